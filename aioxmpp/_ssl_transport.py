@@ -25,6 +25,7 @@ The transport implementation is documented below:
 import asyncio
 import logging
 import socket
+import threading
 
 from enum import Enum
 
@@ -34,6 +35,21 @@ from . import errors
 
 logger = logging.getLogger(__name__)
 
+_read_buffers = threading.local()
+
+
+def _get_read_buffer(size):
+    # event loops are bound to a thread and read callbacks never nest, so all
+    # transports running in one thread can share the same receive buffer
+    try:
+        buf = _read_buffers.buf
+    except AttributeError:
+        buf = None
+    if buf is None or len(buf) < size:
+        buf = bytearray(size)
+        _read_buffers.buf = buf
+    return buf
+
 
 class _State(Enum):
     RAW_OPEN               = 0x0000
@@ -128,6 +144,13 @@ class STARTTLSTransport(asyncio.Transport):
     e.g. using DANE. The coroutine must not return a value. If it encounters an
     error, an appropriate exception should be raised, which will propagate out
     of :meth:`starttls` and/or passed to the `waiter` future.
+
+    Received data is read into a receive buffer which is preallocated and
+    re-used for all reads (and shared with other transports in the same
+    thread). The `protocol` is passed a :class:`memoryview` slice of that
+    buffer instead of a :class:`bytes` object. The slice is only valid during
+    the :meth:`~asyncio.Protocol.data_received` call; protocols which need to
+    keep the data around must copy it.
     """
 
     MAX_SIZE = 256 * 1024
@@ -429,8 +452,9 @@ class STARTTLSTransport(asyncio.Transport):
             # no further reading
             return
 
+        buf = _get_read_buffer(self.MAX_SIZE)
         try:
-            data = self._sock.recv(self.MAX_SIZE)
+            nread = self._sock.recv_into(buf, self.MAX_SIZE)
         except (BlockingIOError, InterruptedError, OpenSSL.SSL.WantReadError):
             pass
         except OpenSSL.SSL.WantWriteError:
@@ -443,8 +467,8 @@ class STARTTLSTransport(asyncio.Transport):
             self._fatal_error(err, "Fatal read error on STARTTLS transport")
             return
         else:
-            if data:
-                self._protocol.data_received(data)
+            if nread:
+                self._protocol.data_received(memoryview(buf)[:nread])
             else:
                 keep_open = False
                 try:
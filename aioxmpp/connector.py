@@ -69,7 +69,8 @@ class BaseConnector(metaclass=abc.ABCMeta):
 
     @abc.abstractmethod
     @asyncio.coroutine
-    def connect(self, loop, metadata, domain, host, port, negotiation_timeout):
+    def connect(self, loop, metadata, domain, host, port, negotiation_timeout,
+                *, limits=None):
         """
         Establish a :class:`.protocol.XMLStream` for `domain` with the given
         `host` at the given TCP `port`.
@@ -81,6 +82,9 @@ class BaseConnector(metaclass=abc.ABCMeta):
         `negotiation_timeout` must be the maximum time in seconds to wait for
         the server to reply in each negotiation step.
 
+        `limits` is passed to the :class:`.protocol.XMLStream`; see
+        :attr:`.protocol.XMLStream.limits`.
+
         Return a triple consisting of the :class:`asyncio.Transport`, the
         :class:`.protocol.XMLStream` and the
         :class:`aioxmpp.nonza.StreamFeatures` of the stream.
@@ -88,6 +92,10 @@ class BaseConnector(metaclass=abc.ABCMeta):
         To detect the use of TLS on the stream, check whether
         :meth:`asyncio.Transport.get_extra_info` returns a non-:data:`None`
         value for ``"ssl_object"``.
+
+        .. versionchanged:: 0.7
+
+           The `limits` argument was added.
         """
 
 
@@ -108,7 +116,7 @@ class STARTTLSConnector(BaseConnector):
 
     @asyncio.coroutine
     def connect(self, loop, metadata, domain, host, port,
-                negotiation_timeout):
+                negotiation_timeout, *, limits=None):
         """
         .. seealso::
 
@@ -137,6 +145,7 @@ class STARTTLSConnector(BaseConnector):
         stream = protocol.XMLStream(
             to=domain,
             features_future=features_future,
+            limits=limits,
         )
 
         transport, _ = yield from ssl_transport.create_starttls_connection(
@@ -236,7 +245,7 @@ class XMPPOverTLSConnector(BaseConnector):
 
     @asyncio.coroutine
     def connect(self, loop, metadata, domain, host, port,
-                negotiation_timeout):
+                negotiation_timeout, *, limits=None):
         """
         .. seealso::
 
@@ -262,6 +271,7 @@ class XMPPOverTLSConnector(BaseConnector):
         stream = protocol.XMLStream(
             to=domain,
             features_future=features_future,
+            limits=limits,
         )
 
         verifier = metadata.certificate_verifier_factory()
@@ -18,6 +18,13 @@ Entity information
 
 .. autoclass:: StaticNode
 
+Crawling
+--------
+
+.. autoclass:: Crawler
+
+.. autoclass:: CrawlResult
+
 .. module:: aioxmpp.disco.xso
 
 .. currentmodule:: aioxmpp.disco.xso
@@ -54,3 +61,4 @@ Item queries
 
 from . import xso  # NOQA
 from .service import Service, Node, StaticNode  # NOQA
+from .crawler import Crawler, CrawlResult  # NOQA
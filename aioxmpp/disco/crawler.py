@@ -0,0 +1,227 @@
+import asyncio
+import collections
+import functools
+
+
+class CrawlResult(collections.namedtuple(
+        "CrawlResult",
+        ["jid", "node", "depth", "info", "items", "exception"])):
+    """
+    Result of visiting a single entity with a :class:`Crawler`.
+
+    .. attribute:: jid
+
+       The JID of the entity.
+
+    .. attribute:: node
+
+       The node of the entity, or :data:`None`.
+
+    .. attribute:: depth
+
+       The number of items queries which lead from the root of the crawl to
+       the entity; the root itself has depth ``0``.
+
+    .. attribute:: info
+
+       The :class:`~.disco.xso.InfoQuery` of the entity, or :data:`None` if it
+       could not be retrieved.
+
+    .. attribute:: items
+
+       The :class:`~.disco.xso.ItemsQuery` of the entity, or :data:`None` if it
+       could not be retrieved.
+
+    .. attribute:: exception
+
+       :data:`None` if both queries succeeded. Otherwise, the exception which
+       made the first query fail.
+    """
+
+
+class Crawler:
+    """
+    Breadth-first traversal of the :xep:`30` items tree.
+
+    :param disco: The service to send the queries with.
+    :type disco: :class:`~.disco.Service`
+    :param jid: The JID of the root entity.
+    :type jid: :class:`~aioxmpp.structs.JID`
+    :param node: The node of the root entity.
+    :type node: :class:`str` or :data:`None`
+    :param max_depth: Do not follow the items of entities at this depth.
+    :type max_depth: :class:`int` or :data:`None`
+    :param max_concurrency: Maximum number of entities queried at the same
+                            time.
+    :type max_concurrency: :class:`int`
+    :param domain_interval: Minimum time in seconds between two queries sent
+                            to the same domain.
+    :type domain_interval: :class:`float` or :data:`None`
+    :param timeout: Timeout for each query.
+    :type timeout: :class:`float` or :data:`None`
+
+    Use :meth:`.disco.Service.crawl` to create a crawler. The crawl starts
+    right away. The info and items of each entity are queried with
+    :meth:`~.disco.Service.query_info` and
+    :meth:`~.disco.Service.query_items`, so the cache of the service is used
+    and filled. Each entity is visited at most once, even if it is listed as
+    item of several entities.
+
+    If a query fails, the exception is reported in the
+    :class:`CrawlResult` and the crawl continues with the other entities. This
+    includes queries which are cancelled, for example because the stream is
+    destroyed; they are reported with a :class:`asyncio.CancelledError`.
+
+    The results are returned in the order in which the entities have been
+    visited by :meth:`get`::
+
+      crawler = disco.crawl(server_jid, max_depth=1)
+      result = yield from crawler.get()
+      while result is not None:
+          print(result.jid, result.node, result.exception)
+          result = yield from crawler.get()
+
+    On Python 3.5 and newer, ``async for`` can be used instead::
+
+      async for result in disco.crawl(server_jid, max_depth=1):
+          print(result.jid, result.node, result.exception)
+
+    .. automethod:: get
+
+    .. automethod:: cancel
+    """
+
+    def __init__(self, disco, jid, node=None, *,
+                 max_depth=None,
+                 max_concurrency=8,
+                 domain_interval=None,
+                 timeout=None):
+        super().__init__()
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be positive")
+
+        self._disco = disco
+        self._max_depth = max_depth
+        self._max_concurrency = max_concurrency
+        self._domain_interval = domain_interval
+        self._timeout = timeout
+
+        self._pending = collections.deque([(jid, node, 0)])
+        self._seen = {(jid, node)}
+        self._tasks = set()
+        self._next_slot = {}
+        self._results = asyncio.Queue()
+        self._finished = False
+        self._cancelled = False
+
+        self._schedule()
+
+    def _schedule(self):
+        while self._pending and len(self._tasks) < self._max_concurrency:
+            jid, node, depth = self._pending.popleft()
+            task = asyncio.async(self._visit(jid, node, depth))
+            self._tasks.add(task)
+            task.add_done_callback(
+                functools.partial(self._visit_done, jid, node, depth)
+            )
+
+        if not self._tasks and not self._pending:
+            self._results.put_nowait(None)
+
+    def _visit_done(self, jid, node, depth, task):
+        self._tasks.discard(task)
+        if self._cancelled:
+            return
+
+        if task.cancelled():
+            # a query has been cancelled from outside
+            result = CrawlResult(jid, node, depth, None, None,
+                                 asyncio.CancelledError())
+        else:
+            result = task.result()
+        self._results.put_nowait(result)
+
+        if (result.items is not None and
+                (self._max_depth is None or result.depth < self._max_depth)):
+            for item in result.items.items:
+                key = item.jid, item.node
+                if key in self._seen:
+                    continue
+                self._seen.add(key)
+                self._pending.append((item.jid, item.node, result.depth+1))
+
+        self._schedule()
+
+    @asyncio.coroutine
+    def _wait_for_slot(self, jid):
+        if self._domain_interval is None:
+            return
+
+        now = asyncio.get_event_loop().time()
+        slot = max(now, self._next_slot.get(jid.domain, now))
+        self._next_slot[jid.domain] = slot + self._domain_interval
+        if slot > now:
+            yield from asyncio.sleep(slot - now)
+
+    @asyncio.coroutine
+    def _visit(self, jid, node, depth):
+        info = None
+        items = None
+        exception = None
+        try:
+            yield from self._wait_for_slot(jid)
+            info = yield from self._disco.query_info(
+                jid,
+                node=node,
+                timeout=self._timeout,
+            )
+            yield from self._wait_for_slot(jid)
+            items = yield from self._disco.query_items(
+                jid,
+                node=node,
+                timeout=self._timeout,
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            exception = exc
+
+        return CrawlResult(jid, node, depth, info, items, exception)
+
+    @asyncio.coroutine
+    def get(self):
+        """
+        Wait for the next :class:`CrawlResult` and return it. Return
+        :data:`None` once all reachable entities have been visited or the
+        crawl has been cancelled.
+        """
+        if self._finished:
+            return None
+        result = yield from self._results.get()
+        if result is None:
+            self._finished = True
+        return result
+
+    def cancel(self):
+        """
+        Stop the crawl. Queries in progress are cancelled; results which have
+        been collected already are still returned by :meth:`get`.
+        """
+        if self._cancelled:
+            return
+        self._cancelled = True
+        self._pending.clear()
+        for task in self._tasks:
+            task.cancel()
+        self._tasks.clear()
+        self._results.put_nowait(None)
+
+    def __aiter__(self):
+        return self
+
+    @asyncio.coroutine
+    def __anext__(self):
+        result = yield from self.get()
+        if result is None:
+            raise StopAsyncIteration
+        return result
@@ -1,4 +1,5 @@
 import asyncio
+import collections
 import functools
 import itertools
 
@@ -11,6 +12,7 @@ import aioxmpp.stanza as stanza
 from aioxmpp.utils import namespaces
 
 from . import xso as disco_xso
+from .crawler import Crawler
 
 
 class Node(object):
@@ -39,6 +41,8 @@ class Node(object):
 
     .. automethod:: iter_identities
 
+    .. automethod:: as_info_xso
+
     To access items, use:
 
     .. automethod:: iter_items
@@ -67,6 +71,11 @@ class Node(object):
         super().__init__()
         self._identities = {}
         self._features = set()
+        self._info_xso = None
+        self.on_info_changed.connect(self._invalidate_info_xso)
+
+    def _invalidate_info_xso(self):
+        self._info_xso = None
 
     def iter_identities(self):
         """
@@ -94,6 +103,33 @@ class Node(object):
             iter(self._features)
         )
 
+    def as_info_xso(self):
+        """
+        Return a :class:`.xso.InfoQuery` with the identities and features of
+        this :class:`Node`.
+
+        The object is built on the first call and then re-used until
+        :meth:`on_info_changed` emits. It is shared and must not be modified.
+
+        Subclasses which override :meth:`iter_identities` or
+        :meth:`iter_features` must emit :meth:`on_info_changed` whenever their
+        result changes.
+
+        .. versionadded:: 0.7
+        """
+        if self._info_xso is None:
+            result = disco_xso.InfoQuery()
+            for category, type_, lang, name in self.iter_identities():
+                result.identities.append(disco_xso.Identity(
+                    category=category,
+                    type_=type_,
+                    lang=lang,
+                    name=name
+                ))
+            result.features.update(self.iter_features())
+            self._info_xso = result
+        return self._info_xso
+
     def iter_items(self):
         """
         Return an iterator which yields the :class:`.xso.Item` objects which
@@ -196,6 +232,64 @@ class StaticNode(Node):
         return iter(self.items)
 
 
+class _QueryCache:
+    """
+    Cache of futures for :xep:`30` queries, keyed by ``(jid, node)``.
+
+    Entries are kept in least-recently-used order. An entry may carry an
+    expiry time (in :meth:`asyncio.AbstractEventLoop.time`), after which it is
+    treated as if it did not exist.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._entries = collections.OrderedDict()
+        self._expires = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        del self._entries[key]
+        self._expires.pop(key, None)
+
+    def get(self, key):
+        fut = self._entries[key]
+        expires = self._expires.get(key)
+        if (expires is not None and
+                expires <= asyncio.get_event_loop().time()):
+            self._remove(key)
+            raise KeyError(key)
+        self._entries.move_to_end(key)
+        return fut
+
+    def put(self, key, fut, max_entries):
+        self._expires.pop(key, None)
+        self._entries[key] = fut
+        self._entries.move_to_end(key)
+        while max_entries is not None and len(self._entries) > max_entries:
+            old_key, _ = self._entries.popitem(last=False)
+            self._expires.pop(old_key, None)
+
+    def expire_after(self, key, fut, ttl):
+        if self._entries.get(key) is not fut:
+            return
+        self._expires[key] = asyncio.get_event_loop().time() + ttl
+
+    def discard(self, key, fut):
+        if self._entries.get(key) is fut:
+            self._remove(key)
+
+    def clear(self, keep_results=False):
+        for key, fut in list(self._entries.items()):
+            if not fut.done():
+                fut.cancel()
+            elif (keep_results and not fut.cancelled() and
+                    fut.exception() is None):
+                continue
+            self._remove(key)
+
+
 class Service(service.Service, Node):
     """
     A service implementing :xep:`30`. The service provides methods for managing
@@ -208,12 +302,50 @@ class Service(service.Service, Node):
 
     .. automethod:: query_items
 
+    .. automethod:: crawl
+
     To prime the cache with information, the following method can be used:
 
     .. automethod:: set_info_cache
 
     .. automethod:: set_info_future
 
+    The cache of query results is configured with the following attributes,
+    which may be set on the class or on instances:
+
+    .. attribute:: cache_ttl
+
+       Time in seconds for which a result is cached. If :data:`None`, results
+       are kept until the stream is destroyed (or evicted due to
+       :attr:`cache_max_entries`). Entries set with :meth:`set_info_future`
+       do not expire.
+
+       .. versionadded:: 0.7
+
+    .. attribute:: negative_cache_ttl
+
+       Time in seconds for which errors returned by the peer
+       (:class:`~.errors.XMPPError`) and timeouts are cached. If :data:`None`,
+       errors are not cached at all.
+
+       .. versionadded:: 0.7
+
+    .. attribute:: cache_max_entries
+
+       Maximum number of cached :meth:`query_info` and :meth:`query_items`
+       results each. Least recently used entries are evicted first. If
+       :data:`None`, the number is not limited.
+
+       .. versionadded:: 0.7
+
+    .. attribute:: keep_cache_across_streams
+
+       If true, successful results are kept when the stream is destroyed, so
+       that they can be re-used after a reconnect. Pending queries are
+       cancelled in any case.
+
+       .. versionadded:: 0.7
+
     Services inherit from :class:`Node` to manage the identities and features
     of the JID itself. The identities and features declared in the service
     using the :class:`Node` interface on the :class:`Service` instance are
@@ -266,11 +398,16 @@ class Service(service.Service, Node):
 
     on_info_result = aioxmpp.callbacks.Signal()
 
+    cache_ttl = None
+    negative_cache_ttl = None
+    cache_max_entries = None
+    keep_cache_across_streams = False
+
     def __init__(self, client, **kwargs):
         super().__init__(client, **kwargs)
 
-        self._info_pending = {}
-        self._items_pending = {}
+        self._info_cache = _QueryCache()
+        self._items_cache = _QueryCache()
 
         self._node_mounts = {
             None: self
@@ -305,15 +442,68 @@ class Service(service.Service, Node):
         yield from super()._shutdown()
 
     def _clear_cache(self):
-        for fut in self._info_pending.values():
-            if not fut.done():
-                fut.cancel()
-        self._info_pending.clear()
+        self._info_cache.clear(keep_results=self.keep_cache_across_streams)
+        self._items_cache.clear(keep_results=self.keep_cache_across_streams)
 
-        for fut in self._items_pending.values():
-            if not fut.done():
-                fut.cancel()
-        self._items_pending.clear()
+    def _handle_request_done(self, cache, key, fut):
+        if fut.cancelled():
+            cache.discard(key, fut)
+            return
+
+        exc = fut.exception()
+        if exc is None:
+            if self.cache_ttl is not None:
+                cache.expire_after(key, fut, self.cache_ttl)
+        elif (self.negative_cache_ttl is not None and
+                isinstance(exc, errors.XMPPError)):
+            cache.expire_after(key, fut, self.negative_cache_ttl)
+        else:
+            cache.discard(key, fut)
+
+    def _cache_timeout(self, cache, key, request):
+        if self.negative_cache_ttl is None:
+            return
+        try:
+            existing = cache.get(key)
+        except KeyError:
+            pass
+        else:
+            if existing is not request:
+                # someone else has started a new request in the meantime
+                return
+
+        fut = asyncio.Future()
+        fut.set_exception(TimeoutError())
+        cache.put(key, fut, self.cache_max_entries)
+        cache.expire_after(key, fut, self.negative_cache_ttl)
+
+    @asyncio.coroutine
+    def _query(self, cache, key, make_request, require_fresh, timeout):
+        if not require_fresh:
+            try:
+                request = cache.get(key)
+            except KeyError:
+                pass
+            else:
+                try:
+                    return (yield from request)
+                except asyncio.CancelledError:
+                    pass
+
+        request = make_request()
+        cache.put(key, request, self.cache_max_entries)
+        request.add_done_callback(
+            functools.partial(self._handle_request_done, cache, key)
+        )
+
+        if timeout is None:
+            return (yield from request)
+
+        try:
+            return (yield from asyncio.wait_for(request, timeout=timeout))
+        except asyncio.TimeoutError:
+            self._cache_timeout(cache, key, request)
+            raise TimeoutError()
 
     def _handle_info_received(self, jid, node, task):
         try:
@@ -333,23 +523,13 @@ class Service(service.Service, Node):
                 condition=(namespaces.stanzas, "item-not-found")
             )
 
-        response = disco_xso.InfoQuery()
-
-        for category, type_, lang, name in node.iter_identities():
-            response.identities.append(disco_xso.Identity(
-                category=category,
-                type_=type_,
-                lang=lang,
-                name=name
-            ))
+        response = node.as_info_xso()
 
         if not response.identities:
             raise errors.XMPPModifyError(
                 condition=(namespaces.stanzas, "item-not-found"),
             )
 
-        response.features.update(node.iter_features())
-
         return response
 
     @asyncio.coroutine
@@ -403,64 +583,40 @@ class Service(service.Service, Node):
 
         Both can be turned off by using `require_fresh`. In general, you should
         not need to use `require_fresh`, as all requests are implicitly
-        cancelled whenever the underlying session gets destroyed.
+        cancelled whenever the underlying session gets destroyed. How long
+        results are cached is controlled by :attr:`cache_ttl`,
+        :attr:`cache_max_entries` and :attr:`keep_cache_across_streams`.
 
         The `timeout` can be used to restrict the time to wait for a
         response. If the timeout triggers, :class:`TimeoutError` is raised.
 
         If :meth:`~.StanzaStream.send_iq_and_wait_for_reply` raises an
         exception, all queries which were running simultanously for the same
-        target re-raise that exception. The result is not cached though. If a
-        new query is sent at a later point for the same target, a new query is
-        actually sent, independent of the value chosen for `require_fresh`.
+        target re-raise that exception. The result is not cached though, unless
+        :attr:`negative_cache_ttl` is set (see there). If a new query is sent
+        at a later point for the same target, a new query is actually sent,
+        independent of the value chosen for `require_fresh`.
         """
-        key = jid, node
-
-        if not require_fresh:
-            try:
-                request = self._info_pending[key]
-            except KeyError:
-                pass
-            else:
-                try:
-                    return (yield from request)
-                except asyncio.CancelledError:
-                    pass
-
-        request = asyncio.async(
-            self.send_and_decode_info_query(jid, node)
-        )
-        request.add_done_callback(
-            functools.partial(
-                self._handle_info_received,
-                jid,
-                node
+        def make_request():
+            request = asyncio.async(
+                self.send_and_decode_info_query(jid, node)
             )
-        )
-
-        self._info_pending[key] = request
-        try:
-            if timeout is not None:
-                try:
-                    result = yield from asyncio.wait_for(
-                        request,
-                        timeout=timeout)
-                except asyncio.TimeoutError:
-                    raise TimeoutError()
-            else:
-                result = yield from request
-        except:
-            if request.done():
-                try:
-                    pending = self._info_pending[key]
-                except KeyError:
-                    pass
-                else:
-                    if pending is request:
-                        del self._info_pending[key]
-            raise
+            request.add_done_callback(
+                functools.partial(
+                    self._handle_info_received,
+                    jid,
+                    node
+                )
+            )
+            return request
 
-        return result
+        return (yield from self._query(
+            self._info_cache,
+            (jid, node),
+            make_request,
+            require_fresh,
+            timeout,
+        ))
 
     @asyncio.coroutine
     def query_items(self, jid, *,
@@ -472,49 +628,40 @@ class Service(service.Service, Node):
         The arguments have the same semantics as with :meth:`query_info`, as
         does the caching and error handling.
         """
-        key = jid, node
-
-        if not require_fresh:
-            try:
-                request = self._items_pending[key]
-            except KeyError:
-                pass
-            else:
-                try:
-                    return (yield from request)
-                except asyncio.CancelledError:
-                    pass
+        def make_request():
+            request_iq = stanza.IQ(to=jid, type_="get")
+            request_iq.payload = disco_xso.ItemsQuery(node=node)
+            return asyncio.async(
+                self.client.stream.send_iq_and_wait_for_reply(request_iq)
+            )
 
-        request_iq = stanza.IQ(to=jid, type_="get")
-        request_iq.payload = disco_xso.ItemsQuery(node=node)
+        return (yield from self._query(
+            self._items_cache,
+            (jid, node),
+            make_request,
+            require_fresh,
+            timeout,
+        ))
 
-        request = asyncio.async(
-            self.client.stream.send_iq_and_wait_for_reply(request_iq)
-        )
+    def crawl(self, jid, *, node=None, max_depth=None, max_concurrency=8,
+              domain_interval=None, timeout=None):
+        """
+        Start a breadth-first crawl of the items tree, beginning at the entity
+        identified by `jid` and `node`, and return the
+        :class:`~.disco.Crawler`.
 
-        self._items_pending[key] = request
-        try:
-            if timeout is not None:
-                try:
-                    result = yield from asyncio.wait_for(
-                        request,
-                        timeout=timeout)
-                except asyncio.TimeoutError:
-                    raise TimeoutError()
-            else:
-                result = yield from request
-        except:
-            if request.done():
-                try:
-                    pending = self._items_pending[key]
-                except KeyError:
-                    pass
-                else:
-                    if pending is request:
-                        del self._items_pending[key]
-            raise
+        `max_depth`, `max_concurrency`, `domain_interval` and `timeout` are
+        passed to the :class:`~.disco.Crawler`; see there for details.
 
-        return result
+        .. versionadded:: 0.7
+        """
+        return Crawler(
+            self, jid, node,
+            max_depth=max_depth,
+            max_concurrency=max_concurrency,
+            domain_interval=domain_interval,
+            timeout=timeout,
+        )
 
     def set_info_cache(self, jid, node, info):
         """
@@ -552,9 +699,12 @@ class Service(service.Service, Node):
            all queries for that target fail with that exception, until a query
            uses `require_fresh`.
 
+        The entry does not expire due to :attr:`cache_ttl`, but it may be
+        evicted due to :attr:`cache_max_entries`.
+
         .. versionadded:: 0.5
         """
-        self._info_pending[jid, node] = fut
+        self._info_cache.put((jid, node), fut, self.cache_max_entries)
 
     def mount_node(self, mountpoint, node):
         """
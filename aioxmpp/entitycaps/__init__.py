@@ -31,8 +31,26 @@ not loaded, the :class:`Caps` instance is available at
 
 .. autoclass:: Caps
 
+.. currentmodule:: aioxmpp.entitycaps.database
+
+:mod:`.entitycaps.database` --- Single-file database
+====================================================
+
+Instead of a directory with one file per hash, a :class:`Database` keeps all
+entries in a single indexed file. It can be used with
+:meth:`~.entitycaps.Cache.set_system_db` and
+:meth:`~.entitycaps.Cache.set_user_db`. Existing directory-based databases
+can be converted with :meth:`Database.import_directory` (or the
+``utils/import_caps_db.py`` script).
+
+.. versionadded:: 0.7
+
+.. autoclass:: Database
+
+.. autofunction:: serialise_events
+
 
 """
 
 from .service import Service, Cache  # NOQA
-from . import xso  # NOQA
+from . import xso, database  # NOQA
@@ -0,0 +1,324 @@
+import asyncio
+import functools
+import io
+import logging
+import sqlite3
+import threading
+import urllib.parse
+
+import aioxmpp.disco as disco
+import aioxmpp.xml
+import aioxmpp.xso
+
+
+logger = logging.getLogger(__name__)
+
+
+def serialise_events(captured_events):
+    """
+    Serialise the `captured_events` of a :class:`~.disco.xso.InfoQuery` to
+    :class:`bytes` in the format used by the databases.
+    """
+    buf = io.BytesIO()
+    generator = aioxmpp.xml.XMPPXMLGenerator(
+        buf,
+        short_empty_elements=True)
+    generator.startDocument()
+    aioxmpp.xso.events_to_sax(captured_events, generator)
+    generator.endDocument()
+    return buf.getvalue()
+
+
+class Database:
+    """
+    A single-file database of entity capabilities, backed by :mod:`sqlite3`.
+
+    :param path: Path of the database file; it is created if it does not
+                 exist (unless `read_only` is true).
+    :type path: :class:`pathlib.Path` or :class:`str`
+    :param read_only: Open the database for reading only.
+    :type read_only: :class:`bool`
+    :param preload: Load the index of all stored entries into memory when
+                    opening the database.
+    :type preload: :class:`bool`
+    :param flush_delay: Time in seconds to collect new entries before they are
+                        written to the file.
+    :type flush_delay: :class:`float`
+
+    Entries are keyed by the hash function name and the node (including the
+    ``#ver`` part), as used by :class:`~.entitycaps.Cache`. They are stored as
+    serialised XML, as in the directory-based databases.
+
+    With `preload`, looking up entries which are not in the database does not
+    access the file at all, which makes misses cheap.
+
+    Entries added with :meth:`add` become visible in :meth:`lookup`
+    immediately, but are only written to the file in batches: either after
+    `flush_delay` seconds, when :meth:`flush` is called or when the database is
+    closed. The batches written after `flush_delay` are written in the default
+    executor of the event loop, so that the event loop is not blocked by the
+    file system.
+
+    .. automethod:: lookup
+
+    .. automethod:: fetch
+
+    .. automethod:: add
+
+    .. automethod:: flush
+
+    .. automethod:: import_directory
+
+    .. automethod:: close
+    """
+
+    def __init__(self, path, *,
+                 read_only=False,
+                 preload=True,
+                 flush_delay=1.0):
+        super().__init__()
+        if read_only:
+            self._conn = sqlite3.connect(
+                "file:{}?mode=ro".format(
+                    urllib.parse.quote(str(path))
+                ),
+                uri=True,
+            )
+        else:
+            self._conn = sqlite3.connect(str(path))
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS caps ("
+                " hash TEXT NOT NULL,"
+                " node TEXT NOT NULL,"
+                " data BLOB NOT NULL,"
+                " PRIMARY KEY (hash, node)"
+                ") WITHOUT ROWID"
+            )
+            self._conn.commit()
+            # with a write-ahead log, lookups are not blocked while a batch
+            # is committed from the executor
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # writes happen in executor threads, serialised by _write_lock
+            self._write_conn = sqlite3.connect(
+                str(path),
+                check_same_thread=False,
+            )
+        self._read_only = read_only
+        self._flush_delay = flush_delay
+        self._flush_handle = None
+        self._pending = {}
+        self._writing = {}
+        self._write_future = None
+        self._write_lock = threading.Lock()
+        self._closed = False
+
+        if preload:
+            self._index = set(self._conn.execute(
+                "SELECT hash, node FROM caps"
+            ))
+        else:
+            self._index = None
+
+    def __contains__(self, key):
+        if key in self._pending or key in self._writing:
+            return True
+        if self._index is not None:
+            return key in self._index
+        return self._fetch(*key) is not None
+
+    def _fetch(self, hash_, node):
+        row = self._conn.execute(
+            "SELECT data FROM caps WHERE hash = ? AND node = ?",
+            (hash_, node)
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0]
+
+    def fetch(self, hash_, node):
+        """
+        Return the serialised :class:`~.disco.xso.InfoQuery` stored for the
+        `hash_` function and the `node` as :class:`bytes`.
+
+        :raises KeyError: if no entry exists
+        """
+        key = hash_, node
+        try:
+            return self._pending[key]
+        except KeyError:
+            pass
+        try:
+            return self._writing[key]
+        except KeyError:
+            pass
+        if self._index is not None and key not in self._index:
+            raise KeyError(node)
+        data = self._fetch(hash_, node)
+        if data is None:
+            raise KeyError(node)
+        return data
+
+    def lookup(self, hash_, node):
+        """
+        Return the :class:`~.disco.xso.InfoQuery` stored for the `hash_`
+        function and the `node`.
+
+        :raises KeyError: if no entry exists
+        """
+        return aioxmpp.xml.read_single_xso(
+            io.BytesIO(self.fetch(hash_, node)),
+            disco.xso.InfoQuery,
+        )
+
+    def add(self, hash_, node, data):
+        """
+        Store the serialised :class:`~.disco.xso.InfoQuery` `data` (see
+        :func:`serialise_events`) for the `hash_` function and the `node`.
+
+        The entry is written with the next batch.
+        """
+        if self._read_only:
+            raise RuntimeError("database is read-only")
+
+        self._pending[hash_, node] = data
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_event_loop().call_later(
+                self._flush_delay,
+                self._flush_in_executor,
+            )
+
+    def _insert(self, rows):
+        # the caller must hold _write_lock
+        with self._write_conn:
+            self._write_conn.executemany(
+                "INSERT OR REPLACE INTO caps (hash, node, data)"
+                " VALUES (?, ?, ?)",
+                rows
+            )
+
+    def _write(self, entries):
+        with self._write_lock:
+            if self._closed:
+                # close() has written the entries already
+                return
+            self._insert([
+                (hash_, node, data)
+                for (hash_, node), data in entries.items()
+            ])
+
+    def _flush_in_executor(self):
+        self._flush_handle = None
+        if not self._pending or self._write_future is not None:
+            # a running write picks up the pending entries when it is done
+            return
+
+        pending, self._pending = self._pending, {}
+        self._writing.update(pending)
+        logger.debug("writing %d entries to caps database in executor",
+                     len(pending))
+        self._write_future = asyncio.get_event_loop().run_in_executor(
+            None,
+            self._write,
+            pending,
+        )
+        self._write_future.add_done_callback(
+            functools.partial(self._write_done, pending)
+        )
+
+    def _write_done(self, entries, fut):
+        self._write_future = None
+        for key, data in entries.items():
+            if self._writing.get(key) is data:
+                del self._writing[key]
+
+        if fut.exception() is not None:
+            logger.error("failed to write to caps database",
+                         exc_info=fut.exception())
+            for key, data in entries.items():
+                self._pending.setdefault(key, data)
+            return
+
+        if self._index is not None:
+            self._index.update(entries.keys())
+
+        if self._pending and self._flush_handle is None:
+            self._flush_in_executor()
+
+    def flush(self):
+        """
+        Write all entries added since the last flush to the file, in a single
+        transaction.
+
+        Unlike the batches written after `flush_delay`, this blocks until the
+        entries are written.
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        if not self._pending:
+            return
+
+        pending, self._pending = self._pending, {}
+        logger.debug("writing %d entries to caps database", len(pending))
+        self._write(pending)
+        if self._index is not None:
+            self._index.update(pending.keys())
+
+    def import_directory(self, path):
+        """
+        Import all entries from a directory-based database at `path` (see
+        :meth:`.Cache.set_user_db_path`).
+
+        :param path: The directory to import.
+        :type path: :class:`pathlib.Path`
+        :return: The number of imported entries.
+
+        Files whose name does not follow the format of the directory-based
+        databases are skipped. Existing entries are replaced.
+        """
+        if self._read_only:
+            raise RuntimeError("database is read-only")
+
+        self.flush()
+
+        rows = []
+        for entry_path in path.iterdir():
+            if entry_path.suffix != ".xml":
+                continue
+            hash_, sep, quoted = entry_path.stem.partition("_")
+            if not sep:
+                logger.debug("skipping %s", entry_path)
+                continue
+            rows.append((
+                hash_,
+                urllib.parse.unquote(quoted),
+                entry_path.read_bytes(),
+            ))
+
+        with self._write_lock:
+            self._insert(rows)
+        if self._index is not None:
+            self._index.update((hash_, node) for hash_, node, _ in rows)
+
+        return len(rows)
+
+    def close(self):
+        """
+        Write pending entries and close the database.
+
+        This blocks until all entries are written, including batches which
+        are still being written in the executor.
+        """
+        if not self._read_only:
+            self.flush()
+            with self._write_lock:
+                if self._writing:
+                    # the executor may not have picked these up yet
+                    self._insert([
+                        (hash_, node, data)
+                        for (hash_, node), data in self._writing.items()
+                    ])
+                self._closed = True
+                self._write_conn.close()
+        self._conn.close()
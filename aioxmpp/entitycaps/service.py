@@ -1,8 +1,10 @@
 import asyncio
 import base64
+import collections
 import copy
 import functools
 import hashlib
+import io
 import logging
 import os
 import tempfile
@@ -17,6 +19,7 @@ import aioxmpp.xml
 import aioxmpp.xso
 
 from . import xso as my_xso
+from .database import serialise_events
 
 
 logger = logging.getLogger("aioxmpp.entitycaps")
@@ -56,14 +59,12 @@ def build_forms_string(forms):
     types = set()
     forms_list = []
     for form in forms:
-        try:
-            form_types = set(
-                value
-                for field in form.fields.filter(attrs={"var": "FORM_TYPE"})
-                for value in field.values
-            )
-        except KeyError:
-            continue
+        form_types = set(
+            value
+            for field in form.fields
+            if field.var == "FORM_TYPE"
+            for value in field.values
+        )
 
         if len(form_types) > 1:
             raise ValueError("form with multiple types")
@@ -137,6 +138,10 @@ class Cache:
 
     .. automethod:: set_user_db_path
 
+    .. automethod:: set_system_db
+
+    .. automethod:: set_user_db
+
     Queries (API intended for :class:`Service`):
 
     .. automethod:: create_query_future
@@ -144,13 +149,52 @@ class Cache:
     .. automethod:: lookup_in_database
 
     .. automethod:: lookup
+
+    Entries added with :meth:`add_cache_entry` are kept in memory in addition
+    to being written to the user-level database. Entries found in the
+    databases set with :meth:`set_system_db` and :meth:`set_user_db` are kept
+    in memory, too, so that they are not parsed again on the next lookup. The
+    in-memory entries are evicted in least-recently-used order according to
+    these limits:
+
+    .. attribute:: overlay_max_entries
+
+       Maximum number of entries kept in memory, or :data:`None` for no limit.
+
+       .. versionadded:: 0.7
+
+    .. attribute:: overlay_max_bytes
+
+       Maximum total size of the entries kept in memory, measured as the size
+       of their serialised XML, or :data:`None` for no limit. The most recently
+       added entry is always kept.
+
+       .. versionadded:: 0.7
+
+    .. attribute:: overlay_stats
+
+       A :class:`collections.Counter` with the number of ``"hits"``,
+       ``"misses"`` and ``"evictions"`` of the in-memory entries.
+
+       .. versionadded:: 0.7
+
+    The in-memory entries do not keep the
+    :attr:`~.disco.xso.InfoQuery.captured_events` of the original entry; it is
+    :data:`None` on entries returned from memory.
     """
 
+    overlay_max_entries = 1024
+    overlay_max_bytes = None
+
     def __init__(self):
         self._lookup_cache = {}
-        self._memory_overlay = {}
+        self._memory_overlay = collections.OrderedDict()
+        self._overlay_bytes = 0
+        self.overlay_stats = collections.Counter()
         self._system_db_path = None
         self._user_db_path = None
+        self._system_db = None
+        self._user_db = None
 
     def _erase_future(self, for_hash, for_node, fut):
         try:
@@ -161,21 +205,90 @@ class Cache:
             if existing is fut:
                 del self._lookup_cache[for_hash, for_node]
 
+    def _add_to_overlay(self, key, entry, size):
+        try:
+            _, old_size = self._memory_overlay.pop(key)
+        except KeyError:
+            pass
+        else:
+            self._overlay_bytes -= old_size
+
+        self._memory_overlay[key] = entry, size
+        self._overlay_bytes += size
+
+        while len(self._memory_overlay) > 1 and (
+                (self.overlay_max_entries is not None and
+                 len(self._memory_overlay) > self.overlay_max_entries) or
+                (self.overlay_max_bytes is not None and
+                 self._overlay_bytes > self.overlay_max_bytes)):
+            _, (_, old_size) = self._memory_overlay.popitem(last=False)
+            self._overlay_bytes -= old_size
+            self.overlay_stats["evictions"] += 1
+
+    def _lookup_in_single_file_db(self, database, hash_, node):
+        data = database.fetch(hash_, node)
+        result = aioxmpp.xml.read_single_xso(
+            io.BytesIO(data),
+            disco.xso.InfoQuery,
+        )
+        copied_result = copy.copy(result)
+        copied_result.captured_events = None
+        self._add_to_overlay((hash_, node), copied_result, len(data))
+        return result
+
     def set_system_db_path(self, path):
         self._system_db_path = path
 
     def set_user_db_path(self, path):
         self._user_db_path = path
 
+    def set_system_db(self, database):
+        """
+        Use the single-file :class:`~.entitycaps.database.Database` `database`
+        as trusted database.
+
+        It is consulted before the directory set with
+        :meth:`set_system_db_path`. Pass :data:`None` to stop using it.
+
+        .. versionadded:: 0.7
+        """
+        self._system_db = database
+
+    def set_user_db(self, database):
+        """
+        Use the single-file :class:`~.entitycaps.database.Database` `database`
+        as user-level database.
+
+        It is consulted before the directory set with :meth:`set_user_db_path`
+        and new entries are added to it in batches. Pass :data:`None` to stop
+        using it.
+
+        .. versionadded:: 0.7
+        """
+        self._user_db = database
+
     def lookup_in_database(self, hash_, node):
         try:
-            result = self._memory_overlay[hash_, node]
+            result, _ = self._memory_overlay[hash_, node]
         except KeyError:
-            pass
+            self.overlay_stats["misses"] += 1
         else:
             logger.debug("memory cache hit: %s %r", hash_, node)
+            self._memory_overlay.move_to_end((hash_, node))
+            self.overlay_stats["hits"] += 1
             return result
 
+        if self._system_db is not None:
+            try:
+                result = self._lookup_in_single_file_db(
+                    self._system_db, hash_, node
+                )
+            except KeyError:
+                pass
+            else:
+                logger.debug("system db hit: %s %r", hash_, node)
+                return result
+
         quoted = urllib.parse.quote(node, safe="")
         if self._system_db_path is not None:
             try:
@@ -189,6 +302,17 @@ class Cache:
                 with f:
                     return aioxmpp.xml.read_single_xso(f, disco.xso.InfoQuery)
 
+        if self._user_db is not None:
+            try:
+                result = self._lookup_in_single_file_db(
+                    self._user_db, hash_, node
+                )
+            except KeyError:
+                pass
+            else:
+                logger.debug("user db hit: %s %r", hash_, node)
+                return result
+
         if self._user_db_path is not None:
             try:
                 f = (
@@ -228,6 +352,9 @@ class Cache:
             try:
                 result = yield from fut
             except ValueError:
+                # the done callbacks of the future, which unregister it, may
+                # not have run yet
+                self._erase_future(hash_, node, fut)
                 continue
             else:
                 return result
@@ -259,7 +386,14 @@ class Cache:
         """
         copied_entry = copy.copy(entry)
         copied_entry.node = node
-        self._memory_overlay[hash_, node] = copied_entry
+        copied_entry.captured_events = None
+        if entry.captured_events is not None:
+            data = serialise_events(entry.captured_events)
+        else:
+            data = aioxmpp.xml.serialize_single_xso(entry).encode("utf-8")
+        self._add_to_overlay((hash_, node), copied_entry, len(data))
+        if self._user_db is not None:
+            self._user_db.add(hash_, node, data)
         if self._user_db_path is not None:
             asyncio.async(asyncio.get_event_loop().run_in_executor(
                 None,
@@ -301,8 +435,48 @@ class Service(aioxmpp.service.Service):
        happens when the set of features or identities announced in the
        :class:`.disco.Service` changes.
 
+       Changes are coalesced: however many features and identities are
+       registered or unregistered within one iteration of the event loop (or
+       within :attr:`update_delay`), the hash is computed once and the signal
+       emits at most once.
+
     .. autoattribute:: cache
 
+    .. attribute:: lookup_delay
+
+       If :data:`None` (the default), the lookup of the capabilities announced
+       in a presence is started as soon as the presence is received.
+
+       Otherwise, lookups are deferred until no presence with capabilities has
+       been received for `lookup_delay` seconds, for example until the
+       presence flood after connecting has settled, but at most for
+       :attr:`lookup_max_delay` seconds. Deferred lookups for the same hash
+       are combined into a single lookup. Its result is shared with the other
+       peers announcing that hash only if it matches the hash; otherwise, the
+       next peer is queried. :meth:`.disco.Service.query_info` calls for such
+       peers wait for the deferred lookup.
+
+       .. versionadded:: 0.7
+
+    .. attribute:: lookup_max_delay
+
+       Maximum time in seconds for which a lookup is deferred because of
+       :attr:`lookup_delay`, counted from the first deferred lookup.
+
+       .. versionadded:: 0.7
+
+    .. attribute:: update_delay
+
+       If :data:`None` (the default), the ``ver`` is recomputed in the next
+       iteration of the event loop after the disco information changed.
+
+       Otherwise, the recomputation is deferred until the disco information
+       has not changed for `update_delay` seconds, which also coalesces
+       changes spread over several iterations, for example while services
+       are summoned at startup.
+
+       .. versionadded:: 0.7
+
     """
 
     ORDER_AFTER = {disco.Service}
@@ -311,11 +485,20 @@ class Service(aioxmpp.service.Service):
 
     on_ver_changed = aioxmpp.callbacks.Signal()
 
+    lookup_delay = None
+    lookup_max_delay = 10
+    update_delay = None
+
     def __init__(self, node):
         super().__init__(node)
 
         self.ver = None
+        self._hashed_info = None
         self._cache = Cache()
+        self._deferred_lookups = collections.OrderedDict()
+        self._deferred_handle = None
+        self._deferred_deadline = None
+        self._update_handle = None
 
         self.disco = node.summon(disco.Service)
         self._info_changed_token = self.disco.on_info_changed.connect(
@@ -357,12 +540,38 @@ class Service(aioxmpp.service.Service):
         self._cache = Cache()
 
     def _info_changed(self):
-        asyncio.get_event_loop().call_soon(
-            self.update_hash
+        if self.update_delay is None:
+            if self._update_handle is None:
+                self._update_handle = asyncio.get_event_loop().call_soon(
+                    self._update_hash_scheduled
+                )
+            return
+
+        if self._update_handle is not None:
+            self._update_handle.cancel()
+        self._update_handle = asyncio.get_event_loop().call_later(
+            self.update_delay,
+            self._update_hash_scheduled
         )
 
+    def _update_hash_scheduled(self):
+        self._update_handle = None
+        self.update_hash()
+
     @asyncio.coroutine
     def _shutdown(self):
+        if self._update_handle is not None:
+            self._update_handle.cancel()
+            self._update_handle = None
+        if self._deferred_handle is not None:
+            self._deferred_handle.cancel()
+            self._deferred_handle = None
+        self._deferred_deadline = None
+        for entries in self._deferred_lookups.values():
+            for _, fut in entries:
+                fut.cancel()
+        self._deferred_lookups.clear()
+
         self.client.stream.service_outbound_presence_filter.unregister(
             self._outbound_filter_token
         )
@@ -400,6 +609,27 @@ class Service(aioxmpp.service.Service):
 
         return data
 
+    @asyncio.coroutine
+    def _lookup_info_verified(self, jid, node, ver, hash_):
+        # like lookup_info, but also return whether the info is known to
+        # match the hash; query_and_cache returns the info even if it does not
+        try:
+            info = yield from self.cache.lookup(hash_, node+"#"+ver)
+        except KeyError:
+            pass
+        else:
+            self.logger.debug("found ver=%r in cache", ver)
+            return info, True
+
+        self.logger.debug("have to query for ver=%r", ver)
+        fut = self.cache.create_query_future(hash_, node+"#"+ver)
+        info = yield from self.query_and_cache(
+            jid, node, ver, hash_,
+            fut
+        )
+
+        return info, fut.done() and fut.exception() is None
+
     @asyncio.coroutine
     def lookup_info(self, jid, node, ver, hash_):
         try:
@@ -437,35 +667,89 @@ class Service(aioxmpp.service.Service):
                 "inbound presence with ver=%r and hash=%r from %s",
                 caps.ver, caps.hash_,
                 presence.from_)
-            task = asyncio.async(
-                self.lookup_info(presence.from_,
-                                 caps.node,
-                                 caps.ver,
-                                 caps.hash_)
-            )
+            if self.lookup_delay is None:
+                task = asyncio.async(
+                    self.lookup_info(presence.from_,
+                                     caps.node,
+                                     caps.ver,
+                                     caps.hash_)
+                )
+            else:
+                task = self._defer_lookup(presence.from_,
+                                          caps.node,
+                                          caps.ver,
+                                          caps.hash_)
             self.disco.set_info_future(presence.from_, None, task)
 
         return presence
 
-    def update_hash(self):
-        identities = []
-        for category, type_, lang, name in self.disco.iter_identities():
-            identity = disco.xso.Identity(category=category,
-                                          type_=type_)
-            if lang is not None:
-                identity.lang = lang
-            if name is not None:
-                identity.name = name
-            identities.append(identity)
-
-        new_ver = hash_query(
-            disco.xso.InfoQuery(
-                identities=identities,
-                features=self.disco.iter_features(),
-            ),
-            "sha1",
+    def _defer_lookup(self, jid, node, ver, hash_):
+        fut = asyncio.Future()
+        self._deferred_lookups.setdefault(
+            (node, ver, hash_),
+            []
+        ).append((jid, fut))
+
+        loop = self.client.loop
+        now = loop.time()
+        if self._deferred_deadline is None:
+            self._deferred_deadline = now + self.lookup_max_delay
+
+        if self._deferred_handle is not None:
+            self._deferred_handle.cancel()
+        self._deferred_handle = loop.call_at(
+            min(now + self.lookup_delay, self._deferred_deadline),
+            self._start_deferred_lookups
         )
 
+        return fut
+
+    def _start_deferred_lookups(self):
+        self._deferred_handle = None
+        self._deferred_deadline = None
+        deferred = self._deferred_lookups
+        self._deferred_lookups = collections.OrderedDict()
+
+        self.logger.debug("starting %d deferred lookups", len(deferred))
+        for (node, ver, hash_), entries in deferred.items():
+            asyncio.async(
+                self._run_deferred_lookup(node, ver, hash_, entries)
+            )
+
+    @asyncio.coroutine
+    def _run_deferred_lookup(self, node, ver, hash_, entries):
+        for i, (jid, fut) in enumerate(entries):
+            if fut.done():
+                continue
+
+            try:
+                info, verified = yield from self._lookup_info_verified(
+                    jid, node, ver, hash_
+                )
+            except Exception as exc:
+                if not fut.done():
+                    fut.set_exception(exc)
+                continue
+
+            if not fut.done():
+                fut.set_result(info)
+
+            if verified:
+                # only info which matches the hash may be used for other
+                # peers; anything else is specific to the peer which sent it
+                for _, other_fut in entries[i+1:]:
+                    if not other_fut.done():
+                        other_fut.set_result(info)
+                return
+
+    def update_hash(self):
+        info = self.disco.as_info_xso()
+        if info is self._hashed_info:
+            return
+
+        new_ver = hash_query(info, "sha1")
+        self._hashed_info = info
+
         if self.ver != new_ver:
             if self.ver is not None:
                 self.disco.unmount_node(self.NODE + "#" + self.ver)
@@ -3,3 +3,9 @@ from . import xso
 from .xso import (  # NOQA
     Data
 )
+
+from .form import (  # NOQA
+    Form,
+    InputJID,
+    InputLine,
+)
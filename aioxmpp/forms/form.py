@@ -1,13 +1,17 @@
 import abc
+import collections
 
 import aioxmpp.xso as xso
 
+from . import xso as forms_xso
+
 
 class InputLine:
-    def __init__(self, var, type_=xso.String()):
+    def __init__(self, var, type_=xso.String(), *, default=None):
         super().__init__()
         self._var = var
         self._type = type_
+        self._default = default
 
     @property
     def var(self):
@@ -17,31 +21,75 @@ class InputLine:
     def type_(self):
         return self._type
 
+    @property
+    def default(self):
+        return self._default
+
     def __get__(self, instance, type_):
         if instance is None:
             return self
-        return self._type.parse(instance._field_data[self.var])
+        try:
+            return instance._parsed_data[self._var]
+        except KeyError:
+            pass
+        try:
+            raw = instance._field_data[self._var][0]
+        except KeyError:
+            return self._default
+        value = self._type.parse(raw)
+        instance._parsed_data[self._var] = value
+        return value
 
     def __set__(self, instance, value):
-        value = self._type.format(self._type.coerce(value))
-        if "\r" in value or "\n" in value:
+        value = self._type.coerce(value)
+        formatted = self._type.format(value)
+        if "\r" in formatted or "\n" in formatted:
             raise ValueError("newlines not allowed in input line")
-        instance._field_data[self.var] = value
+        instance._field_data[self._var] = [formatted]
+        instance._parsed_data[self._var] = value
+
+    def __delete__(self, instance):
+        instance._field_data.pop(self._var, None)
+        instance._parsed_data.pop(self._var, None)
 
 
 class InputJID(InputLine):
-    def __init__(self, var):
-        super().__init__(var, type_=xso.JID())
+    def __init__(self, var, **kwargs):
+        super().__init__(var, type_=xso.JID(), **kwargs)
 
 
 class FormClass(abc.ABCMeta):
+    """
+    Meta class for :class:`Form` templates.
+
+    When the class is created, the field descriptors declared on it and on its
+    bases are collected in :attr:`FIELD_DESCRIPTORS`, a mapping from the field
+    var to the descriptor, so that binding a form does not need to inspect
+    the class.
+
+    Declaring two descriptors for the same var raises :class:`TypeError`.
+    """
+
     def __new__(mcls, name, bases, namespace):
-        namespace["FIELD_DESCRIPTORS"] = False
-        namespace["FIELDS"] = False
+        descriptors = {}
+        for base in reversed(bases):
+            descriptors.update(getattr(base, "FIELD_DESCRIPTORS", {}))
+
+        for attr_name, value in namespace.items():
+            if not isinstance(value, InputLine):
+                continue
+            existing = descriptors.get(value.var)
+            if existing is not None and existing is not value:
+                raise TypeError(
+                    "duplicate descriptor for var {!r}".format(value.var)
+                )
+            descriptors[value.var] = value
+
+        namespace["FIELD_DESCRIPTORS"] = descriptors
         return super().__new__(mcls, name, bases, namespace)
 
 
-class Form:
+class Form(metaclass=FormClass):
     """
     A form template for :xep:`0004` data forms.
 
@@ -80,8 +128,131 @@ class Form:
     For details on the field semantics and restrictions with respect to field
     declaration and inheritance, check out the documentation of the meta class
     :class:`FormClass` used by :class:`Form`.
+
+    When binding a :class:`.xso.Data` with :meth:`from_xso`, the fields are
+    indexed by their var in a single pass. Afterwards, :meth:`get_field` and
+    :attr:`form_type` do not need to search the fields. Values are parsed on
+    first access through a descriptor and cached until they are set again.
+
+    .. attribute:: FORM_TYPE
+
+       If not :data:`None`, :meth:`from_xso` rejects forms with a different
+       ``FORM_TYPE`` and :meth:`render_reply` emits it.
+
+    .. autoattribute:: form_type
+
+    .. automethod:: from_xso
+
+    .. automethod:: get_field
+
+    .. automethod:: render_reply
     """
 
+    FORM_TYPE = None
+
+    def __init__(self):
+        super().__init__()
+        self._xso = None
+        self._fields = collections.OrderedDict()
+        self._field_data = collections.OrderedDict()
+        self._parsed_data = {}
+
+    @classmethod
+    def from_xso(cls, xso):
+        """
+        Create a form from the :class:`.xso.Data` `xso`.
+
+        Fields of the ``-multi`` types keep all their values; for the other
+        fields, the first value is used as value of the field. Later
+        modifications of `xso` are not reflected in the form.
+
+        :raises ValueError: if :attr:`FORM_TYPE` is set and the form has a
+                            different ``FORM_TYPE``.
+        """
+        result = cls()
+        result._xso = xso
+        fields = result._fields
+        field_data = result._field_data
+        for field in xso.fields:
+            var = field.var
+            if var is None or var in fields:
+                continue
+            fields[var] = field
+            if not field.values:
+                continue
+            if field.type_.endswith("-multi"):
+                field_data[var] = list(field.values)
+            else:
+                field_data[var] = [field.values[0]]
+
+        form_type = field_data.get("FORM_TYPE", [None])[0]
+        if cls.FORM_TYPE is not None and form_type != cls.FORM_TYPE:
+            raise ValueError(
+                "unexpected FORM_TYPE {!r}".format(form_type)
+            )
+
+        return result
+
+    @property
+    def form_type(self):
+        """
+        The ``FORM_TYPE`` of the bound form, or :attr:`FORM_TYPE` if the form
+        has not been created with :meth:`from_xso` or has no ``FORM_TYPE``.
+        """
+        try:
+            return self._field_data["FORM_TYPE"][0]
+        except KeyError:
+            return self.FORM_TYPE
+
+    def get_field(self, var):
+        """
+        Return the :class:`.xso.Field` with the given `var` from the bound
+        form.
+
+        :raises KeyError: if the form has no such field
+        """
+        return self._fields[var]
+
+    def render_reply(self):
+        """
+        Return a :class:`.xso.Data` of type ``"submit"`` with the current
+        values of the fields.
+
+        The fields of the bound form are emitted in their original order,
+        followed by the fields which have only been set on the template. The
+        fields of the bound form keep their type, label and all of their
+        values. Their options, description and the required flag are omitted,
+        as they only apply to the form which is being filled out.
+        """
+        result = forms_xso.Data()
+        result.type_ = "submit"
+        fields = result.fields
+
+        form_type = self.form_type
+        if form_type is not None:
+            fields.append(forms_xso.Field(
+                type_="hidden",
+                var="FORM_TYPE",
+                values=[form_type],
+            ))
+
+        for var, field in self._fields.items():
+            if var == "FORM_TYPE" or var not in self._field_data:
+                continue
+            fields.append(forms_xso.Field(
+                type_=field.type_,
+                label=field.label,
+                var=var,
+                values=list(self._field_data[var]),
+            ))
+
+        for var, values in self._field_data.items():
+            if var == "FORM_TYPE" or var in self._fields:
+                continue
+            fields.append(forms_xso.Field(var=var, values=list(values)))
+
+        return result
+
 
 # class MUCConfigureForm(forms.Form):
 #     FORM_TYPE = "http://jabber.org/protocol/muc#roomconfig"
@@ -185,6 +185,68 @@ class Data(AbstractItem):
 
     reported = xso.Child([Reported], required=False)
 
+    @classmethod
+    def from_dict(cls, type_, values, *, form_type=None):
+        """
+        Create a form of the given `type_` from the mapping `values`.
+
+        `values` maps field vars to either a :class:`str` or a list of
+        :class:`str`. If `form_type` is not :data:`None`, a hidden
+        ``FORM_TYPE`` field with that value is emitted as first field.
+
+        The fields are created with the default type; for forms of type
+        ``"submit"`` and ``"result"``, the field types are optional.
+
+        .. versionadded:: 0.7
+        """
+        result = cls()
+        result.type_ = type_
+        fields = result.fields
+        if form_type is not None:
+            fields.append(Field(
+                type_="hidden",
+                var="FORM_TYPE",
+                values=[form_type],
+            ))
+        for var, value in values.items():
+            if isinstance(value, str):
+                value = [value]
+            fields.append(Field(var=var, values=value))
+        return result
+
+    def to_dict(self):
+        """
+        Return a dictionary mapping the vars of the fields to lists of their
+        values. Fields without var (``"fixed"`` fields) are skipped; the
+        ``FORM_TYPE`` is included.
+
+        .. versionadded:: 0.7
+        """
+        return {
+            field.var: list(field.values)
+            for field in self.fields
+            if field.var is not None
+        }
+
+    def get_form_type(self):
+        """
+        Return the value of the ``FORM_TYPE`` field, or :data:`None` if the
+        form has none.
+
+        By convention, the ``FORM_TYPE`` is the first field of the form, so
+        the search usually stops at the first field. To look up several
+        fields by var, bind the form to a :class:`~aioxmpp.forms.Form`
+        instead, which indexes the fields once.
+
+        .. versionadded:: 0.7
+        """
+        for field in self.fields:
+            if field.var == "FORM_TYPE":
+                if field.values:
+                    return field.values[0]
+                return None
+        return None
+
     def _validate_result(self):
         if self.fields:
             raise ValueError("field in report result")
@@ -1,15 +1,19 @@
 import asyncio
+import collections
 import functools
 
 from datetime import datetime, timedelta
 from enum import Enum
 
 import aioxmpp.callbacks
+import aioxmpp.errors
 import aioxmpp.service
 import aioxmpp.stanza
 import aioxmpp.structs
 import aioxmpp.tracking
 
+from aioxmpp.utils import namespaces
+
 from . import xso as muc_xso
 
 
@@ -29,6 +33,100 @@ class _OccupantDiffClass(Enum):
     LEFT = 2
 
 
+@asyncio.coroutine
+def _send_admin_query(stream, mucjid, items):
+    iq = aioxmpp.stanza.IQ(
+        type_="set",
+        to=mucjid
+    )
+    iq.payload = muc_xso.AdminQuery(items=items)
+    yield from stream.send_iq_and_wait_for_reply(iq)
+
+
+def _means_unsupported(exc):
+    # temporary errors, for example from rate limiting, must not turn off
+    # batching for good
+    if exc.condition in ((namespaces.stanzas, "policy-violation"),
+                         (namespaces.stanzas, "resource-constraint")):
+        return False
+    return (exc.condition in ((namespaces.stanzas, "feature-not-implemented"),
+                              (namespaces.stanzas, "bad-request")) or
+            exc.TYPE == "cancel")
+
+
+@asyncio.coroutine
+def _send_admin_items_singly(stream, mucjid, items, results, offset):
+    all_ok = True
+    for i, item in enumerate(items, offset):
+        try:
+            yield from _send_admin_query(stream, mucjid, [item])
+        except aioxmpp.errors.XMPPError as exc:
+            results[i] = exc
+            all_ok = False
+    return all_ok
+
+
+@asyncio.coroutine
+def _send_admin_batch(stream, mucjid, items, results, offset,
+                      unbatched_services):
+    service_jid = mucjid.replace(localpart=None, resource=None)
+    if len(items) > 1 and service_jid in unbatched_services:
+        yield from _send_admin_items_singly(
+            stream, mucjid, items, results, offset
+        )
+        return
+
+    try:
+        yield from _send_admin_query(stream, mucjid, items)
+    except aioxmpp.errors.XMPPError as exc:
+        if len(items) == 1:
+            results[offset] = exc
+            return
+        # the server either does not support multiple items per request or
+        # rejected one of them; retry one by one to find out which
+        all_ok = yield from _send_admin_items_singly(
+            stream, mucjid, items, results, offset
+        )
+        if all_ok and _means_unsupported(exc):
+            # every item is fine on its own, so it was the batching
+            unbatched_services.add(service_jid)
+
+
+@asyncio.coroutine
+def _send_admin_items(stream, mucjid, items, batch_size, max_concurrency,
+                      unbatched_services):
+    if batch_size < 1:
+        raise ValueError("batch_size must be positive")
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be positive")
+
+    results = [None] * len(items)
+    offsets = collections.deque(range(0, len(items), batch_size))
+    pending = set()
+    try:
+        while offsets or pending:
+            while offsets and len(pending) < max_concurrency:
+                offset = offsets.popleft()
+                pending.add(asyncio.async(_send_admin_batch(
+                    stream, mucjid,
+                    items[offset:offset+batch_size],
+                    results, offset,
+                    unbatched_services,
+                )))
+
+            done, pending = yield from asyncio.wait(
+                pending,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+    return results
+
+
 class Occupant:
     """
     A tracking object to track a single occupant in a :class:`Room`.
@@ -59,8 +157,24 @@ class Occupant:
 
        The actual JID of the occupant, if it is known.
 
+    .. versionchanged:: 0.7
+
+       Occupants use :attr:`~object.__slots__`; arbitrary attributes cannot be
+       set on them anymore.
+
     """
 
+    __slots__ = (
+        "occupantjid",
+        "presence_state",
+        "presence_status",
+        "affiliation",
+        "role",
+        "jid",
+        "is_self",
+        "__weakref__",
+    )
+
     def __init__(self,
                  occupantjid,
                  presence_state=aioxmpp.structs.PresenceState(available=True),
@@ -130,12 +244,35 @@ class Room:
 
     .. autoattribute:: subject_setter
 
+    .. autoattribute:: last_message_received
+
+    .. autoattribute:: join_latency
+
     .. attribute:: autorejoin
 
        A boolean flag indicating whether this MUC is supposed to be
        automatically rejoined when the stream it is used gets destroyed and
        re-estabished.
 
+    .. attribute:: history_batch_size
+
+       If :data:`None` (the default), messages received during history
+       playback are emitted individually via :meth:`on_message`. Otherwise,
+       they are emitted via :meth:`on_history` in lists of at most this many
+       messages.
+
+       .. versionadded:: 0.7
+
+    .. attribute:: history_dedup_size
+
+       If not :data:`None`, the room remembers the sender and stanza ID of this
+       many of the most recently received messages and drops messages during
+       history playback which it has received before, for example before a
+       reconnect. Messages without stanza ID are never dropped, as repeated
+       messages with the same text cannot be told apart from duplicates.
+
+       .. versionadded:: 0.7
+
     .. attribute:: password
 
        The password to use when (re-)joining. If :attr:`autorejoin` is
@@ -147,10 +284,28 @@ class Room:
 
     .. autoattribute:: occupants
 
+    The occupants (including the local user, once :meth:`on_enter` has been
+    emitted) are indexed by their real JID, role and affiliation, so that the
+    following lookups do not need to look at all occupants:
+
+    .. automethod:: get_occupants_with_jid
+
+    .. automethod:: get_occupants_with_role
+
+    .. automethod:: get_occupants_with_affiliation
+
+    .. autoattribute:: role_counts
+
+    .. autoattribute:: affiliation_counts
+
     .. automethod:: set_role
 
+    .. automethod:: set_roles
+
     .. automethod:: set_affiliation
 
+    .. automethod:: set_affiliations
+
     .. automethod:: set_subject
 
     .. automethod:: leave
@@ -201,6 +356,20 @@ class Room:
           certain roles, no :class:`Occupant` instances are created and tracked
           for those occupants
 
+    .. signal:: on_history(messages, **kwargs)
+
+       Emits with a list of group chat :class:`~.stanza.Message` objects
+       received during history playback, if :attr:`history_batch_size` is not
+       :data:`None`. In that case, :meth:`on_message` does not emit for these
+       messages.
+
+       History playback starts with :meth:`on_enter` and ends with the
+       message carrying the room subject, as specified in :xep:`45`. Messages
+       which are still collected when the playback ends (or the room is left)
+       are emitted right away.
+
+       .. versionadded:: 0.7
+
     .. signal:: on_subject_change(message, subject, **kwargs)
 
        Emits when the subject of the room changes or is transmitted initially.
@@ -329,6 +498,7 @@ class Room:
     """
 
     on_message = aioxmpp.callbacks.Signal()
+    on_history = aioxmpp.callbacks.Signal()
 
     # this occupant state events
     on_enter = aioxmpp.callbacks.Signal()
@@ -347,17 +517,29 @@ class Room:
     # room state events
     on_subject_change = aioxmpp.callbacks.Signal()
 
+    history_batch_size = None
+    history_dedup_size = None
+
     def __init__(self, service, mucjid):
         super().__init__()
         self._service = service
         self._mucjid = mucjid
         self._occupant_info = {}
+        self._by_jid = {}
+        self._by_role = {}
+        self._by_affiliation = {}
         self._subject = aioxmpp.structs.LanguageMap()
         self._subject_setter = None
         self._joined = False
         self._active = False
         self._this_occupant = None
         self._tracking = {}
+        self._last_message_received = None
+        self._join_sent_at = None
+        self._join_latency = None
+        self._in_history = False
+        self._history_batch = []
+        self._seen_messages = collections.OrderedDict()
         self.autorejoin = False
         self.password = None
 
@@ -413,6 +595,30 @@ class Room:
         """
         return self._subject_setter
 
+    @property
+    def last_message_received(self):
+        """
+        The time (as naive UTC :class:`~datetime.datetime`) at which the last
+        message or subject change was received from the room, or :data:`None`.
+
+        When the room is rejoined after the stream was destroyed, history is
+        requested since this time.
+
+        .. versionadded:: 0.7
+        """
+        return self._last_message_received
+
+    @property
+    def join_latency(self):
+        """
+        Time in seconds from sending the join presence until :meth:`on_enter`
+        for the most recent (re-)join, or :data:`None` if the room has not been
+        entered yet.
+
+        .. versionadded:: 0.7
+        """
+        return self._join_latency
+
     @property
     def this_occupant(self):
         """
@@ -445,13 +651,102 @@ class Room:
         items += list(self._occupant_info.values())
         return items
 
+    def get_occupants_with_jid(self, jid):
+        """
+        Return the occupants whose real JID is `jid` as :class:`frozenset`.
+
+        If `jid` is a bare JID, all occupants with that bare real JID are
+        returned. Occupants whose real JID is unknown are never returned.
+
+        .. versionadded:: 0.7
+        """
+        occupants = self._by_jid.get(jid.bare(), ())
+        if jid.is_bare:
+            return frozenset(occupants)
+        return frozenset(
+            occupant
+            for occupant in occupants
+            if occupant.jid == jid
+        )
+
+    def get_occupants_with_role(self, role):
+        """
+        Return the occupants with the given `role` as :class:`frozenset`.
+
+        .. versionadded:: 0.7
+        """
+        return frozenset(self._by_role.get(role, ()))
+
+    def get_occupants_with_affiliation(self, affiliation):
+        """
+        Return the occupants with the given `affiliation` as
+        :class:`frozenset`.
+
+        .. versionadded:: 0.7
+        """
+        return frozenset(self._by_affiliation.get(affiliation, ()))
+
+    @property
+    def role_counts(self):
+        """
+        A :class:`collections.Counter` with the number of occupants in each
+        role.
+
+        .. versionadded:: 0.7
+        """
+        return collections.Counter({
+            role: len(occupants)
+            for role, occupants in self._by_role.items()
+        })
+
+    @property
+    def affiliation_counts(self):
+        """
+        A :class:`collections.Counter` with the number of occupants with each
+        affiliation.
+
+        .. versionadded:: 0.7
+        """
+        return collections.Counter({
+            affiliation: len(occupants)
+            for affiliation, occupants in self._by_affiliation.items()
+        })
+
+    @staticmethod
+    def _index_add(index, key, occupant):
+        index.setdefault(key, set()).add(occupant)
+
+    @staticmethod
+    def _index_remove(index, key, occupant):
+        occupants = index.get(key)
+        if occupants is None:
+            return
+        occupants.discard(occupant)
+        if not occupants:
+            del index[key]
+
+    def _track(self, occupant):
+        if occupant.jid is not None:
+            self._index_add(self._by_jid, occupant.jid.bare(), occupant)
+        self._index_add(self._by_role, occupant.role, occupant)
+        self._index_add(self._by_affiliation, occupant.affiliation, occupant)
+
+    def _untrack(self, occupant):
+        if occupant.jid is not None:
+            self._index_remove(self._by_jid, occupant.jid.bare(), occupant)
+        self._index_remove(self._by_role, occupant.role, occupant)
+        self._index_remove(self._by_affiliation, occupant.affiliation,
+                           occupant)
+
     def _suspend(self):
+        self._end_history()
         self.on_suspend()
         self._active = False
 
     def _disconnect(self):
         if not self._joined:
             return
+        self._end_history()
         self.on_exit(
             None,
             self.this_occupant,
@@ -463,15 +758,60 @@ class Room:
     def _resume(self):
         self._this_occupant = None
         self._occupant_info = {}
+        self._by_jid = {}
+        self._by_role = {}
+        self._by_affiliation = {}
         self._active = False
         self.on_resume()
 
+    def _seen_before(self, stanza):
+        if self.history_dedup_size is None or not stanza.id_:
+            return False
+        key = stanza.from_, stanza.id_
+        if key in self._seen_messages:
+            self._seen_messages.move_to_end(key)
+            return True
+        self._seen_messages[key] = None
+        while len(self._seen_messages) > self.history_dedup_size:
+            self._seen_messages.popitem(last=False)
+        return False
+
+    def _end_history(self):
+        self._in_history = False
+        self._flush_history()
+
+    def _flush_history(self):
+        if self._history_batch:
+            batch, self._history_batch = self._history_batch, []
+            self.on_history(batch)
+
+    def _inbound_history_message(self, stanza):
+        if self._seen_before(stanza):
+            return
+
+        if self.history_batch_size is None:
+            self.on_message(
+                stanza,
+                occupant=self._occupant_info.get(stanza.from_, None)
+            )
+            return
+
+        self._history_batch.append(stanza)
+        if len(self._history_batch) >= self.history_batch_size:
+            self._flush_history()
+
     def _inbound_message(self, stanza):
         self._service.logger.debug("%s: inbound message %r",
                                    self._mucjid,
                                    stanza)
 
+        if stanza.body or stanza.subject:
+            self._last_message_received = datetime.utcnow()
+
         if not stanza.body and stanza.subject:
+            if self._in_history:
+                self._end_history()
+
             self._subject = aioxmpp.structs.LanguageMap(stanza.subject)
             self._subject_setter = stanza.from_.resource
 
@@ -481,6 +821,11 @@ class Room:
                 occupant=self._occupant_info.get(stanza.from_, None)
             )
         elif stanza.body:
+            if self._in_history:
+                self._inbound_history_message(stanza)
+                return
+
+            self._seen_before(stanza)
             self.on_message(
                 stanza,
                 occupant=self._occupant_info.get(stanza.from_, None)
@@ -564,7 +909,9 @@ class Room:
             ))
 
         if to_emit:
+            self._untrack(existing)
             existing.update(info)
+            self._track(existing)
             for signal, args, kwargs in to_emit:
                 signal(stanza, existing, *args, **kwargs)
 
@@ -586,8 +933,15 @@ class Room:
                                        self._mucjid)
             self._this_occupant = info
             info.is_self = True
+            self._track(info)
             self._joined = True
             self._active = True
+            if self._join_sent_at is not None:
+                self._join_latency = (
+                    asyncio.get_event_loop().time() - self._join_sent_at
+                )
+                self._join_sent_at = None
+            self._in_history = True
             self.on_enter(stanza, info)
             return
 
@@ -608,7 +962,9 @@ class Room:
             self._service.logger.debug("%s: we left the MUC. reason=%r",
                                        self._mucjid,
                                        reason)
+            self._untrack(existing)
             existing.update(info)
+            self._end_history()
             self.on_exit(stanza, existing, mode, actor=actor, reason=reason)
             self._joined = False
             self._active = False
@@ -629,6 +985,7 @@ class Room:
             existing = self._occupant_info[info.occupantjid]
         except KeyError:
             self._occupant_info[info.occupantjid] = info
+            self._track(info)
             self.on_join(stanza, info)
             return
 
@@ -643,6 +1000,7 @@ class Room:
             self.on_nick_change(stanza, existing)
         elif mode == _OccupantDiffClass.LEFT:
             mode, actor, reason = data
+            self._untrack(existing)
             existing.update(info)
             self.on_leave(stanza, existing, mode, actor=actor, reason=reason)
             del self._occupant_info[existing.occupantjid]
@@ -686,6 +1044,53 @@ class Room:
             iq
         )
 
+    @asyncio.coroutine
+    def set_roles(self, changes, *, batch_size=50, max_concurrency=4):
+        """
+        Change the roles of many occupants at once.
+
+        :param changes: The changes to apply.
+        :type changes: iterable of ``(nick, role, reason)`` tuples
+        :param batch_size: Maximum number of changes per request.
+        :type batch_size: :class:`int`
+        :param max_concurrency: Maximum number of requests in flight at the
+                                same time.
+        :type max_concurrency: :class:`int`
+        :return: A list with one entry per change, in the order of `changes`:
+                 :data:`None` if the change succeeded, the
+                 :class:`aioxmpp.errors.XMPPError` otherwise.
+
+        The changes are packed into requests with up to `batch_size` items
+        each. If the server rejects such a request, the changes in it are
+        retried one by one, so that each change gets its own result. See
+        :meth:`Service.set_affiliations` for how servers which do not support
+        several items per request are handled.
+
+        Errors other than :class:`aioxmpp.errors.XMPPError` (for example a
+        :class:`ConnectionError`) are raised and cancel the remaining
+        requests.
+
+        .. versionadded:: 0.7
+        """
+        items = []
+        for nick, role, reason in changes:
+            if nick is None:
+                raise ValueError("nick must not be None")
+            if role is None:
+                raise ValueError("role must not be None")
+            items.append(muc_xso.AdminItem(nick=nick,
+                                           reason=reason,
+                                           role=role))
+
+        return (yield from _send_admin_items(
+            self.service.client.stream,
+            self.mucjid,
+            items,
+            batch_size,
+            max_concurrency,
+            self.service._unbatched_admin_services,
+        ))
+
     @asyncio.coroutine
     def set_affiliation(self, jid, affiliation, *, reason=None):
         """
@@ -698,6 +1103,20 @@ class Room:
             jid, affiliation,
             reason=reason))
 
+    @asyncio.coroutine
+    def set_affiliations(self, changes, **kwargs):
+        """
+        Convenience wrapper around :meth:`Service.set_affiliations`. See there
+        for details, and consider its `mucjid` argument to be set to
+        :attr:`mucjid`.
+
+        .. versionadded:: 0.7
+        """
+        return (yield from self.service.set_affiliations(
+            self.mucjid,
+            changes,
+            **kwargs))
+
     def set_subject(self, subject):
         """
         Request to set the subject to `subject`. `subject` must be a mapping
@@ -845,9 +1264,45 @@ class Service(aioxmpp.service.Service):
 
     .. automethod:: set_affiliation
 
+    .. automethod:: set_affiliations
+
+    When the stream is (re-)established, the rooms which are to be (re-)joined
+    are joined in the order of their :attr:`Room.last_message_received`, most
+    recently active first. The following attributes throttle these joins; they
+    can be set on the class or on instances:
+
+    .. attribute:: rejoin_concurrency
+
+       Maximum number of joins which may be in progress at the same time, or
+       :data:`None` (the default) for no limit. A join is in progress until
+       the room has been entered, the join failed or
+       :attr:`rejoin_timeout` has passed.
+
+       .. versionadded:: 0.7
+
+    .. attribute:: rejoin_timeout
+
+       Time in seconds after which a join which has not been answered no
+       longer counts against :attr:`rejoin_concurrency`, so that rooms which
+       never answer do not stall the other joins. The join itself is not
+       aborted. :data:`None` disables the timeout. The default is 60.
+
+       .. versionadded:: 0.7
+
+    .. attribute:: rejoin_interval
+
+       Minimum time in seconds between sending two join presences, or
+       :data:`None` (the default) to send them without delay.
+
+       .. versionadded:: 0.7
+
     """
     on_muc_joined = aioxmpp.callbacks.Signal()
 
+    rejoin_concurrency = None
+    rejoin_interval = None
+    rejoin_timeout = 60
+
     def __init__(self, client, **kwargs):
         super().__init__(client, **kwargs)
 
@@ -872,6 +1327,11 @@ class Service(aioxmpp.service.Service):
 
         self._pending_mucs = {}
         self._joined_mucs = {}
+        self._join_queue = collections.deque()
+        self._joins_in_progress = {}
+        self._unbatched_admin_services = set()
+        self._next_join_at = None
+        self._join_handle = None
 
     def _send_join_presence(self, mucjid, history, nick, password):
         presence = aioxmpp.stanza.Presence()
@@ -889,14 +1349,91 @@ class Service(aioxmpp.service.Service):
             if muc.joined:
                 self.logger.debug("%s: resuming", muc.mucjid)
                 muc._resume()
-            self.logger.debug("%s: sending join presence", muc.mucjid)
-            self._send_join_presence(muc.mucjid, history, nick, muc.password)
+
+        def activity(entry):
+            last = entry[0].last_message_received
+            return (last is not None, last or datetime.min)
+
+        self._join_queue.extend(
+            muc.mucjid
+            for muc, *_ in sorted(self._pending_mucs.values(),
+                                  key=activity,
+                                  reverse=True)
+        )
+        self._send_queued_joins()
+
+    def _send_queued_joins(self):
+        self._join_handle = None
+        loop = asyncio.get_event_loop()
+
+        while self._join_queue:
+            if (self.rejoin_concurrency is not None and
+                    len(self._joins_in_progress) >= self.rejoin_concurrency):
+                return
+
+            now = loop.time()
+            if self._next_join_at is not None and now < self._next_join_at:
+                self._join_handle = loop.call_later(
+                    self._next_join_at - now,
+                    self._send_queued_joins,
+                )
+                return
+
+            mucjid = self._join_queue.popleft()
+            try:
+                muc, fut, nick, history = self._pending_mucs[mucjid]
+            except KeyError:
+                continue
+
+            self.logger.debug("%s: sending join presence", mucjid)
+            muc._join_sent_at = now
+            timeout_handle = None
+            if (self.rejoin_concurrency is not None and
+                    self.rejoin_timeout is not None):
+                timeout_handle = loop.call_later(
+                    self.rejoin_timeout,
+                    self._join_timed_out,
+                    mucjid,
+                )
+            self._joins_in_progress[mucjid] = timeout_handle
+            self._send_join_presence(mucjid, history, nick, muc.password)
+            if self.rejoin_interval is not None:
+                self._next_join_at = now + self.rejoin_interval
+
+    def _join_finished(self, mucjid):
+        try:
+            timeout_handle = self._joins_in_progress.pop(mucjid)
+        except KeyError:
+            return
+        if timeout_handle is not None:
+            timeout_handle.cancel()
+        if self._join_handle is None:
+            self._send_queued_joins()
+
+    def _join_timed_out(self, mucjid):
+        self.logger.debug("%s: no answer to join, releasing the slot",
+                          mucjid)
+        self._joins_in_progress[mucjid] = None
+        self._join_finished(mucjid)
+
+    def _reset_join_queue(self):
+        if self._join_handle is not None:
+            self._join_handle.cancel()
+            self._join_handle = None
+        self._join_queue.clear()
+        for timeout_handle in self._joins_in_progress.values():
+            if timeout_handle is not None:
+                timeout_handle.cancel()
+        self._joins_in_progress.clear()
+        self._next_join_at = None
 
     def _stream_destroyed(self):
         self.logger.debug(
             "stream destroyed, preparing autorejoin and cleaning up the others"
         )
 
+        self._reset_join_queue()
+
         new_pending = {}
         for muc, fut, *more in self._pending_mucs.values():
             if not muc.autorejoin:
@@ -923,7 +1460,8 @@ class Service(aioxmpp.service.Service):
                 muc._suspend()
                 self._pending_mucs[muc.mucjid] = (
                     muc, None, muc.this_occupant.nick, muc_xso.History(
-                        since=datetime.utcnow()
+                        since=(muc.last_message_received or
+                               datetime.utcnow())
                     )
                 )
             else:
@@ -938,6 +1476,7 @@ class Service(aioxmpp.service.Service):
                           self._joined_mucs)
 
     def _pending_join_done(self, mucjid, fut):
+        self._join_finished(mucjid)
         if fut.cancelled():
             try:
                 del self._pending_mucs[mucjid]
@@ -949,6 +1488,7 @@ class Service(aioxmpp.service.Service):
 
     def _pending_on_enter(self, presence, occupant, **kwargs):
         mucjid = presence.from_.bare()
+        self._join_finished(mucjid)
         try:
             pending, fut, *_ = self._pending_mucs.pop(mucjid)
         except KeyError:
@@ -984,6 +1524,7 @@ class Service(aioxmpp.service.Service):
 
     def _inbound_muc_presence(self, stanza):
         mucjid = stanza.from_.bare()
+        self._join_finished(mucjid)
         try:
             pending, fut, *_ = self._pending_mucs.pop(mucjid)
         except KeyError:
@@ -1025,6 +1566,8 @@ class Service(aioxmpp.service.Service):
 
     @asyncio.coroutine
     def _shutdown(self):
+        self._reset_join_queue()
+
         for muc, fut, *_ in self._pending_mucs.values():
             muc._disconnect()
             fut.set_exception(ConnectionError())
@@ -1070,13 +1613,10 @@ class Service(aioxmpp.service.Service):
 
         If `autorejoin` is true, the MUC will be re-joined after the stream has
         been destroyed and re-established. In that case, the service will
-        request history since the stream destruction and ignore the `history`
-        object passed here.
-
-        .. todo:
-
-           Use the timestamp of the last received message instead of the
-           timestamp of stream destruction.
+        request history since the last message received from the room (see
+        :attr:`Room.last_message_received`), or since the stream destruction if
+        no message has been received, and ignore the `history` object passed
+        here.
 
         If the stream is currently not established, the join is deferred until
         the stream is established.
@@ -1124,6 +1664,7 @@ class Service(aioxmpp.service.Service):
         self._pending_mucs[mucjid] = room, fut, nick, history
 
         if self.client.established:
+            room._join_sent_at = asyncio.get_event_loop().time()
             self._send_join_presence(mucjid, history, nick, password)
 
         return room, fut
@@ -1173,3 +1714,67 @@ class Service(aioxmpp.service.Service):
         yield from self.client.stream.send_iq_and_wait_for_reply(
             iq
         )
+
+    @asyncio.coroutine
+    def set_affiliations(self, mucjid, changes, *,
+                         batch_size=50,
+                         max_concurrency=4):
+        """
+        Change the affiliations of many JIDs with the MUC identified by the
+        bare `mucjid` at once.
+
+        :param changes: The changes to apply.
+        :type changes: iterable of ``(jid, affiliation, reason)`` tuples
+        :param batch_size: Maximum number of changes per request.
+        :type batch_size: :class:`int`
+        :param max_concurrency: Maximum number of requests in flight at the
+                                same time.
+        :type max_concurrency: :class:`int`
+        :return: A list with one entry per change, in the order of `changes`:
+                 :data:`None` if the change succeeded, the
+                 :class:`aioxmpp.errors.XMPPError` otherwise.
+
+        This is the bulk variant of :meth:`set_affiliation`, useful for
+        example to ban or grant membership to many JIDs. :xep:`0045` allows
+        several items per admin request; the changes are packed into requests
+        with up to `batch_size` items each. If the server rejects such a
+        request, the changes in it are retried one by one, so that each
+        change gets its own result.
+
+        If all changes of a rejected request succeed when retried one by one
+        and the request was rejected with ``feature-not-implemented``,
+        ``bad-request`` or another error of type ``cancel``, the MUC service
+        evidently does not support several items per request. This is
+        remembered for the lifetime of the :class:`Service`, and further bulk
+        changes in rooms of that MUC service are sent one by one right away.
+        Temporary errors, such as ``resource-constraint`` or
+        ``policy-violation`` from rate limiting, are not remembered.
+
+        Errors other than :class:`aioxmpp.errors.XMPPError` (for example a
+        :class:`ConnectionError`) are raised and cancel the remaining
+        requests.
+
+        .. versionadded:: 0.7
+        """
+
+        if mucjid is None or not mucjid.is_bare:
+            raise ValueError("mucjid must be bare JID")
+
+        items = []
+        for jid, affiliation, reason in changes:
+            if jid is None:
+                raise ValueError("jid must not be None")
+            if affiliation is None:
+                raise ValueError("affiliation must not be None")
+            items.append(muc_xso.AdminItem(jid=jid,
+                                           reason=reason,
+                                           affiliation=affiliation))
+
+        return (yield from _send_admin_items(
+            self.client.stream,
+            mucjid,
+            items,
+            batch_size,
+            max_concurrency,
+            self._unbatched_admin_services,
+        ))
@@ -164,10 +164,17 @@ def discover_connectors(domain, loop=None, logger=logger):
 
 @asyncio.coroutine
 def _try_options(options, exceptions,
-                 jid, metadata, negotiation_timeout, loop, logger):
+                 jid, metadata, negotiation_timeout, loop, logger,
+                 compression_level=None,
+                 xml_limits=None):
     """
     Helper function for :func:`connect_xmlstream`.
     """
+    connect_kwargs = {}
+    if xml_limits is not None:
+        # only pass it if needed, to support connectors which predate it
+        connect_kwargs["limits"] = xml_limits
+
     for host, port, conn in options:
         logger.debug(
             "domain %s: trying to connect to %r:%s using %r",
@@ -181,6 +188,7 @@ def _try_options(options, exceptions,
                 host,
                 port,
                 negotiation_timeout,
+                **connect_kwargs
             )
         except OSError as exc:
             logger.warning(
@@ -204,6 +212,15 @@ def _try_options(options, exceptions,
                 jid,
                 features,
             )
+
+            if compression_level is not None:
+                features = yield from protocol.negotiate_compression(
+                    xmlstream,
+                    features,
+                    level=compression_level,
+                    timeout=negotiation_timeout,
+                    logger=logger,
+                )
         except errors.SASLUnavailable as exc:
             protocol.send_stream_error_and_close(
                 xmlstream,
@@ -232,7 +249,9 @@ def connect_xmlstream(
         negotiation_timeout=60.,
         override_peer=[],
         loop=None,
-        logger=logger):
+        logger=logger,
+        compression_level=None,
+        xml_limits=None):
     """
     Prepare and connect a :class:`aioxmpp.protocol.XMLStream` to a server
     responsible for the given `jid` and authenticate against that server using
@@ -252,6 +271,17 @@ def connect_xmlstream(
     `loop` may be a :class:`asyncio.BaseEventLoop` to use. Defaults to the
     current event loop.
 
+    If `compression_level` is not :data:`None`, :xep:`138` stream compression
+    is negotiated after SASL authentication using
+    :func:`aioxmpp.protocol.negotiate_compression`, with `compression_level`
+    as the ``zlib`` compression level. If the server does not support stream
+    compression, the stream is used uncompressed.
+
+    If `xml_limits` is not :data:`None`, it must be an
+    :class:`aioxmpp.xml.XMLLimits` instance, which is enforced on the data
+    received over the stream (see :attr:`aioxmpp.protocol.XMLStream.limits`).
+    It is passed to the `connector` as `limits` keyword argument.
+
     If `domain` announces that XMPP is not supported at all,
     :class:`ValueError` is raised. If no options are returned from
     :func:`discover_connectors` and `override_peer` is empty,
@@ -277,6 +307,10 @@ def connect_xmlstream(
     the stream.
 
     .. versionadded:: 0.6
+
+    .. versionchanged:: 0.7
+
+       The `compression_level` and `xml_limits` arguments were added.
     """
     loop = asyncio.get_event_loop() if loop is None else loop
 
@@ -290,6 +324,8 @@ def connect_xmlstream(
         options,
         exceptions,
         jid, metadata, negotiation_timeout, loop, logger,
+        compression_level=compression_level,
+        xml_limits=xml_limits,
     )
     if result is not None:
         return result
@@ -304,6 +340,8 @@ def connect_xmlstream(
         options,
         exceptions,
         jid, metadata, negotiation_timeout, loop, logger,
+        compression_level=compression_level,
+        xml_limits=xml_limits,
     )
     if result is not None:
         return result
@@ -395,12 +433,31 @@ class AbstractClient:
 
        .. versionadded:: 0.6
 
+    .. attribute:: compression_level = None
+
+       If not :data:`None`, :xep:`138` stream compression is negotiated with
+       this ``zlib`` compression level (see the `compression_level` argument
+       of :func:`connect_xmlstream`). Stream compression is disabled by
+       default.
+
+       .. versionadded:: 0.7
+
+    .. attribute:: xml_limits = None
+
+       If not :data:`None`, an :class:`aioxmpp.xml.XMLLimits` instance which
+       is enforced on the data received from the server (see the `xml_limits`
+       argument of :func:`connect_xmlstream`).
+
+       .. versionadded:: 0.7
+
     Connection information:
 
     .. autoattribute:: established
 
     .. autoattribute:: local_jid
 
+    .. autoattribute:: loop
+
     .. attribute:: stream
 
        The :class:`~aioxmpp.stream.StanzaStream` instance used by the node.
@@ -526,6 +583,8 @@ class AbstractClient:
         self.backoff_factor = 1.2
         self.backoff_cap = timedelta(seconds=60)
         self.override_peer = list(override_peer)
+        self.compression_level = None
+        self.xml_limits = None
 
         self.on_stopped.logger = self.logger.getChild("on_stopped")
         self.on_failure.logger = self.logger.getChild("on_failure")
@@ -682,7 +741,9 @@ class AbstractClient:
                 negotiation_timeout=self.negotiation_timeout.total_seconds(),
                 override_peer=override_peer,
                 loop=self._loop,
-                logger=self.logger)
+                logger=self.logger,
+                compression_level=self.compression_level,
+                xml_limits=self.xml_limits)
 
         try:
             features, sm_resumed = yield from self._negotiate_stream(
@@ -813,6 +874,15 @@ class AbstractClient:
         """
         return self._local_jid
 
+    @property
+    def loop(self):
+        """
+        The :mod:`asyncio` event loop the client runs on.
+
+        .. versionadded:: 0.7
+        """
+        return self._loop
+
     @property
     def running(self):
         """
@@ -29,6 +29,21 @@ StartTLS related XSOs
 
 .. autoclass:: StartTLSFailure()
 
+Stream compression related XSOs
+===============================
+
+.. autoclass:: CompressionXSO()
+
+.. autoclass:: CompressionFeature()
+
+.. autoclass:: CompressionMethod(name=None)
+
+.. autoclass:: Compress()
+
+.. autoclass:: Compressed()
+
+.. autoclass:: CompressionFailure()
+
 SASL related XSOs
 =================
 
@@ -308,6 +323,116 @@ class StartTLSProceed(StartTLSXSO):
     TAG = (namespaces.starttls, "proceed")
 
 
+class CompressionXSO(xso.XSO):
+    """
+    Base class for :xep:`138` stream compression related XSOs.
+
+    This base class merely defines the namespaces to declare when serialising
+    the derived XSOs.
+    """
+
+    DECLARE_NS = {None: namespaces.compression}
+
+
+class CompressionMethod(xso.XSO):
+    """
+    A compression method announced in the :class:`CompressionFeature`.
+
+    .. attribute:: name
+
+       The name of the method, for example ``"zlib"``.
+    """
+
+    TAG = (namespaces.compression_feature, "method")
+
+    name = xso.Text()
+
+    def __init__(self, name=None):
+        super().__init__()
+        self.name = name
+
+
+@StreamFeatures.as_feature_class
+class CompressionFeature(xso.XSO):
+    """
+    Stream compression capability stream feature.
+
+    .. attribute:: methods
+
+       The :class:`CompressionMethod` XSOs announced by the server.
+
+    .. automethod:: get_method_list
+    """
+
+    TAG = (namespaces.compression_feature, "compression")
+
+    DECLARE_NS = {None: namespaces.compression_feature}
+
+    methods = xso.ChildList([CompressionMethod])
+
+    def get_method_list(self):
+        """
+        Return the names of the announced compression methods as list.
+        """
+        return [
+            method.name
+            for method in self.methods
+        ]
+
+
+class Compress(CompressionXSO):
+    """
+    Request to compress the stream using the given `method`.
+
+    .. attribute:: method
+
+       The name of the compression method to use.
+    """
+
+    TAG = (namespaces.compression, "compress")
+
+    method = xso.ChildText(
+        (namespaces.compression, "method"),
+        default=None,
+        declare_prefix=None,
+    )
+
+    def __init__(self, method=None):
+        super().__init__()
+        self.method = method
+
+
+class Compressed(CompressionXSO):
+    """
+    Server acknowledges the start of stream compression.
+    """
+
+    TAG = (namespaces.compression, "compressed")
+
+
+class CompressionFailure(CompressionXSO):
+    """
+    Server refusing to start stream compression.
+
+    .. attribute:: condition
+
+       The condition which caused the negotiation to fail.
+    """
+
+    TAG = (namespaces.compression, "failure")
+
+    condition = xso.ChildTag(
+        tags=[
+            "processing-failed",
+            "setup-failed",
+            "unsupported-method",
+        ],
+        default_ns=namespaces.compression,
+        allow_none=True,
+        declare_prefix=None,
+    )
+
+
 class SASLXSO(xso.XSO):
     DECLARE_NS = {
         None: namespaces.sasl
@@ -1,4 +1,5 @@
 import asyncio
+import collections
 
 import aioxmpp.callbacks
 import aioxmpp.service
@@ -6,6 +7,54 @@ import aioxmpp.structs
 import aioxmpp.xso.model
 
 
+class _ResourceRanking:
+    """
+    Keep the available resources of a single bare JID ordered by their
+    availability.
+
+    Resources are kept in one bucket per
+    :attr:`~aioxmpp.structs.PresenceState.SHOW_VALUE_WEIGHT`; inside a bucket,
+    the resource which was updated last is at the end.
+    """
+
+    __slots__ = ("_buckets", "_weights")
+
+    def __init__(self):
+        self._buckets = {}
+        self._weights = {}
+
+    def __len__(self):
+        return len(self._weights)
+
+    def set(self, resource, weight):
+        self.discard(resource)
+        self._weights[resource] = weight
+        self._buckets.setdefault(
+            weight,
+            collections.OrderedDict()
+        )[resource] = None
+
+    def discard(self, resource):
+        try:
+            weight = self._weights.pop(resource)
+        except KeyError:
+            return
+        bucket = self._buckets[weight]
+        del bucket[resource]
+        if not bucket:
+            del self._buckets[weight]
+
+    def best(self):
+        for weight in range(len(aioxmpp.structs.PresenceState.SHOW_VALUES)-1,
+                            -1, -1):
+            try:
+                bucket = self._buckets[weight]
+            except KeyError:
+                continue
+            return next(reversed(bucket))
+        return None
+
+
 class Service(aioxmpp.service.Service):
     """
     The presence service tracks all incoming presence information (this does
@@ -34,6 +83,13 @@ class Service(aioxmpp.service.Service):
 
     .. automethod:: get_stanza
 
+    The available resources are indexed by their ``show`` value and their
+    domain:
+
+    .. automethod:: get_resources_with_show
+
+    .. automethod:: get_available_resources_of_domain
+
     On presence changes of peers, signals are emitted:
 
     .. signal:: on_bare_available(stanza)
@@ -74,6 +130,41 @@ class Service(aioxmpp.service.Service):
     The three signals :meth:`on_available`,  :meth:`on_changed` and
     :meth:`on_unavailable` never fire for the same stanza.
 
+    Right after a connection has been established, the server sends the
+    presence of all contacts at once. To reduce the cost of processing such a
+    flood, the presence updates can be coalesced:
+
+    .. attribute:: coalesce_window
+
+       If :data:`None` (the default), each presence stanza is processed as
+       soon as it is received.
+
+       Otherwise, received presence stanzas are queued and processed in a
+       batch after `coalesce_window` seconds; ``0`` processes the batch in the
+       next iteration of the event loop. If a stanza from the same address is
+       received while an older one is still queued, the older one is
+       discarded. The queued stanzas are not visible to the query methods
+       above until the batch is processed.
+
+       .. versionadded:: 0.7
+
+    .. attribute:: fire_resource_events_when_coalescing
+
+       If true (the default), the signals above also fire for the updates of
+       a batch. Set this to false if only :meth:`on_coalesced_update` is used.
+
+       .. versionadded:: 0.7
+
+    .. signal:: on_coalesced_update(available, changed, unavailable)
+
+       Fires after a batch of presence updates has been processed, if
+       :attr:`coalesce_window` is not :data:`None` and at least one resource
+       changed its state. The arguments are lists of ``(full_jid, stanza)``
+       pairs with the same meaning as the arguments of :meth:`on_available`,
+       :meth:`on_changed` and :meth:`on_unavailable` respectively.
+
+       .. versionadded:: 0.7
+
     .. versionadded:: 0.4
     """
 
@@ -84,10 +175,20 @@ class Service(aioxmpp.service.Service):
     on_changed = aioxmpp.callbacks.Signal()
     on_unavailable = aioxmpp.callbacks.Signal()
 
+    on_coalesced_update = aioxmpp.callbacks.Signal()
+
+    coalesce_window = None
+    fire_resource_events_when_coalescing = True
+
     def __init__(self, client):
         super().__init__(client)
 
         self._presences = {}
+        self._pending = collections.OrderedDict()
+        self._flush_handle = None
+        self._rankings = {}
+        self._by_show = {}
+        self._by_domain = {}
 
         client.stream.register_presence_callback(
             None,
@@ -109,6 +210,11 @@ class Service(aioxmpp.service.Service):
 
     @asyncio.coroutine
     def _shutdown(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._pending.clear()
+
         self.client.stream.unregister_presence_callback(
             "unavailable",
             None
@@ -128,16 +234,84 @@ class Service(aioxmpp.service.Service):
         """
         Return the stanza of the resource with the most available presence.
 
-        The resources are sorted using the ordering defined on
-        :class:`~aioxmpp.structs.PresenceState`.
+        The resources are ordered using the ordering defined on
+        :class:`~aioxmpp.structs.PresenceState`. If several resources are
+        equally available, the stanza of the resource which sent its presence
+        last is returned.
+
+        The order is maintained while presence is received, so this does not
+        depend on the number of resources.
         """
-        presences = sorted(
-            self.get_peer_resources(peer_jid).items(),
-            key=lambda item: aioxmpp.structs.PresenceState.from_stanza(item[1])
-        )
-        if not presences:
+        try:
+            ranking = self._rankings[peer_jid]
+        except KeyError:
             return None
-        return presences[-1][1]
+        return self._presences[peer_jid][ranking.best()]
+
+    def get_resources_with_show(self, show):
+        """
+        Return the full JIDs of all available resources with the given `show`
+        value as :class:`frozenset`.
+
+        `show` must be one of the values allowed for
+        :attr:`~aioxmpp.stanza.Presence.show`; :data:`None` returns the
+        resources which are available without a ``show`` value.
+
+        .. versionadded:: 0.7
+        """
+        return frozenset(self._by_show.get(show, ()))
+
+    def get_available_resources_of_domain(self, domain):
+        """
+        Return the full JIDs of all available resources whose bare JID is at
+        `domain` as :class:`frozenset`.
+
+        .. versionadded:: 0.7
+        """
+        return frozenset(self._by_domain.get(domain, ()))
+
+    def _index_resource(self, bare, resource, st):
+        full_jid = st.from_
+        try:
+            old_show = self._presences[bare][resource].show
+        except KeyError:
+            pass
+        else:
+            self._discard_from_index(self._by_show, old_show, full_jid)
+
+        self._by_show.setdefault(st.show, set()).add(full_jid)
+        self._by_domain.setdefault(bare.domain, set()).add(full_jid)
+
+        try:
+            ranking = self._rankings[bare]
+        except KeyError:
+            ranking = _ResourceRanking()
+            self._rankings[bare] = ranking
+        ranking.set(
+            resource,
+            aioxmpp.structs.PresenceState.SHOW_VALUE_WEIGHT[st.show]
+        )
+
+    @staticmethod
+    def _discard_from_index(index, key, full_jid):
+        try:
+            entries = index[key]
+        except KeyError:
+            return
+        entries.discard(full_jid)
+        if not entries:
+            del index[key]
+
+    def _unindex_resource(self, bare, resource):
+        st = self._presences[bare][resource]
+        full_jid = bare.replace(resource=resource)
+        self._discard_from_index(self._by_show, st.show, full_jid)
+        self._discard_from_index(self._by_domain, bare.domain, full_jid)
+
+        ranking = self._rankings[bare]
+        ranking.discard(resource)
+        if not ranking:
+            del self._rankings[bare]
 
     def get_peer_resources(self, peer_jid):
         """
@@ -174,6 +348,39 @@ class Service(aioxmpp.service.Service):
             pass
 
     def handle_presence(self, st):
+        if self.coalesce_window is None:
+            self._apply_presence(st, None)
+            return
+
+        # a newer presence from the same address supersedes the pending one;
+        # moving it to the end keeps the relative order of bare (error) and
+        # full JID updates intact
+        self._pending[st.from_] = st
+        self._pending.move_to_end(st.from_)
+
+        if self._flush_handle is None:
+            loop = asyncio.get_event_loop()
+            if self.coalesce_window:
+                self._flush_handle = loop.call_later(
+                    self.coalesce_window,
+                    self._flush_pending
+                )
+            else:
+                self._flush_handle = loop.call_soon(self._flush_pending)
+
+    def _flush_pending(self):
+        self._flush_handle = None
+        pending, self._pending = self._pending, collections.OrderedDict()
+
+        batch = ([], [], [])
+        for st in pending.values():
+            self._apply_presence(st, batch)
+
+        if any(batch):
+            self.on_coalesced_update(*batch)
+
+    def _apply_presence(self, st, batch):
+        fire = batch is None or self.fire_resource_events_when_coalescing
         bare = st.from_.bare()
         resource = st.from_.resource
 
@@ -184,9 +391,13 @@ class Service(aioxmpp.service.Service):
                 return
             dest_dict.pop(None, None)
             if resource in dest_dict:
-                self.on_unavailable(st.from_, st)
-                if len(dest_dict) == 1:
-                    self.on_bare_unavailable(st)
+                if fire:
+                    self.on_unavailable(st.from_, st)
+                    if len(dest_dict) == 1:
+                        self.on_bare_unavailable(st)
+                if batch is not None:
+                    batch[2].append((st.from_, st))
+                self._unindex_resource(bare, resource)
                 del dest_dict[resource]
         elif st.type_ == "error":
             try:
@@ -195,17 +406,33 @@ class Service(aioxmpp.service.Service):
                 pass
             else:
                 for resource in dest_dict.keys():
-                    self.on_unavailable(st.from_.replace(resource=resource),
-                                        st)
-                self.on_bare_unavailable(st)
+                    full_jid = st.from_.replace(resource=resource)
+                    if fire:
+                        self.on_unavailable(full_jid, st)
+                    if batch is not None:
+                        batch[2].append((full_jid, st))
+                    if resource is not None:
+                        self._unindex_resource(bare, resource)
+                if fire:
+                    self.on_bare_unavailable(st)
             self._presences[bare] = {None: st}
         else:
             dest_dict = self._presences.setdefault(bare, {})
             dest_dict.pop(None, None)
             bare_became_available = not dest_dict
             resource_became_available = resource not in dest_dict
+            if resource is not None:
+                self._index_resource(bare, resource, st)
             dest_dict[resource] = st
 
+            if batch is not None:
+                batch[0 if resource_became_available else 1].append(
+                    (st.from_, st)
+                )
+
+            if not fire:
+                return
+
             if bare_became_available:
                 self.on_bare_available(st)
             if resource_became_available:
@@ -14,6 +14,11 @@ class. Separating them helps with testing.
 
 .. autoclass:: XMLStream
 
+Stream compression
+==================
+
+.. autoclass:: ZlibCompression
+
 Utilities for XML streams
 =========================
 
@@ -21,6 +26,8 @@ Utilities for XML streams
 
 .. autofunction:: reset_stream_and_get_features
 
+.. autofunction:: negotiate_compression
+
 Enumerations
 ============
 
@@ -34,6 +41,7 @@ import asyncio
 import functools
 import inspect
 import logging
+import zlib
 
 from enum import Enum
 
@@ -136,7 +144,141 @@ class DebugWrapper:
     def flush(self):
         self.logger.debug("SENT %r", b"".join(self._pieces))
         self._pieces = []
-        self._flush
+        self._flush()
+
+
+class ZlibCompression:
+    """
+    Incremental ``zlib`` compression context for :xep:`138` stream
+    compression.
+
+    `level` is the compression level passed to :func:`zlib.compressobj`; it
+    defaults to :data:`zlib.Z_DEFAULT_COMPRESSION`.
+
+    One context is used for the whole lifetime of a connection, in both
+    directions. Outgoing data is compressed without flushing until
+    :meth:`flush` is called, which emits a sync flush. :class:`XMLStream`
+    calls :meth:`flush` at each stanza boundary, so that the peer can
+    decompress and process each stanza as soon as it has been received.
+
+    .. automethod:: compress
+
+    .. automethod:: flush
+
+    .. automethod:: decompress
+
+    .. automethod:: iter_decompress
+
+    Byte counters:
+
+    .. attribute:: raw_bytes_sent
+
+       Number of uncompressed bytes passed to :meth:`compress`.
+
+    .. attribute:: compressed_bytes_sent
+
+       Number of compressed bytes returned by :meth:`compress` and
+       :meth:`flush`.
+
+    .. attribute:: raw_bytes_received
+
+       Number of uncompressed bytes returned by :meth:`decompress`.
+
+    .. attribute:: compressed_bytes_received
+
+       Number of compressed bytes passed to :meth:`decompress`.
+
+    .. versionadded:: 0.7
+    """
+
+    METHOD = "zlib"
+    CHUNK_SIZE = 16384
+
+    def __init__(self, level=zlib.Z_DEFAULT_COMPRESSION):
+        super().__init__()
+        self.level = level
+        self._compressor = zlib.compressobj(level)
+        self._decompressor = zlib.decompressobj()
+        self.raw_bytes_sent = 0
+        self.compressed_bytes_sent = 0
+        self.raw_bytes_received = 0
+        self.compressed_bytes_received = 0
+
+    def compress(self, data):
+        """
+        Feed `data` into the compressor and return the compressed bytes which
+        are available for sending. The result may be empty; use :meth:`flush`
+        to force the pending data out.
+        """
+        self.raw_bytes_sent += len(data)
+        result = self._compressor.compress(data)
+        self.compressed_bytes_sent += len(result)
+        return result
+
+    def flush(self):
+        """
+        Perform a sync flush on the compressor and return the bytes which need
+        to be sent to allow the peer to decompress everything passed to
+        :meth:`compress` so far.
+        """
+        result = self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        self.compressed_bytes_sent += len(result)
+        return result
+
+    def decompress(self, data):
+        """
+        Decompress the received `data` and return the uncompressed bytes.
+
+        The size of the result is not bounded; a small amount of compressed
+        data may expand to a huge result. Use :meth:`iter_decompress` to
+        process untrusted data.
+
+        :raises zlib.error: if the data cannot be decompressed.
+        """
+        return b"".join(self.iter_decompress(data))
+
+    def iter_decompress(self, data, max_length=None):
+        """
+        Decompress the received `data` and iterate over the uncompressed
+        bytes, in chunks of at most `max_length` bytes (:attr:`CHUNK_SIZE` by
+        default).
+
+        Each chunk is only decompressed when the previous one has been
+        consumed, so the consumer can stop early (for example when a limit is
+        exceeded) without ever holding the complete decompressed data.
+
+        :raises zlib.error: if the data cannot be decompressed.
+        """
+        if max_length is None:
+            max_length = self.CHUNK_SIZE
+
+        self.compressed_bytes_received += len(data)
+        while True:
+            chunk = self._decompressor.decompress(data, max_length)
+            data = self._decompressor.unconsumed_tail
+            if not chunk and not data:
+                return
+            self.raw_bytes_received += len(chunk)
+            yield chunk
+
+
+class CompressionWrapper:
+    def __init__(self, dest, compression):
+        self.dest = dest
+        self.compression = compression
+        if hasattr(dest, "flush"):
+            self._flush = dest.flush
+        else:
+            self._flush = lambda: None
+
+    def write(self, data):
+        data = self.compression.compress(data)
+        if data:
+            self.dest.write(data)
+
+    def flush(self):
+        self.dest.write(self.compression.flush())
+        self._flush()
 
 
 class XMLStream(asyncio.Protocol):
@@ -161,6 +303,21 @@ class XMLStream(asyncio.Protocol):
     child for logging purposes. This eases debugging and allows for
     connection-specific loggers.
 
+    `limits` may be an :class:`~aioxmpp.xml.XMLLimits` instance to enforce on
+    this stream; it is used to initialise the :attr:`limits` attribute.
+
+    The raw traffic sent and received over the stream is logged at
+    :data:`logging.DEBUG` level to a separate ``trace`` child of that logger
+    (for example ``aioxmpp.XMLStream.trace``). Whether traffic is logged is
+    decided whenever the stream is (re-)started, so that traffic logging
+    does not cost anything while it is disabled. To get debug logs without the
+    traffic, set the level of the ``trace`` logger to :data:`logging.INFO` or
+    higher.
+
+    The data passed to :meth:`data_received` may be any bytes-like object,
+    such as a :class:`memoryview` into a receive buffer owned by the
+    transport. It is not referenced after :meth:`data_received` returns.
+
     Receiving XSOs:
 
     .. attribute:: stanza_parser
@@ -193,6 +350,8 @@ class XMLStream(asyncio.Protocol):
 
     .. automethod:: starttls
 
+    .. automethod:: start_compression
+
     .. automethod:: reset
 
     .. automethod:: close
@@ -228,19 +387,49 @@ class XMLStream(asyncio.Protocol):
        The maximum time to wait for the peer ``</stream:stream>`` before
        forcing to close the transport and considering the stream closed.
 
+    Limits:
+
+    .. attribute:: limits
+
+       An :class:`~aioxmpp.xml.XMLLimits` instance or :data:`None` (the
+       default). If set, the limits are enforced on all data received from
+       the peer: the stanza size is checked incrementally while data is fed
+       into the parser, and the other limits are checked by the
+       :class:`~aioxmpp.xml.XMPPXMLProcessor`. The stream header is subject
+       to the stanza size limit, too. If a limit is exceeded, the stream is
+       closed with a ``policy-violation`` stream error.
+
+       The class attribute applies to all streams which have not been given
+       `limits` when they were created; prefer passing `limits` to the
+       constructor.
+
+       Changes to this attribute take effect when the stream is (re-)started.
+
+       .. versionadded:: 0.7
+
+    .. versionchanged:: 0.7
+
+       The `limits` argument was added.
+
     """
 
     on_closing = callbacks.Signal()
     shutdown_timeout = 15
+    limits = None
 
     def __init__(self, to,
                  features_future,
                  sorted_attributes=False,
                  base_logger=logging.getLogger("aioxmpp"),
-                 loop=None):
+                 loop=None,
+                 limits=None):
         self._to = to
+        if limits is not None:
+            self.limits = limits
         self._sorted_attributes = sorted_attributes
         self._logger = base_logger.getChild("XMLStream")
+        self._trace_logger = self._logger.getChild("trace")
+        self._trace_traffic = False
         self._transport = None
         self._features_future = features_future
         self._exception = None
@@ -249,6 +438,7 @@ class XMLStream(asyncio.Protocol):
         self._smachine = statemachine.OrderedStateMachine(State.READY)
         self._transport_closing = False
         self._footer_timeout_future = None
+        self._compression = None
 
         self._closing_future = asyncio.async(
             self._smachine.wait_for(
@@ -401,9 +591,39 @@ class XMLStream(asyncio.Protocol):
         self._features_future.set_result(features)
         self._features_future = None
 
+    def _rx_stream_level_event(self):
+        self._rx_stanza_offset = xml.get_current_byte_index(self._parser)
+
+    def _rx_feed_limited(self, blob, max_stanza_bytes):
+        # feed the data in pieces which cannot push the current stanza beyond
+        # the limit, so that the violation is caught before the complete
+        # stanza has been buffered. all data since the last stream-level
+        # event is accounted, which includes incomplete start tags.
+        view = memoryview(blob)
+        while view:
+            budget = max_stanza_bytes - (
+                self._rx_offset - self._rx_stanza_offset
+            )
+            if budget <= 0:
+                raise self._processor.limits.violation(
+                    "max_stanza_bytes",
+                    "maximum stanza size exceeded"
+                )
+            piece = view[:budget]
+            self._parser.feed(piece)
+            self._rx_offset += len(piece)
+            view = view[len(piece):]
+
     def _rx_feed(self, blob):
         try:
-            self._parser.feed(blob)
+            if     (self._processor.limits is not None and
+                    self._processor.limits.max_stanza_bytes is not None):
+                self._rx_feed_limited(
+                    blob,
+                    self._processor.limits.max_stanza_bytes
+                )
+            else:
+                self._parser.feed(blob)
         except sax.SAXParseException as exc:
             if     (exc.getException().args[0].startswith(
                     pyexpat.errors.XML_ERROR_UNDEFINED_ENTITY)):
@@ -451,10 +671,27 @@ class XMLStream(asyncio.Protocol):
         if self._footer_timeout_future is not None:
             self._footer_timeout_future.cancel()
 
+    def _rx_decompress(self, blob):
+        try:
+            yield from self._compression.iter_decompress(blob)
+        except zlib.error as exc:
+            raise errors.StreamError(
+                condition=(namespaces.streams, "undefined-condition"),
+                text="stream decompression failed: {}".format(exc)
+            )
+
     def data_received(self, blob):
-        self._logger.debug("RECV %r", blob)
         try:
-            self._rx_feed(blob)
+            if self._compression is not None:
+                # decompress and parse in bounded chunks, so that limits are
+                # enforced before the whole blob has been inflated
+                chunks = self._rx_decompress(blob)
+            else:
+                chunks = (blob,)
+            for chunk in chunks:
+                if self._trace_traffic:
+                    self._trace_logger.debug("RECV %r", bytes(chunk))
+                self._rx_feed(chunk)
         except errors.StreamError as exc:
             stanza_obj = nonza.StreamError.from_exception(exc)
             try:
@@ -548,13 +785,19 @@ class XMLStream(asyncio.Protocol):
         self._processor.on_stream_header = self._rx_stream_header
         self._processor.on_stream_footer = self._rx_stream_footer
         self._processor.on_exception = self._rx_exception
+        self._processor.on_stream_level_event = self._rx_stream_level_event
+        self._processor.limits = self.limits
         self._parser = xml.make_parser()
         self._parser.setContentHandler(self._processor)
-
-        if self._logger.getEffectiveLevel() <= logging.DEBUG:
-            dest = DebugWrapper(self._transport, self._logger)
-        else:
-            dest = self._transport
+        self._rx_offset = 0
+        self._rx_stanza_offset = 0
+
+        dest = self._transport
+        if self._compression is not None:
+            dest = CompressionWrapper(dest, self._compression)
+        self._trace_traffic = self._trace_logger.isEnabledFor(logging.DEBUG)
+        if self._trace_traffic:
+            dest = DebugWrapper(dest, self._trace_logger)
         self._writer = xml.write_xmlstream(
             dest,
             self._to,
@@ -652,6 +895,32 @@ class XMLStream(asyncio.Protocol):
                                             post_handshake_callback)
         self._reset_state()
 
+    def start_compression(self, compression):
+        """
+        Start compressing the stream using the given `compression` context.
+
+        `compression` must be a :class:`ZlibCompression` instance (or an
+        object with the same interface). All data sent and received after the
+        call is passed through `compression`. This is used after the peer has
+        acknowledged the :xep:`138` compression request; see
+        :func:`negotiate_compression`.
+
+        If the stream is currently not connected, :class:`ConnectionError`
+        is raised. If compression is already active, :class:`RuntimeError` is
+        raised.
+
+        After :meth:`start_compression` returns, you must call :meth:`reset`,
+        as the stream needs to be restarted over the compressed transport.
+
+        .. versionadded:: 0.7
+        """
+        self._require_connection()
+        if self._compression is not None:
+            raise RuntimeError("stream compression is already active")
+
+        self._compression = compression
+        self._reset_state()
+
     def error_future(self):
         """
         Return a future which will receive the next XML stream error as
@@ -682,6 +951,19 @@ class XMLStream(asyncio.Protocol):
         """
         return self._smachine.state
 
+    @property
+    def compression(self):
+        """
+        The :class:`ZlibCompression` context which is used on the stream or
+        :data:`None` if the stream is not compressed. It can be used to
+        access the byte counters of the compression layer.
+
+        This attribute cannot be set; use :meth:`start_compression`.
+
+        .. versionadded:: 0.7
+        """
+        return self._compression
+
 
 @asyncio.coroutine
 def send_and_wait_for(xmlstream, send, wait_for, timeout=None):
@@ -777,6 +1059,61 @@ def reset_stream_and_get_features(xmlstream, timeout=None):
         raise
 
 
+@asyncio.coroutine
+def negotiate_compression(xmlstream, features,
+                          level=zlib.Z_DEFAULT_COMPRESSION,
+                          timeout=None,
+                          logger=logger):
+    """
+    Negotiate :xep:`138` stream compression on the given `xmlstream`, using
+    the stream `features` received most recently.
+
+    If the peer does not announce the ``zlib`` method in the
+    :class:`~.nonza.CompressionFeature` or refuses to compress the stream,
+    `features` is returned unchanged and the stream stays uncompressed.
+
+    Otherwise, a :class:`ZlibCompression` context with the given `level` is
+    started on the stream, the stream is reset and the new
+    :class:`~.nonza.StreamFeatures` are returned. `timeout` is applied to each
+    negotiation step.
+
+    .. versionadded:: 0.7
+    """
+
+    try:
+        feature = features[nonza.CompressionFeature]
+    except KeyError:
+        return features
+
+    if ZlibCompression.METHOD not in feature.get_method_list():
+        logger.debug("peer does not support zlib stream compression")
+        return features
+
+    response = yield from send_and_wait_for(
+        xmlstream,
+        [
+            nonza.Compress(ZlibCompression.METHOD),
+        ],
+        [
+            nonza.Compressed,
+            nonza.CompressionFailure,
+        ],
+        timeout=timeout,
+    )
+
+    if not isinstance(response, nonza.Compressed):
+        logger.warning("peer refused stream compression: %s",
+                       response.condition)
+        return features
+
+    xmlstream.start_compression(ZlibCompression(level))
+
+    return (yield from reset_stream_and_get_features(
+        xmlstream,
+        timeout=timeout,
+    ))
+
+
 def send_stream_error_and_close(
         xmlstream,
         condition,
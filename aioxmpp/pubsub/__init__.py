@@ -15,6 +15,12 @@ To start using PubSub services in your application, you have to load the
 
 .. autoclass:: Service
 
+.. autoclass:: ItemPager
+
+.. autoclass:: NodeReplica
+
+.. autoclass:: Publisher
+
 .. currentmodule:: aioxmpp.pubsub.xso
 
 XSOs
@@ -60,6 +66,10 @@ alphabetical order.
 
 .. autoclass:: Publish
 
+.. autoclass:: ResultSet
+
+.. autoclass:: ResultSetFirst
+
 .. autoclass:: Retract
 
 .. autoclass:: Subscribe
@@ -152,4 +162,6 @@ below:
 
 """
 
-from .service import Service
+from .service import Service, ItemPager  # NOQA
+from .replica import NodeReplica  # NOQA
+from .publisher import Publisher  # NOQA
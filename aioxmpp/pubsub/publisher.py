@@ -0,0 +1,170 @@
+import asyncio
+import collections
+import functools
+
+
+class Publisher:
+    """
+    Publish many items to a single pubsub node with pipelined requests.
+
+    :param pubsub: The service to publish the items with.
+    :type pubsub: :class:`~.pubsub.Service`
+    :param jid: Address of the PubSub service.
+    :type jid: :class:`aioxmpp.structs.JID`
+    :param node: Name of the node.
+    :type node: :class:`str`
+    :param max_in_flight: Maximum number of publish requests which are sent
+                          and not answered yet.
+    :type max_in_flight: :class:`int`
+    :param max_queued: Maximum number of items waiting for a free request
+                       slot.
+    :type max_queued: :class:`int`
+
+    Use :meth:`.pubsub.Service.publisher` to create a publisher.
+
+    :xep:`0060` allows only a single item per publish request. Instead of
+    waiting for the reply to each request before sending the next one (as
+    sequential calls to :meth:`.pubsub.Service.publish` would do), the
+    publisher keeps up to `max_in_flight` requests in flight. Further items
+    are queued; once `max_queued` items are queued, :meth:`publish` blocks
+    until the service has caught up.
+
+    Items are sent in the order in which they have been passed to
+    :meth:`publish`, but as the requests are pipelined, the service may
+    process them in a different order.
+
+    .. automethod:: publish
+
+    .. automethod:: flush
+
+    .. automethod:: close
+
+    .. autoattribute:: pending
+
+    .. versionadded:: 0.7
+    """
+
+    def __init__(self, pubsub, jid, node, *,
+                 max_in_flight=16,
+                 max_queued=256):
+        super().__init__()
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be positive")
+        if max_queued < 0:
+            raise ValueError("max_queued must not be negative")
+
+        self._pubsub = pubsub
+        self._jid = jid
+        self._node = node
+        self._max_in_flight = max_in_flight
+        self._max_queued = max_queued
+
+        self._queue = collections.deque()
+        self._in_flight = {}
+        self._space_waiters = []
+        self._closed = False
+
+    @property
+    def pending(self):
+        """
+        The number of items which have been passed to :meth:`publish` and
+        have not been acknowledged by the service yet.
+        """
+        return len(self._queue) + len(self._in_flight)
+
+    def _has_space(self):
+        return (len(self._in_flight) < self._max_in_flight or
+                len(self._queue) < self._max_queued)
+
+    def _wake_space_waiters(self):
+        waiters, self._space_waiters = self._space_waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _send_queued(self):
+        while self._queue and len(self._in_flight) < self._max_in_flight:
+            payload, id_, fut = self._queue.popleft()
+            if fut.done():
+                # cancelled by the caller
+                continue
+
+            task = asyncio.async(self._pubsub.publish(
+                self._jid, self._node, payload,
+                id_=id_,
+            ))
+            self._in_flight[task] = fut
+            task.add_done_callback(functools.partial(self._publish_done, fut))
+
+    def _publish_done(self, fut, task):
+        self._in_flight.pop(task, None)
+
+        if not fut.done():
+            if task.cancelled():
+                fut.cancel()
+            elif task.exception() is not None:
+                fut.set_exception(task.exception())
+            else:
+                fut.set_result(task.result())
+
+        if not self._closed:
+            self._send_queued()
+        self._wake_space_waiters()
+
+    @asyncio.coroutine
+    def publish(self, payload, *, id_=None):
+        """
+        Queue the `payload` for publication, see
+        :meth:`.pubsub.Service.publish` for the meaning of the arguments.
+
+        If the queue is full, wait until there is space for the item.
+
+        Return an :class:`asyncio.Future` which receives the ID of the
+        published item, or the exception which occured while publishing it.
+        Cancelling the future before the item has been sent removes the item
+        from the queue.
+
+        :raises RuntimeError: if the publisher has been closed.
+        """
+        while True:
+            if self._closed:
+                raise RuntimeError("publisher is closed")
+            if self._has_space():
+                break
+            waiter = asyncio.Future()
+            self._space_waiters.append(waiter)
+            yield from waiter
+
+        fut = asyncio.Future()
+        self._queue.append((payload, id_, fut))
+        self._send_queued()
+        return fut
+
+    @asyncio.coroutine
+    def flush(self):
+        """
+        Wait until all items which have been queued so far have been
+        acknowledged by the service (or failed).
+        """
+        futures = [fut for _, _, fut in self._queue]
+        futures.extend(self._in_flight.values())
+        if futures:
+            yield from asyncio.wait(futures)
+
+    def close(self):
+        """
+        Stop publishing. Queued items are dropped, requests which have been
+        sent already are not waited for; the futures of both are cancelled.
+        Subsequent calls to :meth:`publish` raise :class:`RuntimeError`.
+
+        To publish all queued items before closing, call :meth:`flush` first.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        for _, _, fut in self._queue:
+            fut.cancel()
+        self._queue.clear()
+        for task in list(self._in_flight):
+            task.cancel()
+        self._wake_space_waiters()
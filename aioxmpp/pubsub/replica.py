@@ -0,0 +1,334 @@
+import asyncio
+import collections
+import logging
+
+import aioxmpp.callbacks
+
+from . import xso as pubsub_xso
+
+
+logger = logging.getLogger(__name__)
+
+
+class NodeReplica:
+    """
+    A local copy of the items of a pubsub node, kept up-to-date by the event
+    notifications of the node.
+
+    :param pubsub: The service to request the items with.
+    :type pubsub: :class:`~.pubsub.Service`
+    :param jid: Address of the PubSub service.
+    :type jid: :class:`aioxmpp.structs.JID`
+    :param node: Name of the node.
+    :type node: :class:`str`
+    :param max_items: Maximum number of items to keep, or :data:`None` for no
+                      limit.
+    :type max_items: :class:`int` or :data:`None`
+
+    Use :meth:`.pubsub.Service.replicate` to create a replica. The replica
+    does not subscribe to the node; a subscription (or :xep:`163` interest)
+    must exist for the notifications to arrive.
+
+    The items are keyed by their ID and ordered by the time they have been
+    published, oldest first. The initial items are taken in the order returned
+    by the service. An item which is published again with the same ID moves to
+    the end. If more than `max_items` items are known, the oldest ones are
+    dropped. Items without ID cannot be tracked and are ignored.
+
+    The items are :class:`~.pubsub.xso.Item` objects when they have been
+    obtained by :meth:`sync` and :class:`~.pubsub.xso.EventItem` objects when
+    they have been received with a notification. Both have the same
+    attributes for the ID and the payload.
+
+    All reads are answered from the local copy:
+
+    .. automethod:: get
+
+    .. automethod:: keys
+
+    .. automethod:: values
+
+    .. autoattribute:: latest
+
+    .. autoattribute:: synced
+
+    .. autoattribute:: deleted
+
+    The replica also supports :func:`len`, ``in`` (with item IDs) and
+    iteration (over the item IDs).
+
+    Whenever the stream is re-established, :meth:`sync` is called to catch up
+    with the changes which happened in the meantime. As notifications may have
+    been missed, the items are compared by ID with the current items of the
+    node and the signals are fired for the differences.
+
+    .. automethod:: sync
+
+    .. automethod:: close
+
+    .. signal:: on_item_published(id_, item)
+
+       An item has been added to the replica or replaced in it.
+
+    .. signal:: on_item_retracted(id_)
+
+       An item has been removed from the replica, because it has been
+       retracted, because the node has been purged or because it was not
+       present anymore during :meth:`sync`.
+       Items which are dropped because of `max_items` do not fire this signal.
+       This includes items missing from the result of :meth:`sync` when the
+       service returned `max_items` items, as they may only have been pushed
+       out by newer items.
+
+    .. signal:: on_node_deleted()
+
+       The node has been deleted. The replica is empty afterwards.
+
+    .. signal:: on_synced()
+
+       :meth:`sync` has finished successfully.
+
+    .. versionadded:: 0.7
+    """
+
+    on_item_published = aioxmpp.callbacks.Signal()
+    on_item_retracted = aioxmpp.callbacks.Signal()
+    on_node_deleted = aioxmpp.callbacks.Signal()
+    on_synced = aioxmpp.callbacks.Signal()
+
+    def __init__(self, pubsub, jid, node, *, max_items=None):
+        super().__init__()
+        if max_items is not None and max_items < 1:
+            raise ValueError("max_items must be positive")
+
+        self._pubsub = pubsub
+        self._jid = jid
+        self._node = node
+        self._max_items = max_items
+        self._items = collections.OrderedDict()
+        self._synced = False
+        self._deleted = False
+        self._sync_task = None
+        # changes received while a sync is in progress; the sync result must
+        # not override them
+        self._live_changes = None
+        self._deleted_during_sync = False
+
+        pubsub.register_node_callback(jid, node, self._handle_event)
+        self._stream_established_token = \
+            pubsub.client.on_stream_established.connect(
+                self._handle_stream_established
+            )
+        self._closed = False
+
+    @property
+    def jid(self):
+        return self._jid
+
+    @property
+    def node(self):
+        return self._node
+
+    @property
+    def synced(self):
+        """
+        Whether :meth:`sync` has completed at least once.
+        """
+        return self._synced
+
+    @property
+    def deleted(self):
+        """
+        Whether a notification about the deletion of the node has been
+        received since the last :meth:`sync`.
+        """
+        return self._deleted
+
+    @property
+    def latest(self):
+        """
+        The most recently published item, or :data:`None` if the replica is
+        empty.
+        """
+        if not self._items:
+            return None
+        return next(reversed(self._items.values()))
+
+    def get(self, id_, default=None):
+        """
+        Return the item with the ID `id_`, or `default` if it is not known.
+        """
+        return self._items.get(id_, default)
+
+    def keys(self):
+        """
+        Return a view of the IDs of the items, oldest first.
+        """
+        return self._items.keys()
+
+    def values(self):
+        """
+        Return a view of the items, oldest first.
+        """
+        return self._items.values()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, id_):
+        return id_ in self._items
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def _store(self, id_, item):
+        self._items.pop(id_, None)
+        self._items[id_] = item
+        if self._max_items is not None:
+            while len(self._items) > self._max_items:
+                self._items.popitem(last=False)
+
+    def _handle_published(self, item):
+        if item.id_ is None:
+            return
+        if self._live_changes is not None:
+            self._live_changes[item.id_] = item
+        self._deleted = False
+        self._store(item.id_, item)
+        self.on_item_published(item.id_, item)
+
+    def _handle_retracted(self, id_):
+        if self._live_changes is not None:
+            self._live_changes[id_] = None
+        if self._items.pop(id_, None) is not None:
+            self.on_item_retracted(id_)
+
+    def _handle_purged(self):
+        for id_ in list(self._items):
+            self._handle_retracted(id_)
+
+    def _handle_deleted(self):
+        # a sync in progress must not resurrect the items
+        if self._live_changes is not None:
+            self._deleted_during_sync = True
+        self._items.clear()
+        self._deleted = True
+        self.on_node_deleted()
+
+    def _handle_event(self, message, payload):
+        if isinstance(payload, pubsub_xso.EventItems):
+            for item in payload.items:
+                if item.node is None or item.node == self._node:
+                    self._handle_published(item)
+            for retract in payload.retracts:
+                self._handle_retracted(retract.id_)
+        elif isinstance(payload, pubsub_xso.EventPurge):
+            self._handle_purged()
+        elif isinstance(payload, pubsub_xso.EventDelete):
+            self._handle_deleted()
+
+    def _start_sync(self):
+        if self._sync_task is None or self._sync_task.done():
+            self._sync_task = asyncio.async(self._sync())
+        return self._sync_task
+
+    def _handle_stream_established(self):
+        if self._sync_task is not None and not self._sync_task.done():
+            return
+        self._start_sync().add_done_callback(self._sync_done)
+
+    def _sync_done(self, task):
+        if task.cancelled():
+            return
+        exc = task.exception()
+        if exc is not None:
+            logger.warning("failed to resync replica of %s at %s: %s",
+                           self._node, self._jid, exc)
+
+    @asyncio.coroutine
+    def sync(self):
+        """
+        Request the current items of the node and update the replica.
+
+        At most `max_items` of the most recent items are requested. Changes
+        received via notifications while the request is in progress take
+        precedence over the result; if the node is deleted in the meantime,
+        the result is discarded.
+
+        :meth:`on_item_published` and :meth:`on_item_retracted` are fired for
+        the IDs which have been added or removed. Items which have been
+        published again under a known ID are updated silently.
+
+        If an error occurs, the corresponding :class:`~.errors.XMPPError` is
+        raised and the replica is left unchanged.
+
+        Only one request is in progress at any time: if :meth:`sync` is called
+        while a sync is in progress (for example the one started when the
+        stream has been re-established), it waits for that sync and returns
+        (or raises) its result. Cancelling the call does not cancel the sync.
+        """
+        yield from asyncio.shield(self._start_sync())
+
+    @asyncio.coroutine
+    def _sync(self):
+        self._live_changes = collections.OrderedDict()
+        self._deleted_during_sync = False
+        try:
+            response = yield from self._pubsub.get_items(
+                self._jid, self._node,
+                max_items=self._max_items,
+            )
+            live_changes = self._live_changes
+        finally:
+            self._live_changes = None
+
+        if self._deleted_during_sync:
+            return
+
+        fetched_items = list(response.payload.items)
+        # with a full page, older items may still exist on the service
+        complete = (self._max_items is None or
+                    len(fetched_items) < self._max_items)
+        new_items = collections.OrderedDict(
+            (item.id_, item)
+            for item in fetched_items
+            if item.id_ is not None and item.id_ not in live_changes
+        )
+        for id_, item in live_changes.items():
+            if item is not None:
+                new_items[id_] = item
+
+        old_items = self._items
+        self._items = collections.OrderedDict()
+        for id_, item in new_items.items():
+            self._store(id_, item)
+        self._deleted = False
+        self._synced = True
+
+        if complete:
+            for id_ in old_items:
+                if id_ not in new_items:
+                    self.on_item_retracted(id_)
+        for id_, item in self._items.items():
+            if id_ not in live_changes and id_ not in old_items:
+                self.on_item_published(id_, item)
+        self.on_synced()
+
+    def close(self):
+        """
+        Stop tracking the node. The items stay available, but are not updated
+        anymore.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._pubsub.unregister_node_callback(
+            self._jid, self._node,
+            self._handle_event,
+        )
+        self._pubsub.client.on_stream_established.disconnect(
+            self._stream_established_token
+        )
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            self._sync_task = None
@@ -6,6 +6,167 @@ import aioxmpp.service
 import aioxmpp.stanza
 
 from . import xso as pubsub_xso
+from .publisher import Publisher
+from .replica import NodeReplica
+
+
+class ItemPager:
+    """
+    Page through the items of a pubsub node with :xep:`0059` result set
+    management.
+
+    :param service: The service to send the requests with.
+    :type service: :class:`Service`
+    :param jid: Address of the PubSub service.
+    :type jid: :class:`aioxmpp.structs.JID`
+    :param node: Name of the node.
+    :type node: :class:`str`
+    :param page_size: Maximum number of items per page.
+    :type page_size: :class:`int`
+    :param after: Start after the item with this ID.
+    :type after: :class:`str` or :data:`None`
+    :param before: Page backwards, starting before the item with this ID; the
+                   empty string starts at the end of the node.
+    :type before: :class:`str` or :data:`None`
+
+    Use :meth:`Service.iter_items` to create a pager. Pages are only requested
+    when :meth:`get` is called, one at a time, so that no more than one page
+    of items is held at any time; `page_size` thus bounds the memory used.
+
+    To resume an interrupted iteration later, save :attr:`cursor` and pass it
+    as `after` (or `before`, when paging backwards) to a new pager.
+
+    If the service does not support result set management and returns all
+    items at once, they are returned as a single page.
+
+    Fetching all items page by page looks like this::
+
+      pager = pubsub.iter_items(jid, node, page_size=50)
+      page = yield from pager.get()
+      while page is not None:
+          for item in page:
+              print(item.id_)
+          page = yield from pager.get()
+
+    In a native coroutine (Python 3.5 and newer), the pager is an asynchronous
+    iterator over the pages::
+
+      async for page in pubsub.iter_items(jid, node, page_size=50):
+          for item in page:
+              print(item.id_)
+
+    .. autoattribute:: cursor
+
+    .. autoattribute:: count
+
+    .. automethod:: get
+
+    .. versionadded:: 0.7
+    """
+
+    def __init__(self, service, jid, node, *,
+                 page_size=100,
+                 after=None,
+                 before=None):
+        super().__init__()
+        if page_size < 1:
+            raise ValueError("page_size must be positive")
+        if after is not None and before is not None:
+            raise ValueError("after and before are mutually exclusive")
+
+        self._service = service
+        self._jid = jid
+        self._node = node
+        self._page_size = page_size
+        self._reverse = before is not None
+        self._cursor = before if self._reverse else after
+        self._count = None
+        self._finished = False
+
+    @property
+    def cursor(self):
+        """
+        The ID of the item after which (or before which, when paging
+        backwards) the next page starts, or :data:`None` if no item has been
+        received yet.
+        """
+        return self._cursor
+
+    @property
+    def count(self):
+        """
+        The number of items in the node as reported by the service with the
+        last page, or :data:`None` if unknown.
+        """
+        return self._count
+
+    @asyncio.coroutine
+    def get(self):
+        """
+        Request the next page and return its :class:`.xso.Item` objects, in
+        the order returned by the service. Return :data:`None` once all items
+        have been returned.
+
+        If an error occurs, the corresponding :class:`~.errors.XMPPError` is
+        raised and :meth:`get` may be called again to retry.
+        """
+        if self._finished:
+            return None
+
+        rsm = pubsub_xso.ResultSet(max_=self._page_size)
+        if self._reverse:
+            rsm.before = self._cursor or ""
+        else:
+            rsm.after = self._cursor
+
+        iq = aioxmpp.stanza.IQ(to=self._jid, type_="get")
+        iq.payload = pubsub_xso.Request(
+            pubsub_xso.Items(self._node)
+        )
+        iq.payload.rsm = rsm
+
+        response = yield from \
+            self._service.client.stream.send_iq_and_wait_for_reply(iq)
+
+        items = list(response.payload.items)
+        result = response.rsm
+        if not items:
+            self._finished = True
+            return None
+
+        if result is None:
+            self._finished = True
+            return items
+
+        self._count = result.count
+        if self._reverse:
+            first = result.first
+            cursor = first.value if first is not None else None
+            if first is not None and first.index == 0:
+                self._finished = True
+        else:
+            cursor = result.last
+            index = result.first.index if result.first is not None else None
+            if (index is not None and result.count is not None and
+                    index + len(items) >= result.count):
+                self._finished = True
+
+        if cursor is None:
+            self._finished = True
+        else:
+            self._cursor = cursor
+
+        return items
+
+    def __aiter__(self):
+        return self
+
+    @asyncio.coroutine
+    def __anext__(self):
+        page = yield from self.get()
+        if page is None:
+            raise StopAsyncIteration
+        return page
 
 
 class Service(aioxmpp.service.Service):
@@ -29,6 +190,8 @@ class Service(aioxmpp.service.Service):
           get_items_by_id
           get_subscription_config
           get_subscriptions
+          iter_items
+          replicate
           set_subscription_config
           subscribe
           unsubscribe
@@ -43,6 +206,7 @@ class Service(aioxmpp.service.Service):
 
           notify
           publish
+          publisher
           retract
 
     Owner use cases:
@@ -82,12 +246,18 @@ class Service(aioxmpp.service.Service):
 
     .. automethod:: get_items_by_id
 
+    .. automethod:: iter_items
+
+    .. automethod:: replicate
+
     Publishing and retracting items:
 
     .. automethod:: notify
 
     .. automethod:: publish
 
+    .. automethod:: publisher
+
     .. automethod:: retract
 
     Manage nodes:
@@ -118,6 +288,14 @@ class Service(aioxmpp.service.Service):
 
     .. autosignal:: on_subscription_update(jid, node, state, *, subid=None, message=None)
 
+    The signals above fire once per item, for all nodes. Consumers which are
+    interested in specific nodes only, or which receive notifications with
+    many items, should register a callback for the node instead:
+
+    .. automethod:: register_node_callback
+
+    .. automethod:: unregister_node_callback
+
     """
 
     ORDER_AFTER = [
@@ -186,16 +364,74 @@ class Service(aioxmpp.service.Service):
     def __init__(self, client, **kwargs):
         super().__init__(client, **kwargs)
         self._disco = self._client.summon(aioxmpp.disco.Service)
+        self._node_callbacks = {}
 
         client.stream.service_inbound_message_filter.register(
             self.filter_inbound_message,
             type(self)
         )
 
+    def register_node_callback(self, jid, node, cb):
+        """
+        Register a callback function `cb` to be called for each event
+        notification about the pubsub `node` hosted at `jid`.
+
+        `cb` is called with the :class:`.stanza.Message` carrying the
+        notification and the payload of its :class:`.xso.Event`, for example
+        :class:`.xso.EventItems` or :class:`.xso.EventDelete`. All items and
+        retractions of a notification are thus delivered in a single call.
+
+        The callbacks are looked up by `jid` and `node` in a dictionary, so
+        notifications for other nodes cost nothing. Several callbacks may be
+        registered for the same node; they are called in the order of
+        registration and before the signals of the service fire. Exceptions
+        raised by a callback are logged and otherwise ignored.
+
+        .. versionadded:: 0.7
+        """
+        self._node_callbacks.setdefault((jid, node), []).append(cb)
+
+    def unregister_node_callback(self, jid, node, cb):
+        """
+        Unregister a callback previously registered with
+        :meth:`register_node_callback`.
+
+        Attempting to unregister a callback which has not been registered for
+        the `jid` and `node` results in a :class:`KeyError`.
+
+        .. versionadded:: 0.7
+        """
+        callbacks = self._node_callbacks[jid, node]
+        try:
+            callbacks.remove(cb)
+        except ValueError:
+            raise KeyError((jid, node)) from None
+        if not callbacks:
+            del self._node_callbacks[jid, node]
+
+    def _dispatch_node_event(self, msg, payload):
+        try:
+            key = msg.from_, payload.node
+        except AttributeError:
+            return
+        # copy, as callbacks may unregister themselves
+        for cb in list(self._node_callbacks.get(key, ())):
+            try:
+                cb(msg, payload)
+            except Exception:
+                self.logger.exception(
+                    "pubsub node callback %r for %r raised", cb, key
+                )
+
     def filter_inbound_message(self, msg):
-        if (msg.xep0060_event is not None and
-                msg.xep0060_event.payload is not None):
-            payload = msg.xep0060_event.payload
+        # read each descriptor at most once; for the common case of a
+        # message without pubsub payload, these are two dict lookups
+        event = msg.xep0060_event
+        payload = event.payload if event is not None else None
+        if payload is not None:
+            if self._node_callbacks:
+                self._dispatch_node_event(msg, payload)
+
             if isinstance(payload, pubsub_xso.EventItems):
                 for item in payload.items:
                     node = item.node or payload.node
@@ -221,9 +457,11 @@ class Service(aioxmpp.service.Service):
                     message=msg,
                 )
 
-        elif (msg.xep0060_request is not None and
-              msg.xep0060_request.payload is not None):
-            payload = msg.xep0060_request.payload
+            return None
+
+        request = msg.xep0060_request
+        payload = request.payload if request is not None else None
+        if payload is not None:
             if isinstance(payload, pubsub_xso.Affiliations):
                 for item in payload.affiliations:
                     self.on_affiliation_update(
@@ -241,8 +479,9 @@ class Service(aioxmpp.service.Service):
                         subid=item.subid,
                         message=msg,
                     )
-        else:
-            return msg
+            return None
+
+        return msg
 
     @asyncio.coroutine
     def get_features(self, jid):
@@ -474,6 +713,45 @@ class Service(aioxmpp.service.Service):
 
         return (yield from self.client.stream.send_iq_and_wait_for_reply(iq))
 
+    def iter_items(self, jid, node, *, page_size=100, after=None,
+                   before=None):
+        """
+        Page through the items of the pubsub `node` hosted at `jid` using
+        :xep:`0059` result set management.
+
+        Return an :class:`ItemPager`; see there for the meaning of the
+        arguments. Unlike :meth:`get_items`, this does not require the service
+        to return all items in a single stanza.
+
+        .. versionadded:: 0.7
+        """
+        return ItemPager(self, jid, node,
+                         page_size=page_size,
+                         after=after,
+                         before=before)
+
+    @asyncio.coroutine
+    def replicate(self, jid, node, *, max_items=None):
+        """
+        Create a :class:`NodeReplica` of the pubsub `node` hosted at `jid`
+        and fill it with the current items of the node.
+
+        `max_items` limits the number of items kept locally; see
+        :class:`NodeReplica` for details. If the initial request fails, the
+        corresponding :class:`~.errors.XMPPError` is raised.
+
+        Call :meth:`NodeReplica.close` when the replica is not needed anymore.
+
+        .. versionadded:: 0.7
+        """
+        replica = NodeReplica(self, jid, node, max_items=max_items)
+        try:
+            yield from replica.sync()
+        except:
+            replica.close()
+            raise
+        return replica
+
     @asyncio.coroutine
     def get_subscriptions(self, jid, node=None):
         """
@@ -526,6 +804,20 @@ class Service(aioxmpp.service.Service):
             return response.payload.item.id_ or id_
         return id_
 
+    def publisher(self, jid, node, *, max_in_flight=16, max_queued=256):
+        """
+        Return a :class:`Publisher` which publishes many items to the `node`
+        at `jid` with pipelined requests.
+
+        See :class:`Publisher` for the meaning of the arguments. Call
+        :meth:`Publisher.close` when the publisher is not needed anymore.
+
+        .. versionadded:: 0.7
+        """
+        return Publisher(self, jid, node,
+                         max_in_flight=max_in_flight,
+                         max_queued=max_queued)
+
     @asyncio.coroutine
     def notify(self, jid, node):
         """
@@ -99,6 +99,7 @@ namespaces.xep0060 = "http://jabber.org/protocol/pubsub"
 namespaces.xep0060_errors = "http://jabber.org/protocol/pubsub#errors"
 namespaces.xep0060_event = "http://jabber.org/protocol/pubsub#event"
 namespaces.xep0060_owner = "http://jabber.org/protocol/pubsub#owner"
+namespaces.xep0059 = "http://jabber.org/protocol/rsm"
 
 
 class Affiliation(xso.XSO):
@@ -236,6 +237,124 @@ class Items(xso.XSO):
         self.max_items = max_items
 
 
+class ResultSetFirst(xso.XSO):
+    """
+    The ``<first/>`` element of a :class:`ResultSet`.
+
+    .. attribute:: index
+
+       The position of the first item of the page in the full result set, or
+       :data:`None`.
+
+    .. attribute:: value
+
+       The ID of the first item of the page.
+
+    .. versionadded:: 0.7
+    """
+    TAG = (namespaces.xep0059, "first")
+
+    index = xso.Attr(
+        "index",
+        type_=xso.Integer(),
+        default=None,
+    )
+
+    value = xso.Text()
+
+    def __init__(self, value=None, index=None):
+        super().__init__()
+        self.value = value
+        self.index = index
+
+
+class ResultSet(xso.XSO):
+    """
+    A :xep:`0059` result set (``<set/>``), used to page through the items of
+    a node.
+
+    In requests:
+
+    .. attribute:: max_
+
+       The maximum number of items to return.
+
+    .. attribute:: after
+
+       Return the items after the item with this ID.
+
+    .. attribute:: before
+
+       Return the items before the item with this ID. The empty string
+       requests the last page.
+
+    .. attribute:: index
+
+       Return the items starting at this position.
+
+    In responses:
+
+    .. attribute:: count
+
+       The number of items in the full result set, or :data:`None`.
+
+    .. attribute:: first
+
+       The :class:`ResultSetFirst` of the page, or :data:`None` if the page is
+       empty.
+
+    .. attribute:: last
+
+       The ID of the last item of the page, or :data:`None` if the page is
+       empty.
+
+    .. versionadded:: 0.7
+    """
+    TAG = (namespaces.xep0059, "set")
+
+    max_ = xso.ChildText(
+        (namespaces.xep0059, "max"),
+        type_=xso.Integer(),
+        default=None,
+    )
+
+    after = xso.ChildText(
+        (namespaces.xep0059, "after"),
+        default=None,
+    )
+
+    before = xso.ChildText(
+        (namespaces.xep0059, "before"),
+        default=None,
+    )
+
+    index = xso.ChildText(
+        (namespaces.xep0059, "index"),
+        type_=xso.Integer(),
+        default=None,
+    )
+
+    count = xso.ChildText(
+        (namespaces.xep0059, "count"),
+        type_=xso.Integer(),
+        default=None,
+    )
+
+    first = xso.Child([ResultSetFirst])
+
+    last = xso.ChildText(
+        (namespaces.xep0059, "last"),
+        default=None,
+    )
+
+    def __init__(self, *, max_=None, after=None, before=None, index=None):
+        super().__init__()
+        self.max_ = max_
+        self.after = after
+        self.before = before
+        self.index = index
+
+
 class Options(xso.XSO):
     TAG = (namespaces.xep0060, "options")
 
@@ -452,6 +571,13 @@ class Request(xso.XSO):
        available here. If they are used without another payload, the
        :attr:`payload` attribute is :data:`None`.
 
+    .. attribute:: rsm
+
+       The :class:`ResultSet` used to page through the items of a node, or
+       :data:`None`.
+
+       .. versionadded:: 0.7
+
     """
     TAG = (namespaces.xep0060, "pubsub")
 
@@ -476,6 +602,10 @@ class Request(xso.XSO):
         Configure,
     ])
 
+    rsm = xso.Child([
+        ResultSet,
+    ])
+
     def __init__(self, payload=None):
         super().__init__()
         self.payload = payload
@@ -29,6 +29,24 @@ The stream feature which is used by servers to announce support for roster
 versioning:
 
 .. autoclass:: RosterVersioningFeature()
+
+.. module:: aioxmpp.roster.storage
+
+.. currentmodule:: aioxmpp.roster.storage
+
+:mod:`.roster.storage` --- Persistent roster storage
+====================================================
+
+Roster versioning (:rfc:`6121`, section 2.6) only pays off if the local copy
+of the roster survives restarts. The stores in the submodule
+:mod:`aioxmpp.roster.storage` persist the roster incrementally: each roster
+push is recorded as a small delta together with the new roster version, so
+that large rosters do not have to be serialised completely whenever they
+change. Use :meth:`.roster.Service.attach_store` to attach a store.
+
+.. autoclass:: AbstractStore
+
+.. autoclass:: LogStore
 """
 
 from .service import Service, Item  # NOQA
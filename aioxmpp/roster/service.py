@@ -1,4 +1,5 @@
 import asyncio
+import collections
 import logging
 
 import aioxmpp.service
@@ -254,6 +255,41 @@ class Service(aioxmpp.service.Service):
        already removed from all bookkeeping structures, but the values on the
        `item` object are the same as right before the removal.
 
+    .. signal:: on_roster_resynced(added, removed, changed)
+
+       Fires when the server sent the complete roster (instead of pushing
+       incremental updates) and the local roster has been reconciled with it.
+       `added`, `removed` and `changed` are lists of the :class:`Item`
+       instances which have been added, removed or modified respectively.
+
+       The signal fires after the per-entry signals above and before
+       :meth:`on_initial_roster_received`.
+
+       .. versionadded:: 0.7
+
+    Reconciliation of a complete roster sent by the server can be tuned with
+    the following attributes:
+
+    .. attribute:: fire_entry_events_on_resync
+
+       If true (the default), the per-entry signals (such as
+       :meth:`on_entry_added`) fire for each change found while reconciling
+       the local roster with a complete roster sent by the server. Users which
+       only listen to :meth:`on_roster_resynced` can set this to false to skip
+       them.
+
+       .. versionadded:: 0.7
+
+    .. attribute:: resync_chunk_size
+
+       If not :data:`None`, the reconciliation yields to the event loop after
+       each `resync_chunk_size` entries, so that very large rosters do not
+       block other tasks. Roster pushes received while the reconciliation
+       is in progress are applied after it has completed. The default is
+       :data:`None`.
+
+       .. versionadded:: 0.7
+
     Modifying roster contents:
 
     .. automethod:: set_entry
@@ -316,6 +352,20 @@ class Service(aioxmpp.service.Service):
     needs to happen after a new :class:`Service` has been created, as roster
     services won’t delete roster contents between two connections on the same
     :class:`.node.AbstractClient` instance.
+
+    Instead of exporting and importing the whole roster, a store from
+    :mod:`aioxmpp.roster.storage` can be attached. The store then receives
+    each change of the roster as it happens:
+
+    .. automethod:: attach_store
+
+    .. attribute:: store
+
+       The store attached with :meth:`attach_store` or :data:`None`.
+
+    .. versionadded:: 0.7
+
+       The :meth:`attach_store` method and the :attr:`store` attribute.
     """
 
     on_initial_roster_received = callbacks.Signal()
@@ -325,12 +375,16 @@ class Service(aioxmpp.service.Service):
     on_entry_added = callbacks.Signal()
     on_entry_added_to_group = callbacks.Signal()
     on_entry_removed_from_group = callbacks.Signal()
+    on_roster_resynced = callbacks.Signal()
 
     on_subscribed = callbacks.Signal()
     on_subscribe = callbacks.Signal()
     on_unsubscribed = callbacks.Signal()
     on_unsubscribe = callbacks.Signal()
 
+    fire_entry_events_on_resync = True
+    resync_chunk_size = None
+
     def __init__(self, client):
         super().__init__(client)
 
@@ -362,6 +416,8 @@ class Service(aioxmpp.service.Service):
         self.items = {}
         self.groups = {}
         self.version = None
+        self.store = None
+        self._pending_pushes = None
 
     @asyncio.coroutine
     def _shutdown(self):
@@ -425,6 +481,94 @@ class Service(aioxmpp.service.Service):
                 del self.groups[group]
             self.on_entry_removed_from_group(stored_item, group)
 
+    def _remove_from_groups(self, item, groups):
+        for group in groups:
+            groupset = self.groups[group]
+            groupset.remove(item)
+            if not groupset:
+                del self.groups[group]
+
+    @asyncio.coroutine
+    def _resync(self, xso_items):
+        fire_events = self.fire_entry_events_on_resync
+        chunk_size = self.resync_chunk_size
+
+        actual = collections.OrderedDict(
+            (xso_item.jid, xso_item)
+            for xso_item in xso_items
+        )
+
+        added = []
+        removed = []
+        changed = []
+
+        for jid in [jid for jid in self.items if jid not in actual]:
+            old_item = self.items.pop(jid)
+            self._remove_from_groups(old_item, old_item.groups)
+            removed.append(old_item)
+            if fire_events:
+                self.on_entry_removed(old_item)
+
+        logger.debug("%d jids dropped", len(removed))
+
+        for i, (jid, xso_item) in enumerate(actual.items(), 1):
+            if chunk_size and i % chunk_size == 0:
+                yield from asyncio.sleep(0)
+
+            stored_item = self.items.get(jid)
+            if stored_item is None:
+                stored_item = Item.from_xso_item(xso_item)
+                self.items[jid] = stored_item
+                for group in stored_item.groups:
+                    self.groups.setdefault(group, set()).add(stored_item)
+                added.append(stored_item)
+                if fire_events:
+                    self.on_entry_added(stored_item)
+                continue
+
+            new_groups = {group.name for group in xso_item.groups}
+            name_changed = stored_item.name != xso_item.name
+            subscription_changed = (
+                stored_item.subscription != xso_item.subscription or
+                stored_item.approved != xso_item.approved or
+                stored_item.ask != xso_item.ask
+            )
+            if     (not name_changed and
+                    not subscription_changed and
+                    new_groups == stored_item.groups):
+                continue
+
+            old_groups = stored_item.groups
+            stored_item.subscription = xso_item.subscription
+            stored_item.approved = xso_item.approved
+            stored_item.ask = xso_item.ask
+            stored_item.name = xso_item.name
+            stored_item.groups = new_groups
+            changed.append(stored_item)
+
+            added_to_groups = new_groups - old_groups
+            removed_from_groups = old_groups - new_groups
+            for group in added_to_groups:
+                self.groups.setdefault(group, set()).add(stored_item)
+            self._remove_from_groups(stored_item, removed_from_groups)
+
+            if not fire_events:
+                continue
+
+            if name_changed:
+                self.on_entry_name_changed(stored_item)
+            if subscription_changed:
+                self.on_entry_subscription_state_changed(stored_item)
+            for group in added_to_groups:
+                self.on_entry_added_to_group(stored_item, group)
+            for group in removed_from_groups:
+                self.on_entry_removed_from_group(stored_item, group)
+
+        logger.debug("%d jids added, %d jids changed",
+                     len(added), len(changed))
+
+        self.on_roster_resynced(added, removed, changed)
+
     @asyncio.coroutine
     def handle_roster_push(self, iq):
         if iq.from_:
@@ -432,23 +576,50 @@ class Service(aioxmpp.service.Service):
 
         request = iq.payload
 
+        if self._pending_pushes is not None:
+            # a resync is in progress; applying the push now would let the
+            # (older) full roster overwrite it
+            logger.debug("deferring roster push until resync completes")
+            self._pending_pushes.append(request)
+            return
+
+        changes = self._apply_push(request)
+
+        if self.store is not None:
+            self._store_changes(changes)
+
+    def _apply_push(self, request):
+        changes = {}
         for item in request.items:
             if item.subscription == "remove":
+                changes[str(item.jid)] = None
                 try:
                     old_item = self.items.pop(item.jid)
                 except KeyError:
                     pass
                 else:
-                    for group in old_item.groups:
-                        groupset = self.groups[group]
-                        groupset.remove(old_item)
-                        if not groupset:
-                            del self.groups[group]
+                    self._remove_from_groups(old_item, old_item.groups)
                     self.on_entry_removed(old_item)
             else:
                 self._update_entry(item)
+                changes[str(item.jid)] = self.items[item.jid].export_as_json()
 
         self.version = request.ver
+        return changes
+
+    def _store_changes(self, changes):
+        if self.store.write_failed:
+            logger.debug("roster store failed before, writing a snapshot")
+            self._store_snapshot()
+            return
+
+        self.store.append(changes, self.version)
+        if self.store.needs_compaction:
+            logger.debug("compacting roster store")
+            self._store_snapshot()
+
+    def _store_snapshot(self):
+        self.store.write_snapshot(self.export_as_json())
 
     def handle_subscribe(self, stanza):
         self.on_subscribe(stanza)
@@ -484,22 +655,20 @@ class Service(aioxmpp.service.Service):
             self.on_initial_roster_received()
             return True
 
-        self.version = response.ver
-        logger.debug("roster update received (new ver = %s)", self.version)
-
-        actual_jids = {item.jid for item in response.items}
-        known_jids = set(self.items.keys())
+        logger.debug("roster update received (new ver = %s)", response.ver)
 
-        removed_jids = known_jids - actual_jids
-        logger.debug("jids dropped: %r", removed_jids)
+        self._pending_pushes = []
+        try:
+            yield from self._resync(response.items)
+        finally:
+            pending, self._pending_pushes = self._pending_pushes, None
 
-        for removed_jid in removed_jids:
-            old_item = self.items.pop(removed_jid)
-            self.on_entry_removed(old_item)
+        self.version = response.ver
+        for request in pending:
+            self._apply_push(request)
 
-        logger.debug("jids updated: %r", actual_jids - removed_jids)
-        for item in response.items:
-            self._update_entry(item)
+        if self.store is not None:
+            self._store_snapshot()
 
         self.on_initial_roster_received()
         return True
@@ -541,6 +710,29 @@ class Service(aioxmpp.service.Service):
             for group in item.groups:
                 self.groups.setdefault(group, set()).add(item)
 
+    def attach_store(self, store):
+        """
+        Load the roster from `store` and record all future changes in it.
+
+        :param store: The store to use.
+        :type store: :class:`~.roster.storage.AbstractStore`
+
+        The current roster is replaced with the contents of `store`, without
+        firing any events (like with :meth:`import_from_json`). Afterwards,
+        each roster push is recorded in the store as delta, and whenever the
+        server sends the complete roster, a new snapshot is written.
+
+        Like :meth:`import_from_json`, this must be called before the stream
+        is established to make use of roster versioning.
+
+        Errors while writing to the store do not affect the processing of
+        roster updates. If the store reports a failed write (see
+        :attr:`~.roster.storage.AbstractStore.write_failed`), a complete
+        snapshot is written with the next change instead of a delta.
+        """
+        self.import_from_json(store.load())
+        self.store = store
+
     @asyncio.coroutine
     def set_entry(self, jid, *,
                   name=_Sentinel,
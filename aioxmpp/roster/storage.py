@@ -0,0 +1,361 @@
+import abc
+import concurrent.futures
+import json
+import logging
+import os
+import tempfile
+import uuid
+
+
+logger = logging.getLogger(__name__)
+
+
+class AbstractStore(metaclass=abc.ABCMeta):
+    """
+    Interface for roster storage backends.
+
+    The data exchanged with the store uses the format of
+    :meth:`.roster.Service.export_as_json`. Roster entries are keyed by the
+    string representation of their bare JID and are represented by the
+    dictionaries returned by :meth:`.roster.Item.export_as_json`.
+
+    The methods are called from the event loop. Implementations which do
+    blocking I/O should do it in the background, like :class:`LogStore`.
+    Errors while writing must not be raised from :meth:`append` and
+    :meth:`write_snapshot`; instead, :attr:`write_failed` reports them.
+
+    .. automethod:: load
+
+    .. automethod:: append
+
+    .. automethod:: write_snapshot
+
+    .. autoattribute:: needs_compaction
+
+    .. autoattribute:: write_failed
+
+    .. automethod:: close
+    """
+
+    @abc.abstractmethod
+    def load(self):
+        """
+        Return the stored roster as dictionary in the format of
+        :meth:`.roster.Service.export_as_json`.
+
+        If nothing has been stored yet, an empty roster without version is
+        returned.
+        """
+
+    @abc.abstractmethod
+    def append(self, changes, ver):
+        """
+        Record a change of the roster.
+
+        :param changes: Changed entries
+        :type changes: :class:`dict`
+        :param ver: The roster version after the change
+        :type ver: :class:`str` or :data:`None`
+
+        `changes` maps the string representation of bare JIDs to the new
+        data of the entry, or to :data:`None` if the entry has been removed.
+
+        The changes and the version must be recorded atomically: a later
+        :meth:`load` must either see all of them or none.
+        """
+
+    @abc.abstractmethod
+    def write_snapshot(self, data):
+        """
+        Replace the stored roster with `data`, which must be in the format of
+        :meth:`.roster.Service.export_as_json`.
+
+        This is used when the server sends the complete roster and for
+        compaction.
+        """
+
+    @property
+    def needs_compaction(self):
+        """
+        Whether the store would like to receive a fresh snapshot via
+        :meth:`write_snapshot` to reduce the amount of recorded deltas.
+
+        The default implementation always returns :data:`False`.
+        """
+        return False
+
+    @property
+    def write_failed(self):
+        """
+        Whether writing to the store has failed since the last successful
+        :meth:`write_snapshot`.
+
+        While this is true, the store does not record changes passed to
+        :meth:`append`, as they would be recorded with a version which does
+        not match the stored roster. The roster service writes a fresh
+        snapshot with the next change, which repairs the store.
+
+        The default implementation always returns :data:`False`.
+        """
+        return False
+
+    def close(self):
+        """
+        Release any resources held by the store. The default implementation
+        does nothing.
+        """
+
+
+class LogStore(AbstractStore):
+    """
+    Store the roster in a directory using a snapshot and an append-only log.
+
+    :param path: Directory to store the data in; it must exist.
+    :type path: :class:`pathlib.Path`
+    :param compact_after: Number of log records after which compaction is
+                          requested.
+    :type compact_after: :class:`int`
+    :param fsync: Whether to :func:`os.fsync` after each write.
+    :type fsync: :class:`bool`
+
+    The snapshot is stored in ``roster.json`` and is always replaced
+    atomically. Each call to :meth:`append` writes a single line to
+    ``roster.log``. A line which has not been written completely (for example
+    because the process crashed) is ignored and discarded on the next
+    :meth:`load`.
+
+    Once `compact_after` records have been appended since the last snapshot,
+    :attr:`needs_compaction` becomes true.
+
+    Each snapshot carries a random identifier, which is also written at the
+    start of the log which belongs to it. On :meth:`load`, a log which does
+    not belong to the snapshot is discarded. Thus, a crash between replacing
+    the snapshot and starting the new log cannot replay old records on top
+    of the new snapshot, and if replacing the snapshot fails, the old
+    snapshot and its log stay in use.
+
+    The files are written in a background thread, in the order of the calls
+    to :meth:`append` and :meth:`write_snapshot`, so that writing (and
+    :func:`os.fsync`) does not block the event loop. :meth:`load` and
+    :meth:`close` wait for all pending writes.
+
+    If a write fails, the error is logged, :attr:`write_failed` becomes true
+    and the stored snapshot and log are removed, so that a later
+    :meth:`load` returns an empty roster without version and the complete
+    roster is requested from the server. Changes passed to :meth:`append`
+    are dropped until a snapshot has been written successfully.
+    """
+
+    SNAPSHOT_NAME = "roster.json"
+    LOG_NAME = "roster.log"
+
+    def __init__(self, path, *, compact_after=1000, fsync=False):
+        super().__init__()
+        self._path = path
+        self._compact_after = compact_after
+        self._fsync = fsync
+        self._log = None
+        self._log_id = None
+        self._log_records = 0
+        self._executor = None
+        self._write_failed = False
+
+    @property
+    def snapshot_path(self):
+        return self._path / self.SNAPSHOT_NAME
+
+    @property
+    def log_path(self):
+        return self._path / self.LOG_NAME
+
+    def _submit(self, fn, *args):
+        # a single worker keeps the writes in order
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1
+            )
+        return self._executor.submit(fn, *args)
+
+    def _submit_write(self, fn, *args):
+        self._submit(fn, *args).add_done_callback(self._write_done)
+
+    def _write_done(self, fut):
+        # runs in the worker thread, before the next write is started
+        exc = fut.exception()
+        if exc is None:
+            return
+
+        logger.error("failed to write roster store in %s", self._path,
+                     exc_info=exc)
+        self._write_failed = True
+        self._close_log()
+        # without the files, the complete roster is requested the next time
+        for path in [self.snapshot_path, self.log_path]:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError:
+                logger.exception("failed to remove %s", path)
+
+    def _sync(self, f):
+        f.flush()
+        if self._fsync:
+            os.fsync(f.fileno())
+
+    def _open_log(self):
+        if self._log is None:
+            self._log = self.log_path.open("ab")
+            if self._log.tell() == 0 and self._log_id is not None:
+                self._write_log_header()
+        return self._log
+
+    def _write_log_header(self):
+        self._log.write(json.dumps(
+            {"log_id": self._log_id},
+            separators=(",", ":"),
+        ).encode("utf-8") + b"\n")
+
+    def _close_log(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def _load(self):
+        if self._write_failed:
+            return {"items": {}, "ver": None}
+
+        try:
+            with self.snapshot_path.open("rb") as f:
+                data = json.loads(f.read().decode("utf-8"))
+        except FileNotFoundError:
+            data = {}
+
+        self._log_id = data.pop("log_id", None)
+        items = data.setdefault("items", {})
+        data.setdefault("ver", None)
+
+        self._close_log()
+        self._log_records = 0
+        try:
+            f = self.log_path.open("rb")
+        except FileNotFoundError:
+            return data
+
+        with f:
+            good_offset = 0
+            log_id = None
+            for i, line in enumerate(f):
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("incomplete record")
+                    record = json.loads(line.decode("utf-8"))
+                except ValueError:
+                    logger.warning(
+                        "discarding incomplete roster log record at offset %d"
+                        " in %s",
+                        good_offset,
+                        self.log_path,
+                    )
+                    break
+
+                if i == 0 and "log_id" in record:
+                    log_id = record["log_id"]
+                    if log_id != self._log_id:
+                        break
+                    good_offset += len(line)
+                    continue
+
+                if log_id != self._log_id:
+                    break
+
+                for jid, item_data in record["items"].items():
+                    if item_data is None:
+                        items.pop(jid, None)
+                    else:
+                        items[jid] = item_data
+                data["ver"] = record["ver"]
+                good_offset += len(line)
+                self._log_records += 1
+            else:
+                return data
+
+        if log_id != self._log_id:
+            logger.info("discarding roster log %s which does not belong to"
+                        " the snapshot", self.log_path)
+            good_offset = 0
+
+        with self.log_path.open("r+b") as f:
+            f.truncate(good_offset)
+
+        return data
+
+    def load(self):
+        return self._submit(self._load).result()
+
+    def _append(self, record):
+        if self._write_failed:
+            return
+        f = self._open_log()
+        f.write(record)
+        self._sync(f)
+
+    def append(self, changes, ver):
+        record = json.dumps(
+            {
+                "items": changes,
+                "ver": ver,
+            },
+            separators=(",", ":"),
+        ).encode("utf-8") + b"\n"
+
+        self._submit_write(self._append, record)
+        self._log_records += 1
+
+    def _write_snapshot(self, serialised, log_id):
+        with tempfile.NamedTemporaryFile(dir=str(self._path),
+                                         delete=False) as tmpf:
+            try:
+                tmpf.write(serialised)
+                self._sync(tmpf)
+            except:
+                os.unlink(tmpf.name)
+                raise
+        try:
+            os.replace(tmpf.name, str(self.snapshot_path))
+        except:
+            os.unlink(tmpf.name)
+            raise
+
+        self._close_log()
+        self._log_id = log_id
+        self._log = self.log_path.open("wb")
+        self._write_log_header()
+        self._sync(self._log)
+        self._write_failed = False
+
+    def write_snapshot(self, data):
+        log_id = uuid.uuid4().hex
+        data = dict(data)
+        data["log_id"] = log_id
+        serialised = json.dumps(
+            data,
+            separators=(",", ":"),
+        ).encode("utf-8")
+
+        self._submit_write(self._write_snapshot, serialised, log_id)
+        self._log_records = 0
+
+    @property
+    def needs_compaction(self):
+        return self._log_records >= self._compact_after
+
+    @property
+    def write_failed(self):
+        return self._write_failed
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.submit(self._close_log)
+            self._executor.shutdown(wait=True)
+            self._executor = None
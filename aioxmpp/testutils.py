@@ -104,6 +104,7 @@ class ConnectedClientMock(unittest.mock.Mock):
         ])
 
         self.established = True
+        self.loop = asyncio.get_event_loop()
 
         self.stream_features = nonza.StreamFeatures()
         self.stream.send_iq_and_wait_for_reply = CoroutineMock()
@@ -523,6 +524,11 @@ class XMLStreamMock(InteractivityMock):
                                    post_handshake_callback,
                                    response)
 
+    class StartCompression(collections.namedtuple("StartCompression", [
+            "level", "response"])):
+        def __new__(cls, level, *, response=None):
+            return super().__new__(cls, level, response)
+
     on_closing = callbacks.Signal()
 
     def __init__(self, tester, *, loop=None):
@@ -572,6 +578,8 @@ class XMLStreamMock(InteractivityMock):
                     yield from self._starttls(*args)
                 elif action == "abort":
                     yield from self._abort(*args)
+                elif action == "start_compression":
+                    yield from self._start_compression(*args)
                 else:
                     assert False
 
@@ -659,11 +667,38 @@ class XMLStreamMock(InteractivityMock):
 
         self._execute_response(head.response)
 
+    @asyncio.coroutine
+    def _start_compression(self, compression):
+        self._tester.assertTrue(
+            self._actions,
+            self._format_unexpected_action("start_compression",
+                                           "no actions left"),
+        )
+        head = self._actions[0]
+        self._tester.assertIsInstance(
+            head, self.StartCompression,
+            self._format_unexpected_action("start_compression",
+                                           "expected something else"),
+        )
+        self._actions.pop(0)
+
+        self._tester.assertEqual(
+            compression.level,
+            head.level,
+            "mismatched start_compression argument")
+
+        self._execute_response(head.response)
+
     def send_xso(self, obj):
         if self._exception:
             raise self._exception
         self._queue.put_nowait(("send", obj))
 
+    def start_compression(self, compression):
+        if self._exception:
+            raise self._exception
+        self._queue.put_nowait(("start_compression", compression))
+
     def reset(self):
         if self._exception:
             raise self._exception
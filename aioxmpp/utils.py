@@ -11,6 +11,8 @@ namespaces = types.SimpleNamespace()
 namespaces.xmlstream = "http://etherx.jabber.org/streams"
 namespaces.client = "jabber:client"
 namespaces.starttls = "urn:ietf:params:xml:ns:xmpp-tls"
+namespaces.compression = "http://jabber.org/protocol/compress"
+namespaces.compression_feature = "http://jabber.org/features/compress"
 namespaces.sasl = "urn:ietf:params:xml:ns:xmpp-sasl"
 namespaces.stanzas = "urn:ietf:params:xml:ns:xmpp-stanzas"
 namespaces.streams = "urn:ietf:params:xml:ns:xmpp-streams"
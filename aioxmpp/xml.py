@@ -30,10 +30,14 @@ instances, the following classes and functions can be used:
 
 .. autoclass:: XMPPXMLProcessor
 
+.. autoclass:: XMLLimits
+
 .. autoclass:: XMPPLexicalHandler
 
 .. autofunction:: make_parser
 
+.. autofunction:: get_current_byte_index
+
 Utility functions
 =================
 
@@ -47,12 +51,13 @@ Utility functions
 
 """
 
+import collections
 import ctypes
 import io
 import os
+import re
 
 import xml.sax
-import xml.sax.saxutils
 
 from enum import Enum
 
@@ -76,6 +81,67 @@ def xmlValidateNameValue_buf(b):
     return bool(libxml2.xmlValidateNameValue(b))
 
 
+# a single scan finds both the characters which are illegal in XML 1.0 and
+# those which need escaping; text without any of them (which is the common
+# case, e.g. for base64 payloads) is encoded directly
+_TEXT_SPECIAL = re.compile("[&<>\x00-\x08\x0b\x0c\x0e-\x1f]")
+_TEXT_FORBIDDEN = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_ATTR_SPECIAL = re.compile("[&<>\"'\n\r\t]")
+
+
+def _escape_text(chars):
+    """
+    Validate and escape `chars` for use as character data and return the
+    UTF-8 encoded result.
+
+    Raise :class:`ValueError` if `chars` contains ASCII control characters.
+    """
+    if _TEXT_SPECIAL.search(chars) is None:
+        return chars.encode("utf-8")
+    if _TEXT_FORBIDDEN.search(chars) is not None:
+        raise ValueError("control characters are not allowed in "
+                         "well-formed XML")
+    return chars.replace(
+        "&", "&amp;"
+    ).replace(
+        ">", "&gt;"
+    ).replace(
+        "<", "&lt;"
+    ).encode("utf-8")
+
+
+def _quote_attr(value):
+    """
+    Escape and quote `value` for use as attribute value and return the UTF-8
+    encoded result.
+
+    The output is the same as :func:`xml.sax.saxutils.quoteattr`.
+    """
+    if _ATTR_SPECIAL.search(value) is None:
+        return b'"' + value.encode("utf-8") + b'"'
+
+    value = value.replace(
+        "&", "&amp;"
+    ).replace(
+        ">", "&gt;"
+    ).replace(
+        "<", "&lt;"
+    ).replace(
+        "\n", "&#10;"
+    ).replace(
+        "\r", "&#13;"
+    ).replace(
+        "\t", "&#9;"
+    )
+
+    if '"' in value:
+        if "'" in value:
+            value = value.replace('"', "&quot;")
+        else:
+            return b"'" + value.encode("utf-8") + b"'"
+    return b'"' + value.encode("utf-8") + b'"'
+
+
 class AbortStream(Exception):
     """
     This is a signal exception which causes :func:`write_xmlstream` to stop
@@ -340,7 +406,7 @@ class XMPPXMLGenerator:
         if None in pending_prefixes:
             uri = pending_prefixes.pop(None)
             self._write(b" xmlns=")
-            self._write(xml.sax.saxutils.quoteattr(uri).encode("utf-8"))
+            self._write(_quote_attr(uri))
 
         for prefix, uri in sorted(pending_prefixes.items()):
             self._write(b" xmlns")
@@ -348,9 +414,7 @@ class XMPPXMLGenerator:
                 self._write(b":")
                 self._write(prefix.encode("utf-8"))
             self._write(b"=")
-            self._write(
-                xml.sax.saxutils.quoteattr(uri).encode("utf-8")
-            )
+            self._write(_quote_attr(uri))
 
         if self._sorted_attributes:
             attrib.sort()
@@ -359,9 +423,7 @@ class XMPPXMLGenerator:
             self._write(b" ")
             self._write(attrname.encode("utf-8"))
             self._write(b"=")
-            self._write(
-                xml.sax.saxutils.quoteattr(value).encode("utf-8")
-            )
+            self._write(_quote_attr(value))
 
         if self._short_empty_elements:
             self._pending_start_element = name
@@ -411,13 +473,7 @@ class XMPPXMLGenerator:
         raised.
         """
         self._finish_pending_start_element()
-        if any(0 <= ord(c) <= 8 or
-               11 <= ord(c) <= 12 or
-               14 <= ord(c) <= 31
-               for c in chars):
-            raise ValueError("control characters are not allowed in "
-                             "well-formed XML")
-        self._write(xml.sax.saxutils.escape(chars).encode("utf-8"))
+        self._write(_escape_text(chars))
 
     def processingInstruction(self, target, data):
         """
@@ -570,6 +626,87 @@ def write_xmlstream(f,
         writer.flush()
 
 
+class XMLLimits:
+    """
+    Limits which are enforced on the XML received over an XML stream, to
+    protect against peers sending (nearly) unbounded amounts of data which
+    would otherwise be buffered.
+
+    All arguments are used to initialise the attributes of the same name.
+    Setting a limit to :data:`None` disables it.
+
+    .. attribute:: max_stanza_bytes
+
+       The maximum size of a single stream-level element (such as a stanza),
+       in bytes, as received from the peer. This limit is enforced by
+       :class:`~aioxmpp.protocol.XMLStream` while feeding data into the
+       parser, so that oversized elements are rejected before they have been
+       received completely.
+
+    .. attribute:: max_depth
+
+       The maximum nesting depth of elements below the stream. The
+       stream-level element itself has depth 1.
+
+    .. attribute:: max_attributes
+
+       The maximum number of attributes on a single element.
+
+    .. attribute:: max_text_length
+
+       The maximum length (in characters) of a single piece of character data
+       between two element boundaries.
+
+    When a limit is exceeded, a :class:`~aioxmpp.errors.StreamError` with
+    the ``policy-violation`` condition is raised.
+
+    Counters:
+
+    .. attribute:: violations
+
+       A :class:`collections.Counter` which maps the attribute names of the
+       limits to the number of times the limit has been exceeded. As
+       :class:`XMLLimits` instances can be shared between streams, this is
+       the sum over all streams using this instance.
+
+    .. versionadded:: 0.7
+    """
+
+    def __init__(self, *,
+                 max_stanza_bytes=1024*1024,
+                 max_depth=64,
+                 max_attributes=64,
+                 max_text_length=1024*1024):
+        super().__init__()
+        self.max_stanza_bytes = max_stanza_bytes
+        self.max_depth = max_depth
+        self.max_attributes = max_attributes
+        self.max_text_length = max_text_length
+        self.violations = collections.Counter()
+
+    def violation(self, limit, text):
+        """
+        Count a violation of the `limit` (given by the name of the attribute)
+        and return a :class:`~.errors.StreamError` to raise.
+        """
+        self.violations[limit] += 1
+        return errors.StreamError(
+            (namespaces.streams, "policy-violation"),
+            text
+        )
+
+    def __repr__(self):
+        return (
+            "<XMLLimits max_stanza_bytes={!r} max_depth={!r} "
+            "max_attributes={!r} max_text_length={!r}>".format(
+                self.max_stanza_bytes,
+                self.max_depth,
+                self.max_attributes,
+                self.max_text_length,
+            )
+        )
+
+
 class ProcessorState(Enum):
     CLEAN = 0
     STARTED = 1
@@ -625,6 +762,27 @@ class XMPPXMLProcessor:
        May be a callable or :data:`None`. If not false, the value will get
        called whenever a stream header is processed.
 
+    .. attribute:: on_stream_level_event
+
+       May be a callable or :data:`None`. If not false, the value will get
+       called for every event directly at the stream level: the stream header,
+       the start and end of each stream-level element (such as a stanza) and
+       character data between stream-level elements.
+
+       This is used by :class:`~aioxmpp.protocol.XMLStream` to measure the
+       amount of data received for a single stream-level element.
+
+       .. versionadded:: 0.7
+
+    .. attribute:: limits
+
+       May be an :class:`XMLLimits` instance or :data:`None`. If set, the
+       depth, attribute and text limits are enforced on all elements below
+       the stream element. The stanza size limit is not enforced by the
+       processor, as it does not know about the bytes received.
+
+       .. versionadded:: 0.7
+
     .. autoattribute:: stanza_parser
     """
 
@@ -635,7 +793,10 @@ class XMPPXMLProcessor:
         self._stored_exception = None
         self.on_stream_header = None
         self.on_stream_footer = None
+        self.on_stream_level_event = None
         self.on_exception = None
+        self.limits = None
+        self._text_length = 0
 
         self.remote_version = None
         self.remote_from = None
@@ -666,12 +827,40 @@ class XMPPXMLProcessor:
             "processing instructions are not allowed in XMPP"
         )
 
+    def _check_element_limits(self, attributes):
+        limits = self.limits
+        if     (limits.max_depth is not None and
+                self._depth > limits.max_depth):
+            raise limits.violation(
+                "max_depth",
+                "maximum element depth exceeded"
+            )
+        if     (limits.max_attributes is not None and
+                len(attributes) > limits.max_attributes):
+            raise limits.violation(
+                "max_attributes",
+                "maximum number of attributes exceeded"
+            )
+        self._text_length = 0
+
     def characters(self, characters):
+        if self.limits is not None:
+            self._text_length += len(characters)
+            max_text_length = self.limits.max_text_length
+            if     (max_text_length is not None and
+                    self._text_length > max_text_length):
+                raise self.limits.violation(
+                    "max_text_length",
+                    "maximum text length exceeded"
+                )
+
         if self._state == ProcessorState.EXCEPTION_BACKOFF:
             pass
         elif self._state != ProcessorState.STREAM_HEADER_PROCESSED:
             raise RuntimeError("invalid state: {}".format(self._state))
         else:
+            if self._depth == 1 and self.on_stream_level_event:
+                self.on_stream_level_event()
             self._driver.characters(characters)
 
     def startDocument(self):
@@ -703,6 +892,10 @@ class XMPPXMLProcessor:
 
     def startElementNS(self, name, qname, attributes):
         if self._state == ProcessorState.STREAM_HEADER_PROCESSED:
+            if self.limits is not None:
+                self._check_element_limits(attributes)
+            if self._depth == 1 and self.on_stream_level_event:
+                self.on_stream_level_event()
             try:
                 self._driver.startElementNS(name, qname, attributes)
             except Exception as exc:
@@ -711,6 +904,8 @@ class XMPPXMLProcessor:
             self._depth += 1
             return
         elif self._state == ProcessorState.EXCEPTION_BACKOFF:
+            if self.limits is not None:
+                self._check_element_limits(attributes)
             self._depth += 1
             return
         elif self._state != ProcessorState.STARTED:
@@ -755,6 +950,9 @@ class XMPPXMLProcessor:
                 "id attribute required in response header"
             )
 
+        if self.on_stream_level_event:
+            self.on_stream_level_event()
+
         if self.on_stream_header:
             self.on_stream_header()
 
@@ -762,6 +960,8 @@ class XMPPXMLProcessor:
         self._depth += 1
 
     def _end_element_exception_handling(self):
+        if self.on_stream_level_event:
+            self.on_stream_level_event()
         self._state = ProcessorState.STREAM_HEADER_PROCESSED
         exc = self._stored_exception
         self._stored_exception = None
@@ -771,9 +971,12 @@ class XMPPXMLProcessor:
             raise exc
 
     def endElementNS(self, name, qname):
+        self._text_length = 0
         if self._state == ProcessorState.STREAM_HEADER_PROCESSED:
             self._depth -= 1
             if self._depth > 0:
+                if self._depth == 1 and self.on_stream_level_event:
+                    self.on_stream_level_event()
                 try:
                     return self._driver.endElementNS(name, qname)
                 except Exception as exc:
@@ -862,6 +1065,20 @@ def make_parser():
     return p
 
 
+def get_current_byte_index(parser):
+    """
+    Return the offset in bytes, counted from the start of the document, of the
+    event which is currently being reported by the `parser`, which must have
+    been created with :func:`make_parser`.
+
+    This may only be called from within the handlers of the parser.
+
+    .. versionadded:: 0.7
+    """
+    # the expat parser object of the SAX reader only exists while parsing
+    return parser._parser.CurrentByteIndex
+
+
 def serialize_single_xso(x):
     """
     Serialize a single XSO `x` to a string. This is potentially very slow and
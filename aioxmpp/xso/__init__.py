@@ -105,7 +105,7 @@ repeated that detailed on the other classes. Refer to the documentation of the
 Non-scalar descriptors
 ^^^^^^^^^^^^^^^^^^^^^^
 
-.. autoclass:: ChildList(classes)
+.. autoclass:: ChildList(classes, *, indexed=False)
 
 .. autoclass:: ChildMap(classes[, key=None])
 
@@ -132,6 +132,8 @@ provides advanced capabilities for filtering :class:`XSO` objects.
 
 .. autoclass:: XSOList
 
+.. autoclass:: IndexedXSOList
+
 .. currentmodule:: aioxmpp.xso
 
 
@@ -9,6 +9,7 @@ import collections
 import copy
 import logging
 import sys
+import weakref
 import xml.sax.handler
 
 import lxml.sax
@@ -144,10 +145,8 @@ class XSOList(list):
 
     .. automethod:: filtered
 
-    In the future, methods to add indices to :class:`XSOList` instances may be
-    added; right now, there is no need for the huge complexity which would
-    arise from keeping the indices up-to-date with changes in the elements
-    attributes.
+    Filtering requires a linear scan of the list. For large lists which are
+    filtered repeatedly, :class:`IndexedXSOList` can be used instead.
     """
 
     def _filter_type(self, chained_results, type_):
@@ -245,6 +244,236 @@ class XSOList(list):
         return list(self.filter(type_=type_, lang=lang, attrs=attrs))
 
 
+class _WatchedContents(dict):
+    # replaces the _xso_contents of an XSO once the XSO is indexed by an
+    # IndexedXSOList, so that only indexed XSOs pay for tracking changes. the
+    # descriptors only use __setitem__ and __delitem__ to change values;
+    # defaults which are created on first access are stored with setdefault,
+    # which is not a change and does not notify.
+    __slots__ = ("watchers",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # lists are not hashable, so they are keyed by their id
+        self.watchers = weakref.WeakValueDictionary()
+
+    def _notify(self):
+        watchers = list(self.watchers.values())
+        self.watchers.clear()
+        for watcher in watchers:
+            watcher.invalidate()
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._notify()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._notify()
+
+    def __reduce_ex__(self, protocol):
+        return dict, (dict(self),)
+
+
+def _invalidating(name):
+    method = getattr(list, name)
+
+    def wrapper(self, *args, **kwargs):
+        self.invalidate()
+        return method(self, *args, **kwargs)
+
+    wrapper.__name__ = name
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+class IndexedXSOList(XSOList):
+    """
+    A :class:`XSOList` which keeps indices to answer :meth:`filter` calls
+    without scanning the whole list.
+
+    The indices are built on demand by the calls to :meth:`filter`:
+
+    * for each type passed as `type_`, the elements of that type;
+    * for each attribute name used in `attrs`, a mapping of the attribute
+      values to the elements with that value;
+    * for each `type_`, the languages of the elements and the language chosen
+      for each sequence of language ranges passed as `lang`.
+
+    All indices are dropped whenever the list is modified or an attribute of
+    an indexed element is changed through its descriptor. Changes to elements
+    which are not :class:`~.xso.XSO` instances cannot be detected; call
+    :meth:`invalidate` after making them.
+
+    Attribute values which are not hashable are matched by scanning the
+    working sequence, like :meth:`XSOList.filter` does.
+
+    Building the indices is more expensive than a single scan of the list, so
+    this pays off only for long lists which are filtered repeatedly. To use an
+    :class:`IndexedXSOList` for the children collected by a
+    :class:`~aioxmpp.xso.ChildList`, pass ``indexed=True`` to the descriptor.
+
+    .. automethod:: filter
+
+    .. automethod:: invalidate
+
+    .. versionadded:: 0.7
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._type_index = {}
+        self._attr_index = {}
+        self._lang_index = {}
+
+    def invalidate(self):
+        """
+        Drop all indices. They are rebuilt when they are needed again.
+        """
+        self._type_index.clear()
+        self._attr_index.clear()
+        self._lang_index.clear()
+
+    def _watch_items(self):
+        for item in self:
+            if not isinstance(item, XSO):
+                # changes cannot be tracked
+                continue
+            contents = item._xso_contents
+            if type(contents) is not _WatchedContents:
+                contents = _WatchedContents(contents)
+                item._xso_contents = contents
+            contents.watchers[id(self)] = self
+
+    def _items_of_type(self, type_):
+        if type_ is None:
+            return self
+        try:
+            return self._type_index[type_]
+        except KeyError:
+            result = [item for item in self if isinstance(item, type_)]
+            self._type_index[type_] = result
+            return result
+
+    def _attr_values(self, key):
+        try:
+            return self._attr_index[key]
+        except KeyError:
+            pass
+
+        index = {}
+        for item in self:
+            try:
+                value = getattr(item, key)
+            except AttributeError:
+                continue
+            try:
+                index.setdefault(value, []).append(item)
+            except TypeError:
+                # unhashable, found by the lookup fallback
+                pass
+
+        self._watch_items()
+        self._attr_index[key] = index
+        return index
+
+    def _lookup_lang(self, type_, lang):
+        if isinstance(lang, structs.LanguageRange):
+            lang = (lang,)
+        else:
+            lang = tuple(lang)
+
+        try:
+            languages, items_by_lang, matches = self._lang_index[type_]
+        except KeyError:
+            items_by_lang = {}
+            for item in self._items_of_type(type_):
+                item_lang = getattr(item, "lang", None)
+                if item_lang is not None:
+                    items_by_lang.setdefault(item_lang, []).append(item)
+            languages = sorted(items_by_lang)
+            matches = {}
+            self._watch_items()
+            self._lang_index[type_] = languages, items_by_lang, matches
+
+        if not languages:
+            # no languages -> no results
+            return []
+
+        try:
+            match = matches[lang]
+        except KeyError:
+            match = structs.lookup_language(languages, list(lang))
+            # no language? fallback is using the first one
+            if match is None:
+                match = languages[0]
+            matches[lang] = match
+
+        return items_by_lang[match]
+
+    def filter(self, *, type_=None, lang=None, attrs={}):
+        """
+        Like :meth:`XSOList.filter`, but using the indices.
+
+        The returned iterable is a snapshot: changes to the list made after
+        the call are not picked up.
+        """
+        if lang is not None:
+            result = self._lookup_lang(type_, lang)
+        else:
+            result = self._items_of_type(type_)
+
+        if attrs:
+            buckets = []
+            unhashable = {}
+            for key, value in attrs.items():
+                try:
+                    buckets.append(self._attr_values(key).get(value, ()))
+                except TypeError:
+                    unhashable[key] = value
+
+            if buckets:
+                # all buckets are in list order; start with the smallest one
+                # so that looking up a single attribute does not scan the
+                # list
+                if result is not self:
+                    buckets.append(result)
+                buckets.sort(key=len)
+                result = buckets[0]
+                for bucket in buckets[1:]:
+                    ids = {id(item) for item in bucket}
+                    result = [item for item in result if id(item) in ids]
+            if unhashable:
+                result = self._filter_attrs(result, unhashable)
+
+        return iter(list(result))
+
+    def __copy__(self):
+        return type(self)(self)
+
+    def __deepcopy__(self, memo):
+        result = type(self)()
+        memo[id(self)] = result
+        list.extend(result, (copy.deepcopy(item, memo) for item in self))
+        return result
+
+    def __reduce_ex__(self, protocol):
+        return type(self), (list(self),)
+
+    append = _invalidating("append")
+    extend = _invalidating("extend")
+    insert = _invalidating("insert")
+    remove = _invalidating("remove")
+    pop = _invalidating("pop")
+    clear = _invalidating("clear")
+    sort = _invalidating("sort")
+    reverse = _invalidating("reverse")
+    __setitem__ = _invalidating("__setitem__")
+    __delitem__ = _invalidating("__delitem__")
+    __iadd__ = _invalidating("__iadd__")
+    __imul__ = _invalidating("__imul__")
+
+
 class PropBaseMeta(type):
     def __instancecheck__(self, instance):
         if (isinstance(instance, xso_query.BoundDescriptor) and
@@ -502,13 +731,21 @@ class ChildList(_ChildPropBase):
     * the default is fixed at an empty list.
     * `required` is not supported
 
+    If `indexed` is true, an :class:`~aioxmpp.xso.model.IndexedXSOList` is
+    used instead of a plain :class:`~aioxmpp.xso.model.XSOList`.
+
     .. automethod:: from_events
 
     .. automethod:: to_sax
+
+    .. versionchanged:: 0.7
+
+       The `indexed` argument was added.
     """
 
-    def __init__(self, classes):
+    def __init__(self, classes, *, indexed=False):
         super().__init__(classes)
+        self.indexed = indexed
 
     def __get__(self, instance, type_):
         if instance is None:
@@ -518,7 +755,11 @@ class ChildList(_ChildPropBase):
                 xso_query.GetSequenceDescriptor,
             )
 
-        return instance._xso_contents.setdefault(self, XSOList())
+        try:
+            return instance._xso_contents[self]
+        except KeyError:
+            result = IndexedXSOList() if self.indexed else XSOList()
+            return instance._xso_contents.setdefault(self, result)
 
     def _set(self, instance, value):
         if not isinstance(value, list):
@@ -1149,8 +1390,7 @@ class ChildValueList(_ChildPropBase):
             return instance._xso_contents[self]
         except KeyError:
             result = self.container_type()
-            instance._xso_contents[self] = result
-            return result
+            return instance._xso_contents.setdefault(self, result)
 
     def __set__(self, instance, value):
         raise AttributeError("child value list not writable")
@@ -1208,8 +1448,7 @@ class ChildValueMap(_ChildPropBase):
             return instance._xso_contents[self]
         except KeyError:
             result = self.mapping_type()
-            instance._xso_contents[self] = result
-            return result
+            return instance._xso_contents.setdefault(self, result)
 
     def __set__(self, instance, value):
         raise AttributeError("child value map not writable")
@@ -1260,8 +1499,7 @@ class ChildValueMultiMap(_ChildPropBase):
             return instance._xso_contents[self]
         except KeyError:
             result = self.mapping_type()
-            instance._xso_contents[self] = result
-            return result
+            return instance._xso_contents.setdefault(self, result)
 
     def __set__(self, instance, value):
         raise AttributeError("child value multi map not writable")
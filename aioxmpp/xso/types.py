@@ -11,6 +11,7 @@ import array
 import base64
 import binascii
 import decimal
+import functools
 import ipaddress
 import numbers
 import unicodedata
@@ -183,6 +184,38 @@ class Bool(AbstractType):
             return "false"
 
 
+# The expressions below accept exactly what the datetime.strptime formats
+# previously used for parsing accepted (e.g. single-digit fields and a
+# lower-case ``t``), so that a single match replaces several strptime
+# attempts.
+_DATE_RE = (
+    r"(\d\d\d\d)-(1[0-2]|0[1-9]|[1-9])-(3[01]|[12]\d|0[1-9]|[1-9]| [1-9])"
+)
+_LEGACY_DATE_RE = (
+    r"(\d\d\d\d)(1[0-2]|0[1-9]|[1-9])(3[01]|[12]\d|0[1-9]|[1-9]| [1-9])"
+)
+_TIME_RE = r"(2[0-3]|[0-1]\d|\d):([0-5]\d|\d):(6[0-1]|[0-5]\d|\d)"
+_TZ_RE = r"(?:(Z)|([+-][0-9]{2}:[0-9]{2}))?"
+
+
+@functools.lru_cache(maxsize=32)
+def _parse_tz_offset(tz):
+    hour_offset, minute_offset = tz.split(":")
+    return timedelta(minutes=int(minute_offset) + 60 * int(hour_offset))
+
+
+def _parse_fraction(fraction):
+    if fraction is None:
+        return 0
+    return int(fraction + "0" * (6 - len(fraction)))
+
+
+def _format_fraction(microsecond):
+    if microsecond:
+        return ".{:06d}".format(microsecond).rstrip("0")
+    return ""
+
+
 class DateTime(AbstractType):
     """
     Parse the value as ISO datetime, possibly including microseconds and
@@ -211,6 +244,12 @@ class DateTime(AbstractType):
 
     tzextract = re.compile("((Z)|([+-][0-9]{2}):([0-9]{2}))$")
 
+    _parse_re = re.compile(
+        r"(?:" + _DATE_RE + r"[Tt]" + _TIME_RE + r"(?:\.([0-9]{1,6}))?|" +
+        _LEGACY_DATE_RE + r"[Tt]" + _TIME_RE + r")" +
+        _TZ_RE + r"\Z"
+    )
+
     def __init__(self, *, legacy=False):
         super().__init__()
         self.legacy = legacy
@@ -221,47 +260,47 @@ class DateTime(AbstractType):
         return v
 
     def parse(self, v):
-        v = v.strip()
-        m = self.tzextract.search(v)
-        if m:
-            _, utc, hour_offset, minute_offset = m.groups()
-            if utc:
-                hour_offset = 0
-                minute_offset = 0
-            else:
-                hour_offset = int(hour_offset)
-                minute_offset = int(minute_offset)
-            tzinfo = pytz.utc
-            offset = timedelta(minutes=minute_offset + 60 * hour_offset)
-            v = v[:m.start()]
-        else:
-            tzinfo = None
-            offset = timedelta(0)
-
-        try:
-            dt = datetime.strptime(v, "%Y-%m-%dT%H:%M:%S.%f")
-        except ValueError:
-            try:
-                dt = datetime.strptime(v, "%Y-%m-%dT%H:%M:%S")
-            except ValueError:
-                dt = datetime.strptime(v, "%Y%m%dT%H:%M:%S")
-                tzinfo = pytz.utc
-                offset = timedelta(0)
-
-        return dt.replace(tzinfo=tzinfo) - offset
+        m = self._parse_re.match(v.strip())
+        if m is None:
+            raise ValueError("not a valid ISO 8601 date/time: {!r}".format(v))
+
+        (year, month, day, hour, minute, second, fraction,
+         lyear, lmonth, lday, lhour, lminute, lsecond,
+         utc, tz) = m.groups()
+
+        if year is None:
+            # legacy format, always UTC
+            return datetime(
+                int(lyear), int(lmonth), int(lday),
+                int(lhour), int(lminute), int(lsecond),
+                tzinfo=pytz.utc,
+            )
+
+        dt = datetime(
+            int(year), int(month), int(day),
+            int(hour), int(minute), int(second),
+            _parse_fraction(fraction),
+            tzinfo=pytz.utc if utc or tz else None,
+        )
+        if tz:
+            dt -= _parse_tz_offset(tz)
+        return dt
 
     def format(self, v):
         if v.tzinfo:
             v = pytz.utc.normalize(v)
         if self.legacy:
-            return v.strftime("%Y%m%dT%H:%M:%S")
+            return "{:04d}{:02d}{:02d}T{:02d}:{:02d}:{:02d}".format(
+                v.year, v.month, v.day,
+                v.hour, v.minute, v.second,
+            )
 
-        result = v.strftime("%Y-%m-%dT%H:%M:%S")
-        if v.microsecond:
-            result += ".{:06d}".format(v.microsecond).rstrip("0")
-        if v.tzinfo:
-            result += "Z"
-        return result
+        return "{:04d}-{:02d}-{:02d}T{:02d}:{:02d}:{:02d}{}{}".format(
+            v.year, v.month, v.day,
+            v.hour, v.minute, v.second,
+            _format_fraction(v.microsecond),
+            "Z" if v.tzinfo else "",
+        )
 
 
 class Date(AbstractType):
@@ -274,8 +313,14 @@ class Date(AbstractType):
     .. versionadded:: 0.5
     """
 
+    _parse_re = re.compile(_DATE_RE + r"\Z")
+
     def parse(self, s):
-        return datetime.strptime(s, "%Y-%m-%d").date()
+        m = self._parse_re.match(s)
+        if m is None:
+            raise ValueError("not a valid ISO 8601 date: {!r}".format(s))
+        year, month, day = m.groups()
+        return date(int(year), int(month), int(day))
 
     def coerce(self, v):
         if not isinstance(v, date) or isinstance(v, datetime):
@@ -297,41 +342,41 @@ class Time(AbstractType):
     .. versionadded:: 0.5
     """
 
-    def parse(self, v):
-        v = v.strip()
-        m = DateTime.tzextract.search(v)
-        if m:
-            _, utc, hour_offset, minute_offset = m.groups()
-            if utc:
-                hour_offset = 0
-                minute_offset = 0
-            else:
-                hour_offset = int(hour_offset)
-                minute_offset = int(minute_offset)
-            tzinfo = pytz.utc
-            offset = timedelta(minutes=minute_offset + 60 * hour_offset)
-            v = v[:m.start()]
-        else:
-            tzinfo = None
-            offset = timedelta(0)
-
-        try:
-            dt = datetime.strptime(v, "%H:%M:%S.%f")
-        except ValueError:
-            dt = datetime.strptime(v, "%H:%M:%S")
+    _parse_re = re.compile(
+        _TIME_RE + r"(?:\.([0-9]{1,6}))?" + _TZ_RE + r"\Z"
+    )
 
-        return (dt.replace(tzinfo=tzinfo) - offset).timetz()
+    def parse(self, v):
+        m = self._parse_re.match(v.strip())
+        if m is None:
+            raise ValueError("not a valid ISO 8601 time: {!r}".format(v))
+
+        hour, minute, second, fraction, utc, tz = m.groups()
+        hour, minute, second = int(hour), int(minute), int(second)
+        microsecond = _parse_fraction(fraction)
+
+        if not tz:
+            return time(
+                hour, minute, second, microsecond,
+                tzinfo=pytz.utc if utc else None,
+            )
+
+        # apply the offset on an arbitrary date to wrap around midnight
+        return (
+            datetime(1900, 1, 1, hour, minute, second, microsecond,
+                     tzinfo=pytz.utc) -
+            _parse_tz_offset(tz)
+        ).timetz()
 
     def format(self, v):
         if v.tzinfo:
             v = pytz.utc.normalize(v)
 
-        result = v.strftime("%H:%M:%S")
-        if v.microsecond:
-            result += ".{:06d}".format(v.microsecond).rstrip("0")
-        if v.tzinfo:
-            result += "Z"
-        return result
+        return "{:02d}:{:02d}:{:02d}{}{}".format(
+            v.hour, v.minute, v.second,
+            _format_fraction(v.microsecond),
+            "Z" if v.tzinfo else "",
+        )
 
     def coerce(self, t):
         if not isinstance(t, time):
@@ -1,6 +1,7 @@
 import unittest
 
 import aioxmpp.disco as disco
+import aioxmpp.disco.crawler as disco_crawler
 import aioxmpp.disco.service as disco_service
 import aioxmpp.disco.xso as disco_xso
 
@@ -17,3 +18,9 @@ class TestExports(unittest.TestCase):
 
     def test_StaticNode(self):
         self.assertIs(disco.StaticNode, disco_service.StaticNode)
+
+    def test_Crawler(self):
+        self.assertIs(disco.Crawler, disco_crawler.Crawler)
+
+    def test_CrawlResult(self):
+        self.assertIs(disco.CrawlResult, disco_crawler.CrawlResult)
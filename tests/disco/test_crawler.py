@@ -0,0 +1,217 @@
+import asyncio
+import unittest
+import unittest.mock
+
+import aioxmpp.disco.crawler as disco_crawler
+import aioxmpp.disco.xso as disco_xso
+import aioxmpp.errors as errors
+import aioxmpp.structs as structs
+
+from aioxmpp.utils import namespaces
+
+from aioxmpp.testutils import run_coroutine
+
+
+ROOT = structs.JID.fromstr("server.example")
+A = structs.JID.fromstr("a.server.example")
+B = structs.JID.fromstr("b.server.example")
+C = structs.JID.fromstr("c.server.example")
+
+
+class FakeDisco:
+    def __init__(self, tree, failing=()):
+        self.tree = tree
+        self.failing = set(failing)
+        self.calls = []
+        self.running = 0
+        self.max_running = 0
+        # (jid, node) -> future awaited by query_info
+        self.blocking = {}
+
+    @asyncio.coroutine
+    def query_info(self, jid, *, node=None, timeout=None):
+        self.calls.append(("info", jid, node, timeout))
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            yield from asyncio.sleep(0)
+            if (jid, node) in self.blocking:
+                yield from self.blocking[jid, node]
+        finally:
+            self.running -= 1
+        if (jid, node) in self.failing:
+            raise errors.XMPPCancelError(
+                condition=(namespaces.stanzas, "item-not-found"),
+            )
+        return disco_xso.InfoQuery(node=node)
+
+    @asyncio.coroutine
+    def query_items(self, jid, *, node=None, timeout=None):
+        self.calls.append(("items", jid, node, timeout))
+        return disco_xso.ItemsQuery(
+            node=node,
+            items=[
+                disco_xso.Item(child_jid, node=child_node)
+                for child_jid, child_node in self.tree.get((jid, node), [])
+            ]
+        )
+
+
+def collect(crawler):
+    results = []
+    while True:
+        result = run_coroutine(crawler.get())
+        if result is None:
+            return results
+        results.append(result)
+
+
+class TestCrawler(unittest.TestCase):
+    def setUp(self):
+        self.disco = FakeDisco({
+            (ROOT, None): [(A, None), (B, None)],
+            (A, None): [(C, None), (A, "n1")],
+            (B, None): [(C, None)],
+            (C, None): [(ROOT, None)],
+        })
+
+    def test_visits_each_entity_once_breadth_first(self):
+        results = collect(disco_crawler.Crawler(self.disco, ROOT))
+
+        self.assertSequenceEqual(
+            [
+                (ROOT, None, 0),
+                (A, None, 1),
+                (B, None, 1),
+                (C, None, 2),
+                (A, "n1", 2),
+            ],
+            [(r.jid, r.node, r.depth) for r in results]
+        )
+        for result in results:
+            self.assertIsNone(result.exception)
+            self.assertIsInstance(result.info, disco_xso.InfoQuery)
+            self.assertIsInstance(result.items, disco_xso.ItemsQuery)
+
+        self.assertEqual(10, len(self.disco.calls))
+
+    def test_get_returns_None_after_end(self):
+        crawler = disco_crawler.Crawler(self.disco, ROOT)
+        collect(crawler)
+        self.assertIsNone(run_coroutine(crawler.get()))
+
+    def test_max_depth(self):
+        results = collect(disco_crawler.Crawler(self.disco, ROOT,
+                                                max_depth=1))
+        self.assertSetEqual(
+            {(ROOT, None), (A, None), (B, None)},
+            {(r.jid, r.node) for r in results}
+        )
+
+    def test_passes_timeout(self):
+        collect(disco_crawler.Crawler(self.disco, ROOT, max_depth=0,
+                                      timeout=10))
+        self.assertSequenceEqual(
+            [
+                ("info", ROOT, None, 10),
+                ("items", ROOT, None, 10),
+            ],
+            self.disco.calls
+        )
+
+    def test_failures_are_reported_and_do_not_stop_the_crawl(self):
+        self.disco.failing.add((A, None))
+        results = collect(disco_crawler.Crawler(self.disco, ROOT))
+
+        by_key = {(r.jid, r.node): r for r in results}
+        self.assertIsInstance(by_key[A, None].exception,
+                              errors.XMPPCancelError)
+        self.assertIsNone(by_key[A, None].info)
+        self.assertIsNone(by_key[A, None].items)
+        # C is still reachable via B
+        self.assertIn((C, None), by_key)
+        self.assertNotIn((A, "n1"), by_key)
+
+    def test_max_concurrency(self):
+        tree = {
+            (ROOT, None): [
+                (structs.JID.fromstr("c{}.server.example".format(i)), None)
+                for i in range(10)
+            ]
+        }
+        disco = FakeDisco(tree)
+        results = collect(disco_crawler.Crawler(disco, ROOT,
+                                                max_concurrency=3))
+        self.assertEqual(11, len(results))
+        self.assertEqual(3, disco.max_running)
+
+    def test_max_concurrency_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            disco_crawler.Crawler(self.disco, ROOT, max_concurrency=0)
+
+    def test_domain_interval(self):
+        disco = FakeDisco({})
+        loop = asyncio.get_event_loop()
+        start = loop.time()
+        collect(disco_crawler.Crawler(disco, ROOT, domain_interval=0.02))
+        self.assertGreaterEqual(loop.time() - start, 0.02)
+
+    def test_domain_interval_spaces_queries_per_domain(self):
+        crawler = disco_crawler.Crawler(self.disco, ROOT,
+                                        domain_interval=1)
+        crawler.cancel()
+
+        with unittest.mock.patch("asyncio.sleep") as sleep:
+            sleep.return_value = iter([])
+            with unittest.mock.patch.object(
+                    asyncio.get_event_loop(), "time",
+                    return_value=100):
+                run_coroutine(crawler._wait_for_slot(A))
+                run_coroutine(crawler._wait_for_slot(A))
+                run_coroutine(crawler._wait_for_slot(B))
+                run_coroutine(crawler._wait_for_slot(A))
+
+        self.assertSequenceEqual(
+            [
+                unittest.mock.call(1),
+                unittest.mock.call(2),
+            ],
+            sleep.mock_calls
+        )
+
+    def test_cancel(self):
+        crawler = disco_crawler.Crawler(self.disco, ROOT)
+        crawler.cancel()
+        self.assertIsNone(run_coroutine(crawler.get()))
+        run_coroutine(asyncio.sleep(0.01))
+        self.assertIsNone(run_coroutine(crawler.get()))
+        self.assertFalse(self.disco.calls[1:])
+
+    def test_anext(self):
+        crawler = disco_crawler.Crawler(self.disco, ROOT, max_depth=0)
+        self.assertIs(crawler, crawler.__aiter__())
+        result = run_coroutine(crawler.__anext__())
+        self.assertEqual(ROOT, result.jid)
+        with self.assertRaises(StopAsyncIteration):
+            run_coroutine(crawler.__anext__())
+
+    def test_cancelled_query_is_reported_and_crawl_continues(self):
+        self.disco.blocking[A, None] = asyncio.Future()
+        crawler = disco_crawler.Crawler(self.disco, ROOT, max_depth=1)
+
+        results = [run_coroutine(crawler.get()) for i in range(2)]
+        self.assertSequenceEqual(
+            [ROOT, B],
+            [result.jid for result in results]
+        )
+
+        # like disco does when the stream is destroyed
+        self.disco.blocking[A, None].cancel()
+
+        result = run_coroutine(crawler.get())
+        self.assertEqual(A, result.jid)
+        self.assertEqual(1, result.depth)
+        self.assertIsNone(result.info)
+        self.assertIsInstance(result.exception, asyncio.CancelledError)
+
+        self.assertIsNone(run_coroutine(crawler.get()))
@@ -1,5 +1,6 @@
 import asyncio
 import unittest
+import unittest.mock
 
 import aioxmpp.service as service
 import aioxmpp.disco.service as disco_service
@@ -318,6 +319,49 @@ class TestNode(unittest.TestCase):
         )
 
 
+    def test_as_info_xso(self):
+        n = disco_service.Node()
+        n.register_feature("foo")
+        n.register_identity(
+            "client", "pc",
+            names={structs.LanguageTag.fromstr("en"): "bar"}
+        )
+
+        info = n.as_info_xso()
+        self.assertIsInstance(info, disco_xso.InfoQuery)
+        self.assertIsNone(info.node)
+        self.assertSetEqual(
+            {namespaces.xep0030_info, "foo"},
+            info.features
+        )
+        self.assertSequenceEqual(
+            [("client", "pc", structs.LanguageTag.fromstr("en"), "bar")],
+            [(i.category, i.type_, i.lang, i.name) for i in info.identities]
+        )
+
+    def test_as_info_xso_is_cached(self):
+        n = disco_service.Node()
+        n.register_feature("foo")
+        self.assertIs(n.as_info_xso(), n.as_info_xso())
+
+    def test_as_info_xso_is_invalidated_on_info_changed(self):
+        n = disco_service.Node()
+        info = n.as_info_xso()
+
+        n.register_feature("foo")
+        new_info = n.as_info_xso()
+        self.assertIsNot(info, new_info)
+        self.assertIn("foo", new_info.features)
+
+        n.register_identity("client", "pc")
+        self.assertIsNot(new_info, n.as_info_xso())
+        self.assertEqual(1, len(n.as_info_xso().identities))
+
+        info = n.as_info_xso()
+        n.on_info_changed()
+        self.assertIsNot(info, n.as_info_xso())
+
+
 class TestStaticNode(unittest.TestCase):
     def setUp(self):
         self.n = disco_service.StaticNode()
@@ -417,6 +461,17 @@ class TestService(unittest.TestCase):
 
         self.assertFalse(response.node)
 
+    def test_info_response_is_reused_until_info_changes(self):
+        response1 = run_coroutine(self.s.handle_info_request(self.request_iq))
+        response2 = run_coroutine(self.s.handle_info_request(self.request_iq))
+        self.assertIs(response1, response2)
+
+        self.s.register_feature("foo")
+
+        response3 = run_coroutine(self.s.handle_info_request(self.request_iq))
+        self.assertIsNot(response1, response3)
+        self.assertIn("foo", response3.features)
+
     def test_nonexistant_node_response(self):
         self.request_iq.payload.node = "foobar"
         with self.assertRaises(errors.XMPPModifyError) as ctx:
@@ -1302,3 +1357,188 @@ class TestService(unittest.TestCase):
             run_coroutine(request)
 
         self.assertIs(ctx.exception, exc)
+
+    def test_cache_defaults(self):
+        self.assertIsNone(disco_service.Service.cache_ttl)
+        self.assertIsNone(disco_service.Service.negative_cache_ttl)
+        self.assertIsNone(disco_service.Service.cache_max_entries)
+        self.assertFalse(disco_service.Service.keep_cache_across_streams)
+
+    def test_query_info_result_expires_after_cache_ttl(self):
+        to = structs.JID.fromstr("user@foo.example/res1")
+        self.s.cache_ttl = 0.02
+
+        with unittest.mock.patch.object(
+                self.s,
+                "send_and_decode_info_query",
+                new=CoroutineMock()) as send_and_decode:
+            send_and_decode.return_value = {}
+
+            run_coroutine(self.s.query_info(to))
+            run_coroutine(self.s.query_info(to))
+            self.assertEqual(1, len(send_and_decode.mock_calls))
+
+            run_coroutine(asyncio.sleep(0.03))
+
+            run_coroutine(self.s.query_info(to))
+            self.assertEqual(2, len(send_and_decode.mock_calls))
+
+    def test_query_items_result_expires_after_cache_ttl(self):
+        to = structs.JID.fromstr("user@foo.example/res1")
+        self.s.cache_ttl = 0.02
+        self.cc.stream.send_iq_and_wait_for_reply.return_value = \
+            disco_xso.ItemsQuery()
+
+        run_coroutine(self.s.query_items(to))
+        run_coroutine(self.s.query_items(to))
+        self.assertEqual(
+            1,
+            len(self.cc.stream.send_iq_and_wait_for_reply.mock_calls)
+        )
+
+        run_coroutine(asyncio.sleep(0.03))
+
+        run_coroutine(self.s.query_items(to))
+        self.assertEqual(
+            2,
+            len(self.cc.stream.send_iq_and_wait_for_reply.mock_calls)
+        )
+
+    def test_query_info_caches_errors_with_negative_cache_ttl(self):
+        to = structs.JID.fromstr("user@foo.example/res1")
+        self.s.negative_cache_ttl = 0.02
+
+        with unittest.mock.patch.object(
+                self.s,
+                "send_and_decode_info_query",
+                new=CoroutineMock()) as send_and_decode:
+            send_and_decode.side_effect = errors.XMPPCancelError(
+                condition=(namespaces.stanzas, "item-not-found"),
+            )
+
+            for i in range(2):
+                with self.assertRaises(errors.XMPPCancelError):
+                    run_coroutine(self.s.query_info(to))
+            self.assertEqual(1, len(send_and_decode.mock_calls))
+
+            run_coroutine(asyncio.sleep(0.03))
+
+            with self.assertRaises(errors.XMPPCancelError):
+                run_coroutine(self.s.query_info(to))
+            self.assertEqual(2, len(send_and_decode.mock_calls))
+
+    def test_query_info_does_not_cache_connection_errors(self):
+        to = structs.JID.fromstr("user@foo.example/res1")
+        self.s.negative_cache_ttl = 10
+
+        with unittest.mock.patch.object(
+                self.s,
+                "send_and_decode_info_query",
+                new=CoroutineMock()) as send_and_decode:
+            send_and_decode.side_effect = ConnectionError()
+
+            for i in range(2):
+                with self.assertRaises(ConnectionError):
+                    run_coroutine(self.s.query_info(to))
+
+        self.assertEqual(2, len(send_and_decode.mock_calls))
+
+    def test_query_info_caches_timeout_with_negative_cache_ttl(self):
+        to = structs.JID.fromstr("user@foo.example/res1")
+        self.s.negative_cache_ttl = 10
+
+        with unittest.mock.patch.object(
+                self.s,
+                "send_and_decode_info_query",
+                new=CoroutineMock()) as send_and_decode:
+            send_and_decode.delay = 1
+            send_and_decode.return_value = {}
+
+            with self.assertRaises(TimeoutError):
+                run_coroutine(self.s.query_info(to, timeout=0.01))
+
+            with self.assertRaises(TimeoutError):
+                run_coroutine(self.s.query_info(to))
+
+        self.assertEqual(1, len(send_and_decode.mock_calls))
+
+    def test_query_info_evicts_least_recently_used(self):
+        self.s.cache_max_entries = 2
+        jids = [
+            structs.JID.fromstr("user@foo.example/res{}".format(i))
+            for i in range(3)
+        ]
+
+        with unittest.mock.patch.object(
+                self.s,
+                "send_and_decode_info_query",
+                new=CoroutineMock()) as send_and_decode:
+            send_and_decode.return_value = {}
+
+            run_coroutine(self.s.query_info(jids[0]))
+            run_coroutine(self.s.query_info(jids[1]))
+            run_coroutine(self.s.query_info(jids[0]))
+            run_coroutine(self.s.query_info(jids[2]))
+            self.assertEqual(3, len(send_and_decode.mock_calls))
+
+            run_coroutine(self.s.query_info(jids[0]))
+            run_coroutine(self.s.query_info(jids[2]))
+            self.assertEqual(3, len(send_and_decode.mock_calls))
+
+            run_coroutine(self.s.query_info(jids[1]))
+            self.assertEqual(4, len(send_and_decode.mock_calls))
+
+    def test_query_info_keeps_results_across_streams(self):
+        to = structs.JID.fromstr("user@foo.example/res1")
+        self.s.keep_cache_across_streams = True
+
+        with unittest.mock.patch.object(
+                self.s,
+                "send_and_decode_info_query",
+                new=CoroutineMock()) as send_and_decode:
+            send_and_decode.return_value = {}
+
+            run_coroutine(self.s.query_info(to))
+            self.cc.on_stream_destroyed()
+            run_coroutine(self.s.query_info(to))
+
+        self.assertEqual(1, len(send_and_decode.mock_calls))
+
+    def test_keep_cache_across_streams_cancels_pending_requests(self):
+        to = structs.JID.fromstr("user@foo.example/res1")
+        self.s.keep_cache_across_streams = True
+        fut = asyncio.Future()
+        self.s.set_info_future(to, None, fut)
+
+        self.cc.on_stream_destroyed()
+
+        self.assertTrue(fut.cancelled())
+
+    def test_set_info_cache_does_not_expire(self):
+        to = structs.JID.fromstr("user@foo.example/res1")
+        self.s.cache_ttl = 0.01
+        response = disco_xso.InfoQuery()
+        self.s.set_info_cache(to, None, response)
+
+        run_coroutine(asyncio.sleep(0.02))
+
+        result = run_coroutine(self.s.query_info(to))
+        self.assertIs(result, response)
+        self.assertFalse(self.cc.stream.mock_calls)
+
+    def test_crawl(self):
+        to = structs.JID.fromstr("foo.example")
+        with unittest.mock.patch(
+                "aioxmpp.disco.service.Crawler") as Crawler:
+            result = self.s.crawl(to, node="foo", max_depth=2,
+                                  max_concurrency=4, domain_interval=0.5,
+                                  timeout=10)
+
+        Crawler.assert_called_once_with(
+            self.s, to, "foo",
+            max_depth=2,
+            max_concurrency=4,
+            domain_interval=0.5,
+            timeout=10,
+        )
+        self.assertEqual(result, Crawler())
@@ -0,0 +1,206 @@
+import asyncio
+import contextlib
+import io
+import pathlib
+import tempfile
+import unittest
+import unittest.mock
+import urllib.parse
+
+import aioxmpp.disco as disco
+import aioxmpp.xml
+
+import aioxmpp.entitycaps.database as caps_database
+
+from aioxmpp.testutils import run_coroutine
+
+
+TEST_NODE = "http://tkabber.jabber.ru/#+0mnUAF1ozCEc37cmdPPsYbsfhg="
+
+TEST_DATA = b"""\
+<?xml version="1.0"?><query xmlns="http://jabber.org/protocol/disco#info" \
+node="http://tkabber.jabber.ru/#+0mnUAF1ozCEc37cmdPPsYbsfhg="><identity \
+category="client" name="Tkabber" type="pc"/><feature var="jabber:iq:time"/>\
+</query>"""
+
+
+class Testserialise_events(unittest.TestCase):
+    def test_roundtrip(self):
+        q = aioxmpp.xml.read_single_xso(io.BytesIO(TEST_DATA),
+                                        disco.xso.InfoQuery)
+        data = caps_database.serialise_events(q.captured_events)
+        q2 = aioxmpp.xml.read_single_xso(io.BytesIO(data),
+                                         disco.xso.InfoQuery)
+        self.assertEqual(q.node, q2.node)
+        self.assertSetEqual(set(q.features), set(q2.features))
+        self.assertEqual(len(q.identities), len(q2.identities))
+
+
+class TestDatabase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self.tmpdir.name) / "caps.db"
+        self.db = caps_database.Database(self.path)
+
+    def tearDown(self):
+        self.db.close()
+        self.tmpdir.cleanup()
+
+    def _reopen(self, **kwargs):
+        self.db.close()
+        self.db = caps_database.Database(self.path, **kwargs)
+
+    def test_lookup_key_errors_on_empty_database(self):
+        with self.assertRaises(KeyError):
+            self.db.lookup("sha-1", TEST_NODE)
+        self.assertNotIn(("sha-1", TEST_NODE), self.db)
+
+    def test_added_entry_is_immediately_visible(self):
+        self.db.add("sha-1", TEST_NODE, TEST_DATA)
+        self.assertIn(("sha-1", TEST_NODE), self.db)
+        result = self.db.lookup("sha-1", TEST_NODE)
+        self.assertIsInstance(result, disco.xso.InfoQuery)
+        self.assertEqual(TEST_NODE, result.node)
+        self.assertIn("jabber:iq:time", result.features)
+
+    def test_key_includes_hash_function(self):
+        self.db.add("sha-1", TEST_NODE, TEST_DATA)
+        with self.assertRaises(KeyError):
+            self.db.lookup("sha-256", TEST_NODE)
+
+    def test_add_batches_writes(self):
+        with unittest.mock.patch.object(self.db, "_write_conn") as conn:
+            self.db.add("sha-1", TEST_NODE, TEST_DATA)
+            self.db.add("sha-1", "foo#bar", TEST_DATA)
+            self.assertFalse(conn.executemany.mock_calls)
+
+            self.db.flush()
+
+            conn.executemany.assert_called_once_with(
+                unittest.mock.ANY,
+                [
+                    ("sha-1", TEST_NODE, TEST_DATA),
+                    ("sha-1", "foo#bar", TEST_DATA),
+                ]
+            )
+
+    def test_add_flushes_after_delay(self):
+        self._reopen(flush_delay=0.01)
+        self.db.add("sha-1", TEST_NODE, TEST_DATA)
+        run_coroutine(asyncio.sleep(0.02))
+        for i in range(100):
+            if not self.db._writing:
+                break
+            run_coroutine(asyncio.sleep(0.01))
+
+        other = caps_database.Database(self.path, read_only=True)
+        try:
+            self.assertEqual(TEST_NODE, other.lookup("sha-1", TEST_NODE).node)
+        finally:
+            other.close()
+
+    def test_delayed_flush_writes_in_executor(self):
+        self._reopen(flush_delay=0.01)
+        loop = asyncio.get_event_loop()
+        with contextlib.ExitStack() as stack:
+            run_in_executor = stack.enter_context(unittest.mock.patch.object(
+                loop,
+                "run_in_executor",
+            ))
+            run_in_executor.return_value = asyncio.Future(loop=loop)
+            write_conn = stack.enter_context(unittest.mock.patch.object(
+                self.db,
+                "_write_conn",
+            ))
+
+            self.db.add("sha-1", TEST_NODE, TEST_DATA)
+            run_coroutine(asyncio.sleep(0.02))
+
+            run_in_executor.assert_called_once_with(
+                None,
+                self.db._write,
+                {("sha-1", TEST_NODE): TEST_DATA},
+            )
+            self.assertFalse(write_conn.mock_calls)
+
+            # entries being written are still visible
+            self.assertIn(("sha-1", TEST_NODE), self.db)
+            self.assertEqual(TEST_NODE,
+                             self.db.lookup("sha-1", TEST_NODE).node)
+
+            run_in_executor.return_value.set_result(None)
+            run_coroutine(asyncio.sleep(0))
+
+        self.assertIn(("sha-1", TEST_NODE), self.db._index)
+        self.assertFalse(self.db._writing)
+
+    def test_close_writes_entries_still_queued_for_executor(self):
+        self._reopen(flush_delay=0.01)
+        loop = asyncio.get_event_loop()
+        with unittest.mock.patch.object(
+                loop,
+                "run_in_executor") as run_in_executor:
+            run_in_executor.return_value = asyncio.Future(loop=loop)
+            self.db.add("sha-1", TEST_NODE, TEST_DATA)
+            run_coroutine(asyncio.sleep(0.02))
+            self.assertTrue(run_in_executor.mock_calls)
+
+        self._reopen()
+        self.assertEqual(TEST_NODE, self.db.lookup("sha-1", TEST_NODE).node)
+
+    def test_fetch_returns_serialised_entry(self):
+        self.db.add("sha-1", TEST_NODE, TEST_DATA)
+        self.assertEqual(TEST_DATA, self.db.fetch("sha-1", TEST_NODE))
+        self._reopen()
+        self.assertEqual(TEST_DATA, self.db.fetch("sha-1", TEST_NODE))
+        with self.assertRaises(KeyError):
+            self.db.fetch("sha-1", "foo#bar")
+
+    def test_flush_without_pending_entries_does_not_write(self):
+        with unittest.mock.patch.object(self.db, "_write_conn") as conn:
+            self.db.flush()
+        self.assertFalse(conn.mock_calls)
+
+    def test_persists_across_close(self):
+        self.db.add("sha-1", TEST_NODE, TEST_DATA)
+        self._reopen()
+        self.assertIn(("sha-1", TEST_NODE), self.db)
+        self.assertEqual(TEST_NODE, self.db.lookup("sha-1", TEST_NODE).node)
+
+    def test_preloaded_index_avoids_queries_on_miss(self):
+        self.db.add("sha-1", TEST_NODE, TEST_DATA)
+        self._reopen()
+        with unittest.mock.patch.object(self.db, "_conn") as conn:
+            with self.assertRaises(KeyError):
+                self.db.lookup("sha-1", "foo#bar")
+        self.assertFalse(conn.mock_calls)
+
+    def test_lookup_without_preload(self):
+        self.db.add("sha-1", TEST_NODE, TEST_DATA)
+        self._reopen(preload=False)
+        self.assertIn(("sha-1", TEST_NODE), self.db)
+        self.assertEqual(TEST_NODE, self.db.lookup("sha-1", TEST_NODE).node)
+        with self.assertRaises(KeyError):
+            self.db.lookup("sha-1", "foo#bar")
+
+    def test_read_only(self):
+        self.db.add("sha-1", TEST_NODE, TEST_DATA)
+        self._reopen(read_only=True)
+        self.assertEqual(TEST_NODE, self.db.lookup("sha-1", TEST_NODE).node)
+        with self.assertRaises(RuntimeError):
+            self.db.add("sha-1", "foo#bar", TEST_DATA)
+
+    def test_import_directory(self):
+        dirpath = pathlib.Path(self.tmpdir.name) / "old"
+        dirpath.mkdir()
+        (dirpath / "sha-1_{}.xml".format(
+            urllib.parse.quote(TEST_NODE, safe="")
+        )).write_bytes(TEST_DATA)
+        (dirpath / "README").write_bytes(b"")
+        (dirpath / "garbage.xml").write_bytes(b"")
+
+        self.assertEqual(1, self.db.import_directory(dirpath))
+        self.assertIn(("sha-1", TEST_NODE), self.db)
+
+        self._reopen()
+        self.assertEqual(TEST_NODE, self.db.lookup("sha-1", TEST_NODE).node)
@@ -589,6 +589,7 @@ info</value></field><field var="software"><value>Tkabber</value></field><field\
  var="software_version"><value>1.0-svn-20140122 (Tcl/Tk 8.4.20)</value></field\
 ><field var="os"><value>FreeBSD</value></field><field var="os_version"><value>\
 10.0-STABLE</value></field></x></query>""")
+TEST_DB_ENTRY_DATA = _src.getvalue()
 TEST_DB_ENTRY = aioxmpp.xml.read_single_xso(_src, disco.xso.InfoQuery)
 TEST_DB_ENTRY_VER = "+0mnUAF1ozCEc37cmdPPsYbsfhg="
 TEST_DB_ENTRY_HASH = "sha-1"
@@ -953,6 +954,143 @@ class TestCache(unittest.TestCase):
         self.assertEqual(result, copy())
         self.assertEqual(result.node, node)
 
+    def test_system_db_used_before_system_db_path(self):
+        db = unittest.mock.Mock()
+        db.fetch.return_value = TEST_DB_ENTRY_DATA
+        p = unittest.mock.MagicMock()
+        self.c.set_system_db(db)
+        self.c.set_system_db_path(p)
+
+        result = self.c.lookup_in_database("sha-1", "node")
+
+        db.fetch.assert_called_once_with("sha-1", "node")
+        self.assertIsInstance(result, disco.xso.InfoQuery)
+        self.assertSetEqual(set(TEST_DB_ENTRY.features),
+                            set(result.features))
+        self.assertFalse(p.mock_calls)
+
+    def test_user_db_used_after_system_db(self):
+        system_db = unittest.mock.Mock()
+        system_db.fetch.side_effect = KeyError()
+        user_db = unittest.mock.Mock()
+        user_db.fetch.return_value = TEST_DB_ENTRY_DATA
+        self.c.set_system_db(system_db)
+        self.c.set_user_db(user_db)
+
+        result = self.c.lookup_in_database("sha-1", "node")
+
+        system_db.fetch.assert_called_once_with("sha-1", "node")
+        user_db.fetch.assert_called_once_with("sha-1", "node")
+        self.assertSetEqual(set(TEST_DB_ENTRY.features),
+                            set(result.features))
+
+    def test_db_hits_are_kept_in_memory(self):
+        db = unittest.mock.Mock()
+        db.fetch.return_value = TEST_DB_ENTRY_DATA
+        self.c.set_user_db(db)
+
+        self.c.lookup_in_database("sha-1", "node")
+        with unittest.mock.patch(
+                "aioxmpp.xml.read_single_xso") as read_single_xso:
+            result = self.c.lookup_in_database("sha-1", "node")
+
+        db.fetch.assert_called_once_with("sha-1", "node")
+        self.assertFalse(read_single_xso.mock_calls)
+        self.assertIsNone(result.captured_events)
+        self.assertSetEqual(set(TEST_DB_ENTRY.features),
+                            set(result.features))
+        self.assertEqual(len(TEST_DB_ENTRY_DATA), self.c._overlay_bytes)
+        self.assertEqual(1, self.c.overlay_stats["hits"])
+
+    def test_lookup_in_database_key_errors_if_not_in_user_db(self):
+        user_db = unittest.mock.Mock()
+        user_db.fetch.side_effect = KeyError()
+        self.c.set_user_db(user_db)
+
+        with self.assertRaises(KeyError):
+            self.c.lookup_in_database("sha-1", "node")
+
+    def test_add_cache_entry_adds_to_user_db(self):
+        user_db = unittest.mock.Mock()
+        self.c.set_user_db(user_db)
+
+        with unittest.mock.patch(
+                "aioxmpp.entitycaps.service.serialise_events"
+        ) as serialise_events:
+            self.c.add_cache_entry("sha-1", "node", TEST_DB_ENTRY)
+
+        serialise_events.assert_called_once_with(
+            TEST_DB_ENTRY.captured_events
+        )
+        user_db.add.assert_called_once_with(
+            "sha-1", "node", serialise_events()
+        )
+        self.assertFalse(user_db.lookup.mock_calls)
+        self.assertEqual(
+            self.c.lookup_in_database("sha-1", "node").node,
+            "node"
+        )
+
+    def test_overlay_defaults(self):
+        self.assertEqual(1024, entitycaps_service.Cache.overlay_max_entries)
+        self.assertIsNone(entitycaps_service.Cache.overlay_max_bytes)
+
+    def test_overlay_does_not_keep_captured_events(self):
+        self.c.add_cache_entry("sha-1", "node", TEST_DB_ENTRY)
+        result = self.c.lookup_in_database("sha-1", "node")
+        self.assertIsNone(result.captured_events)
+        self.assertIsNotNone(TEST_DB_ENTRY.captured_events)
+        self.assertSetEqual(set(TEST_DB_ENTRY.features),
+                            set(result.features))
+
+    def test_overlay_evicts_least_recently_used_entry(self):
+        self.c.overlay_max_entries = 2
+        self.c.add_cache_entry("sha-1", "a", TEST_DB_ENTRY)
+        self.c.add_cache_entry("sha-1", "b", TEST_DB_ENTRY)
+        self.c.lookup_in_database("sha-1", "a")
+        self.c.add_cache_entry("sha-1", "c", TEST_DB_ENTRY)
+
+        self.c.lookup_in_database("sha-1", "a")
+        self.c.lookup_in_database("sha-1", "c")
+        with self.assertRaises(KeyError):
+            self.c.lookup_in_database("sha-1", "b")
+
+        self.assertEqual(
+            {"hits": 3, "misses": 1, "evictions": 1},
+            dict(self.c.overlay_stats)
+        )
+
+    def test_overlay_evicts_by_size(self):
+        self.c.add_cache_entry("sha-1", "a", TEST_DB_ENTRY)
+        size = self.c._overlay_bytes
+        self.assertGreater(size, 0)
+
+        self.c.overlay_max_bytes = size * 2
+        self.c.add_cache_entry("sha-1", "b", TEST_DB_ENTRY)
+        self.c.add_cache_entry("sha-1", "c", TEST_DB_ENTRY)
+
+        with self.assertRaises(KeyError):
+            self.c.lookup_in_database("sha-1", "a")
+        self.c.lookup_in_database("sha-1", "b")
+        self.c.lookup_in_database("sha-1", "c")
+        self.assertEqual(size * 2, self.c._overlay_bytes)
+
+    def test_overlay_keeps_newest_entry_even_if_too_large(self):
+        self.c.overlay_max_bytes = 1
+        self.c.add_cache_entry("sha-1", "a", TEST_DB_ENTRY)
+        self.c.add_cache_entry("sha-1", "b", TEST_DB_ENTRY)
+
+        self.c.lookup_in_database("sha-1", "b")
+        with self.assertRaises(KeyError):
+            self.c.lookup_in_database("sha-1", "a")
+
+    def test_overlay_replacing_entry_does_not_leak_size(self):
+        self.c.add_cache_entry("sha-1", "a", TEST_DB_ENTRY)
+        size = self.c._overlay_bytes
+        self.c.add_cache_entry("sha-1", "a", TEST_DB_ENTRY)
+        self.assertEqual(size, self.c._overlay_bytes)
+        self.assertEqual(0, self.c.overlay_stats["evictions"])
+
     def test_add_cache_entry_does_not_perform_writeback_if_no_userdb_is_set(self):
         q = disco.xso.InfoQuery()
         p = unittest.mock.Mock()
@@ -1159,6 +1297,164 @@ class TestService(unittest.TestCase):
 
         self.assertIsNone(presence.xep0115_caps)
 
+    def _caps_presence(self, from_, ver=None):
+        presence = stanza.Presence()
+        presence.from_ = from_
+        presence.xep0115_caps = entitycaps_xso.Caps(
+            TEST_DB_ENTRY_NODE_BARE,
+            ver or TEST_DB_ENTRY_VER,
+            TEST_DB_ENTRY_HASH,
+        )
+        return presence
+
+    def test_lookup_delay_defaults_to_None(self):
+        self.assertIsNone(entitycaps_service.Service.lookup_delay)
+
+    def test_handle_inbound_presence_defers_lookups(self):
+        self.s.lookup_delay = 0.02
+        from2 = TEST_FROM.replace(resource="r2")
+        from3 = TEST_FROM.replace(localpart="other")
+
+        info = unittest.mock.sentinel.info
+
+        with unittest.mock.patch.object(self.s, "_lookup_info_verified",
+                                        new=CoroutineMock()) as lookup_info:
+            lookup_info.return_value = info, True
+
+            self.s.handle_inbound_presence(self._caps_presence(TEST_FROM))
+            run_coroutine(asyncio.sleep(0.01))
+            self.s.handle_inbound_presence(self._caps_presence(from2))
+            self.s.handle_inbound_presence(
+                self._caps_presence(from3, ver="otherver")
+            )
+            run_coroutine(asyncio.sleep(0.01))
+
+            # the timer has been restarted by the later presences
+            self.assertFalse(lookup_info.mock_calls)
+
+            run_coroutine(asyncio.sleep(0.02))
+
+        self.assertSequenceEqual(
+            [
+                unittest.mock.call(TEST_FROM,
+                                   TEST_DB_ENTRY_NODE_BARE,
+                                   TEST_DB_ENTRY_VER,
+                                   TEST_DB_ENTRY_HASH),
+                unittest.mock.call(from3,
+                                   TEST_DB_ENTRY_NODE_BARE,
+                                   "otherver",
+                                   TEST_DB_ENTRY_HASH),
+            ],
+            lookup_info.mock_calls
+        )
+
+        futures = {
+            call[1][0]: call[1][2]
+            for call in self.disco.set_info_future.mock_calls
+        }
+        self.assertSetEqual({TEST_FROM, from2, from3}, set(futures))
+        for fut in futures.values():
+            self.assertIs(info, fut.result())
+
+    def test_deferred_lookup_falls_back_to_next_peer(self):
+        self.s.lookup_delay = 0
+        from2 = TEST_FROM.replace(resource="r2")
+        exc = ValueError("hash mismatch")
+        info = unittest.mock.sentinel.info
+
+        with unittest.mock.patch.object(self.s, "_lookup_info_verified",
+                                        new=CoroutineMock()) as lookup_info:
+            lookup_info.side_effect = [exc, (info, True)]
+
+            self.s.handle_inbound_presence(self._caps_presence(TEST_FROM))
+            self.s.handle_inbound_presence(self._caps_presence(from2))
+            run_coroutine(asyncio.sleep(0.01))
+
+        self.assertEqual(2, len(lookup_info.mock_calls))
+
+        (_, (_, _, fut1), _), (_, (_, _, fut2), _) = \
+            self.disco.set_info_future.mock_calls
+        self.assertIs(exc, fut1.exception())
+        self.assertIs(info, fut2.result())
+
+    def test_deferred_lookup_does_not_share_unverified_info(self):
+        self.s.lookup_delay = 0
+        from2 = TEST_FROM.replace(resource="r2")
+        from3 = TEST_FROM.replace(resource="r3")
+        forged = disco.xso.InfoQuery(features={"urn:forged"})
+        info = disco.xso.InfoQuery()
+        self.disco.query_info.side_effect = [forged, info]
+
+        with unittest.mock.patch(
+                "aioxmpp.entitycaps.service.hash_query") as hash_query:
+            hash_query.side_effect = ["mismatch", TEST_DB_ENTRY_VER]
+
+            self.s.handle_inbound_presence(self._caps_presence(TEST_FROM))
+            self.s.handle_inbound_presence(self._caps_presence(from2))
+            self.s.handle_inbound_presence(self._caps_presence(from3))
+            run_coroutine(asyncio.sleep(0.01))
+
+        self.assertSequenceEqual(
+            [
+                unittest.mock.call(
+                    jid,
+                    node=TEST_DB_ENTRY_NODE_BARE + "#" + TEST_DB_ENTRY_VER,
+                    require_fresh=True,
+                )
+                for jid in [TEST_FROM, from2]
+            ],
+            self.disco.query_info.mock_calls
+        )
+
+        fut1, fut2, fut3 = [
+            call[1][2]
+            for call in self.disco.set_info_future.mock_calls
+        ]
+        self.assertIs(forged, fut1.result())
+        self.assertIs(info, fut2.result())
+        self.assertIs(info, fut3.result())
+
+    def test_lookup_max_delay(self):
+        self.s.lookup_delay = 0.02
+        self.s.lookup_max_delay = 0.03
+
+        with unittest.mock.patch.object(self.s, "_lookup_info_verified",
+                                        new=CoroutineMock()) as lookup_info:
+            lookup_info.return_value = unittest.mock.sentinel.info, True
+
+            for i in range(5):
+                self.s.handle_inbound_presence(self._caps_presence(
+                    TEST_FROM.replace(resource=str(i))
+                ))
+                run_coroutine(asyncio.sleep(0.01))
+
+        self.assertEqual(1, len(lookup_info.mock_calls))
+
+    def test_deferred_lookup_uses_client_loop(self):
+        self.s.lookup_delay = 0.01
+        self.cc.loop = unittest.mock.Mock()
+        self.cc.loop.time.return_value = 100
+
+        self.s.handle_inbound_presence(self._caps_presence(TEST_FROM))
+
+        self.cc.loop.call_at.assert_called_once_with(
+            100.01,
+            self.s._start_deferred_lookups,
+        )
+
+    def test_shutdown_cancels_deferred_lookups(self):
+        self.s.lookup_delay = 0.01
+
+        with unittest.mock.patch.object(self.s, "_lookup_info_verified",
+                                        new=CoroutineMock()) as lookup_info:
+            self.s.handle_inbound_presence(self._caps_presence(TEST_FROM))
+            run_coroutine(self.s.shutdown())
+            run_coroutine(asyncio.sleep(0.02))
+
+        self.assertFalse(lookup_info.mock_calls)
+        _, (_, _, fut), _ = self.disco.set_info_future.mock_calls[0]
+        self.assertTrue(fut.cancelled())
+
     def test_handle_inbound_presence_deals_with_None(self):
         presence = stanza.Presence()
         presence.from_ = TEST_FROM
@@ -1471,19 +1767,6 @@ class TestService(unittest.TestCase):
         self.assertIs(result, query_result)
 
     def test_update_hash(self):
-        iter_features_result = iter([
-            "http://jabber.org/protocol/caps",
-            "http://jabber.org/protocol/disco#items",
-            "http://jabber.org/protocol/disco#info",
-        ])
-
-        self.disco.iter_features.return_value = iter_features_result
-
-        self.disco.iter_identities.return_value = iter([
-            ("client", "pc", None, None),
-            ("client", "pc", structs.LanguageTag.fromstr("en"), "foo"),
-        ])
-
         self.s.ver = "old_ver"
         old_ver = self.s.ver
 
@@ -1494,72 +1777,78 @@ class TestService(unittest.TestCase):
                 new=base.hash_query
             ))
 
-            stack.enter_context(unittest.mock.patch(
-                "aioxmpp.disco.xso.InfoQuery",
-                new=base.InfoQuery
-            ))
-
             base.hash_query.return_value = "hash_query_result"
 
             self.s.update_hash()
 
-        base.InfoQuery.assert_called_with(
-            identities=[
-                disco.xso.Identity(category="client",
-                                   type_="pc"),
-                disco.xso.Identity(category="client",
-                                   type_="pc",
-                                   lang=structs.LanguageTag.fromstr("en"),
-                                   name="foo"),
-            ],
-            features=iter_features_result
-        )
-
-        base.hash_query.assert_called_with(
-            base.InfoQuery(),
-            "sha1",
-        )
-
         calls = list(self.disco.mock_calls)
         self.assertSequenceEqual(
             calls,
             [
-                unittest.mock.call.iter_identities(),
-                unittest.mock.call.iter_features(),
+                unittest.mock.call.as_info_xso(),
                 unittest.mock.call.unmount_node(
                     "http://aioxmpp.zombofant.net/#"+old_ver
                 ),
                 unittest.mock.call.mount_node(
-                    "http://aioxmpp.zombofant.net/#"+base.hash_query(),
+                    "http://aioxmpp.zombofant.net/#hash_query_result",
                     self.disco
                 ),
             ]
         )
 
+        base.hash_query.assert_called_once_with(
+            self.disco.as_info_xso(),
+            "sha1",
+        )
+
+        self.assertEqual(self.s.ver, "hash_query_result")
+
+    def test_update_hash_hashes_info_of_disco_node(self):
+        node = disco.Service(self.cc)
+        node.register_feature("http://jabber.org/protocol/caps")
+        self.disco.as_info_xso.return_value = node.as_info_xso()
+
+        self.s.update_hash()
+
         self.assertEqual(
-            self.s.ver,
-            base.hash_query()
+            entitycaps_service.hash_query(node.as_info_xso(), "sha1"),
+            self.s.ver
         )
 
-    def test_update_hash_emits_on_ver_changed(self):
-        self.disco.iter_features.return_value = iter([
-            "http://jabber.org/protocol/caps",
-            "http://jabber.org/protocol/disco#items",
-            "http://jabber.org/protocol/disco#info",
-        ])
+    def test_update_hash_does_not_rehash_unchanged_info(self):
+        base = unittest.mock.Mock()
+        with contextlib.ExitStack() as stack:
+            stack.enter_context(unittest.mock.patch(
+                "aioxmpp.entitycaps.service.hash_query",
+                new=base.hash_query
+            ))
+            base.hash_query.return_value = "hash_query_result"
 
-        self.disco.iter_identities.return_value = iter([
-            ("client", "pc", None, None),
-            ("client", "pc", structs.LanguageTag.fromstr("en"), "foo"),
-        ])
+            self.s.update_hash()
+            self.s.update_hash()
+
+            self.assertEqual(1, len(base.hash_query.mock_calls))
 
+            self.disco.as_info_xso.return_value = unittest.mock.sentinel.new
+            self.s.update_hash()
+
+        base.hash_query.assert_called_with(
+            unittest.mock.sentinel.new,
+            "sha1",
+        )
+        self.assertEqual(2, len(base.hash_query.mock_calls))
+
+    def test_update_hash_emits_on_ver_changed(self):
         self.s.ver = "old_ver"
 
         cb = unittest.mock.Mock()
 
         self.s.on_ver_changed.connect(cb)
 
-        self.s.update_hash()
+        with unittest.mock.patch(
+                "aioxmpp.entitycaps.service.hash_query",
+                return_value="new_ver"):
+            self.s.update_hash()
 
         cb.assert_called_with()
 
@@ -1585,8 +1874,7 @@ class TestService(unittest.TestCase):
         self.assertSequenceEqual(
             calls,
             [
-                unittest.mock.call.iter_identities(),
-                unittest.mock.call.iter_features(),
+                unittest.mock.call.as_info_xso(),
             ]
         )
 
@@ -1607,8 +1895,7 @@ class TestService(unittest.TestCase):
         self.assertSequenceEqual(
             calls,
             [
-                unittest.mock.call.iter_identities(),
-                unittest.mock.call.iter_features(),
+                unittest.mock.call.as_info_xso(),
                 unittest.mock.call.mount_node(
                     "http://aioxmpp.zombofant.net/#"+base.hash_query(),
                     self.disco
@@ -1633,8 +1920,7 @@ class TestService(unittest.TestCase):
         self.assertSequenceEqual(
             calls,
             [
-                unittest.mock.call.iter_identities(),
-                unittest.mock.call.iter_features(),
+                unittest.mock.call.as_info_xso(),
                 unittest.mock.call.mount_node(
                     "http://aioxmpp.zombofant.net/#"+base.hash_query(),
                     self.disco
@@ -1664,9 +1950,64 @@ class TestService(unittest.TestCase):
 
         get_event_loop.assert_called_with()
         get_event_loop().call_soon.assert_called_with(
-            self.s.update_hash
+            self.s._update_hash_scheduled
         )
 
+    def test__info_changed_coalesces_changes_within_one_iteration(self):
+        with unittest.mock.patch.object(self.s, "update_hash") as update_hash:
+            for i in range(30):
+                self.s._info_changed()
+            run_coroutine(asyncio.sleep(0))
+
+            update_hash.assert_called_once_with()
+
+            self.s._info_changed()
+            run_coroutine(asyncio.sleep(0))
+
+        self.assertEqual(2, len(update_hash.mock_calls))
+
+    def test_registering_many_features_emits_on_ver_changed_once(self):
+        cc = make_connected_client()
+        disco_service = disco.Service(cc)
+        cc.mock_services[disco.Service] = disco_service
+        s = entitycaps_service.Service(cc)
+        run_coroutine(asyncio.sleep(0))
+
+        cb = unittest.mock.Mock()
+        cb.return_value = None
+        s.on_ver_changed.connect(cb)
+
+        with unittest.mock.patch(
+                "aioxmpp.entitycaps.service.hash_query",
+                wraps=entitycaps_service.hash_query) as hash_query:
+            for i in range(30):
+                disco_service.register_feature("urn:example:{}".format(i))
+            run_coroutine(asyncio.sleep(0))
+
+        hash_query.assert_called_once_with(unittest.mock.ANY, "sha1")
+        cb.assert_called_once_with()
+
+    def test__info_changed_with_update_delay_debounces(self):
+        self.s.update_delay = 0.02
+        with unittest.mock.patch.object(self.s, "update_hash") as update_hash:
+            self.s._info_changed()
+            run_coroutine(asyncio.sleep(0.01))
+            self.s._info_changed()
+            run_coroutine(asyncio.sleep(0.01))
+            self.assertFalse(update_hash.mock_calls)
+            run_coroutine(asyncio.sleep(0.02))
+
+        update_hash.assert_called_once_with()
+
+    def test_shutdown_cancels_scheduled_update(self):
+        self.s.update_delay = 0.01
+        with unittest.mock.patch.object(self.s, "update_hash") as update_hash:
+            self.s._info_changed()
+            run_coroutine(self.s.shutdown())
+            run_coroutine(asyncio.sleep(0.02))
+
+        self.assertFalse(update_hash.mock_calls)
+
     def test_handle_outbound_presence_does_not_attach_caps_if_ver_is_None(
             self):
         self.s.ver = None
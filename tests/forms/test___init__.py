@@ -1,6 +1,7 @@
 import unittest
 
 import aioxmpp.forms as forms
+import aioxmpp.forms.form as forms_form
 import aioxmpp.forms.xso as forms_xso
 
 
@@ -10,3 +11,21 @@ class TestExports(unittest.TestCase):
             forms.Data,
             forms_xso.Data
         )
+
+    def test_Form(self):
+        self.assertIs(
+            forms.Form,
+            forms_form.Form
+        )
+
+    def test_InputLine(self):
+        self.assertIs(
+            forms.InputLine,
+            forms_form.InputLine
+        )
+
+    def test_InputJID(self):
+        self.assertIs(
+            forms.InputJID,
+            forms_form.InputJID
+        )
@@ -0,0 +1,234 @@
+import unittest
+import unittest.mock
+
+import aioxmpp.forms.form as form
+import aioxmpp.forms.xso as forms_xso
+import aioxmpp.structs as structs
+import aioxmpp.xso as xso
+
+
+TEST_JID = structs.JID.fromstr("foo@bar.example/baz")
+
+
+class ExampleForm(form.Form):
+    FORM_TYPE = "urn:example"
+
+    name = form.InputLine("name", default="nobody")
+
+    count = form.InputLine("count", type_=xso.Integer())
+
+    owner = form.InputJID("owner")
+
+
+def make_data(fields, form_type="urn:example"):
+    data = forms_xso.Data()
+    data.type_ = "form"
+    if form_type is not None:
+        data.fields.append(forms_xso.Field(
+            type_="hidden",
+            var="FORM_TYPE",
+            values=[form_type],
+        ))
+    for var, values in fields:
+        data.fields.append(forms_xso.Field(var=var, values=values))
+    return data
+
+
+class TestInputLine(unittest.TestCase):
+    def test_class_access_returns_descriptor(self):
+        self.assertIsInstance(ExampleForm.name, form.InputLine)
+        self.assertEqual("name", ExampleForm.name.var)
+        self.assertEqual("nobody", ExampleForm.name.default)
+        self.assertIsInstance(ExampleForm.count.type_, xso.Integer)
+        self.assertIsInstance(ExampleForm.owner.type_, xso.JID)
+
+    def test_default(self):
+        f = ExampleForm()
+        self.assertEqual("nobody", f.name)
+        self.assertIsNone(f.count)
+
+    def test_set_and_get(self):
+        f = ExampleForm()
+        f.count = 10
+        f.owner = TEST_JID
+
+        self.assertEqual(10, f.count)
+        self.assertEqual(TEST_JID, f.owner)
+        self.assertEqual(["10"], f._field_data["count"])
+
+    def test_set_rejects_newlines(self):
+        f = ExampleForm()
+        with self.assertRaisesRegex(ValueError, "newlines not allowed"):
+            f.name = "foo\nbar"
+        self.assertEqual("nobody", f.name)
+
+    def test_value_is_parsed_once(self):
+        f = ExampleForm.from_xso(make_data([("count", ["10"])]))
+
+        with unittest.mock.patch.object(
+                ExampleForm.count.type_, "parse",
+                wraps=ExampleForm.count.type_.parse) as parse:
+            self.assertEqual(10, f.count)
+            self.assertEqual(10, f.count)
+
+        parse.assert_called_once_with("10")
+
+    def test_set_invalidates_parsed_value(self):
+        f = ExampleForm.from_xso(make_data([("count", ["10"])]))
+        self.assertEqual(10, f.count)
+        f.count = 20
+        self.assertEqual(20, f.count)
+
+    def test_delete(self):
+        f = ExampleForm()
+        f.name = "foo"
+        del f.name
+        self.assertEqual("nobody", f.name)
+
+
+class TestFormClass(unittest.TestCase):
+    def test_collects_descriptors(self):
+        self.assertDictEqual(
+            {
+                "name": ExampleForm.name,
+                "count": ExampleForm.count,
+                "owner": ExampleForm.owner,
+            },
+            ExampleForm.FIELD_DESCRIPTORS
+        )
+        self.assertDictEqual({}, form.Form.FIELD_DESCRIPTORS)
+
+    def test_inherits_descriptors(self):
+        class Derived(ExampleForm):
+            extra = form.InputLine("extra")
+
+        self.assertDictEqual(
+            {
+                "name": ExampleForm.name,
+                "count": ExampleForm.count,
+                "owner": ExampleForm.owner,
+                "extra": Derived.extra,
+            },
+            Derived.FIELD_DESCRIPTORS
+        )
+
+    def test_rejects_duplicate_var(self):
+        with self.assertRaisesRegex(TypeError, "duplicate descriptor"):
+            class Broken(ExampleForm):
+                other_name = form.InputLine("name")
+
+
+class TestForm(unittest.TestCase):
+    def test_init(self):
+        f = ExampleForm()
+        self.assertEqual("urn:example", f.form_type)
+        with self.assertRaises(KeyError):
+            f.get_field("name")
+
+    def test_from_xso(self):
+        data = make_data([
+            ("name", ["foo"]),
+            ("owner", [str(TEST_JID)]),
+            ("unknown", ["x"]),
+        ])
+        f = ExampleForm.from_xso(data)
+
+        self.assertEqual("urn:example", f.form_type)
+        self.assertEqual("foo", f.name)
+        self.assertEqual(TEST_JID, f.owner)
+        self.assertIsNone(f.count)
+        self.assertIs(data.fields[1], f.get_field("name"))
+        self.assertIs(data.fields[3], f.get_field("unknown"))
+        with self.assertRaises(KeyError):
+            f.get_field("count")
+
+    def test_from_xso_rejects_other_form_type(self):
+        with self.assertRaisesRegex(ValueError, "unexpected FORM_TYPE"):
+            ExampleForm.from_xso(make_data([], form_type="urn:other"))
+
+        with self.assertRaisesRegex(ValueError, "unexpected FORM_TYPE"):
+            ExampleForm.from_xso(make_data([], form_type=None))
+
+    def test_from_xso_without_template_form_type(self):
+        f = form.Form.from_xso(make_data([], form_type="urn:other"))
+        self.assertEqual("urn:other", f.form_type)
+
+    def test_from_xso_uses_first_field_with_var(self):
+        data = make_data([("name", ["foo"]), ("name", ["bar"])])
+        f = ExampleForm.from_xso(data)
+        self.assertEqual("foo", f.name)
+        self.assertIs(data.fields[1], f.get_field("name"))
+
+    def test_render_reply(self):
+        data = make_data([
+            ("unknown", ["x"]),
+            ("name", ["foo"]),
+        ])
+        f = ExampleForm.from_xso(data)
+        f.count = 3
+        f.name = "bar"
+
+        reply = f.render_reply()
+        self.assertIsInstance(reply, forms_xso.Data)
+        self.assertEqual("submit", reply.type_)
+        self.assertSequenceEqual(
+            [
+                ("FORM_TYPE", ["urn:example"]),
+                ("unknown", ["x"]),
+                ("name", ["bar"]),
+                ("count", ["3"]),
+            ],
+            [(field.var, list(field.values)) for field in reply.fields]
+        )
+
+    def test_render_reply_without_form_type(self):
+        f = form.Form()
+        self.assertSequenceEqual([], list(f.render_reply().fields))
+
+    def test_render_reply_keeps_type_and_label(self):
+        data = make_data([])
+        data.fields.append(forms_xso.Field(
+            type_="list-single",
+            var="name",
+            label="Name",
+            desc="The name",
+            options={"a": "A", "b": "B"},
+            values=["a"],
+            required=True,
+        ))
+        f = ExampleForm.from_xso(data)
+        f.name = "b"
+
+        field = f.render_reply().fields[1]
+        self.assertEqual("name", field.var)
+        self.assertEqual("list-single", field.type_)
+        self.assertEqual("Name", field.label)
+        self.assertSequenceEqual(["b"], field.values)
+        self.assertFalse(field.options)
+        self.assertIsNone(field.desc)
+        self.assertIsNone(field.required)
+
+    def test_render_reply_keeps_all_values_of_multi_fields(self):
+        owners = [
+            str(TEST_JID.bare()),
+            "owner2@bar.example",
+            "owner3@bar.example",
+        ]
+        data = make_data([])
+        data.fields.append(forms_xso.Field(
+            type_="jid-multi",
+            var="muc#roomconfig_roomowners",
+            values=owners,
+        ))
+        f = form.Form.from_xso(data)
+
+        field = f.render_reply().fields[1]
+        self.assertEqual("muc#roomconfig_roomowners", field.var)
+        self.assertEqual("jid-multi", field.type_)
+        self.assertSequenceEqual(owners, field.values)
+
+        reparsed = form.Form.from_xso(f.render_reply())
+        self.assertSequenceEqual(
+            owners,
+            reparsed.render_reply().fields[1].values
+        )
@@ -1,3 +1,4 @@
+import collections
 import unittest
 
 import aioxmpp.forms.xso as forms_xso
@@ -664,3 +665,81 @@ class TestData(unittest.TestCase):
         with self.assertRaisesRegex(ValueError,
                                      "field mismatch between row and header"):
             obj.validate()
+
+    def test_from_dict(self):
+        obj = forms_xso.Data.from_dict(
+            "submit",
+            collections.OrderedDict([
+                ("foo", "bar"),
+                ("multi", ["a", "b"]),
+            ]),
+            form_type="urn:example",
+        )
+
+        self.assertEqual("submit", obj.type_)
+        self.assertSequenceEqual(
+            [
+                ("FORM_TYPE", "hidden", ["urn:example"]),
+                ("foo", "text-single", ["bar"]),
+                ("multi", "text-single", ["a", "b"]),
+            ],
+            [
+                (field.var, field.type_, list(field.values))
+                for field in obj.fields
+            ]
+        )
+
+    def test_from_dict_without_form_type(self):
+        obj = forms_xso.Data.from_dict("result", {"foo": "bar"})
+        self.assertSequenceEqual(
+            ["foo"],
+            [field.var for field in obj.fields]
+        )
+
+    def test_to_dict(self):
+        obj = forms_xso.Data()
+        obj.type_ = "form"
+        obj.fields.append(forms_xso.Field(type_="fixed", values=["text"]))
+        obj.fields.append(forms_xso.Field(type_="hidden", var="FORM_TYPE",
+                                          values=["urn:example"]))
+        obj.fields.append(forms_xso.Field(var="foo", values=["bar"]))
+        obj.fields.append(forms_xso.Field(var="empty"))
+
+        self.assertDictEqual(
+            {
+                "FORM_TYPE": ["urn:example"],
+                "foo": ["bar"],
+                "empty": [],
+            },
+            obj.to_dict()
+        )
+
+    def test_dict_roundtrip(self):
+        values = {"foo": ["bar"], "baz": ["a", "b"]}
+        self.assertDictEqual(
+            values,
+            forms_xso.Data.from_dict("submit", values).to_dict()
+        )
+
+    def test_get_form_type(self):
+        obj = forms_xso.Data()
+        self.assertIsNone(obj.get_form_type())
+
+        obj.fields.append(forms_xso.Field(var="foo", values=["bar"]))
+        self.assertIsNone(obj.get_form_type())
+
+        obj.fields.append(forms_xso.Field(type_="hidden", var="FORM_TYPE"))
+        self.assertIsNone(obj.get_form_type())
+
+        obj.fields[-1].values.append("urn:example")
+        self.assertEqual("urn:example", obj.get_form_type())
+
+    def test_get_form_type_returns_first_form_type(self):
+        obj = forms_xso.Data()
+        obj.fields.append(forms_xso.Field(var="foo", values=["bar"]))
+        obj.fields.append(forms_xso.Field(type_="hidden", var="FORM_TYPE",
+                                          values=["urn:example"]))
+        self.assertEqual("urn:example", obj.get_form_type())
+
+        obj.fields[0].var = "FORM_TYPE"
+        self.assertEqual("bar", obj.get_form_type())
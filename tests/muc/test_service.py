@@ -103,6 +103,11 @@ class TestOccupant(unittest.TestCase):
 
         self.assertFalse(occ.is_self)
 
+    def test_uses_slots(self):
+        occupant = muc_service.Occupant(TEST_MUC_JID.replace(resource="foo"))
+        with self.assertRaises(AttributeError):
+            occupant.foo = "bar"
+
     def test_from_presence_can_deal_with_sparse_presence(self):
         presence = aioxmpp.stanza.Presence(
             from_=TEST_MUC_JID.replace(resource="secondwitch"),
@@ -222,6 +227,7 @@ class TestRoom(unittest.TestCase):
 
         self.base = unittest.mock.Mock()
         self.base.service.logger = unittest.mock.Mock(name="logger")
+        self.base.service._unbatched_admin_services = set()
 
         self.jmuc = muc_service.Room(self.base.service, self.mucjid)
 
@@ -1583,6 +1589,96 @@ class TestRoom(unittest.TestCase):
         )
         self.assertEqual(result, run_coroutine(set_affiliation()))
 
+    def test_set_roles(self):
+        with unittest.mock.patch.object(
+                self.base.service.client.stream,
+                "send_iq_and_wait_for_reply",
+                new=CoroutineMock()) as send_iq:
+            send_iq.return_value = None
+
+            result = run_coroutine(self.jmuc.set_roles(
+                [
+                    ("firstwitch", "visitor", "foo"),
+                    ("secondwitch", "participant", None),
+                    ("thirdwitch", "moderator", None),
+                ],
+                batch_size=2,
+            ))
+
+        self.assertSequenceEqual([None, None, None], result)
+        self.assertEqual(2, len(send_iq.mock_calls))
+
+        _, (iq,), _ = send_iq.mock_calls[0]
+        self.assertEqual(self.mucjid, iq.to)
+        self.assertSequenceEqual(
+            [("firstwitch", "visitor", "foo"),
+             ("secondwitch", "participant", None)],
+            [(item.nick, item.role, item.reason)
+             for item in iq.payload.items]
+        )
+
+        _, (iq,), _ = send_iq.mock_calls[1]
+        self.assertSequenceEqual(
+            [("thirdwitch", "moderator", None)],
+            [(item.nick, item.role, item.reason)
+             for item in iq.payload.items]
+        )
+
+    def test_set_roles_reports_errors_per_item(self):
+        with unittest.mock.patch.object(
+                self.base.service.client.stream,
+                "send_iq_and_wait_for_reply",
+                new=CoroutineMock()) as send_iq:
+            exc = aioxmpp.errors.XMPPCancelError(
+                condition=(utils.namespaces.stanzas, "forbidden")
+            )
+            send_iq.side_effect = [exc, None, exc]
+
+            result = run_coroutine(self.jmuc.set_roles(
+                [
+                    ("firstwitch", "visitor", None),
+                    ("secondwitch", "visitor", None),
+                ],
+            ))
+
+        self.assertSequenceEqual([None, exc], result)
+        self.assertSequenceEqual(
+            [2, 1, 1],
+            [len(iq.payload.items)
+             for _, (iq,), _ in send_iq.mock_calls]
+        )
+
+    def test_set_roles_rejects_None_role(self):
+        with unittest.mock.patch.object(
+                self.base.service.client.stream,
+                "send_iq_and_wait_for_reply",
+                new=CoroutineMock()) as send_iq:
+            with self.assertRaisesRegex(ValueError,
+                                        "role must not be None"):
+                run_coroutine(self.jmuc.set_roles(
+                    [("thirdwitch", None, None)],
+                ))
+
+        self.assertFalse(send_iq.mock_calls)
+
+    def test_set_affiliations_delegates_to_service(self):
+        with unittest.mock.patch.object(
+                self.base.service,
+                "set_affiliations",
+                new=CoroutineMock()) as set_affiliations:
+            changes = object()
+
+            result = run_coroutine(self.jmuc.set_affiliations(
+                changes, batch_size=10
+            ))
+
+        set_affiliations.assert_called_with(
+            self.mucjid,
+            changes,
+            batch_size=10,
+        )
+        self.assertEqual(result, run_coroutine(set_affiliations()))
+
     def test_set_subject(self):
         d = {
             None: "foobar"
@@ -2002,6 +2098,298 @@ class TestRoom(unittest.TestCase):
         del self.jmuc
 
 
+    def _presence(self, nick, *, type_=None, affiliation="member",
+                  role="participant", jid=None, status_codes=()):
+        presence = aioxmpp.stanza.Presence(
+            type_=type_,
+            from_=TEST_MUC_JID.replace(resource=nick)
+        )
+        presence.xep0045_muc_user = muc_xso.UserExt(
+            status_codes=set(status_codes),
+            items=[
+                muc_xso.UserItem(affiliation=affiliation,
+                                 role=role,
+                                 jid=jid)
+            ]
+        )
+        return presence
+
+    def test_occupant_indices(self):
+        jid1 = aioxmpp.structs.JID.fromstr("foo@bar.example/a")
+        jid2 = aioxmpp.structs.JID.fromstr("foo@bar.example/b")
+
+        self.jmuc._inbound_muc_user_presence(
+            self._presence("thirdwitch", affiliation="owner",
+                           role="moderator", status_codes={110})
+        )
+        self.jmuc._inbound_muc_user_presence(
+            self._presence("firstwitch", jid=jid1)
+        )
+        self.jmuc._inbound_muc_user_presence(
+            self._presence("secondwitch", jid=jid2, role="visitor",
+                           affiliation="none")
+        )
+        self.jmuc._inbound_muc_user_presence(self._presence("anon"))
+
+        me, first, second, anon = self.jmuc.occupants
+
+        self.assertSetEqual(
+            {first, second},
+            self.jmuc.get_occupants_with_jid(jid1.bare())
+        )
+        self.assertSetEqual({first},
+                            self.jmuc.get_occupants_with_jid(jid1))
+        self.assertSetEqual({me},
+                            self.jmuc.get_occupants_with_role("moderator"))
+        self.assertSetEqual(
+            {first, anon},
+            self.jmuc.get_occupants_with_role("participant")
+        )
+        self.assertSetEqual(
+            {first, anon},
+            self.jmuc.get_occupants_with_affiliation("member")
+        )
+        self.assertEqual(
+            {"moderator": 1, "participant": 2, "visitor": 1},
+            dict(self.jmuc.role_counts)
+        )
+        self.assertEqual(
+            {"owner": 1, "member": 2, "none": 1},
+            dict(self.jmuc.affiliation_counts)
+        )
+        self.assertIsInstance(
+            self.jmuc.get_occupants_with_role("visitor"),
+            frozenset
+        )
+
+    def test_occupant_indices_follow_role_and_affiliation_changes(self):
+        jid = aioxmpp.structs.JID.fromstr("foo@bar.example/a")
+        self.jmuc._inbound_muc_user_presence(
+            self._presence("firstwitch", jid=jid)
+        )
+        occupant, = self.jmuc.occupants
+
+        self.jmuc._inbound_muc_user_presence(
+            self._presence("firstwitch", jid=jid, role="moderator",
+                           affiliation="admin")
+        )
+
+        self.assertFalse(self.jmuc.get_occupants_with_role("participant"))
+        self.assertSetEqual({occupant},
+                            self.jmuc.get_occupants_with_role("moderator"))
+        self.assertSetEqual(
+            {occupant},
+            self.jmuc.get_occupants_with_affiliation("admin")
+        )
+        self.assertEqual({"moderator": 1}, dict(self.jmuc.role_counts))
+
+    def test_occupant_indices_survive_nick_change(self):
+        jid = aioxmpp.structs.JID.fromstr("foo@bar.example/a")
+        self.jmuc._inbound_muc_user_presence(
+            self._presence("firstwitch", jid=jid)
+        )
+        occupant, = self.jmuc.occupants
+
+        presence = self._presence("firstwitch", jid=jid, type_="unavailable",
+                                  status_codes={303})
+        presence.xep0045_muc_user.items[0].nick = "oldwitch"
+        self.jmuc._inbound_muc_user_presence(presence)
+
+        self.assertEqual("oldwitch", occupant.nick)
+        self.assertSetEqual({occupant},
+                            self.jmuc.get_occupants_with_jid(jid))
+
+    def test_occupant_indices_drop_leaving_occupants(self):
+        jid = aioxmpp.structs.JID.fromstr("foo@bar.example/a")
+        self.jmuc._inbound_muc_user_presence(
+            self._presence("firstwitch", jid=jid)
+        )
+        self.jmuc._inbound_muc_user_presence(
+            self._presence("firstwitch", jid=jid, type_="unavailable",
+                           role="none")
+        )
+
+        self.assertFalse(self.jmuc.get_occupants_with_jid(jid))
+        self.assertFalse(self.jmuc.role_counts)
+        self.assertFalse(self.jmuc.affiliation_counts)
+
+    def test_occupant_indices_are_cleared_on_resume(self):
+        self.jmuc._inbound_muc_user_presence(self._presence("firstwitch"))
+        self.jmuc._resume()
+        self.assertFalse(self.jmuc.get_occupants_with_role("participant"))
+        self.assertFalse(self.jmuc.role_counts)
+
+
+    def _enter_room(self):
+        self.jmuc._inbound_muc_user_presence(
+            self._presence("thirdwitch", status_codes={110})
+        )
+
+    def _message(self, nick, body, id_=None):
+        msg = aioxmpp.stanza.Message(
+            type_="groupchat",
+            from_=TEST_MUC_JID.replace(resource=nick),
+            id_=id_,
+        )
+        msg.body[None] = body
+        return msg
+
+    def _subject(self):
+        msg = aioxmpp.stanza.Message(
+            type_="groupchat",
+            from_=TEST_MUC_JID.replace(resource="firstwitch"),
+        )
+        msg.subject[None] = "topic"
+        return msg
+
+    def test_history_defaults(self):
+        self.assertIsNone(muc_service.Room.history_batch_size)
+        self.assertIsNone(muc_service.Room.history_dedup_size)
+        self.assertIsInstance(self.jmuc.on_history,
+                              aioxmpp.callbacks.AdHocSignal)
+
+    def test_history_batches(self):
+        self.jmuc.history_batch_size = 2
+        history = unittest.mock.Mock()
+        history.return_value = None
+        self.jmuc.on_history.connect(history)
+
+        self._enter_room()
+        self.base.mock_calls.clear()
+
+        msgs = [self._message("firstwitch", str(i)) for i in range(3)]
+        for msg in msgs:
+            self.jmuc._inbound_message(msg)
+
+        history.assert_called_once_with(msgs[:2])
+        history.reset_mock()
+
+        self.jmuc._inbound_message(self._subject())
+        history.assert_called_once_with(msgs[2:])
+
+        live = self._message("firstwitch", "live")
+        self.jmuc._inbound_message(live)
+
+        self.assertSequenceEqual(
+            [
+                unittest.mock.call.on_subject_change(
+                    unittest.mock.ANY,
+                    unittest.mock.ANY,
+                    occupant=None,
+                ),
+                unittest.mock.call.on_message(live, occupant=None),
+            ],
+            self.base.mock_calls
+        )
+
+    def test_history_without_batching_uses_on_message(self):
+        self._enter_room()
+        self.base.mock_calls.clear()
+
+        msg = self._message("firstwitch", "foo")
+        self.jmuc._inbound_message(msg)
+
+        self.assertSequenceEqual(
+            [
+                unittest.mock.call.on_message(msg, occupant=None),
+            ],
+            self.base.mock_calls
+        )
+
+    def test_history_is_flushed_on_suspend(self):
+        self.jmuc.history_batch_size = 10
+        history = unittest.mock.Mock()
+        history.return_value = None
+        self.jmuc.on_history.connect(history)
+
+        self._enter_room()
+        msg = self._message("firstwitch", "foo")
+        self.jmuc._inbound_message(msg)
+        self.assertFalse(history.mock_calls)
+
+        self.jmuc._suspend()
+        history.assert_called_once_with([msg])
+
+    def test_history_skips_tracking(self):
+        tracker = unittest.mock.Mock()
+        self.jmuc._tracking["foo"] = tracker
+        self._enter_room()
+
+        self.jmuc._inbound_message(self._message("thirdwitch", "x", "foo"))
+        self.assertIn("foo", self.jmuc._tracking)
+
+        self.jmuc._inbound_message(self._subject())
+        self.jmuc._inbound_message(self._message("thirdwitch", "x", "foo"))
+        self.assertNotIn("foo", self.jmuc._tracking)
+
+    def test_history_dedup_drops_messages_seen_before(self):
+        self.jmuc.history_dedup_size = 2
+        self._enter_room()
+        self.jmuc._inbound_message(self._subject())
+
+        self.jmuc._inbound_message(self._message("firstwitch", "a", "id1"))
+        self.jmuc._inbound_message(self._message("firstwitch", "b"))
+        self.jmuc._suspend()
+        self.jmuc._resume()
+        self.base.mock_calls.clear()
+
+        self._enter_room()
+        old1 = self._message("firstwitch", "a", "id1")
+        old2 = self._message("firstwitch", "b")
+        new = self._message("firstwitch", "c", "id2")
+        for msg in [old1, old2, new]:
+            self.jmuc._inbound_message(msg)
+
+        self.assertSequenceEqual(
+            [
+                unittest.mock.call.on_enter(unittest.mock.ANY,
+                                            unittest.mock.ANY),
+                unittest.mock.call.on_message(old2, occupant=None),
+                unittest.mock.call.on_message(new, occupant=None),
+            ],
+            self.base.mock_calls
+        )
+
+    def test_history_dedup_keeps_repeated_messages_without_id(self):
+        self.jmuc.history_dedup_size = 10
+        self._enter_room()
+        self.base.mock_calls.clear()
+
+        msg1 = self._message("firstwitch", "ok")
+        msg2 = self._message("firstwitch", "ok")
+        self.jmuc._inbound_message(msg1)
+        self.jmuc._inbound_message(msg2)
+
+        self.assertSequenceEqual(
+            [
+                unittest.mock.call.on_message(msg1, occupant=None),
+                unittest.mock.call.on_message(msg2, occupant=None),
+            ],
+            self.base.mock_calls
+        )
+
+    def test_history_dedup_is_bounded(self):
+        self.jmuc.history_dedup_size = 1
+        self._enter_room()
+        self.jmuc._inbound_message(self._subject())
+
+        self.jmuc._inbound_message(self._message("firstwitch", "a", "id1"))
+        self.jmuc._inbound_message(self._message("firstwitch", "b", "id2"))
+        self.jmuc._suspend()
+        self.jmuc._resume()
+        self._enter_room()
+        self.base.mock_calls.clear()
+
+        msg = self._message("firstwitch", "a", "id1")
+        self.jmuc._inbound_message(msg)
+        self.assertSequenceEqual(
+            [
+                unittest.mock.call.on_message(msg, occupant=None),
+            ],
+            self.base.mock_calls
+        )
+
+
 class TestService(unittest.TestCase):
     def test_is_service(self):
         self.assertTrue(issubclass(
@@ -3035,6 +3423,482 @@ class TestService(unittest.TestCase):
                     reason="foobar",
                 ))
 
+    def _bulk_send_iq(self, reject=lambda items: False, error=None):
+        if error is None:
+            def error():
+                return aioxmpp.errors.XMPPCancelError(
+                    condition=(utils.namespaces.stanzas, "not-allowed")
+                )
+
+        requests = []
+        in_flight = [0, 0]
+
+        @asyncio.coroutine
+        def send_iq(iq):
+            items = list(iq.payload.items)
+            requests.append(items)
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight)
+            try:
+                yield from asyncio.sleep(0)
+                if reject(items):
+                    raise error()
+            finally:
+                in_flight[0] -= 1
+
+        return send_iq, requests, in_flight
+
+    def _bulk_changes(self, n):
+        return [
+            (TEST_ENTITY_JID.replace(localpart="u{}".format(i),
+                                     resource=None),
+             "outcast",
+             "spam")
+            for i in range(n)
+        ]
+
+    def test_set_affiliations_batches_items(self):
+        send_iq, requests, in_flight = self._bulk_send_iq()
+        changes = self._bulk_changes(7)
+
+        with unittest.mock.patch.object(
+                self.cc.stream,
+                "send_iq_and_wait_for_reply",
+                new=send_iq):
+            result = run_coroutine(self.s.set_affiliations(
+                TEST_MUC_JID,
+                changes,
+                batch_size=3,
+                max_concurrency=2,
+            ))
+
+        self.assertSequenceEqual([None]*7, result)
+        self.assertSequenceEqual([3, 3, 1], [len(r) for r in requests])
+        self.assertEqual(2, in_flight[1])
+
+        items = [item for request in requests for item in request]
+        self.assertSequenceEqual(
+            changes,
+            [(item.jid, item.affiliation, item.reason) for item in items]
+        )
+
+    def test_set_affiliations_sends_to_mucjid(self):
+        with unittest.mock.patch.object(
+                self.cc.stream,
+                "send_iq_and_wait_for_reply",
+                new=CoroutineMock()) as send_iq:
+            send_iq.return_value = None
+            run_coroutine(self.s.set_affiliations(
+                TEST_MUC_JID,
+                self._bulk_changes(2),
+            ))
+
+        _, (iq,), _ = send_iq.mock_calls[-1]
+        self.assertEqual("set", iq.type_)
+        self.assertEqual(TEST_MUC_JID, iq.to)
+        self.assertIsInstance(iq.payload, muc_xso.AdminQuery)
+        self.assertEqual(2, len(iq.payload.items))
+
+    def test_set_affiliations_falls_back_to_single_items(self):
+        changes = self._bulk_changes(4)
+        bad = changes[1][0]
+        send_iq, requests, _ = self._bulk_send_iq(
+            lambda items: len(items) > 1 or items[0].jid == bad
+        )
+
+        with unittest.mock.patch.object(
+                self.cc.stream,
+                "send_iq_and_wait_for_reply",
+                new=send_iq):
+            result = run_coroutine(self.s.set_affiliations(
+                TEST_MUC_JID,
+                changes,
+                batch_size=2,
+            ))
+
+        self.assertIsNone(result[0])
+        self.assertIsInstance(result[1], aioxmpp.errors.XMPPCancelError)
+        self.assertIsNone(result[2])
+        self.assertIsNone(result[3])
+        self.assertEqual(6, len(requests))
+
+    def test_set_affiliations_remembers_unsupported_batches(self):
+        send_iq, requests, _ = self._bulk_send_iq(
+            lambda items: len(items) > 1
+        )
+
+        with unittest.mock.patch.object(
+                self.cc.stream,
+                "send_iq_and_wait_for_reply",
+                new=send_iq):
+            result = run_coroutine(self.s.set_affiliations(
+                TEST_MUC_JID,
+                self._bulk_changes(2),
+                batch_size=2,
+            ))
+            self.assertSequenceEqual([None, None], result)
+            self.assertSequenceEqual([2, 1, 1], [len(r) for r in requests])
+            requests.clear()
+
+            # other rooms of the same service are not batched either
+            result = run_coroutine(self.s.set_affiliations(
+                TEST_MUC_JID.replace(localpart="otherroom"),
+                self._bulk_changes(4),
+                batch_size=2,
+                max_concurrency=1,
+            ))
+
+        self.assertSequenceEqual([None] * 4, result)
+        self.assertSequenceEqual([1, 1, 1, 1], [len(r) for r in requests])
+
+    def test_set_affiliations_does_not_remember_temporary_errors(self):
+        for type_, condition in [
+                (aioxmpp.errors.XMPPWaitError, "resource-constraint"),
+                (aioxmpp.errors.XMPPWaitError, "policy-violation"),
+                (aioxmpp.errors.XMPPModifyError, "policy-violation"),
+                (aioxmpp.errors.XMPPCancelError, "policy-violation")]:
+            s = muc_service.Service(self.cc)
+            throttled = [True]
+
+            def reject(items):
+                if len(items) > 1 and throttled[0]:
+                    throttled[0] = False
+                    return True
+                return False
+
+            send_iq, requests, _ = self._bulk_send_iq(
+                reject,
+                lambda: type_(
+                    condition=(utils.namespaces.stanzas, condition)
+                ),
+            )
+
+            with unittest.mock.patch.object(
+                    self.cc.stream,
+                    "send_iq_and_wait_for_reply",
+                    new=send_iq):
+                run_coroutine(s.set_affiliations(
+                    TEST_MUC_JID,
+                    self._bulk_changes(2),
+                    batch_size=2,
+                ))
+                requests.clear()
+                result = run_coroutine(s.set_affiliations(
+                    TEST_MUC_JID,
+                    self._bulk_changes(2),
+                    batch_size=2,
+                ))
+
+            self.assertSequenceEqual([None, None], result)
+            self.assertSequenceEqual([2], [len(r) for r in requests],
+                                     condition)
+
+    def test_set_affiliations_remembers_feature_not_implemented(self):
+        send_iq, requests, _ = self._bulk_send_iq(
+            lambda items: len(items) > 1,
+            lambda: aioxmpp.errors.XMPPCancelError(
+                condition=(utils.namespaces.stanzas,
+                           "feature-not-implemented")
+            ),
+        )
+
+        with unittest.mock.patch.object(
+                self.cc.stream,
+                "send_iq_and_wait_for_reply",
+                new=send_iq):
+            run_coroutine(self.s.set_affiliations(
+                TEST_MUC_JID,
+                self._bulk_changes(2),
+                batch_size=2,
+            ))
+            requests.clear()
+            run_coroutine(self.s.set_affiliations(
+                TEST_MUC_JID,
+                self._bulk_changes(2),
+                batch_size=2,
+            ))
+
+        self.assertSequenceEqual([1, 1], [len(r) for r in requests])
+
+    def test_set_affiliations_does_not_remember_rejected_items(self):
+        changes = self._bulk_changes(2)
+        bad = changes[1][0]
+        send_iq, requests, _ = self._bulk_send_iq(
+            lambda items: any(item.jid == bad for item in items)
+        )
+
+        with unittest.mock.patch.object(
+                self.cc.stream,
+                "send_iq_and_wait_for_reply",
+                new=send_iq):
+            run_coroutine(self.s.set_affiliations(
+                TEST_MUC_JID,
+                changes,
+                batch_size=2,
+            ))
+            requests.clear()
+
+            run_coroutine(self.s.set_affiliations(
+                TEST_MUC_JID,
+                changes[:1] * 2,
+                batch_size=2,
+            ))
+
+        self.assertSequenceEqual([2], [len(r) for r in requests])
+
+    def test_set_affiliations_raises_other_errors(self):
+        with unittest.mock.patch.object(
+                self.cc.stream,
+                "send_iq_and_wait_for_reply",
+                new=CoroutineMock()) as send_iq:
+            send_iq.side_effect = ConnectionError()
+
+            with self.assertRaises(ConnectionError):
+                run_coroutine(self.s.set_affiliations(
+                    TEST_MUC_JID,
+                    self._bulk_changes(4),
+                    batch_size=1,
+                ))
+
+    def test_set_affiliations_validates_before_sending(self):
+        changes = self._bulk_changes(2)
+        with unittest.mock.patch.object(
+                self.cc.stream,
+                "send_iq_and_wait_for_reply",
+                new=CoroutineMock()) as send_iq:
+            with self.assertRaisesRegex(ValueError,
+                                        "affiliation must not be None"):
+                run_coroutine(self.s.set_affiliations(
+                    TEST_MUC_JID,
+                    changes + [(TEST_ENTITY_JID, None, None)],
+                ))
+
+            with self.assertRaisesRegex(ValueError,
+                                        "jid must not be None"):
+                run_coroutine(self.s.set_affiliations(
+                    TEST_MUC_JID,
+                    [(None, "member", None)],
+                ))
+
+            with self.assertRaisesRegex(ValueError,
+                                        "mucjid must be bare JID"):
+                run_coroutine(self.s.set_affiliations(
+                    TEST_MUC_JID.replace(resource="foo"),
+                    changes,
+                ))
+
+            with self.assertRaisesRegex(ValueError,
+                                        "batch_size must be positive"):
+                run_coroutine(self.s.set_affiliations(
+                    TEST_MUC_JID,
+                    changes,
+                    batch_size=0,
+                ))
+
+        self.assertFalse(send_iq.mock_calls)
+
     def tearDow(self):
         del self.s
         del self.cc
+
+    def _enter(self, mucjid, nick):
+        presence = aioxmpp.stanza.Presence(
+            type_=None,
+            from_=mucjid.replace(resource=nick)
+        )
+        presence.xep0045_muc_user = muc_xso.UserExt(
+            status_codes={110}
+        )
+        self.s._inbound_presence_filter(presence)
+
+    def _join_presence_targets(self):
+        return [
+            stanza.to.bare()
+            for _, (stanza,), _ in self.cc.stream.enqueue_stanza.mock_calls
+            if stanza.xep0045_muc is not None
+        ]
+
+    def test_rejoin_defaults(self):
+        self.assertIsNone(muc_service.Service.rejoin_concurrency)
+        self.assertIsNone(muc_service.Service.rejoin_interval)
+        self.assertEqual(60, muc_service.Service.rejoin_timeout)
+
+    def test_last_message_received_and_join_latency(self):
+        room, fut = self.s.join(TEST_MUC_JID, "thirdwitch")
+        self.assertIsNone(room.last_message_received)
+        self.assertIsNone(room.join_latency)
+
+        self._enter(TEST_MUC_JID, "thirdwitch")
+        self.assertIsNotNone(room.join_latency)
+        self.assertGreaterEqual(room.join_latency, 0)
+
+        msg = aioxmpp.stanza.Message(
+            type_="groupchat",
+            from_=TEST_MUC_JID.replace(resource="firstwitch"),
+        )
+        msg.body[None] = "foo"
+        now = datetime.utcnow()
+        with unittest.mock.patch(
+                "aioxmpp.muc.service.datetime"
+        ) as mock_datetime:
+            mock_datetime.utcnow.return_value = now
+            self.s._inbound_message(msg)
+
+        self.assertEqual(now, room.last_message_received)
+
+    def test_rejoin_requests_history_since_last_message(self):
+        room, fut = self.s.join(TEST_MUC_JID, "thirdwitch")
+        self._enter(TEST_MUC_JID, "thirdwitch")
+
+        last = datetime(2016, 1, 1, 12, 0, 0)
+        room._last_message_received = last
+
+        self.cc.on_stream_destroyed()
+        self.cc.stream.enqueue_stanza.mock_calls.clear()
+        self.cc.on_stream_established()
+
+        _, (stanza,), _ = self.cc.stream.enqueue_stanza.mock_calls[-1]
+        self.assertEqual(last, stanza.xep0045_muc.history.since)
+
+    def test_rejoin_prioritises_recently_active_rooms(self):
+        jids = [
+            TEST_MUC_JID.replace(localpart="room{}".format(i))
+            for i in range(3)
+        ]
+        rooms = []
+        for jid in jids:
+            room, _ = self.s.join(jid, "thirdwitch")
+            self._enter(jid, "thirdwitch")
+            rooms.append(room)
+
+        rooms[0]._last_message_received = datetime(2016, 1, 1)
+        rooms[2]._last_message_received = datetime(2016, 1, 2)
+
+        self.cc.on_stream_destroyed()
+        self.cc.stream.enqueue_stanza.mock_calls.clear()
+        self.cc.on_stream_established()
+
+        self.assertSequenceEqual(
+            [jids[2], jids[0], jids[1]],
+            self._join_presence_targets()
+        )
+
+    def test_rejoin_concurrency(self):
+        self.cc.established = False
+        self.s.rejoin_concurrency = 1
+        jids = [
+            TEST_MUC_JID.replace(localpart="room{}".format(i))
+            for i in range(3)
+        ]
+        futs = [self.s.join(jid, "thirdwitch")[1] for jid in jids]
+
+        self.cc.on_stream_established()
+        self.assertSequenceEqual(jids[:1], self._join_presence_targets())
+
+        self._enter(jids[0], "thirdwitch")
+        self.assertSequenceEqual(jids[:2], self._join_presence_targets())
+
+        response = aioxmpp.stanza.Presence(from_=jids[1], type_="error")
+        response.xep0045_muc = muc_xso.GenericExt()
+        response.error = aioxmpp.stanza.Error()
+        self.s._inbound_presence_filter(response)
+        self.assertTrue(futs[1].done())
+
+        self.assertSequenceEqual(jids, self._join_presence_targets())
+
+    def test_rejoin_concurrency_skips_cancelled_joins(self):
+        self.cc.established = False
+        self.s.rejoin_concurrency = 1
+        jids = [
+            TEST_MUC_JID.replace(localpart="room{}".format(i))
+            for i in range(3)
+        ]
+        futs = [self.s.join(jid, "thirdwitch")[1] for jid in jids]
+
+        self.cc.on_stream_established()
+        futs[1].cancel()
+        futs[0].cancel()
+        run_coroutine(asyncio.sleep(0))
+
+        self.assertIn(jids[2], self._join_presence_targets())
+        self.assertNotIn(
+            jids[1],
+            [
+                stanza.to.bare()
+                for _, (stanza,), _ in
+                self.cc.stream.enqueue_stanza.mock_calls
+                if stanza.type_ is None
+            ]
+        )
+
+    def test_rejoin_timeout_releases_slot(self):
+        self.cc.established = False
+        self.s.rejoin_concurrency = 1
+        self.s.rejoin_timeout = 0.01
+        jids = [
+            TEST_MUC_JID.replace(localpart="room{}".format(i))
+            for i in range(2)
+        ]
+        futs = [self.s.join(jid, "thirdwitch")[1] for jid in jids]
+
+        self.cc.on_stream_established()
+        self.assertSequenceEqual(jids[:1], self._join_presence_targets())
+
+        run_coroutine(asyncio.sleep(0.02))
+        self.assertSequenceEqual(jids, self._join_presence_targets())
+        self.assertFalse(futs[0].done())
+
+        # a late answer still completes the join
+        self._enter(jids[0], "thirdwitch")
+        self.assertTrue(futs[0].done())
+        self.assertSequenceEqual(jids, self._join_presence_targets())
+
+    def test_rejoin_timeout_cancelled_when_join_finishes(self):
+        self.cc.established = False
+        self.s.rejoin_concurrency = 1
+        self.s.rejoin_timeout = 0.01
+        self.s.join(TEST_MUC_JID, "thirdwitch")
+
+        with unittest.mock.patch.object(
+                self.s,
+                "_join_timed_out") as join_timed_out:
+            self.cc.on_stream_established()
+            self._enter(TEST_MUC_JID, "thirdwitch")
+            run_coroutine(asyncio.sleep(0.02))
+
+        self.assertFalse(join_timed_out.mock_calls)
+        self.assertFalse(self.s._joins_in_progress)
+
+    def test_rejoin_interval(self):
+        self.cc.established = False
+        self.s.rejoin_interval = 0.02
+        jids = [
+            TEST_MUC_JID.replace(localpart="room{}".format(i))
+            for i in range(3)
+        ]
+        for jid in jids:
+            self.s.join(jid, "thirdwitch")
+
+        self.cc.on_stream_established()
+        self.assertEqual(1, len(self._join_presence_targets()))
+
+        run_coroutine(asyncio.sleep(0.03))
+        self.assertEqual(2, len(self._join_presence_targets()))
+
+        run_coroutine(asyncio.sleep(0.02))
+        self.assertEqual(3, len(self._join_presence_targets()))
+
+    def test_stream_destroyed_stops_queued_joins(self):
+        self.cc.established = False
+        self.s.rejoin_interval = 0.01
+        for i in range(3):
+            self.s.join(
+                TEST_MUC_JID.replace(localpart="room{}".format(i)),
+                "thirdwitch"
+            )
+
+        self.cc.on_stream_established()
+        self.cc.on_stream_destroyed()
+        run_coroutine(asyncio.sleep(0.03))
+
+        self.assertEqual(1, len(self._join_presence_targets()))
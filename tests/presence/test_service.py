@@ -1,4 +1,6 @@
+import asyncio
 import unittest
+import unittest.mock
 
 import aioxmpp.presence.service as presence_service
 import aioxmpp.service as service
@@ -414,6 +416,278 @@ class TestService(unittest.TestCase):
             base.mock_calls
         )
 
+    def test_get_most_available_stanza_follows_changes(self):
+        foo = TEST_PEER_JID1.replace(resource="foo")
+        bar = TEST_PEER_JID1.replace(resource="bar")
+
+        st_foo = stanza.Presence(type_=None, show="chat", from_=foo)
+        self.s.handle_presence(st_foo)
+        st_bar = stanza.Presence(type_=None, show="away", from_=bar)
+        self.s.handle_presence(st_bar)
+
+        self.assertIs(self.s.get_most_available_stanza(TEST_PEER_JID1),
+                      st_foo)
+
+        st_foo = stanza.Presence(type_=None, show="xa", from_=foo)
+        self.s.handle_presence(st_foo)
+
+        self.assertIs(self.s.get_most_available_stanza(TEST_PEER_JID1),
+                      st_bar)
+
+        self.s.handle_presence(
+            stanza.Presence(type_="unavailable", from_=bar)
+        )
+
+        self.assertIs(self.s.get_most_available_stanza(TEST_PEER_JID1),
+                      st_foo)
+
+        self.s.handle_presence(
+            stanza.Presence(type_="unavailable", from_=foo)
+        )
+
+        self.assertIsNone(
+            self.s.get_most_available_stanza(TEST_PEER_JID1)
+        )
+
+    def test_get_most_available_stanza_prefers_latest_on_tie(self):
+        st1 = stanza.Presence(type_=None,
+                              from_=TEST_PEER_JID1.replace(resource="foo"))
+        self.s.handle_presence(st1)
+        st2 = stanza.Presence(type_=None,
+                              from_=TEST_PEER_JID1.replace(resource="bar"))
+        self.s.handle_presence(st2)
+
+        self.assertIs(self.s.get_most_available_stanza(TEST_PEER_JID1),
+                      st2)
+
+        st1 = stanza.Presence(type_=None,
+                              from_=TEST_PEER_JID1.replace(resource="foo"))
+        self.s.handle_presence(st1)
+
+        self.assertIs(self.s.get_most_available_stanza(TEST_PEER_JID1),
+                      st1)
+
+    def test_get_most_available_stanza_after_error(self):
+        self.s.handle_presence(
+            stanza.Presence(type_=None,
+                            from_=TEST_PEER_JID1.replace(resource="foo"))
+        )
+        self.s.handle_presence(
+            stanza.Presence(type_="error", from_=TEST_PEER_JID1)
+        )
+
+        self.assertIsNone(
+            self.s.get_most_available_stanza(TEST_PEER_JID1)
+        )
+
+    def test_get_resources_with_show(self):
+        foo = TEST_PEER_JID1.replace(resource="foo")
+        bar = TEST_PEER_JID1.replace(resource="bar")
+        baz = TEST_PEER_JID2.replace(resource="baz")
+
+        self.assertSetEqual(set(), self.s.get_resources_with_show("chat"))
+
+        self.s.handle_presence(
+            stanza.Presence(type_=None, show="chat", from_=foo)
+        )
+        self.s.handle_presence(
+            stanza.Presence(type_=None, from_=bar)
+        )
+        self.s.handle_presence(
+            stanza.Presence(type_=None, show="chat", from_=baz)
+        )
+
+        self.assertSetEqual(
+            {foo, baz},
+            self.s.get_resources_with_show("chat")
+        )
+        self.assertSetEqual(
+            {bar},
+            self.s.get_resources_with_show(None)
+        )
+
+        self.s.handle_presence(
+            stanza.Presence(type_=None, show="dnd", from_=foo)
+        )
+        self.s.handle_presence(
+            stanza.Presence(type_="unavailable", from_=baz)
+        )
+
+        self.assertSetEqual(
+            set(),
+            self.s.get_resources_with_show("chat")
+        )
+        self.assertSetEqual(
+            {foo},
+            self.s.get_resources_with_show("dnd")
+        )
+
+    def test_get_available_resources_of_domain(self):
+        foo = TEST_PEER_JID1.replace(resource="foo")
+        bar = TEST_PEER_JID1.replace(localpart="other", resource="bar")
+        baz = TEST_PEER_JID2.replace(resource="baz")
+
+        for jid in [foo, bar, baz]:
+            self.s.handle_presence(
+                stanza.Presence(type_=None, from_=jid)
+            )
+
+        self.assertSetEqual(
+            {foo, bar},
+            self.s.get_available_resources_of_domain(TEST_PEER_JID1.domain)
+        )
+        self.assertSetEqual(
+            {baz},
+            self.s.get_available_resources_of_domain(TEST_PEER_JID2.domain)
+        )
+
+        self.s.handle_presence(
+            stanza.Presence(type_="error", from_=TEST_PEER_JID1)
+        )
+
+        self.assertSetEqual(
+            {bar},
+            self.s.get_available_resources_of_domain(TEST_PEER_JID1.domain)
+        )
+
+    def test_indices_are_frozen_copies(self):
+        foo = TEST_PEER_JID1.replace(resource="foo")
+        self.s.handle_presence(
+            stanza.Presence(type_=None, from_=foo)
+        )
+
+        result = self.s.get_available_resources_of_domain(
+            TEST_PEER_JID1.domain
+        )
+        self.assertIsInstance(result, frozenset)
+
+        self.s.handle_presence(
+            stanza.Presence(type_="unavailable", from_=foo)
+        )
+        self.assertSetEqual({foo}, result)
+
+    def test_coalescing_is_off_by_default(self):
+        self.assertIsNone(presence_service.Service.coalesce_window)
+        self.assertTrue(
+            presence_service.Service.fire_resource_events_when_coalescing
+        )
+
+    def _connect_all(self, base):
+        for name in ["on_bare_available", "on_bare_unavailable",
+                     "on_available", "on_changed", "on_unavailable",
+                     "on_coalesced_update"]:
+            cb = getattr(base, name)
+            cb.return_value = None
+            getattr(self.s, name).connect(cb)
+
+    def test_coalescing_batches_per_loop_iteration(self):
+        self.s.coalesce_window = 0
+        base = unittest.mock.Mock()
+        self._connect_all(base)
+
+        foo = TEST_PEER_JID1.replace(resource="foo")
+        bar = TEST_PEER_JID1.replace(resource="bar")
+
+        st1 = stanza.Presence(type_=None, from_=foo)
+        st2 = stanza.Presence(type_=None, show="away", from_=foo)
+        st3 = stanza.Presence(type_=None, from_=bar)
+        self.s.handle_presence(st1)
+        self.s.handle_presence(st2)
+        self.s.handle_presence(st3)
+
+        self.assertFalse(base.mock_calls)
+        self.assertIsNone(self.s.get_stanza(foo))
+
+        run_coroutine(asyncio.sleep(0))
+
+        self.assertSequenceEqual(
+            [
+                unittest.mock.call.on_bare_available(st2),
+                unittest.mock.call.on_available(foo, st2),
+                unittest.mock.call.on_available(bar, st3),
+                unittest.mock.call.on_coalesced_update(
+                    [(foo, st2), (bar, st3)],
+                    [],
+                    [],
+                ),
+            ],
+            base.mock_calls
+        )
+        self.assertIs(self.s.get_stanza(foo), st2)
+
+    def test_coalescing_collapses_unavailable(self):
+        foo = TEST_PEER_JID1.replace(resource="foo")
+        st = stanza.Presence(type_=None, from_=foo)
+        self.s.handle_presence(st)
+
+        self.s.coalesce_window = 0
+        self.s.fire_resource_events_when_coalescing = False
+        base = unittest.mock.Mock()
+        self._connect_all(base)
+
+        self.s.handle_presence(
+            stanza.Presence(type_=None, show="dnd", from_=foo)
+        )
+        st_unavail = stanza.Presence(type_="unavailable", from_=foo)
+        self.s.handle_presence(st_unavail)
+
+        run_coroutine(asyncio.sleep(0))
+
+        self.assertSequenceEqual(
+            [
+                unittest.mock.call.on_coalesced_update(
+                    [],
+                    [],
+                    [(foo, st_unavail)],
+                ),
+            ],
+            base.mock_calls
+        )
+        self.assertIsNone(self.s.get_stanza(foo))
+
+    def test_coalescing_keeps_order_of_error_and_resources(self):
+        self.s.coalesce_window = 0
+        foo = TEST_PEER_JID1.replace(resource="foo")
+
+        self.s.handle_presence(stanza.Presence(type_=None, from_=foo))
+        self.s.handle_presence(
+            stanza.Presence(type_="error", from_=TEST_PEER_JID1)
+        )
+        st = stanza.Presence(type_=None, from_=foo)
+        self.s.handle_presence(st)
+
+        run_coroutine(asyncio.sleep(0))
+
+        self.assertIs(self.s.get_stanza(foo), st)
+
+    def test_coalescing_with_time_window(self):
+        self.s.coalesce_window = 0.02
+        base = unittest.mock.Mock()
+        self._connect_all(base)
+
+        foo = TEST_PEER_JID1.replace(resource="foo")
+        st = stanza.Presence(type_=None, from_=foo)
+        self.s.handle_presence(st)
+
+        run_coroutine(asyncio.sleep(0.01))
+        self.assertFalse(base.mock_calls)
+
+        run_coroutine(asyncio.sleep(0.02))
+        self.assertIn(
+            unittest.mock.call.on_coalesced_update([(foo, st)], [], []),
+            base.mock_calls
+        )
+
+    def test_shutdown_drops_pending_presence(self):
+        self.s.coalesce_window = 0.01
+        foo = TEST_PEER_JID1.replace(resource="foo")
+        self.s.handle_presence(stanza.Presence(type_=None, from_=foo))
+
+        run_coroutine(self.s.shutdown())
+        run_coroutine(asyncio.sleep(0.02))
+
+        self.assertIsNone(self.s.get_stanza(foo))
+
     def tearDown(self):
         del self.s
         del self.cc
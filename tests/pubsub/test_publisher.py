@@ -0,0 +1,203 @@
+import asyncio
+import unittest
+import unittest.mock
+
+import aioxmpp.errors
+import aioxmpp.structs
+import aioxmpp.pubsub.publisher as pubsub_publisher
+import aioxmpp.pubsub.service as pubsub_service
+
+from aioxmpp.utils import namespaces
+
+from aioxmpp.testutils import (
+    run_coroutine,
+)
+
+
+TEST_JID = aioxmpp.structs.JID.fromstr("pubsub.example")
+
+
+class TestPublisher(unittest.TestCase):
+    def setUp(self):
+        self.requests = []
+
+        @asyncio.coroutine
+        def publish(jid, node, payload, *, id_=None):
+            fut = asyncio.Future()
+            self.requests.append(((jid, node, payload, id_), fut))
+            return (yield from fut)
+
+        self.pubsub = unittest.mock.Mock()
+        self.pubsub.publish = publish
+
+        self.p = pubsub_publisher.Publisher(
+            self.pubsub, TEST_JID, "node",
+            max_in_flight=2,
+            max_queued=2,
+        )
+
+    def tearDown(self):
+        self.p.close()
+        run_coroutine(asyncio.sleep(0))
+        del self.p
+        del self.pubsub
+
+    def _reply(self, i, result="id"):
+        _, fut = self.requests[i]
+        if isinstance(result, BaseException):
+            fut.set_exception(result)
+        else:
+            fut.set_result(result)
+        run_coroutine(asyncio.sleep(0))
+
+    def test_rejects_invalid_arguments(self):
+        with self.assertRaisesRegex(ValueError,
+                                    "max_in_flight must be positive"):
+            pubsub_publisher.Publisher(self.pubsub, TEST_JID, "node",
+                                       max_in_flight=0)
+
+        with self.assertRaisesRegex(ValueError,
+                                    "max_queued must not be negative"):
+            pubsub_publisher.Publisher(self.pubsub, TEST_JID, "node",
+                                       max_queued=-1)
+
+    def test_publish_returns_future_with_id(self):
+        fut = run_coroutine(self.p.publish("payload", id_="a"))
+        self.assertIsInstance(fut, asyncio.Future)
+        self.assertFalse(fut.done())
+
+        run_coroutine(asyncio.sleep(0))
+        self.assertSequenceEqual(
+            [(TEST_JID, "node", "payload", "a")],
+            [args for args, _ in self.requests]
+        )
+        self.assertEqual(1, self.p.pending)
+
+        self._reply(0, "a")
+        self.assertEqual("a", fut.result())
+        self.assertEqual(0, self.p.pending)
+
+    def test_limits_requests_in_flight(self):
+        futs = [
+            run_coroutine(self.p.publish(i))
+            for i in range(4)
+        ]
+        run_coroutine(asyncio.sleep(0))
+
+        self.assertSequenceEqual(
+            [0, 1],
+            [args[2] for args, _ in self.requests]
+        )
+        self.assertEqual(4, self.p.pending)
+
+        self._reply(1, "1")
+        self.assertSequenceEqual(
+            [0, 1, 2],
+            [args[2] for args, _ in self.requests]
+        )
+        self.assertEqual("1", futs[1].result())
+        self.assertFalse(futs[0].done())
+
+    def test_publish_blocks_when_queue_is_full(self):
+        for i in range(4):
+            run_coroutine(self.p.publish(i))
+        run_coroutine(asyncio.sleep(0))
+
+        blocked = asyncio.async(self.p.publish(4))
+        run_coroutine(asyncio.sleep(0))
+        self.assertFalse(blocked.done())
+
+        self._reply(0)
+        run_coroutine(asyncio.sleep(0))
+        self.assertTrue(blocked.done())
+        self.assertEqual(4, self.p.pending)
+
+    def test_errors_are_reported_per_item(self):
+        exc = aioxmpp.errors.XMPPCancelError(
+            condition=(namespaces.stanzas, "forbidden")
+        )
+        fut1 = run_coroutine(self.p.publish(1))
+        fut2 = run_coroutine(self.p.publish(2))
+        fut3 = run_coroutine(self.p.publish(3))
+        run_coroutine(asyncio.sleep(0))
+
+        self._reply(0, exc)
+        self._reply(1, "2")
+        self._reply(2, "3")
+
+        self.assertIs(exc, fut1.exception())
+        self.assertEqual("2", fut2.result())
+        self.assertEqual("3", fut3.result())
+
+    def test_cancelled_queued_item_is_not_sent(self):
+        for i in range(2):
+            run_coroutine(self.p.publish(i))
+        fut = run_coroutine(self.p.publish(2))
+        run_coroutine(self.p.publish(3))
+        run_coroutine(asyncio.sleep(0))
+
+        fut.cancel()
+        self._reply(0)
+        self.assertSequenceEqual(
+            [0, 1, 3],
+            [args[2] for args, _ in self.requests]
+        )
+
+    def test_flush(self):
+        futs = [
+            run_coroutine(self.p.publish(i))
+            for i in range(3)
+        ]
+        flush = asyncio.async(self.p.flush())
+        run_coroutine(asyncio.sleep(0))
+
+        self._reply(0)
+        self._reply(1)
+        self.assertFalse(flush.done())
+
+        self._reply(2)
+        run_coroutine(flush)
+        self.assertTrue(all(fut.done() for fut in futs))
+
+    def test_flush_without_items(self):
+        run_coroutine(self.p.flush())
+
+    def test_close(self):
+        futs = [
+            run_coroutine(self.p.publish(i))
+            for i in range(4)
+        ]
+        run_coroutine(asyncio.sleep(0))
+        blocked = asyncio.async(self.p.publish(4))
+        run_coroutine(asyncio.sleep(0))
+
+        self.p.close()
+        run_coroutine(asyncio.sleep(0))
+
+        self.assertTrue(all(fut.cancelled() for fut in futs))
+        self.assertEqual(2, len(self.requests))
+        self.assertEqual(0, self.p.pending)
+
+        with self.assertRaisesRegex(RuntimeError, "publisher is closed"):
+            run_coroutine(blocked)
+
+        with self.assertRaisesRegex(RuntimeError, "publisher is closed"):
+            run_coroutine(self.p.publish(5))
+
+
+class TestServicePublisher(unittest.TestCase):
+    def test_creates_publisher(self):
+        s = unittest.mock.Mock()
+        with unittest.mock.patch(
+                "aioxmpp.pubsub.service.Publisher") as Publisher:
+            result = pubsub_service.Service.publisher(
+                s, TEST_JID, "node",
+                max_in_flight=4,
+            )
+
+        Publisher.assert_called_once_with(
+            s, TEST_JID, "node",
+            max_in_flight=4,
+            max_queued=256,
+        )
+        self.assertEqual(result, Publisher())
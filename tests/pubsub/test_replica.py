@@ -0,0 +1,432 @@
+import asyncio
+import unittest
+import unittest.mock
+
+import aioxmpp.callbacks
+import aioxmpp.errors
+import aioxmpp.structs
+import aioxmpp.pubsub.replica as pubsub_replica
+import aioxmpp.pubsub.service as pubsub_service
+import aioxmpp.pubsub.xso as pubsub_xso
+
+from aioxmpp.utils import namespaces
+
+from aioxmpp.testutils import (
+    CoroutineMock,
+    run_coroutine,
+)
+
+
+TEST_JID = aioxmpp.structs.JID.fromstr("pubsub.example")
+TEST_OTHER_JID = aioxmpp.structs.JID.fromstr("other.example")
+
+
+def make_response(ids):
+    response = pubsub_xso.Request(pubsub_xso.Items("node"))
+    response.payload.items[:] = [pubsub_xso.Item(id_) for id_ in ids]
+    return response
+
+
+class FakePubSub:
+    def __init__(self):
+        self.node_callbacks = {}
+        self.client = unittest.mock.Mock()
+        self.client.on_stream_established = aioxmpp.callbacks.AdHocSignal()
+        self.get_items = CoroutineMock()
+
+    def register_node_callback(self, jid, node, cb):
+        self.node_callbacks.setdefault((jid, node), []).append(cb)
+
+    def unregister_node_callback(self, jid, node, cb):
+        self.node_callbacks[jid, node].remove(cb)
+
+    def event(self, jid, payload):
+        for cb in list(self.node_callbacks.get((jid, payload.node), [])):
+            cb(unittest.mock.sentinel.message, payload)
+
+
+class TestNodeReplica(unittest.TestCase):
+    def setUp(self):
+        self.pubsub = FakePubSub()
+        self.pubsub.get_items = CoroutineMock()
+        self.pubsub.get_items.return_value = make_response([])
+
+        self.r = pubsub_replica.NodeReplica(self.pubsub, TEST_JID, "node")
+
+        self.listener = unittest.mock.Mock()
+        for name in ["on_item_published", "on_item_retracted",
+                     "on_node_deleted", "on_synced"]:
+            cb = getattr(self.listener, name)
+            cb.return_value = None
+            getattr(self.r, name).connect(cb)
+
+    def tearDown(self):
+        self.r.close()
+        del self.r
+        del self.pubsub
+
+    def _publish(self, id_, jid=TEST_JID, node="node"):
+        item = pubsub_xso.EventItem(None, id_=id_)
+        self.pubsub.event(jid, pubsub_xso.EventItems(node=node,
+                                                     items=[item]))
+        return item
+
+    def _retract(self, id_, jid=TEST_JID, node="node"):
+        self.pubsub.event(jid, pubsub_xso.EventItems(
+            node=node,
+            retracts=[pubsub_xso.EventRetract(id_)],
+        ))
+
+    def _delete(self, jid=TEST_JID, node="node"):
+        self.pubsub.event(jid, pubsub_xso.EventDelete(node))
+
+    def test_signals(self):
+        for name in ["on_item_published", "on_item_retracted",
+                     "on_node_deleted", "on_synced"]:
+            self.assertIsInstance(
+                getattr(pubsub_replica.NodeReplica, name),
+                aioxmpp.callbacks.Signal
+            )
+
+    def test_init(self):
+        self.assertEqual(TEST_JID, self.r.jid)
+        self.assertEqual("node", self.r.node)
+        self.assertEqual(0, len(self.r))
+        self.assertIsNone(self.r.latest)
+        self.assertFalse(self.r.synced)
+        self.assertFalse(self.r.deleted)
+        self.assertFalse(self.pubsub.get_items.mock_calls)
+
+    def test_rejects_invalid_max_items(self):
+        with self.assertRaisesRegex(ValueError,
+                                    "max_items must be positive"):
+            pubsub_replica.NodeReplica(self.pubsub, TEST_JID, "node",
+                                       max_items=0)
+
+    def test_sync(self):
+        self.pubsub.get_items.return_value = make_response(["a", "b", "c"])
+
+        run_coroutine(self.r.sync())
+
+        self.pubsub.get_items.assert_called_once_with(
+            TEST_JID, "node",
+            max_items=None,
+        )
+        self.assertTrue(self.r.synced)
+        self.assertSequenceEqual(["a", "b", "c"], list(self.r))
+        self.assertIn("b", self.r)
+        self.assertEqual("b", self.r.get("b").id_)
+        self.assertIsNone(self.r.get("x"))
+        self.assertEqual("c", self.r.latest.id_)
+        self.assertSequenceEqual(
+            [
+                unittest.mock.call.on_item_published("a", self.r.get("a")),
+                unittest.mock.call.on_item_published("b", self.r.get("b")),
+                unittest.mock.call.on_item_published("c", self.r.get("c")),
+                unittest.mock.call.on_synced(),
+            ],
+            self.listener.mock_calls
+        )
+
+    def test_sync_bounds_items(self):
+        r = pubsub_replica.NodeReplica(self.pubsub, TEST_JID, "node",
+                                       max_items=2)
+        self.pubsub.get_items.return_value = make_response(["a", "b"])
+        run_coroutine(r.sync())
+
+        self.pubsub.get_items.assert_called_once_with(
+            TEST_JID, "node",
+            max_items=2,
+        )
+
+        self._publish("c")
+        self.assertSequenceEqual(["b", "c"], list(r.keys()))
+        r.close()
+
+    def test_publish_and_retract(self):
+        a = self._publish("a")
+        b = self._publish("b")
+        self._publish("a", jid=TEST_OTHER_JID)
+        self._publish("x", node="other")
+
+        self.assertSequenceEqual([a, b], list(self.r.values()))
+
+        a2 = self._publish("a")
+        self.assertSequenceEqual([b, a2], list(self.r.values()))
+
+        self._retract("b")
+        self._retract("unknown")
+        self._retract("a", jid=TEST_OTHER_JID)
+
+        self.assertSequenceEqual(["a"], list(self.r))
+        self.assertSequenceEqual(
+            [
+                unittest.mock.call.on_item_published("a", a),
+                unittest.mock.call.on_item_published("b", b),
+                unittest.mock.call.on_item_published("a", a2),
+                unittest.mock.call.on_item_retracted("b"),
+            ],
+            self.listener.mock_calls
+        )
+
+    def test_batch_of_items(self):
+        items = [pubsub_xso.EventItem(None, id_=id_) for id_ in "abc"]
+        items.append(pubsub_xso.EventItem(None, id_="x"))
+        items[-1].node = "other"
+        self.pubsub.event(TEST_JID, pubsub_xso.EventItems(
+            node="node",
+            items=items,
+            retracts=[pubsub_xso.EventRetract("b")],
+        ))
+
+        self.assertSequenceEqual(["a", "c"], list(self.r))
+
+    def test_purge(self):
+        self._publish("a")
+        self._publish("b")
+        self.listener.mock_calls.clear()
+
+        payload = pubsub_xso.EventPurge()
+        payload.node = "node"
+        self.pubsub.event(TEST_JID, payload)
+
+        self.assertEqual(0, len(self.r))
+        self.assertFalse(self.r.deleted)
+        self.assertSequenceEqual(
+            [
+                unittest.mock.call.on_item_retracted("a"),
+                unittest.mock.call.on_item_retracted("b"),
+            ],
+            self.listener.mock_calls
+        )
+
+    def test_registers_node_callback(self):
+        self.assertEqual(
+            1,
+            len(self.pubsub.node_callbacks[TEST_JID, "node"])
+        )
+
+    def test_ignores_items_without_id(self):
+        self._publish(None)
+        self.assertEqual(0, len(self.r))
+        self.assertFalse(self.listener.mock_calls)
+
+    def test_node_deleted(self):
+        self._publish("a")
+        self.listener.mock_calls.clear()
+
+        self._delete(jid=TEST_OTHER_JID)
+        self.assertEqual(1, len(self.r))
+
+        self._delete()
+        self.assertEqual(0, len(self.r))
+        self.assertTrue(self.r.deleted)
+        self.assertSequenceEqual(
+            [
+                unittest.mock.call.on_node_deleted(),
+            ],
+            self.listener.mock_calls
+        )
+
+    def test_resync_reports_differences(self):
+        self.pubsub.get_items.return_value = make_response(["a", "b"])
+        run_coroutine(self.r.sync())
+        b = self.r.get("b")
+        self.listener.mock_calls.clear()
+
+        self.pubsub.get_items.return_value = make_response(["b", "c"])
+        run_coroutine(self.r.sync())
+
+        self.assertSequenceEqual(["b", "c"], list(self.r))
+        self.assertIsNot(b, self.r.get("b"))
+        self.assertSequenceEqual(
+            [
+                unittest.mock.call.on_item_retracted("a"),
+                unittest.mock.call.on_item_published("c", self.r.get("c")),
+                unittest.mock.call.on_synced(),
+            ],
+            self.listener.mock_calls
+        )
+
+    def test_events_during_sync_take_precedence(self):
+        self.pubsub.get_items.return_value = make_response(["a", "b"])
+        run_coroutine(self.r.sync())
+
+        @asyncio.coroutine
+        def get_items(*args, **kwargs):
+            self._publish("c")
+            self._retract("a")
+            self.assertIn("c", self.r)
+            self.assertNotIn("a", self.r)
+            return make_response(["a", "b"])
+
+        self.pubsub.get_items = get_items
+        self.listener.mock_calls.clear()
+
+        run_coroutine(self.r.sync())
+
+        self.assertSequenceEqual(["b", "c"], list(self.r))
+        self.assertIsInstance(self.r.get("c"), pubsub_xso.EventItem)
+        self.assertSequenceEqual(
+            [
+                unittest.mock.call.on_item_published("c", self.r.get("c")),
+                unittest.mock.call.on_item_retracted("a"),
+                unittest.mock.call.on_synced(),
+            ],
+            self.listener.mock_calls
+        )
+
+    def test_delete_during_sync_discards_result(self):
+        @asyncio.coroutine
+        def get_items(*args, **kwargs):
+            self._delete()
+            return make_response(["a", "b"])
+
+        self.pubsub.get_items = get_items
+        run_coroutine(self.r.sync())
+
+        self.assertEqual(0, len(self.r))
+        self.assertTrue(self.r.deleted)
+
+    def test_sync_after_delete_during_previous_sync(self):
+        @asyncio.coroutine
+        def get_items(*args, **kwargs):
+            self._delete()
+            return make_response(["a"])
+
+        self.pubsub.get_items = get_items
+        run_coroutine(self.r.sync())
+
+        self.pubsub.get_items = CoroutineMock()
+        self.pubsub.get_items.return_value = make_response(["b"])
+        self.listener.mock_calls.clear()
+        run_coroutine(self.r.sync())
+
+        self.assertSequenceEqual(["b"], list(self.r))
+        self.assertFalse(self.r.deleted)
+        self.assertSequenceEqual(
+            [
+                unittest.mock.call.on_item_published("b", self.r.get("b")),
+                unittest.mock.call.on_synced(),
+            ],
+            self.listener.mock_calls
+        )
+
+    def test_concurrent_syncs_share_request(self):
+        self.pubsub.get_items.return_value = make_response(["a"])
+
+        self.pubsub.client.on_stream_established()
+        run_coroutine(asyncio.gather(self.r.sync(), self.r.sync()))
+
+        self.assertEqual(1, len(self.pubsub.get_items.mock_calls))
+        self.assertSequenceEqual(["a"], list(self.r))
+        self.assertTrue(self.r.synced)
+        self.assertSequenceEqual(
+            [
+                unittest.mock.call.on_item_published("a", self.r.get("a")),
+                unittest.mock.call.on_synced(),
+            ],
+            self.listener.mock_calls
+        )
+
+    def test_sync_does_not_retract_trimmed_items(self):
+        r = pubsub_replica.NodeReplica(self.pubsub, TEST_JID, "node",
+                                       max_items=2)
+        self.pubsub.get_items.return_value = make_response(["a", "b"])
+        run_coroutine(r.sync())
+
+        listener = unittest.mock.Mock()
+        listener.return_value = None
+        r.on_item_retracted.connect(listener)
+
+        self.pubsub.get_items.return_value = make_response(["b", "c"])
+        run_coroutine(r.sync())
+        self.assertSequenceEqual(["b", "c"], list(r))
+        self.assertFalse(listener.mock_calls)
+
+        self.pubsub.get_items.return_value = make_response(["b"])
+        run_coroutine(r.sync())
+        self.assertSequenceEqual(["b"], list(r))
+        listener.assert_called_once_with("c")
+        r.close()
+
+    def test_sync_failure_keeps_items(self):
+        self._publish("a")
+        self.pubsub.get_items.side_effect = aioxmpp.errors.XMPPCancelError(
+            condition=(namespaces.stanzas, "item-not-found")
+        )
+
+        with self.assertRaises(aioxmpp.errors.XMPPCancelError):
+            run_coroutine(self.r.sync())
+
+        self.assertSequenceEqual(["a"], list(self.r))
+        self.assertFalse(self.r.synced)
+
+        self._publish("b")
+        self.assertSequenceEqual(["a", "b"], list(self.r))
+
+    def test_resync_on_stream_established(self):
+        self.pubsub.get_items.return_value = make_response(["a"])
+
+        self.pubsub.client.on_stream_established()
+        self.pubsub.client.on_stream_established()
+        run_coroutine(asyncio.sleep(0))
+
+        self.assertEqual(1, len(self.pubsub.get_items.mock_calls))
+        self.assertSequenceEqual(["a"], list(self.r))
+
+    def test_resync_failure_is_logged(self):
+        self.pubsub.get_items.side_effect = aioxmpp.errors.XMPPCancelError(
+            condition=(namespaces.stanzas, "item-not-found")
+        )
+
+        with self.assertLogs("aioxmpp.pubsub.replica", "WARNING"):
+            self.pubsub.client.on_stream_established()
+            run_coroutine(asyncio.sleep(0))
+
+    def test_close(self):
+        self.r.close()
+        self.assertFalse(self.pubsub.node_callbacks[TEST_JID, "node"])
+
+        self._publish("a")
+        self.pubsub.client.on_stream_established()
+        run_coroutine(asyncio.sleep(0))
+
+        self.assertEqual(0, len(self.r))
+        self.assertFalse(self.pubsub.get_items.mock_calls)
+
+
+class TestServiceReplicate(unittest.TestCase):
+    def setUp(self):
+        self.s = unittest.mock.Mock()
+
+    def test_creates_and_syncs_replica(self):
+        with unittest.mock.patch(
+                "aioxmpp.pubsub.service.NodeReplica") as NodeReplica:
+            NodeReplica().sync = CoroutineMock()
+            NodeReplica.reset_mock()
+
+            result = run_coroutine(pubsub_service.Service.replicate(
+                self.s, TEST_JID, "node", max_items=10
+            ))
+
+        NodeReplica.assert_called_once_with(
+            self.s, TEST_JID, "node",
+            max_items=10,
+        )
+        self.assertEqual(result, NodeReplica())
+        result.sync.assert_called_once_with()
+        self.assertFalse(result.close.mock_calls)
+
+    def test_closes_replica_on_error(self):
+        with unittest.mock.patch(
+                "aioxmpp.pubsub.service.NodeReplica") as NodeReplica:
+            NodeReplica().sync = CoroutineMock()
+            NodeReplica().sync.side_effect = ConnectionError()
+
+            with self.assertRaises(ConnectionError):
+                run_coroutine(pubsub_service.Service.replicate(
+                    self.s, TEST_JID, "node",
+                ))
+
+        NodeReplica().close.assert_called_once_with()
@@ -2,9 +2,11 @@ import contextlib
 import unittest
 
 import aioxmpp.disco
+import aioxmpp.errors
 import aioxmpp.service
 import aioxmpp.stanza
 import aioxmpp.structs
+import aioxmpp.utils
 import aioxmpp.pubsub.service as pubsub_service
 import aioxmpp.pubsub.xso as pubsub_xso
 
@@ -378,6 +380,121 @@ class TestService(unittest.TestCase):
             ]
         )
 
+    def _items_message(self, node, ids, from_=TEST_TO):
+        msg = aioxmpp.stanza.Message(
+            type_="normal",
+            from_=from_,
+        )
+        msg.xep0060_event = pubsub_xso.Event(
+            pubsub_xso.EventItems(
+                items=[pubsub_xso.EventItem(None, id_=id_) for id_ in ids],
+                node=node,
+            )
+        )
+        return msg
+
+    def test_node_callback_receives_whole_payload(self):
+        cb = unittest.mock.Mock()
+        other = unittest.mock.Mock()
+        self.s.register_node_callback(TEST_TO, "some-node", cb)
+        self.s.register_node_callback(TEST_TO, "other-node", other)
+        self.s.register_node_callback(TEST_JID1, "some-node", other)
+
+        msg = self._items_message("some-node", ["a", "b", "c"])
+        self.assertIsNone(self.s.filter_inbound_message(msg))
+
+        cb.assert_called_once_with(msg, msg.xep0060_event.payload)
+        self.assertFalse(other.mock_calls)
+
+    def test_node_callbacks_are_called_before_signals(self):
+        m = unittest.mock.Mock()
+        m.published.return_value = None
+        self.s.register_node_callback(TEST_TO, "some-node", m.cb1)
+        self.s.register_node_callback(TEST_TO, "some-node", m.cb2)
+        self.s.on_item_published.connect(m.published)
+
+        msg = self._items_message("some-node", ["a"])
+        self.s.filter_inbound_message(msg)
+
+        payload = msg.xep0060_event.payload
+        self.assertSequenceEqual(
+            [
+                unittest.mock.call.cb1(msg, payload),
+                unittest.mock.call.cb2(msg, payload),
+                unittest.mock.call.published(
+                    TEST_TO, "some-node", payload.items[0],
+                    message=msg,
+                ),
+            ],
+            m.mock_calls
+        )
+
+    def test_node_callback_for_deletion(self):
+        cb = unittest.mock.Mock()
+        self.s.register_node_callback(TEST_TO, "node", cb)
+
+        msg = aioxmpp.stanza.Message(
+            type_="normal",
+            from_=TEST_TO,
+        )
+        msg.xep0060_event = pubsub_xso.Event(
+            payload=pubsub_xso.EventDelete("node")
+        )
+        self.s.filter_inbound_message(msg)
+
+        cb.assert_called_once_with(msg, msg.xep0060_event.payload)
+
+    def test_node_callback_exception_is_logged(self):
+        cb = unittest.mock.Mock()
+        cb.side_effect = Exception()
+        cb2 = unittest.mock.Mock()
+        self.s.register_node_callback(TEST_TO, "some-node", cb)
+        self.s.register_node_callback(TEST_TO, "some-node", cb2)
+
+        msg = self._items_message("some-node", ["a"])
+        with self.assertLogs(self.s.logger, "ERROR"):
+            self.assertIsNone(self.s.filter_inbound_message(msg))
+
+        cb2.assert_called_once_with(msg, msg.xep0060_event.payload)
+
+    def test_unregister_node_callback(self):
+        cb1 = unittest.mock.Mock()
+        cb2 = unittest.mock.Mock()
+        self.s.register_node_callback(TEST_TO, "some-node", cb1)
+        self.s.register_node_callback(TEST_TO, "some-node", cb2)
+
+        self.s.unregister_node_callback(TEST_TO, "some-node", cb1)
+        self.s.filter_inbound_message(self._items_message("some-node", ["a"]))
+        self.assertFalse(cb1.mock_calls)
+        self.assertEqual(1, len(cb2.mock_calls))
+
+        with self.assertRaises(KeyError):
+            self.s.unregister_node_callback(TEST_TO, "some-node", cb1)
+
+        self.s.unregister_node_callback(TEST_TO, "some-node", cb2)
+        with self.assertRaises(KeyError):
+            self.s.unregister_node_callback(TEST_TO, "some-node", cb2)
+
+    def test_callback_may_unregister_itself(self):
+        def cb(msg, payload):
+            self.s.unregister_node_callback(TEST_TO, "some-node", cb)
+            calls.append(payload)
+
+        calls = []
+        self.s.register_node_callback(TEST_TO, "some-node", cb)
+        self.s.filter_inbound_message(self._items_message("some-node", ["a"]))
+        self.s.filter_inbound_message(self._items_message("some-node", ["b"]))
+
+        self.assertEqual(1, len(calls))
+
+    def test_filter_inbound_message_passes_event_without_payload(self):
+        msg = aioxmpp.stanza.Message(
+            type_="normal",
+            from_=TEST_TO,
+        )
+        msg.xep0060_event = pubsub_xso.Event()
+        self.assertIs(msg, self.s.filter_inbound_message(msg))
+
     def test_init(self):
         self.disco = unittest.mock.Mock()
         self.cc = make_connected_client()
@@ -1618,3 +1735,183 @@ class TestService(unittest.TestCase):
 
 
 # foo
+
+
+class TestItemPager(unittest.TestCase):
+    def setUp(self):
+        self.cc = make_connected_client()
+        self.s = unittest.mock.Mock()
+        self.s.client = self.cc
+
+    def tearDown(self):
+        del self.s
+        del self.cc
+
+    def _response(self, ids, *, first_index=None, count=None, rsm=True):
+        response = pubsub_xso.Request(pubsub_xso.Items("foo"))
+        response.payload.items[:] = [pubsub_xso.Item(id_) for id_ in ids]
+        if rsm:
+            response.rsm = pubsub_xso.ResultSet()
+            response.rsm.count = count
+            if ids:
+                response.rsm.first = pubsub_xso.ResultSetFirst(
+                    ids[0], first_index
+                )
+                response.rsm.last = ids[-1]
+        return response
+
+    def _requests(self):
+        return [
+            iq
+            for _, (iq,), _ in
+            self.cc.stream.send_iq_and_wait_for_reply.mock_calls
+        ]
+
+    def _collect(self, pager):
+        pages = []
+        while True:
+            page = run_coroutine(pager.get())
+            if page is None:
+                return pages
+            pages.append([item.id_ for item in page])
+
+    def test_service_iter_items(self):
+        s = pubsub_service.Service.__new__(pubsub_service.Service)
+        with unittest.mock.patch(
+                "aioxmpp.pubsub.service.ItemPager") as ItemPager:
+            result = s.iter_items(TEST_TO, "foo", page_size=10, after="x")
+
+        ItemPager.assert_called_once_with(
+            s, TEST_TO, "foo",
+            page_size=10,
+            after="x",
+            before=None,
+        )
+        self.assertEqual(result, ItemPager())
+
+    def test_rejects_invalid_arguments(self):
+        with self.assertRaisesRegex(ValueError,
+                                    "page_size must be positive"):
+            pubsub_service.ItemPager(self.s, TEST_TO, "foo", page_size=0)
+
+        with self.assertRaisesRegex(ValueError, "mutually exclusive"):
+            pubsub_service.ItemPager(self.s, TEST_TO, "foo",
+                                     after="a", before="b")
+
+    def test_does_not_request_before_get(self):
+        pubsub_service.ItemPager(self.s, TEST_TO, "foo")
+        self.assertFalse(self.cc.stream.send_iq_and_wait_for_reply.mock_calls)
+
+    def test_pages_forward(self):
+        self.cc.stream.send_iq_and_wait_for_reply.side_effect = [
+            self._response(["a", "b"]),
+            self._response(["c", "d"]),
+            self._response([]),
+        ]
+
+        pager = pubsub_service.ItemPager(self.s, TEST_TO, "foo",
+                                         page_size=2)
+        self.assertSequenceEqual(
+            [["a", "b"], ["c", "d"]],
+            self._collect(pager)
+        )
+        self.assertEqual("d", pager.cursor)
+
+        requests = self._requests()
+        self.assertEqual(3, len(requests))
+        for iq, after in zip(requests, [None, "b", "d"]):
+            self.assertEqual(TEST_TO, iq.to)
+            self.assertEqual("get", iq.type_)
+            self.assertEqual("foo", iq.payload.payload.node)
+            self.assertIsNone(iq.payload.payload.max_items)
+            self.assertEqual(2, iq.payload.rsm.max_)
+            self.assertEqual(after, iq.payload.rsm.after)
+            self.assertIsNone(iq.payload.rsm.before)
+
+        self.assertIsNone(run_coroutine(pager.get()))
+        self.assertEqual(3, len(self._requests()))
+
+    def test_stops_at_count(self):
+        self.cc.stream.send_iq_and_wait_for_reply.side_effect = [
+            self._response(["a", "b"], first_index=0, count=3),
+            self._response(["c"], first_index=2, count=3),
+        ]
+
+        pager = pubsub_service.ItemPager(self.s, TEST_TO, "foo",
+                                         page_size=2)
+        self.assertSequenceEqual(
+            [["a", "b"], ["c"]],
+            self._collect(pager)
+        )
+        self.assertEqual(3, pager.count)
+        self.assertEqual(2, len(self._requests()))
+
+    def test_resumes_from_cursor(self):
+        self.cc.stream.send_iq_and_wait_for_reply.side_effect = [
+            self._response([]),
+        ]
+
+        pager = pubsub_service.ItemPager(self.s, TEST_TO, "foo",
+                                         after="x")
+        self.assertIsNone(run_coroutine(pager.get()))
+
+        iq, = self._requests()
+        self.assertEqual("x", iq.payload.rsm.after)
+        self.assertEqual("x", pager.cursor)
+
+    def test_pages_backward(self):
+        self.cc.stream.send_iq_and_wait_for_reply.side_effect = [
+            self._response(["c", "d"], first_index=2),
+            self._response(["a", "b"], first_index=0),
+        ]
+
+        pager = pubsub_service.ItemPager(self.s, TEST_TO, "foo",
+                                         page_size=2, before="")
+        self.assertSequenceEqual(
+            [["c", "d"], ["a", "b"]],
+            self._collect(pager)
+        )
+
+        requests = self._requests()
+        self.assertSequenceEqual(
+            ["", "c"],
+            [iq.payload.rsm.before for iq in requests]
+        )
+        for iq in requests:
+            self.assertIsNone(iq.payload.rsm.after)
+
+    def test_without_rsm_support(self):
+        self.cc.stream.send_iq_and_wait_for_reply.side_effect = [
+            self._response(["a", "b", "c"], rsm=False),
+        ]
+
+        pager = pubsub_service.ItemPager(self.s, TEST_TO, "foo",
+                                         page_size=2)
+        self.assertSequenceEqual(
+            [["a", "b", "c"]],
+            self._collect(pager)
+        )
+        self.assertEqual(1, len(self._requests()))
+
+    def test_error_allows_retry(self):
+        exc = aioxmpp.errors.XMPPWaitError(
+            condition=(aioxmpp.utils.namespaces.stanzas,
+                       "resource-constraint")
+        )
+        self.cc.stream.send_iq_and_wait_for_reply.side_effect = [
+            self._response(["a"]),
+            exc,
+            self._response(["b"], first_index=1, count=2),
+        ]
+
+        pager = pubsub_service.ItemPager(self.s, TEST_TO, "foo")
+        run_coroutine(pager.get())
+        with self.assertRaises(aioxmpp.errors.XMPPWaitError):
+            run_coroutine(pager.get())
+        page = run_coroutine(pager.get())
+        self.assertSequenceEqual(["b"], [item.id_ for item in page])
+
+        self.assertSequenceEqual(
+            [None, "a", "a"],
+            [iq.payload.rsm.after for iq in self._requests()]
+        )
@@ -45,6 +45,12 @@ class TestNamespaces(unittest.TestCase):
             "http://jabber.org/protocol/pubsub#owner"
         )
 
+    def test_rsm(self):
+        self.assertEqual(
+            namespaces.xep0059,
+            "http://jabber.org/protocol/rsm"
+        )
+
 
 class TestAffiliation(unittest.TestCase):
     def test_is_xso(self):
@@ -476,6 +482,94 @@ class TestItems(unittest.TestCase):
         self.assertEqual(i.subid, "bar")
 
 
+class TestResultSetFirst(unittest.TestCase):
+    def test_is_xso(self):
+        self.assertTrue(issubclass(
+            pubsub_xso.ResultSetFirst,
+            xso.XSO
+        ))
+
+    def test_tag(self):
+        self.assertEqual(
+            pubsub_xso.ResultSetFirst.TAG,
+            (namespaces.xep0059, "first")
+        )
+
+    def test_index(self):
+        self.assertIsInstance(
+            pubsub_xso.ResultSetFirst.index,
+            xso.Attr
+        )
+        self.assertIsInstance(
+            pubsub_xso.ResultSetFirst.index.type_,
+            xso.Integer
+        )
+        self.assertIsNone(pubsub_xso.ResultSetFirst.index.default)
+
+    def test_value(self):
+        self.assertIsInstance(
+            pubsub_xso.ResultSetFirst.value,
+            xso.Text
+        )
+
+    def test_init(self):
+        first = pubsub_xso.ResultSetFirst("foo", 10)
+        self.assertEqual(first.value, "foo")
+        self.assertEqual(first.index, 10)
+
+
+class TestResultSet(unittest.TestCase):
+    def test_is_xso(self):
+        self.assertTrue(issubclass(
+            pubsub_xso.ResultSet,
+            xso.XSO
+        ))
+
+    def test_tag(self):
+        self.assertEqual(
+            pubsub_xso.ResultSet.TAG,
+            (namespaces.xep0059, "set")
+        )
+
+    def test_text_children(self):
+        for name, tag, type_ in [
+                ("max_", "max", xso.Integer),
+                ("after", "after", xso.String),
+                ("before", "before", xso.String),
+                ("index", "index", xso.Integer),
+                ("count", "count", xso.Integer),
+                ("last", "last", xso.String)]:
+            prop = getattr(pubsub_xso.ResultSet, name)
+            self.assertIsInstance(prop, xso.ChildText)
+            self.assertEqual(prop.tag, (namespaces.xep0059, tag))
+            self.assertIsInstance(prop.type_, type_)
+            self.assertIsNone(prop.default)
+
+    def test_first(self):
+        self.assertIsInstance(
+            pubsub_xso.ResultSet.first,
+            xso.Child
+        )
+        self.assertSetEqual(
+            pubsub_xso.ResultSet.first._classes,
+            {pubsub_xso.ResultSetFirst}
+        )
+
+    def test_init(self):
+        rsm = pubsub_xso.ResultSet()
+        self.assertIsNone(rsm.max_)
+        self.assertIsNone(rsm.after)
+        self.assertIsNone(rsm.before)
+        self.assertIsNone(rsm.index)
+
+        rsm = pubsub_xso.ResultSet(max_=10, after="foo", before="bar",
+                                   index=2)
+        self.assertEqual(rsm.max_, 10)
+        self.assertEqual(rsm.after, "foo")
+        self.assertEqual(rsm.before, "bar")
+        self.assertEqual(rsm.index, 2)
+
+
 class TestOptions(unittest.TestCase):
     def test_is_xso(self):
         self.assertTrue(issubclass(
@@ -1107,6 +1201,18 @@ class TestRequest(unittest.TestCase):
             }
         )
 
+    def test_rsm(self):
+        self.assertIsInstance(
+            pubsub_xso.Request.rsm,
+            xso.Child
+        )
+        self.assertSetEqual(
+            pubsub_xso.Request.rsm._classes,
+            {
+                pubsub_xso.ResultSet
+            }
+        )
+
     def test_is_registered_iq_payload(self):
         self.assertIn(
             pubsub_xso.Request,
@@ -1200,3 +1200,433 @@ class TestService(unittest.TestCase):
         self.assertIsInstance(st, stanza.Presence)
         self.assertEqual(st.to, TEST_JID)
         self.assertEqual(st.type_, "unsubscribe")
+
+    def test_init_store(self):
+        s = roster_service.Service(self.cc)
+        self.assertIsNone(s.store)
+
+    def test_attach_store_imports_without_events(self):
+        jid = structs.JID.fromstr("fnord@foo.example")
+        store = unittest.mock.Mock()
+        store.load.return_value = {
+            "items": {
+                str(jid): {
+                    "name": "foo fnord",
+                    "subscription": "both",
+                    "groups": ["a"],
+                },
+            },
+            "ver": "stored",
+        }
+
+        cb = unittest.mock.Mock()
+        with contextlib.ExitStack() as stack:
+            stack.enter_context(
+                self.s.on_entry_added.context_connect(cb)
+            )
+            stack.enter_context(
+                self.s.on_entry_removed.context_connect(cb)
+            )
+            self.s.attach_store(store)
+
+        self.assertFalse(cb.mock_calls)
+        self.assertIs(store, self.s.store)
+        self.assertEqual("stored", self.s.version)
+        self.assertSetEqual({jid}, set(self.s.items))
+        self.assertEqual("foo fnord", self.s.items[jid].name)
+        self.assertSetEqual({self.s.items[jid]}, self.s.groups["a"])
+        self.assertSequenceEqual(
+            [
+                unittest.mock.call.load(),
+            ],
+            store.mock_calls
+        )
+
+    def _attach_mock_store(self):
+        store = unittest.mock.Mock()
+        store.load.return_value = self.s.export_as_json()
+        store.needs_compaction = False
+        store.write_failed = False
+        self.s.attach_store(store)
+        store.mock_calls.clear()
+        return store
+
+    def test_handle_roster_push_records_delta(self):
+        store = self._attach_mock_store()
+
+        new_jid = structs.JID.fromstr("new@foo.example")
+        request = roster_xso.Query(
+            items=[
+                roster_xso.Item(
+                    jid=new_jid,
+                    name="new user",
+                ),
+                roster_xso.Item(
+                    jid=self.user1,
+                    subscription="remove",
+                ),
+            ],
+            ver="next"
+        )
+
+        run_coroutine(self.s.handle_roster_push(
+            stanza.IQ("set", payload=request)
+        ))
+
+        self.assertSequenceEqual(
+            [
+                unittest.mock.call.append(
+                    {
+                        str(new_jid): {
+                            "subscription": "none",
+                            "name": "new user",
+                        },
+                        str(self.user1): None,
+                    },
+                    "next",
+                ),
+            ],
+            store.mock_calls
+        )
+
+    def test_handle_roster_push_compacts_store(self):
+        store = self._attach_mock_store()
+        store.needs_compaction = True
+
+        request = roster_xso.Query(
+            items=[
+                roster_xso.Item(
+                    jid=self.user1,
+                    subscription="remove",
+                ),
+            ],
+            ver="next"
+        )
+
+        run_coroutine(self.s.handle_roster_push(
+            stanza.IQ("set", payload=request)
+        ))
+
+        self.assertSequenceEqual(
+            [
+                unittest.mock.call.append(
+                    {str(self.user1): None},
+                    "next",
+                ),
+                unittest.mock.call.write_snapshot(
+                    self.s.export_as_json()
+                ),
+            ],
+            store.mock_calls
+        )
+
+    def test_handle_roster_push_writes_snapshot_after_failed_write(self):
+        store = self._attach_mock_store()
+        store.write_failed = True
+
+        request = roster_xso.Query(
+            items=[
+                roster_xso.Item(
+                    jid=self.user1,
+                    subscription="remove",
+                ),
+            ],
+            ver="next"
+        )
+
+        run_coroutine(self.s.handle_roster_push(
+            stanza.IQ("set", payload=request)
+        ))
+
+        self.assertNotIn(self.user1, self.s.items)
+        self.assertEqual("next", self.s.version)
+        self.assertSequenceEqual(
+            [
+                unittest.mock.call.write_snapshot(
+                    self.s.export_as_json()
+                ),
+            ],
+            store.mock_calls
+        )
+
+    def test_initial_roster_writes_snapshot(self):
+        store = self._attach_mock_store()
+
+        self.cc.stream_features[...] = roster_xso.RosterVersioningFeature()
+        self.cc.stream.send_iq_and_wait_for_reply.return_value = \
+            roster_xso.Query(
+                items=[
+                    roster_xso.Item(
+                        jid=self.user2,
+                        subscription="both",
+                    ),
+                ],
+                ver="fresh",
+            )
+
+        run_coroutine(self.cc.before_stream_established())
+
+        self.assertSequenceEqual(
+            [
+                unittest.mock.call.write_snapshot(
+                    {
+                        "items": {
+                            str(self.user2): {
+                                "subscription": "both",
+                            },
+                        },
+                        "ver": "fresh",
+                    }
+                ),
+            ],
+            store.mock_calls
+        )
+
+    def test_initial_roster_resumes_from_stored_version(self):
+        store = self._attach_mock_store()
+
+        self.cc.stream_features[...] = roster_xso.RosterVersioningFeature()
+        self.cc.stream.send_iq_and_wait_for_reply.return_value = None
+
+        run_coroutine(self.cc.before_stream_established())
+
+        _, (iq, ), _ = \
+            self.cc.stream.send_iq_and_wait_for_reply.mock_calls[-1]
+        self.assertEqual("foobar", iq.payload.ver)
+        self.assertFalse(store.mock_calls)
+
+    def _resync_response(self):
+        self.new_jid = structs.JID.fromstr("new@foo.example")
+        return roster_xso.Query(
+            items=[
+                roster_xso.Item(
+                    jid=self.user2,
+                    name="renamed bar user",
+                    subscription="both",
+                    groups=[
+                        roster_xso.Group(name="group2"),
+                        roster_xso.Group(name="group4"),
+                    ]
+                ),
+                roster_xso.Item(
+                    jid=self.new_jid,
+                    groups=[
+                        roster_xso.Group(name="group4"),
+                    ]
+                ),
+            ],
+            ver="resynced"
+        )
+
+    def test_initial_roster_fires_on_roster_resynced(self):
+        old_user1 = self.s.items[self.user1]
+        old_user2 = self.s.items[self.user2]
+
+        self.cc.stream.send_iq_and_wait_for_reply.return_value = \
+            self._resync_response()
+
+        cb = unittest.mock.Mock()
+        cb.return_value = None
+        self.s.on_roster_resynced.connect(cb)
+
+        run_coroutine(self.cc.before_stream_established())
+
+        new_item = self.s.items[self.new_jid]
+        self.assertSequenceEqual(
+            [
+                unittest.mock.call([new_item], [old_user1], [old_user2]),
+            ],
+            cb.mock_calls
+        )
+        self.assertEqual("renamed bar user", old_user2.name)
+
+    def test_initial_roster_resync_updates_group_index(self):
+        self.cc.stream.send_iq_and_wait_for_reply.return_value = \
+            self._resync_response()
+
+        run_coroutine(self.cc.before_stream_established())
+
+        user2 = self.s.items[self.user2]
+        new_item = self.s.items[self.new_jid]
+        self.assertDictEqual(
+            {
+                "group2": {user2},
+                "group4": {user2, new_item},
+            },
+            self.s.groups
+        )
+
+    def test_initial_roster_resync_unchanged_entries(self):
+        self.cc.stream.send_iq_and_wait_for_reply.return_value = \
+            roster_xso.Query(
+                items=[
+                    roster_xso.Item(
+                        jid=self.user1,
+                        groups=[
+                            roster_xso.Group(name="group3"),
+                            roster_xso.Group(name="group1"),
+                        ]
+                    ),
+                ],
+                ver="same"
+            )
+
+        cb = unittest.mock.Mock()
+        cb.return_value = None
+        with contextlib.ExitStack() as stack:
+            stack.enter_context(
+                self.s.on_roster_resynced.context_connect(cb.resynced)
+            )
+            stack.enter_context(
+                self.s.on_entry_name_changed.context_connect(cb.name)
+            )
+            stack.enter_context(
+                self.s.on_entry_added_to_group.context_connect(cb.group)
+            )
+            run_coroutine(self.cc.before_stream_established())
+
+        self.assertSequenceEqual(
+            [
+                unittest.mock.call.resynced(
+                    [],
+                    [unittest.mock.ANY],
+                    [],
+                ),
+            ],
+            cb.mock_calls
+        )
+
+    def test_initial_roster_resync_without_entry_events(self):
+        self.s.fire_entry_events_on_resync = False
+        self.cc.stream.send_iq_and_wait_for_reply.return_value = \
+            self._resync_response()
+
+        cb = unittest.mock.Mock()
+        cb.return_value = None
+        with contextlib.ExitStack() as stack:
+            for name in ["on_entry_added",
+                         "on_entry_removed",
+                         "on_entry_name_changed",
+                         "on_entry_subscription_state_changed",
+                         "on_entry_added_to_group",
+                         "on_entry_removed_from_group"]:
+                stack.enter_context(
+                    getattr(self.s, name).context_connect(
+                        getattr(cb, name)
+                    )
+                )
+            stack.enter_context(
+                self.s.on_roster_resynced.context_connect(cb.resynced)
+            )
+            run_coroutine(self.cc.before_stream_established())
+
+        self.assertSequenceEqual(
+            [
+                unittest.mock.call.resynced(
+                    unittest.mock.ANY,
+                    unittest.mock.ANY,
+                    unittest.mock.ANY,
+                ),
+            ],
+            cb.mock_calls
+        )
+
+    def test_initial_roster_resync_in_chunks(self):
+        self.s.resync_chunk_size = 2
+        response = roster_xso.Query(
+            items=[
+                roster_xso.Item(
+                    jid=structs.JID.fromstr(
+                        "user{}@foo.example".format(i)
+                    ),
+                )
+                for i in range(5)
+            ],
+            ver="chunked"
+        )
+
+        @asyncio.coroutine
+        def send_iq_and_wait_for_reply(iq, *, timeout=None):
+            return response
+
+        @asyncio.coroutine
+        def sleep(delay):
+            pass
+
+        self.cc.stream.send_iq_and_wait_for_reply = send_iq_and_wait_for_reply
+
+        with unittest.mock.patch("asyncio.sleep") as sleep_mock:
+            sleep_mock.side_effect = sleep
+            run_coroutine(self.cc.before_stream_established())
+
+        self.assertSequenceEqual(
+            [
+                unittest.mock.call(0),
+                unittest.mock.call(0),
+            ],
+            sleep_mock.mock_calls
+        )
+        self.assertEqual(5, len(self.s.items))
+
+    def test_roster_push_during_chunked_resync_is_applied_afterwards(self):
+        self.s.resync_chunk_size = 2
+        store = self._attach_mock_store()
+        jids = [
+            structs.JID.fromstr("user{}@foo.example".format(i))
+            for i in range(5)
+        ]
+        response = roster_xso.Query(
+            items=[
+                roster_xso.Item(jid=jid, name="old")
+                for jid in jids
+            ],
+            ver="full"
+        )
+        push = roster_xso.Query(
+            items=[
+                roster_xso.Item(jid=jids[0], name="pushed"),
+            ],
+            ver="push"
+        )
+
+        @asyncio.coroutine
+        def send_iq_and_wait_for_reply(iq, *, timeout=None):
+            return response
+
+        @asyncio.coroutine
+        def sleep(delay):
+            if len(sleep_mock.mock_calls) == 1:
+                yield from self.s.handle_roster_push(
+                    stanza.IQ("set", payload=push)
+                )
+                self.assertEqual("old", self.s.items[jids[0]].name)
+                self.assertNotEqual("push", self.s.version)
+
+        self.cc.stream.send_iq_and_wait_for_reply = send_iq_and_wait_for_reply
+
+        with unittest.mock.patch("asyncio.sleep") as sleep_mock:
+            sleep_mock.side_effect = sleep
+            run_coroutine(self.cc.before_stream_established())
+
+        self.assertEqual("pushed", self.s.items[jids[0]].name)
+        self.assertEqual("push", self.s.version)
+        self.assertSequenceEqual(
+            [
+                unittest.mock.call.write_snapshot(self.s.export_as_json()),
+            ],
+            store.mock_calls
+        )
+        self.assertEqual(
+            "push",
+            store.write_snapshot.mock_calls[0][1][0]["ver"]
+        )
+
+    def test_initial_roster_incremental_does_not_fire_resynced(self):
+        self.cc.stream.send_iq_and_wait_for_reply.return_value = None
+
+        cb = unittest.mock.Mock()
+        self.s.on_roster_resynced.connect(cb)
+
+        run_coroutine(self.cc.before_stream_established())
+
+        self.assertFalse(cb.mock_calls)
@@ -0,0 +1,319 @@
+import pathlib
+import tempfile
+import threading
+import unittest
+import unittest.mock
+
+import aioxmpp.roster.storage as roster_storage
+
+
+class TestAbstractStore(unittest.TestCase):
+    def test_is_abstract(self):
+        with self.assertRaises(TypeError):
+            roster_storage.AbstractStore()
+
+    def test_defaults(self):
+        class Store(roster_storage.AbstractStore):
+            def load(self):
+                pass
+
+            def append(self, changes, ver):
+                pass
+
+            def write_snapshot(self, data):
+                pass
+
+        s = Store()
+        self.assertFalse(s.needs_compaction)
+        self.assertFalse(s.write_failed)
+        self.assertIsNone(s.close())
+
+
+class TestLogStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self.tmpdir.name)
+        self.s = roster_storage.LogStore(self.path, compact_after=3)
+
+    def tearDown(self):
+        self.s.close()
+        self.tmpdir.cleanup()
+
+    def _reopen(self):
+        self.s.close()
+        self.s = roster_storage.LogStore(self.path, compact_after=3)
+        return self.s.load()
+
+    def test_is_store(self):
+        self.assertIsInstance(self.s, roster_storage.AbstractStore)
+
+    def test_load_empty(self):
+        self.assertDictEqual(
+            {
+                "items": {},
+                "ver": None,
+            },
+            self.s.load()
+        )
+
+    def test_snapshot_roundtrip(self):
+        data = {
+            "items": {
+                "foo@bar.example": {"subscription": "both"},
+            },
+            "ver": "1",
+        }
+        self.s.write_snapshot(data)
+        self.assertDictEqual(data, self._reopen())
+
+    def test_append_is_replayed_on_snapshot(self):
+        self.s.write_snapshot({
+            "items": {
+                "a@bar.example": {"subscription": "both"},
+                "b@bar.example": {"subscription": "none"},
+            },
+            "ver": "1",
+        })
+        self.s.append(
+            {
+                "a@bar.example": None,
+                "c@bar.example": {"subscription": "to", "name": "C"},
+            },
+            "2"
+        )
+        self.s.append(
+            {
+                "b@bar.example": {"subscription": "from"},
+            },
+            "3"
+        )
+
+        self.assertDictEqual(
+            {
+                "items": {
+                    "b@bar.example": {"subscription": "from"},
+                    "c@bar.example": {"subscription": "to", "name": "C"},
+                },
+                "ver": "3",
+            },
+            self._reopen()
+        )
+
+    def test_append_without_snapshot(self):
+        self.s.append({"a@bar.example": {"subscription": "both"}}, "1")
+        self.assertDictEqual(
+            {
+                "items": {
+                    "a@bar.example": {"subscription": "both"},
+                },
+                "ver": "1",
+            },
+            self._reopen()
+        )
+
+    def test_incomplete_record_is_discarded(self):
+        self.s.append({"a@bar.example": {"subscription": "both"}}, "1")
+        self.s.close()
+        with (self.path / "roster.log").open("ab") as f:
+            f.write(b'{"items":{"b@bar.example":')
+
+        with self.assertLogs("aioxmpp.roster.storage", "WARNING"):
+            data = self._reopen()
+
+        self.assertDictEqual(
+            {
+                "items": {
+                    "a@bar.example": {"subscription": "both"},
+                },
+                "ver": "1",
+            },
+            data
+        )
+
+        # the broken tail is removed so that new records are readable
+        self.s.append({"c@bar.example": {"subscription": "none"}}, "2")
+        self.assertDictEqual(
+            {
+                "items": {
+                    "a@bar.example": {"subscription": "both"},
+                    "c@bar.example": {"subscription": "none"},
+                },
+                "ver": "2",
+            },
+            self._reopen()
+        )
+
+    def test_needs_compaction(self):
+        self.assertFalse(self.s.needs_compaction)
+        self.s.append({}, "1")
+        self.s.append({}, "2")
+        self.assertFalse(self.s.needs_compaction)
+        self.s.append({}, "3")
+        self.assertTrue(self.s.needs_compaction)
+
+        self.s.write_snapshot({"items": {}, "ver": "3"})
+        self.assertFalse(self.s.needs_compaction)
+
+    def test_needs_compaction_counts_loaded_records(self):
+        for i in range(3):
+            self.s.append({}, str(i))
+        self._reopen()
+        self.assertTrue(self.s.needs_compaction)
+
+    def test_snapshot_truncates_log(self):
+        self.s.append({"a@bar.example": {"subscription": "both"}}, "1")
+        self.s.write_snapshot({"items": {}, "ver": "2"})
+        self.s.close()
+
+        self.assertEqual(
+            1,
+            len((self.path / "roster.log").read_bytes().splitlines())
+        )
+        self.assertDictEqual(
+            {"items": {}, "ver": "2"},
+            self._reopen()
+        )
+
+    def test_log_of_previous_snapshot_is_discarded(self):
+        self.s.write_snapshot({"items": {}, "ver": "1"})
+        self.s.append({"a@bar.example": {"subscription": "both"}}, "2")
+        self.s.close()
+        log = (self.path / "roster.log").read_bytes()
+
+        self.s.write_snapshot({"items": {}, "ver": "3"})
+        self.s.close()
+        # simulate a crash between replacing the snapshot and starting the
+        # new log
+        (self.path / "roster.log").write_bytes(log)
+
+        with self.assertLogs("aioxmpp.roster.storage", "INFO"):
+            self.assertDictEqual(
+                {"items": {}, "ver": "3"},
+                self._reopen()
+            )
+        self.assertFalse(self.s.needs_compaction)
+
+        self.s.append({"b@bar.example": {"subscription": "none"}}, "4")
+        self.assertDictEqual(
+            {
+                "items": {"b@bar.example": {"subscription": "none"}},
+                "ver": "4",
+            },
+            self._reopen()
+        )
+
+    def test_failed_snapshot_replace_drops_later_records(self):
+        self.s.write_snapshot({"items": {}, "ver": "1"})
+        self.s.append({"a@bar.example": {"subscription": "both"}}, "2")
+        self.s.close()
+
+        with unittest.mock.patch("os.replace") as replace:
+            replace.side_effect = OSError()
+            with self.assertLogs("aioxmpp.roster.storage", "ERROR"):
+                self.s.write_snapshot({"items": {}, "ver": "3"})
+                self.s.close()
+        self.assertTrue(self.s.write_failed)
+        # the temporary file is removed, as are the old snapshot and log
+        self.assertFalse(list(self.path.iterdir()))
+
+        # appending on top of the old snapshot would skip version 3
+        self.s.append({"b@bar.example": {"subscription": "none"}}, "4")
+        self.s.close()
+        self.assertFalse(list(self.path.iterdir()))
+        self.assertDictEqual(
+            {"items": {}, "ver": None},
+            self._reopen()
+        )
+
+    def test_failed_append_drops_later_records(self):
+        self.s.write_snapshot({"items": {}, "ver": "1"})
+        self.s.append({"a@bar.example": {"subscription": "both"}}, "2")
+        self.s.close()
+        self.assertFalse(self.s.write_failed)
+
+        with unittest.mock.patch.object(self.s, "_sync") as sync:
+            sync.side_effect = OSError()
+            with self.assertLogs("aioxmpp.roster.storage", "ERROR"):
+                self.s.append({"b@bar.example": {"subscription": "both"}},
+                              "3")
+                self.s.close()
+        self.assertTrue(self.s.write_failed)
+
+        self.s.append({"c@bar.example": {"subscription": "both"}}, "4")
+        self.assertDictEqual(
+            {"items": {}, "ver": None},
+            self.s.load()
+        )
+        self.s.close()
+        self.assertFalse(list(self.path.iterdir()))
+
+        # the next session requests the complete roster
+        self.assertDictEqual(
+            {"items": {}, "ver": None},
+            self._reopen()
+        )
+
+    def test_snapshot_repairs_failed_store(self):
+        with unittest.mock.patch.object(self.s, "_sync") as sync:
+            sync.side_effect = OSError()
+            with self.assertLogs("aioxmpp.roster.storage", "ERROR"):
+                self.s.append({"a@bar.example": {"subscription": "both"}},
+                              "1")
+                self.s.close()
+        self.assertTrue(self.s.write_failed)
+
+        data = {
+            "items": {"b@bar.example": {"subscription": "none"}},
+            "ver": "2",
+        }
+        self.s.write_snapshot(data)
+        self.s.append({"c@bar.example": {"subscription": "to"}}, "3")
+        self.s.close()
+        self.assertFalse(self.s.write_failed)
+
+        self.assertDictEqual(
+            {
+                "items": {
+                    "b@bar.example": {"subscription": "none"},
+                    "c@bar.example": {"subscription": "to"},
+                },
+                "ver": "3",
+            },
+            self._reopen()
+        )
+
+    def test_writes_do_not_block_the_caller(self):
+        threads = []
+
+        def write(*args, **kwargs):
+            threads.append(threading.current_thread())
+
+        with unittest.mock.patch.object(self.s, "_sync", new=write):
+            self.s.append({}, "1")
+            self.s.write_snapshot({"items": {}, "ver": "2"})
+            self.s.close()
+
+        self.assertEqual(3, len(threads))
+        self.assertNotIn(threading.current_thread(), threads)
+
+    def test_snapshot_failure_keeps_old_snapshot(self):
+        self.s.write_snapshot({"items": {}, "ver": "1"})
+
+        with self.assertRaises(TypeError):
+            self.s.write_snapshot({"items": object(), "ver": "2"})
+
+        self.assertDictEqual(
+            {"items": {}, "ver": "1"},
+            self._reopen()
+        )
+        self.assertSetEqual(
+            {"roster.json", "roster.log"},
+            {p.name for p in self.path.iterdir()}
+        )
+
+    def test_fsync(self):
+        s = roster_storage.LogStore(self.path, fsync=True)
+        with unittest.mock.patch("os.fsync") as fsync:
+            s.append({}, "1")
+            s.close()
+        self.assertEqual(1, len(fsync.mock_calls))
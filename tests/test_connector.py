@@ -28,6 +28,27 @@ class TestSTARTTLSConnector(unittest.TestCase):
             self.c.tls_supported
         )
 
+    def test_connect_passes_limits_to_stream(self):
+        with unittest.mock.patch("aioxmpp.protocol.XMLStream") as XMLStream:
+            XMLStream.side_effect = RuntimeError()
+
+            with self.assertRaises(RuntimeError):
+                run_coroutine(self.c.connect(
+                    asyncio.get_event_loop(),
+                    unittest.mock.Mock(),
+                    unittest.mock.sentinel.domain,
+                    unittest.mock.sentinel.host,
+                    unittest.mock.sentinel.port,
+                    unittest.mock.sentinel.timeout,
+                    limits=unittest.mock.sentinel.limits,
+                ))
+
+        XMLStream.assert_called_once_with(
+            to=unittest.mock.sentinel.domain,
+            features_future=unittest.mock.ANY,
+            limits=unittest.mock.sentinel.limits,
+        )
+
     def test_connect_successful(self):
         captured_features_future = None
 
@@ -129,6 +150,7 @@ class TestSTARTTLSConnector(unittest.TestCase):
                 unittest.mock.call.XMLStream(
                     to=unittest.mock.sentinel.domain,
                     features_future=features_future,
+                    limits=None,
                 ),
                 unittest.mock.call.create_starttls_connection(
                     unittest.mock.sentinel.loop,
@@ -260,6 +282,7 @@ class TestSTARTTLSConnector(unittest.TestCase):
                 unittest.mock.call.XMLStream(
                     to=unittest.mock.sentinel.domain,
                     features_future=features_future,
+                    limits=None,
                 ),
                 unittest.mock.call.create_starttls_connection(
                     unittest.mock.sentinel.loop,
@@ -352,6 +375,7 @@ class TestSTARTTLSConnector(unittest.TestCase):
                 unittest.mock.call.XMLStream(
                     to=unittest.mock.sentinel.domain,
                     features_future=features_future,
+                    limits=None,
                 ),
                 unittest.mock.call.create_starttls_connection(
                     unittest.mock.sentinel.loop,
@@ -478,6 +502,7 @@ class TestSTARTTLSConnector(unittest.TestCase):
                 unittest.mock.call.XMLStream(
                     to=unittest.mock.sentinel.domain,
                     features_future=features_future,
+                    limits=None,
                 ),
                 unittest.mock.call.create_starttls_connection(
                     unittest.mock.sentinel.loop,
@@ -605,6 +630,7 @@ class TestSTARTTLSConnector(unittest.TestCase):
                 unittest.mock.call.XMLStream(
                     to=unittest.mock.sentinel.domain,
                     features_future=features_future,
+                    limits=None,
                 ),
                 unittest.mock.call.create_starttls_connection(
                     unittest.mock.sentinel.loop,
@@ -650,6 +676,27 @@ class TestXMPPOverTLSConnector(unittest.TestCase):
             self.c.tls_supported
         )
 
+    def test_connect_passes_limits_to_stream(self):
+        with unittest.mock.patch("aioxmpp.protocol.XMLStream") as XMLStream:
+            XMLStream.side_effect = RuntimeError()
+
+            with self.assertRaises(RuntimeError):
+                run_coroutine(self.c.connect(
+                    asyncio.get_event_loop(),
+                    unittest.mock.Mock(),
+                    unittest.mock.sentinel.domain,
+                    unittest.mock.sentinel.host,
+                    unittest.mock.sentinel.port,
+                    unittest.mock.sentinel.timeout,
+                    limits=unittest.mock.sentinel.limits,
+                ))
+
+        XMLStream.assert_called_once_with(
+            to=unittest.mock.sentinel.domain,
+            features_future=unittest.mock.ANY,
+            limits=unittest.mock.sentinel.limits,
+        )
+
     def test_connect_with_tls(self):
         captured_features_future = None
 
@@ -720,6 +767,7 @@ class TestXMPPOverTLSConnector(unittest.TestCase):
                 unittest.mock.call.XMLStream(
                     to=unittest.mock.sentinel.domain,
                     features_future=features_future,
+                    limits=None,
                 ),
                 unittest.mock.call.metadata.certificate_verifier_factory(),
                 unittest.mock.call.certificate_verifier.pre_handshake(
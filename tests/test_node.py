@@ -627,6 +627,7 @@ class Testconnect_xmlstream(unittest.TestCase):
     def setUp(self):
         self.discover_connectors = CoroutineMock()
         self.negotiate_sasl = CoroutineMock()
+        self.negotiate_compression = CoroutineMock()
         self.send_stream_error = unittest.mock.Mock()
 
         self.patches = [
@@ -634,12 +635,16 @@ class Testconnect_xmlstream(unittest.TestCase):
                                 new=self.discover_connectors),
             unittest.mock.patch("aioxmpp.security_layer.negotiate_sasl",
                                 new=self.negotiate_sasl),
+            unittest.mock.patch("aioxmpp.protocol.negotiate_compression",
+                                new=self.negotiate_compression),
             unittest.mock.patch("aioxmpp.protocol.send_stream_error_and_close",
                                 new=self.send_stream_error),
         ]
 
         self.negotiate_sasl.return_value = \
             unittest.mock.sentinel.post_sasl_features
+        self.negotiate_compression.return_value = \
+            unittest.mock.sentinel.post_compression_features
 
         for patch in self.patches:
             patch.start()
@@ -713,6 +718,107 @@ class Testconnect_xmlstream(unittest.TestCase):
             )
         )
 
+    def test_no_compression_by_default(self):
+        base = unittest.mock.Mock()
+        jid = unittest.mock.Mock()
+
+        base.c.connect = CoroutineMock()
+        base.c.connect.return_value = (
+            unittest.mock.sentinel.transport,
+            unittest.mock.sentinel.protocol,
+            unittest.mock.sentinel.features,
+        )
+
+        self.discover_connectors.return_value = [
+            (unittest.mock.sentinel.h, unittest.mock.sentinel.p, base.c),
+        ]
+
+        result = run_coroutine(node.connect_xmlstream(
+            jid,
+            base.metadata,
+            loop=unittest.mock.sentinel.loop,
+        ))
+
+        self.assertFalse(self.negotiate_compression.mock_calls)
+        self.assertEqual(
+            result[2],
+            unittest.mock.sentinel.post_sasl_features,
+        )
+
+    def test_passes_xml_limits_to_connector(self):
+        base = unittest.mock.Mock()
+        jid = unittest.mock.Mock()
+
+        base.c.connect = CoroutineMock()
+        base.c.connect.return_value = (
+            unittest.mock.sentinel.transport,
+            unittest.mock.sentinel.protocol,
+            unittest.mock.sentinel.features,
+        )
+
+        self.discover_connectors.return_value = [
+            (unittest.mock.sentinel.h, unittest.mock.sentinel.p, base.c),
+        ]
+
+        run_coroutine(node.connect_xmlstream(
+            jid,
+            base.metadata,
+            loop=unittest.mock.sentinel.loop,
+            xml_limits=unittest.mock.sentinel.limits,
+        ))
+
+        base.c.connect.assert_called_once_with(
+            unittest.mock.sentinel.loop,
+            base.metadata,
+            jid.domain,
+            unittest.mock.sentinel.h,
+            unittest.mock.sentinel.p,
+            60.,
+            limits=unittest.mock.sentinel.limits,
+        )
+
+    def test_negotiate_compression_after_sasl(self):
+        logger = unittest.mock.Mock()
+        base = unittest.mock.Mock()
+        jid = unittest.mock.Mock()
+
+        base.c.connect = CoroutineMock()
+        base.c.connect.return_value = (
+            unittest.mock.sentinel.transport,
+            unittest.mock.sentinel.protocol,
+            unittest.mock.sentinel.features,
+        )
+
+        self.discover_connectors.return_value = [
+            (unittest.mock.sentinel.h, unittest.mock.sentinel.p, base.c),
+        ]
+
+        result = run_coroutine(node.connect_xmlstream(
+            jid,
+            base.metadata,
+            negotiation_timeout=unittest.mock.sentinel.timeout,
+            loop=unittest.mock.sentinel.loop,
+            logger=logger,
+            compression_level=unittest.mock.sentinel.level,
+        ))
+
+        self.negotiate_compression.assert_called_once_with(
+            unittest.mock.sentinel.protocol,
+            unittest.mock.sentinel.post_sasl_features,
+            level=unittest.mock.sentinel.level,
+            timeout=unittest.mock.sentinel.timeout,
+            logger=logger,
+        )
+
+        self.assertEqual(
+            result,
+            (
+                unittest.mock.sentinel.transport,
+                unittest.mock.sentinel.protocol,
+                unittest.mock.sentinel.post_compression_features,
+            )
+        )
+
     def test_negotiate_sasl_after_success(self):
         NCONNECTORS = 4
 
@@ -1291,6 +1397,9 @@ class TestAbstractClient(xmltestutils.XMLTestCase):
             self.client.local_jid.bare(),
             self.client.stream.local_jid
         )
+        self.assertIsNone(self.client.compression_level)
+        self.assertIsNone(self.client.xml_limits)
+        self.assertIs(self.client.loop, self.loop)
 
     def test_setup(self):
         def peer_iterator():
@@ -1352,6 +1461,8 @@ class TestAbstractClient(xmltestutils.XMLTestCase):
             override_peer=[],
             loop=self.loop,
             logger=self.client.logger,
+            compression_level=None,
+            xml_limits=None,
         )
 
     def test_start_with_override_peer(self):
@@ -1373,6 +1484,40 @@ class TestAbstractClient(xmltestutils.XMLTestCase):
             override_peer=self.client.override_peer,
             loop=self.loop,
             logger=self.client.logger,
+            compression_level=None,
+            xml_limits=None,
+        )
+
+    def test_start_with_compression_level(self):
+        self.client.compression_level = 6
+        self.client.start()
+        run_coroutine(self.xmlstream.run_test(self.resource_binding))
+
+        self.connect_xmlstream_rec.assert_called_once_with(
+            self.test_jid,
+            self.security_layer,
+            negotiation_timeout=60.0,
+            override_peer=[],
+            loop=self.loop,
+            logger=self.client.logger,
+            compression_level=6,
+            xml_limits=None,
+        )
+
+    def test_start_with_xml_limits(self):
+        self.client.xml_limits = unittest.mock.sentinel.limits
+        self.client.start()
+        run_coroutine(self.xmlstream.run_test(self.resource_binding))
+
+        self.connect_xmlstream_rec.assert_called_once_with(
+            self.test_jid,
+            self.security_layer,
+            negotiation_timeout=60.0,
+            override_peer=[],
+            loop=self.loop,
+            logger=self.client.logger,
+            compression_level=None,
+            xml_limits=unittest.mock.sentinel.limits,
         )
 
     def test_reject_start_twice(self):
@@ -1484,7 +1629,9 @@ class TestAbstractClient(xmltestutils.XMLTestCase):
                     negotiation_timeout=0.01,
                     override_peer=[],
                     loop=self.loop,
-                    logger=self.client.logger)
+                    logger=self.client.logger,
+                    compression_level=None,
+                    xml_limits=None)
             ]*2,
             self.connect_xmlstream_rec.mock_calls
         )
@@ -1528,7 +1675,9 @@ class TestAbstractClient(xmltestutils.XMLTestCase):
             negotiation_timeout=60.0,
             override_peer=[],
             loop=self.loop,
-            logger=self.client.logger)
+            logger=self.client.logger,
+            compression_level=None,
+            xml_limits=None)
 
         exc = OSError()
         self.connect_xmlstream_rec.side_effect = exc
@@ -1603,7 +1752,9 @@ class TestAbstractClient(xmltestutils.XMLTestCase):
             negotiation_timeout=60.0,
             override_peer=[],
             loop=self.loop,
-            logger=self.client.logger)
+            logger=self.client.logger,
+            compression_level=None,
+            xml_limits=None)
 
         exc = dns.resolver.NoNameservers()
         self.connect_xmlstream_rec.side_effect = exc
@@ -1955,7 +2106,9 @@ class TestAbstractClient(xmltestutils.XMLTestCase):
                     override_peer=[],
                     negotiation_timeout=60.0,
                     loop=self.loop,
-                    logger=self.client.logger),
+                    logger=self.client.logger,
+                    compression_level=None,
+                    xml_limits=None),
                 unittest.mock.call(
                     self.test_jid,
                     self.security_layer,
@@ -1964,7 +2117,9 @@ class TestAbstractClient(xmltestutils.XMLTestCase):
                     ],
                     negotiation_timeout=60.0,
                     loop=self.loop,
-                    logger=self.client.logger),
+                    logger=self.client.logger,
+                    compression_level=None,
+                    xml_limits=None),
             ],
             self.connect_xmlstream_rec.mock_calls
         )
@@ -2031,7 +2186,9 @@ class TestAbstractClient(xmltestutils.XMLTestCase):
                     ],
                     negotiation_timeout=60.0,
                     loop=self.loop,
-                    logger=self.client.logger),
+                    logger=self.client.logger,
+                    compression_level=None,
+                    xml_limits=None),
                 unittest.mock.call(
                     self.test_jid,
                     self.security_layer,
@@ -2041,7 +2198,9 @@ class TestAbstractClient(xmltestutils.XMLTestCase):
                     ],
                     negotiation_timeout=60.0,
                     loop=self.loop,
-                    logger=self.client.logger),
+                    logger=self.client.logger,
+                    compression_level=None,
+                    xml_limits=None),
             ],
             self.connect_xmlstream_rec.mock_calls
         )
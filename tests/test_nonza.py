@@ -350,6 +350,126 @@ class TestStartTLSProceed(unittest.TestCase):
         )
 
 
+class TestCompressionXSO(unittest.TestCase):
+    def test_is_xso(self):
+        self.assertTrue(issubclass(
+            nonza.CompressionXSO,
+            xso.XSO
+        ))
+
+    def test_declare_ns(self):
+        self.assertDictEqual(
+            nonza.CompressionXSO.DECLARE_NS,
+            {
+                None: namespaces.compression
+            }
+        )
+
+
+class TestCompressionFeature(unittest.TestCase):
+    def test_is_xso(self):
+        self.assertTrue(issubclass(
+            nonza.CompressionFeature,
+            xso.XSO
+        ))
+
+    def test_tag(self):
+        self.assertEqual(
+            nonza.CompressionFeature.TAG,
+            (namespaces.compression_feature, "compression")
+        )
+
+    def test_methods(self):
+        self.assertIsInstance(
+            nonza.CompressionFeature.methods,
+            xso.ChildList
+        )
+
+    def test_get_method_list(self):
+        feature = nonza.CompressionFeature()
+        feature.methods.append(nonza.CompressionMethod("zlib"))
+        feature.methods.append(nonza.CompressionMethod("lzw"))
+
+        self.assertSequenceEqual(
+            feature.get_method_list(),
+            ["zlib", "lzw"]
+        )
+
+    def test_is_registered_stream_feature(self):
+        self.assertTrue(nonza.StreamFeatures.is_feature(
+            nonza.CompressionFeature
+        ))
+
+
+class TestCompress(unittest.TestCase):
+    def test_is_compression_xso(self):
+        self.assertTrue(issubclass(
+            nonza.Compress,
+            nonza.CompressionXSO
+        ))
+
+    def test_tag(self):
+        self.assertEqual(
+            nonza.Compress.TAG,
+            (namespaces.compression, "compress")
+        )
+
+    def test_method(self):
+        self.assertIsInstance(
+            nonza.Compress.method,
+            xso.ChildText
+        )
+        self.assertEqual(
+            nonza.Compress.method.tag,
+            (namespaces.compression, "method")
+        )
+
+    def test_init(self):
+        obj = nonza.Compress("zlib")
+        self.assertEqual(obj.method, "zlib")
+
+        obj = nonza.Compress()
+        self.assertIsNone(obj.method)
+
+
+class TestCompressed(unittest.TestCase):
+    def test_is_compression_xso(self):
+        self.assertTrue(issubclass(
+            nonza.Compressed,
+            nonza.CompressionXSO
+        ))
+
+    def test_tag(self):
+        self.assertEqual(
+            nonza.Compressed.TAG,
+            (namespaces.compression, "compressed")
+        )
+
+
+class TestCompressionFailure(unittest.TestCase):
+    def test_is_compression_xso(self):
+        self.assertTrue(issubclass(
+            nonza.CompressionFailure,
+            nonza.CompressionXSO
+        ))
+
+    def test_tag(self):
+        self.assertEqual(
+            nonza.CompressionFailure.TAG,
+            (namespaces.compression, "failure")
+        )
+
+    def test_condition(self):
+        self.assertIsInstance(
+            nonza.CompressionFailure.condition,
+            xso.ChildTag
+        )
+        self.assertIs(
+            nonza.CompressionFailure.condition.default,
+            None
+        )
+
+
 class TestSASLXSO(unittest.TestCase):
     def test_is_xso(self):
         self.assertTrue(issubclass(
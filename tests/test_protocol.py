@@ -1,11 +1,14 @@
 import asyncio
+import logging
 import unittest
 import unittest.mock
+import zlib
 
 import aioxmpp.stanza as stanza
 import aioxmpp.xso as xso
 import aioxmpp.nonza as nonza
 import aioxmpp.errors as errors
+import aioxmpp.xml as xml
 
 from aioxmpp.testutils import (
     TransportMock,
@@ -320,6 +323,54 @@ class TestXMLStream(unittest.TestCase):
             TransportMock.Close()
         ]))
 
+    def test_stanza_size_limit(self):
+        limits = xml.XMLLimits(max_stanza_bytes=512)
+        t, p = self._make_stream(to=TEST_PEER, limits=limits)
+        self.assertIs(p.limits, limits)
+        self.assertIsNone(XMLStream.limits)
+        run_coroutine(t.run_test([
+            TransportMock.Write(
+                STREAM_HEADER,
+                response=[
+                    TransportMock.Receive(self._make_peer_header()),
+                    TransportMock.Receive(
+                        b"<message><body>" + b"x" * 1024 +
+                        b"</body></message>"
+                    )
+                ]),
+            TransportMock.Write(
+                STREAM_ERROR_TEMPLATE_WITH_TEXT.format(
+                    condition="policy-violation",
+                    text="maximum stanza size exceeded"
+                ).encode("utf-8")
+            ),
+            TransportMock.Write(b"</stream:stream>"),
+            TransportMock.WriteEof(),
+            TransportMock.Close()
+        ]))
+        self.assertEqual(p.limits.violations["max_stanza_bytes"], 1)
+
+    def test_stanza_size_limit_applies_per_stanza(self):
+        def catch_iq(obj):
+            pass
+
+        t, p = self._make_stream(to=TEST_PEER)
+        p.stanza_parser.add_class(FakeIQ, catch_iq)
+        p.limits = xml.XMLLimits(max_stanza_bytes=512)
+        run_coroutine(t.run_test([
+            TransportMock.Write(
+                STREAM_HEADER,
+                response=[
+                    TransportMock.Receive(self._make_peer_header()),
+                ] + [
+                    TransportMock.Receive(
+                        b"<iq type='result' id='x'/>" + b" " * 400
+                    )
+                ] * 10
+            ),
+        ]))
+        self.assertFalse(p.limits.violations)
+
     def test_error_propagation(self):
         def cb(stanza):
             pass
@@ -635,6 +686,302 @@ class TestXMLStream(unittest.TestCase):
         self.assertIsNone(p._processor.remote_to)
         self.assertIsNone(p._processor.remote_id)
 
+    def test_data_received_accepts_memoryview(self):
+        buf = bytearray(self._make_peer_header() + b"garbage")
+        t, p = self._make_stream(to=TEST_PEER)
+        run_coroutine(
+            t.run_test(
+                [
+                    TransportMock.Write(
+                        STREAM_HEADER,
+                        response=[
+                            TransportMock.Receive(
+                                memoryview(buf)[:len(buf)-len(b"garbage")]
+                            ),
+                        ]),
+                ],
+                partial=True
+            )
+        )
+        self.assertEqual(protocol.State.OPEN, p.state)
+        self.assertEqual(p._processor.remote_id, "abc")
+
+    def test_traffic_is_logged_to_trace_logger(self):
+        base_logger = logging.getLogger("aioxmpp.tests.trace_enabled")
+        trace_logger = base_logger.getChild("XMLStream.trace")
+
+        t, p = self._make_stream(to=TEST_PEER, base_logger=base_logger)
+        with self.assertLogs(trace_logger, logging.DEBUG) as ctx:
+            run_coroutine(
+                t.run_test(
+                    [
+                        TransportMock.Write(
+                            STREAM_HEADER,
+                            response=[
+                                TransportMock.Receive(
+                                    memoryview(self._make_peer_header())
+                                ),
+                            ]),
+                    ],
+                    partial=True
+                )
+            )
+
+        messages = [record.getMessage() for record in ctx.records]
+        self.assertIn(
+            "SENT {!r}".format(STREAM_HEADER),
+            messages,
+        )
+        self.assertIn(
+            "RECV {!r}".format(self._make_peer_header()),
+            messages,
+        )
+
+    def test_traffic_is_not_logged_with_trace_disabled(self):
+        base_logger = logging.getLogger("aioxmpp.tests.trace_disabled")
+        base_logger.setLevel(logging.DEBUG)
+        trace_logger = base_logger.getChild("XMLStream.trace")
+        trace_logger.setLevel(logging.INFO)
+
+        try:
+            t, p = self._make_stream(to=TEST_PEER, base_logger=base_logger)
+            with unittest.mock.patch.object(trace_logger, "debug") as debug:
+                run_coroutine(
+                    t.run_test(
+                        [
+                            TransportMock.Write(
+                                STREAM_HEADER,
+                                response=[
+                                    TransportMock.Receive(
+                                        self._make_peer_header()
+                                    ),
+                                ]),
+                        ],
+                        partial=True
+                    )
+                )
+
+            self.assertFalse(debug.mock_calls)
+        finally:
+            base_logger.setLevel(logging.NOTSET)
+            trace_logger.setLevel(logging.NOTSET)
+
+    def _compressed_peer(self, level=zlib.Z_DEFAULT_COMPRESSION):
+        compressor = zlib.compressobj(level)
+
+        def compress(data):
+            result = (compressor.compress(data) +
+                      compressor.flush(zlib.Z_SYNC_FLUSH))
+            compress.sent += result
+            return result
+
+        compress.sent = b""
+        return compress
+
+    def _start_compressed_stream(self, level=zlib.Z_DEFAULT_COMPRESSION,
+                                 limits=None):
+        t, p = self._make_stream(to=TEST_PEER, limits=limits)
+        run_coroutine(
+            t.run_test(
+                [
+                    TransportMock.Write(
+                        STREAM_HEADER,
+                        response=[
+                            TransportMock.Receive(self._make_peer_header()),
+                        ]),
+                ],
+                partial=True
+            )
+        )
+
+        compression = protocol.ZlibCompression(level)
+        p.start_compression(compression)
+
+        to_peer = self._compressed_peer(level)
+        from_peer = self._compressed_peer()
+
+        p.reset()
+        run_coroutine(
+            t.run_test(
+                [
+                    TransportMock.Write(
+                        to_peer(STREAM_HEADER),
+                        response=[
+                            TransportMock.Receive(
+                                from_peer(self._make_peer_header())
+                            ),
+                        ]),
+                ],
+                partial=True
+            )
+        )
+
+        return t, p, to_peer, from_peer
+
+    def test_start_compression(self):
+        t, p, to_peer, from_peer = self._start_compressed_stream()
+
+        self.assertIsInstance(p.compression, protocol.ZlibCompression)
+        self.assertEqual(protocol.State.OPEN, p.state)
+        self.assertEqual(p._processor.remote_id, "abc")
+
+        iq = FakeIQ(to=TEST_PEER, type_="get")
+        iq.id_ = "foo"
+        iq.payload = Child()
+        iq.payload.attr = "bar"
+
+        p.send_xso(iq)
+
+        run_coroutine(
+            t.run_test(
+                [
+                    TransportMock.Write(
+                        to_peer(
+                            b'<iq id="foo" to="bar.example" type="get">'
+                            b'<payload xmlns="uri:foo" a="bar"/></iq>'
+                        )
+                    ),
+                ],
+                partial=True
+            )
+        )
+
+    def test_compressed_stream_receives_stanzas(self):
+        t, p, to_peer, from_peer = self._start_compressed_stream()
+
+        received = []
+
+        def cb(iq):
+            received.append(iq)
+
+        p.stanza_parser.add_class(FakeIQ, cb)
+
+        run_coroutine(
+            t.run_test(
+                [],
+                stimulus=TransportMock.Receive(from_peer(
+                    b'<iq id="foo" type="result"/>'
+                )),
+                partial=True
+            )
+        )
+
+        self.assertEqual(len(received), 1)
+        self.assertEqual(received[0].id_, "foo")
+
+    def test_compression_counts_bytes(self):
+        t, p, to_peer, from_peer = self._start_compressed_stream()
+
+        compression = p.compression
+        self.assertEqual(compression.raw_bytes_sent, len(STREAM_HEADER))
+        self.assertEqual(compression.compressed_bytes_sent,
+                         len(to_peer.sent))
+        self.assertEqual(compression.raw_bytes_received,
+                         len(self._make_peer_header()))
+        self.assertEqual(compression.compressed_bytes_received,
+                         len(from_peer.sent))
+
+    def test_start_compression_with_level(self):
+        t, p, to_peer, from_peer = self._start_compressed_stream(level=1)
+        self.assertEqual(p.compression.level, 1)
+
+    def test_compressed_stream_footer_on_close(self):
+        t, p, to_peer, from_peer = self._start_compressed_stream()
+
+        p.close()
+        run_coroutine(
+            t.run_test(
+                [
+                    TransportMock.Write(to_peer(b"</stream:stream>")),
+                    TransportMock.WriteEof(
+                        response=[
+                            TransportMock.Receive(
+                                from_peer(b"</stream:stream>")
+                            ),
+                        ]
+                    ),
+                    TransportMock.Close(),
+                ],
+            )
+        )
+
+    def test_decompression_failure_causes_stream_error(self):
+        t, p, to_peer, from_peer = self._start_compressed_stream()
+
+        garbage = b"\xff\xff\xff\xff"
+
+        decompressor = zlib.decompressobj()
+        decompressor.decompress(from_peer.sent)
+        try:
+            decompressor.decompress(garbage)
+        except zlib.error as exc:
+            message = str(exc)
+        else:
+            self.fail("garbage did not cause a zlib error")
+
+        run_coroutine(
+            t.run_test(
+                [
+                    TransportMock.Write(
+                        to_peer(
+                            STREAM_ERROR_TEMPLATE_WITH_TEXT.format(
+                                condition="undefined-condition",
+                                text="stream decompression failed: " + message
+                            ).encode("utf-8")
+                        ) +
+                        to_peer(b"</stream:stream>")
+                    ),
+                    TransportMock.WriteEof(),
+                    TransportMock.Close(),
+                ],
+                stimulus=TransportMock.Receive(garbage),
+            )
+        )
+
+    def test_decompression_is_bounded_by_stanza_limit(self):
+        t, p, to_peer, from_peer = self._start_compressed_stream(
+            limits=xml.XMLLimits(max_stanza_bytes=512)
+        )
+
+        bomb = from_peer(b"<message><body>" + b"x" * 10000000)
+
+        run_coroutine(
+            t.run_test(
+                [
+                    TransportMock.Write(
+                        to_peer(
+                            STREAM_ERROR_TEMPLATE_WITH_TEXT.format(
+                                condition="policy-violation",
+                                text="maximum stanza size exceeded"
+                            ).encode("utf-8")
+                        ) +
+                        to_peer(b"</stream:stream>")
+                    ),
+                    TransportMock.WriteEof(),
+                    TransportMock.Close(),
+                ],
+                stimulus=TransportMock.Receive(bomb),
+            )
+        )
+
+        self.assertLess(
+            p.compression.raw_bytes_received,
+            len(self._make_peer_header()) +
+            protocol.ZlibCompression.CHUNK_SIZE * 2
+        )
+
+    def test_start_compression_raises_while_closed(self):
+        t, p = self._make_stream(to=TEST_PEER)
+        with self.assertRaisesRegex(ConnectionError,
+                                     "not connected"):
+            p.start_compression(protocol.ZlibCompression())
+
+    def test_start_compression_raises_if_already_compressed(self):
+        t, p, to_peer, from_peer = self._start_compressed_stream()
+        with self.assertRaisesRegex(RuntimeError,
+                                    "already active"):
+            p.start_compression(protocol.ZlibCompression())
+
     def test_features_future(self):
         fut = asyncio.Future()
         t, p = self._make_stream(to=TEST_PEER, features_future=fut)
@@ -1809,6 +2156,173 @@ class Testreset_stream_and_get_features(xmltestutils.XMLTestCase):
         del self.loop
 
 
+class TestZlibCompression(unittest.TestCase):
+    def test_method(self):
+        self.assertEqual(protocol.ZlibCompression.METHOD, "zlib")
+
+    def test_default_level(self):
+        self.assertEqual(
+            protocol.ZlibCompression().level,
+            zlib.Z_DEFAULT_COMPRESSION,
+        )
+
+    def test_round_trip_with_sync_flush(self):
+        local = protocol.ZlibCompression(level=9)
+        remote = protocol.ZlibCompression()
+
+        data = local.compress(b"<presence/>") + local.flush()
+        self.assertEqual(remote.decompress(data), b"<presence/>")
+
+        data = local.compress(b"<presence/>") + local.flush()
+        self.assertEqual(remote.decompress(data), b"<presence/>")
+
+    def test_counters(self):
+        local = protocol.ZlibCompression()
+        remote = protocol.ZlibCompression()
+
+        payload = b"<presence/>" * 100
+        data = local.compress(payload) + local.flush()
+        remote.decompress(data)
+
+        self.assertEqual(local.raw_bytes_sent, len(payload))
+        self.assertEqual(local.compressed_bytes_sent, len(data))
+        self.assertLess(local.compressed_bytes_sent, local.raw_bytes_sent)
+        self.assertEqual(remote.compressed_bytes_received, len(data))
+        self.assertEqual(remote.raw_bytes_received, len(payload))
+
+    def test_decompress_raises_on_garbage(self):
+        with self.assertRaises(zlib.error):
+            protocol.ZlibCompression().decompress(b"\xff\xff\xff\xff")
+
+    def test_iter_decompress_yields_bounded_chunks(self):
+        local = protocol.ZlibCompression()
+        remote = protocol.ZlibCompression()
+
+        payload = b"x" * 100000
+        data = local.compress(payload) + local.flush()
+
+        chunks = remote.iter_decompress(data, 1000)
+        first = next(chunks)
+        self.assertEqual(len(first), 1000)
+        self.assertEqual(remote.raw_bytes_received, 1000)
+
+        rest = list(chunks)
+        self.assertTrue(all(len(chunk) <= 1000 for chunk in rest))
+        self.assertEqual(first + b"".join(rest), payload)
+        self.assertEqual(remote.raw_bytes_received, len(payload))
+        self.assertEqual(remote.compressed_bytes_received, len(data))
+
+    def test_iter_decompress_default_chunk_size(self):
+        local = protocol.ZlibCompression()
+        remote = protocol.ZlibCompression()
+
+        data = local.compress(b"x" * 100000) + local.flush()
+        self.assertEqual(
+            len(next(remote.iter_decompress(data))),
+            protocol.ZlibCompression.CHUNK_SIZE
+        )
+
+
+class Testnegotiate_compression(xmltestutils.XMLTestCase):
+    def setUp(self):
+        self.loop = asyncio.get_event_loop()
+        self.xmlstream = XMLStreamMock(self, loop=self.loop)
+        self.features = nonza.StreamFeatures()
+        self.feature = nonza.CompressionFeature()
+        self.feature.methods.append(nonza.CompressionMethod("zlib"))
+        self.features[...] = self.feature
+
+    def _run_test(self, actions, features, **kwargs):
+        return run_coroutine(
+            asyncio.gather(
+                protocol.negotiate_compression(
+                    self.xmlstream,
+                    features,
+                    **kwargs),
+                self.xmlstream.run_test(actions)
+            )
+        )[0]
+
+    def test_noop_without_feature(self):
+        features = nonza.StreamFeatures()
+        result = self._run_test([], features)
+        self.assertIs(result, features)
+
+    def test_noop_without_zlib_method(self):
+        self.feature.methods[0].name = "lzw"
+        result = self._run_test([], self.features)
+        self.assertIs(result, self.features)
+
+    def test_negotiate_and_reset(self):
+        new_features = nonza.StreamFeatures()
+
+        result = self._run_test(
+            [
+                XMLStreamMock.Send(
+                    nonza.Compress("zlib"),
+                    response=XMLStreamMock.Receive(nonza.Compressed())
+                ),
+                XMLStreamMock.StartCompression(zlib.Z_DEFAULT_COMPRESSION),
+                XMLStreamMock.Reset(
+                    response=XMLStreamMock.Receive(new_features)
+                ),
+            ],
+            self.features,
+        )
+
+        self.assertIs(result, new_features)
+
+    def test_negotiate_with_level(self):
+        new_features = nonza.StreamFeatures()
+
+        result = self._run_test(
+            [
+                XMLStreamMock.Send(
+                    nonza.Compress("zlib"),
+                    response=XMLStreamMock.Receive(nonza.Compressed())
+                ),
+                XMLStreamMock.StartCompression(1),
+                XMLStreamMock.Reset(
+                    response=XMLStreamMock.Receive(new_features)
+                ),
+            ],
+            self.features,
+            level=1,
+        )
+
+        self.assertIs(result, new_features)
+
+    def test_continue_uncompressed_on_failure(self):
+        failure = nonza.CompressionFailure()
+        failure.condition = (namespaces.compression, "setup-failed")
+
+        result = self._run_test(
+            [
+                XMLStreamMock.Send(
+                    nonza.Compress("zlib"),
+                    response=XMLStreamMock.Receive(failure)
+                ),
+            ],
+            self.features,
+        )
+
+        self.assertIs(result, self.features)
+
+    def test_timeout(self):
+        with self.assertRaises(TimeoutError):
+            self._run_test(
+                [
+                    XMLStreamMock.Send(nonza.Compress("zlib")),
+                ],
+                self.features,
+                timeout=0.1,
+            )
+
+    def tearDown(self):
+        del self.xmlstream
+        del self.loop
+
+
 class Testsend_stream_error_and_close(xmltestutils.XMLTestCase):
     def setUp(self):
         self.loop = asyncio.get_event_loop()
@@ -826,6 +826,30 @@ class TestXMLStreamMock(XMLTestCase):
         self.assertIs(caught_exception, exc)
         self.assertIs(other_result, None)
 
+    def test_start_compression(self):
+        compression = unittest.mock.Mock()
+        compression.level = 3
+
+        self.xmlstream.start_compression(compression)
+        run_coroutine(self.xmlstream.run_test(
+            [
+                XMLStreamMock.StartCompression(3),
+            ]
+        ))
+
+    def test_start_compression_reject_incorrect_level(self):
+        compression = unittest.mock.Mock()
+        compression.level = 3
+
+        self.xmlstream.start_compression(compression)
+        with self.assertRaisesRegex(AssertionError,
+                                    "mismatched start_compression argument"):
+            run_coroutine(self.xmlstream.run_test(
+                [
+                    XMLStreamMock.StartCompression(9),
+                ]
+            ))
+
     def test_fail(self):
         exc = ValueError()
         fun = unittest.mock.MagicMock()
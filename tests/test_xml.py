@@ -7,6 +7,7 @@ import unittest.mock
 import lxml.sax
 
 import xml.sax.handler as saxhandler
+import xml.sax.saxutils as saxutils
 
 import aioxmpp.xml as xml
 import aioxmpp.structs as structs
@@ -68,6 +69,54 @@ class TestxmlValidateNameValue_str(unittest.TestCase):
         self.assertFalse(xml.xmlValidateNameValue_str("foo<"))
 
 
+SAMPLE_TEXTS = [
+    "",
+    "foo",
+    "f\u00f6\u00f6 \u2603",
+    "<fo&o>",
+    "&amp;",
+    "a\tb\nc\rd",
+    "\"double\"",
+    "'single'",
+    "\"both'",
+    "<'\"&\n\t\r>",
+    "QUJDREVGR0g=" * 100,
+]
+
+
+class Test_escape_text(unittest.TestCase):
+    def test_matches_saxutils(self):
+        for text in SAMPLE_TEXTS:
+            self.assertEqual(
+                saxutils.escape(text).encode("utf-8"),
+                xml._escape_text(text),
+                text,
+            )
+
+    def test_reject_control_characters(self):
+        for i in set(range(32)) - {9, 10, 13}:
+            with self.assertRaises(ValueError):
+                xml._escape_text(chr(i))
+            with self.assertRaises(ValueError):
+                xml._escape_text("foo&" + chr(i))
+
+    def test_allow_whitespace(self):
+        self.assertEqual(
+            b"\t\n\r",
+            xml._escape_text("\t\n\r")
+        )
+
+
+class Test_quote_attr(unittest.TestCase):
+    def test_matches_saxutils(self):
+        for text in SAMPLE_TEXTS:
+            self.assertEqual(
+                saxutils.quoteattr(text).encode("utf-8"),
+                xml._quote_attr(text),
+                text,
+            )
+
+
 class TestXMPPXMLGenerator(XMLTestCase):
     def setUp(self):
         self.buf = io.BytesIO()
@@ -373,6 +422,25 @@ class TestXMPPXMLGenerator(XMLTestCase):
             with self.assertRaises(ValueError):
                 gen.characters(chr(i))
 
+    def test_attribute_quoting(self):
+        gen = xml.XMPPXMLGenerator(self.buf, sorted_attributes=True)
+        gen.startDocument()
+        gen.startElementNS(
+            (None, "foo"), None,
+            {
+                (None, "a"): "x\"y",
+                (None, "b"): "x'\"<y\n",
+            }
+        )
+        gen.endElementNS((None, "foo"), None)
+        gen.endDocument()
+
+        self.assertEqual(
+            b'<?xml version="1.0"?>'
+            b"<foo a='x\"y' b=\"x'&quot;&lt;y&#10;\"/>",
+            self.buf.getvalue()
+        )
+
     def test_skippedEntity_not_implemented(self):
         gen = xml.XMPPXMLGenerator(self.buf)
         with self.assertRaises(NotImplementedError):
@@ -851,6 +919,48 @@ class Testwrite_xmlstream(unittest.TestCase):
         del self.buf
 
 
+class TestXMLLimits(unittest.TestCase):
+    def test_defaults(self):
+        limits = xml.XMLLimits()
+        self.assertEqual(limits.max_stanza_bytes, 1024*1024)
+        self.assertEqual(limits.max_depth, 64)
+        self.assertEqual(limits.max_attributes, 64)
+        self.assertEqual(limits.max_text_length, 1024*1024)
+        self.assertFalse(limits.violations)
+
+    def test_init(self):
+        limits = xml.XMLLimits(
+            max_stanza_bytes=1,
+            max_depth=2,
+            max_attributes=3,
+            max_text_length=None,
+        )
+        self.assertEqual(limits.max_stanza_bytes, 1)
+        self.assertEqual(limits.max_depth, 2)
+        self.assertEqual(limits.max_attributes, 3)
+        self.assertIsNone(limits.max_text_length)
+
+    def test_violation_counts_and_returns_stream_error(self):
+        limits = xml.XMLLimits()
+        exc = limits.violation("max_depth", "foo")
+        self.assertIsInstance(exc, errors.StreamError)
+        self.assertEqual(
+            exc.condition,
+            (namespaces.streams, "policy-violation")
+        )
+        self.assertEqual(exc.text, "foo")
+
+        limits.violation("max_depth", "foo")
+        limits.violation("max_attributes", "foo")
+        self.assertDictEqual(
+            limits.violations,
+            {
+                "max_depth": 2,
+                "max_attributes": 1,
+            }
+        )
+
+
 class TestXMPPXMLProcessor(unittest.TestCase):
     VALID_STREAM_HEADER = "".join((
         "<stream:stream xmlns:stream='{}'".format(namespaces.xmlstream),
@@ -1047,6 +1157,120 @@ class TestXMPPXMLProcessor(unittest.TestCase):
             [],
             self.proc._driver.mock_calls)
 
+    def _start_limited_stream(self, **kwargs):
+        self.proc.limits = xml.XMLLimits(**kwargs)
+        self.proc.stanza_parser = xso.XSOParser()
+        self.proc.stanza_parser.add_class(Cls, unittest.mock.Mock())
+        self.proc.startDocument()
+        self.proc.startElementNS(self.STREAM_HEADER_TAG, None,
+                                 self.STREAM_HEADER_ATTRS)
+
+    def test_limits_default_to_none(self):
+        self.assertIsNone(self.proc.limits)
+
+    def test_max_depth(self):
+        self._start_limited_stream(max_depth=2)
+
+        self.proc.startElementNS(Cls.TAG, None, {})
+        self.proc.startElementNS(("uri:foo", "bar"), None, {})
+        with self.assertRaises(errors.StreamError) as cm:
+            self.proc.startElementNS(("uri:foo", "baz"), None, {})
+
+        self.assertEqual(
+            (namespaces.streams, "policy-violation"),
+            cm.exception.condition
+        )
+        self.assertEqual(self.proc.limits.violations["max_depth"], 1)
+
+    def test_max_depth_enforced_during_exception_backoff(self):
+        self._start_limited_stream(max_depth=2)
+
+        self.proc.startElementNS(("uri:foo", "unknown"), None, {})
+        self.proc.startElementNS(("uri:foo", "bar"), None, {})
+        with self.assertRaises(errors.StreamError):
+            self.proc.startElementNS(("uri:foo", "baz"), None, {})
+
+    def test_max_attributes(self):
+        self._start_limited_stream(max_attributes=2)
+
+        with self.assertRaises(errors.StreamError) as cm:
+            self.proc.startElementNS(
+                Cls.TAG, None,
+                {
+                    (None, "a"): "1",
+                    (None, "b"): "2",
+                    (None, "c"): "3",
+                }
+            )
+
+        self.assertEqual(
+            (namespaces.streams, "policy-violation"),
+            cm.exception.condition
+        )
+        self.assertEqual(self.proc.limits.violations["max_attributes"], 1)
+
+    def test_max_text_length_is_accumulated(self):
+        self._start_limited_stream(max_text_length=5)
+
+        self.proc.startElementNS(("uri:foo", "unknown"), None, {})
+        self.proc.characters("abc")
+        with self.assertRaises(errors.StreamError) as cm:
+            self.proc.characters("def")
+
+        self.assertEqual(
+            (namespaces.streams, "policy-violation"),
+            cm.exception.condition
+        )
+        self.assertEqual(self.proc.limits.violations["max_text_length"], 1)
+
+    def test_max_text_length_is_reset_at_element_boundaries(self):
+        self._start_limited_stream(max_text_length=5)
+
+        self.proc.startElementNS(("uri:foo", "unknown"), None, {})
+        self.proc.characters("abcd")
+        self.proc.startElementNS(("uri:foo", "bar"), None, {})
+        self.proc.characters("abcd")
+        self.proc.endElementNS(("uri:foo", "bar"), None)
+        self.proc.characters("abcd")
+
+    def test_limits_can_be_disabled(self):
+        self._start_limited_stream(
+            max_depth=None,
+            max_attributes=None,
+            max_text_length=None,
+        )
+
+        for i in range(100):
+            self.proc.startElementNS(
+                ("uri:foo", "unknown"), None,
+                {(None, str(j)): "" for j in range(100)}
+            )
+        self.proc.characters("x" * 10000)
+        self.assertFalse(self.proc.limits.violations)
+
+    def test_on_stream_level_event(self):
+        self.proc.on_stream_level_event = unittest.mock.Mock()
+        self.proc.stanza_parser = xso.XSOParser()
+        self.proc.stanza_parser.add_class(Cls, unittest.mock.Mock())
+
+        self.proc.startDocument()
+        self.proc.startElementNS(self.STREAM_HEADER_TAG, None,
+                                 self.STREAM_HEADER_ATTRS)
+        self.assertEqual(len(self.proc.on_stream_level_event.mock_calls), 1)
+
+        self.proc.characters(" ")
+        self.assertEqual(len(self.proc.on_stream_level_event.mock_calls), 2)
+
+        self.proc.startElementNS(Cls.TAG, None, {})
+        self.assertEqual(len(self.proc.on_stream_level_event.mock_calls), 3)
+
+        self.proc.startElementNS(("uri:foo", "bar"), None, {})
+        self.proc.endElementNS(("uri:foo", "bar"), None)
+        self.assertEqual(len(self.proc.on_stream_level_event.mock_calls), 3)
+
+        self.proc.endElementNS(Cls.TAG, None)
+        self.assertEqual(len(self.proc.on_stream_level_event.mock_calls), 4)
+
     def test_require_start_document(self):
         with self.assertRaises(RuntimeError):
             self.proc.startElementNS((None, "foo"), None, {})
@@ -1429,6 +1653,22 @@ class Testmake_parser(unittest.TestCase):
         )
 
 
+class Testget_current_byte_index(unittest.TestCase):
+    def test_reports_offset_of_current_event(self):
+        p = xml.make_parser()
+        offsets = []
+
+        class Handler(saxhandler.ContentHandler):
+            def startElementNS(self, name, qname, attributes):
+                offsets.append(xml.get_current_byte_index(p))
+
+        p.setContentHandler(Handler())
+        p.feed(b"<a><b/>")
+        p.feed(b"  <c/>")
+
+        self.assertSequenceEqual([0, 3, 9], offsets)
+
+
 class TestXMPPLexicalHandler(unittest.TestCase):
     def setUp(self):
         self.proc = xml.XMPPLexicalHandler()
@@ -2208,6 +2208,265 @@ class TestXSOList(unittest.TestCase):
         del self.b_s
 
 
+class TestIndexedXSOList(TestXSOList):
+    def setUp(self):
+        super().setUp()
+        self.l = xso_model.IndexedXSOList(self.l)
+
+    def test_is_XSOList(self):
+        self.assertIsInstance(self.l, xso_model.XSOList)
+
+    def test_filter_by_generic_attribute_is_dynamic_generator(self):
+        self.a_s[0].foo = "a"
+        self.a_s[1].foo = "b"
+
+        gen = self.l.filter(attrs={"foo": "a"})
+        self.a_s[1].foo = "a"
+        self.assertSequenceEqual([self.a_s[0]], list(gen))
+
+    def test_filter_by_type_and_attribute(self):
+        self.a_s[0].foo = "a"
+        self.a_s[2].foo = "a"
+        self.b_s[0].bar = "a"
+
+        self.assertSequenceEqual(
+            [self.a_s[0], self.a_s[2]],
+            self.l.filtered(type_=self.ClsA, attrs={"foo": "a"})
+        )
+        self.assertSequenceEqual(
+            [],
+            self.l.filtered(attrs={"foo": "a", "bar": "a"})
+        )
+
+    def test_filter_by_unhashable_attribute(self):
+        items = [unittest.mock.Mock(["foo"]) for i in range(3)]
+        items[0].foo = ["a"]
+        items[1].foo = "a"
+        items[2].foo = ["a"]
+        l = xso_model.IndexedXSOList(items)
+
+        self.assertSequenceEqual(
+            [items[0], items[2]],
+            l.filtered(attrs={"foo": ["a"]})
+        )
+        self.assertSequenceEqual(
+            [items[1]],
+            l.filtered(attrs={"foo": "a"})
+        )
+
+    def test_indices_are_reused(self):
+        self.a_s[0].foo = "a"
+        self.l.filtered(type_=self.ClsA, attrs={"foo": "a"})
+
+        self.assertIs(
+            self.l._items_of_type(self.ClsA),
+            self.l._items_of_type(self.ClsA),
+        )
+        self.assertIs(
+            self.l._attr_values("foo"),
+            self.l._attr_values("foo"),
+        )
+
+    def test_language_lookup_is_cached(self):
+        self.a_s[0].lang = structs.LanguageTag.fromstr("en")
+        self.a_s[1].lang = structs.LanguageTag.fromstr("de")
+        ranges = [structs.LanguageRange.fromstr("de")]
+
+        self.assertSequenceEqual([self.a_s[1]], self.l.filtered(lang=ranges))
+
+        with unittest.mock.patch(
+                "aioxmpp.structs.lookup_language") as lookup_language:
+            result = self.l.filtered(lang=ranges)
+
+        self.assertFalse(lookup_language.mock_calls)
+        self.assertSequenceEqual([self.a_s[1]], result)
+
+    def test_attribute_change_invalidates_indices(self):
+        self.a_s[0].foo = "a"
+        self.assertSequenceEqual(
+            [self.a_s[0]],
+            self.l.filtered(attrs={"foo": "a"})
+        )
+
+        self.a_s[1].foo = "a"
+        self.assertSequenceEqual(
+            [self.a_s[0], self.a_s[1]],
+            self.l.filtered(attrs={"foo": "a"})
+        )
+
+        del self.a_s[0].foo
+        self.assertSequenceEqual(
+            [self.a_s[1]],
+            self.l.filtered(attrs={"foo": "a"})
+        )
+
+    def test_language_change_invalidates_indices(self):
+        self.a_s[0].lang = structs.LanguageTag.fromstr("en")
+        en = structs.LanguageRange.fromstr("en")
+        self.assertSequenceEqual([self.a_s[0]], self.l.filtered(lang=en))
+
+        self.a_s[1].lang = structs.LanguageTag.fromstr("en")
+        self.assertSequenceEqual(
+            [self.a_s[0], self.a_s[1]],
+            self.l.filtered(lang=en)
+        )
+
+    def test_tracks_unhashable_elements(self):
+        class Cls(xso.XSO):
+            TAG = ("uri:foo", "baz")
+
+            foo = xso.Attr("foo")
+
+            def __eq__(self, other):
+                return self.foo == other.foo
+
+        self.assertIsNone(Cls.__hash__)
+
+        items = [Cls(), Cls()]
+        items[0].foo = "a"
+        items[1].foo = "a"
+        l = xso_model.IndexedXSOList(items)
+        self.assertSequenceEqual(items, l.filtered(attrs={"foo": "a"}))
+
+        items[0].foo = "b"
+        self.assertSequenceEqual(items[1:], l.filtered(attrs={"foo": "a"}))
+        self.assertSequenceEqual(items[:1], l.filtered(attrs={"foo": "b"}))
+
+    def test_unindexed_elements_are_not_tracked(self):
+        self.l.filtered(type_=self.ClsA)
+        other = self.ClsA()
+        self.assertIs(type(other._xso_contents), dict)
+        for item in self.l:
+            self.assertIs(type(item._xso_contents), dict)
+
+    def test_copies_of_indexed_elements_are_not_tracked(self):
+        self.l.filtered(attrs={"foo": "a"})
+        self.assertIsNot(type(self.a_s[0]._xso_contents), dict)
+
+        self.assertIs(type(copy.copy(self.a_s[0])._xso_contents), dict)
+        self.assertIs(type(copy.deepcopy(self.a_s[0])._xso_contents), dict)
+
+    def test_reading_unset_children_keeps_indices(self):
+        class Child(xso.XSO):
+            TAG = ("uri:foo", "child")
+
+        class Cls(xso.XSO):
+            TAG = ("uri:foo", "baz")
+
+            foo = xso.Attr("foo", default=None)
+            children = xso.ChildList([Child])
+
+        item = Cls()
+        item.foo = "a"
+        l = xso_model.IndexedXSOList([item])
+        index = l._attr_values("foo")
+
+        self.assertSequenceEqual([], item.children)
+        self.assertIs(index, l._attr_values("foo"))
+        self.assertIs(item.children, item.children)
+
+        item.foo = "b"
+        self.assertIsNot(index, l._attr_values("foo"))
+
+    def test_change_invalidates_all_lists_of_element(self):
+        other = xso_model.IndexedXSOList(self.a_s)
+        self.a_s[0].foo = "a"
+        self.l.filtered(attrs={"foo": "a"})
+        other.filtered(attrs={"foo": "a"})
+
+        self.a_s[2].foo = "a"
+        self.assertSequenceEqual(
+            [self.a_s[0], self.a_s[2]],
+            self.l.filtered(attrs={"foo": "a"})
+        )
+        self.assertSequenceEqual(
+            [self.a_s[0], self.a_s[2]],
+            other.filtered(attrs={"foo": "a"})
+        )
+
+    def test_mutation_invalidates_indices(self):
+        new = self.ClsA()
+
+        def mutations():
+            yield lambda: self.l.append(new)
+            yield lambda: self.l.extend([new])
+            yield lambda: self.l.insert(0, new)
+            yield lambda: self.l.__setitem__(0, new)
+            yield lambda: self.l.__setitem__(slice(0, 1), [new])
+            yield lambda: self.l.__iadd__([new])
+
+        for mutation in mutations():
+            self.l[:] = self.a_s
+            self.assertSequenceEqual(
+                self.a_s,
+                self.l.filtered(type_=self.ClsA)
+            )
+            mutation()
+            self.assertIn(new, self.l.filtered(type_=self.ClsA))
+
+        self.l[:] = self.a_s
+        self.l.filtered(type_=self.ClsA)
+        self.l.remove(self.a_s[0])
+        self.assertSequenceEqual(self.a_s[1:], self.l.filtered())
+        self.l.pop()
+        del self.l[0]
+        self.assertSequenceEqual([], self.l.filtered(type_=self.ClsA))
+
+        self.l[:] = self.a_s
+        self.l.filtered(type_=self.ClsA)
+        self.l.reverse()
+        self.assertSequenceEqual(
+            list(reversed(self.a_s)),
+            self.l.filtered(type_=self.ClsA)
+        )
+        self.l *= 2
+        self.assertEqual(6, len(self.l.filtered(type_=self.ClsA)))
+        self.l.clear()
+        self.assertSequenceEqual([], self.l.filtered(type_=self.ClsA))
+
+    def test_invalidate(self):
+        items = [unittest.mock.Mock(["foo"]) for i in range(2)]
+        for item in items:
+            item.foo = "a"
+        l = xso_model.IndexedXSOList(items)
+
+        self.assertSequenceEqual(items, l.filtered(attrs={"foo": "a"}))
+        items[0].foo = "b"
+        self.assertSequenceEqual(items, l.filtered(attrs={"foo": "a"}))
+        l.invalidate()
+        self.assertSequenceEqual(items[1:], l.filtered(attrs={"foo": "a"}))
+
+    def test_copy(self):
+        self.l.filtered(type_=self.ClsA)
+
+        l = copy.copy(self.l)
+        self.assertIsInstance(l, xso_model.IndexedXSOList)
+        self.assertSequenceEqual(self.l, l)
+
+        l.append(self.ClsA())
+        self.assertEqual(4, len(l.filtered(type_=self.ClsA)))
+        self.assertEqual(3, len(self.l.filtered(type_=self.ClsA)))
+
+    def test_deepcopy_tracks_copied_elements(self):
+        self.a_s[0].foo = "a"
+        self.l.filtered(attrs={"foo": "a"})
+
+        l = copy.deepcopy(self.l)
+        self.assertIsInstance(l, xso_model.IndexedXSOList)
+        self.assertEqual(len(self.l), len(l))
+        self.assertSequenceEqual([l[0]], l.filtered(attrs={"foo": "a"}))
+
+        l[1].foo = "a"
+        self.assertSequenceEqual(
+            [l[0], l[1]],
+            l.filtered(attrs={"foo": "a"})
+        )
+        self.assertSequenceEqual(
+            [self.a_s[0]],
+            self.l.filtered(attrs={"foo": "a"})
+        )
+
+
 class Test_PropBase(unittest.TestCase):
     def setUp(self):
         self.default = object()
@@ -2888,6 +3147,20 @@ class TestChildList(XMLTestCase):
             obj.children
         )
 
+    def test_default_is_XSOList(self):
+        obj = self.Cls()
+        self.assertIs(type(obj.children), xso_model.XSOList)
+        self.assertIs(obj.children, obj.children)
+
+    def test_indexed_uses_IndexedXSOList(self):
+        class Cls(xso.XSO):
+            TAG = "foo"
+            children = xso.ChildList([self.ClsLeafA], indexed=True)
+
+        obj = Cls()
+        self.assertIsInstance(obj.children, xso_model.IndexedXSOList)
+        self.assertIs(obj.children, obj.children)
+
     def test_validate_contents_recurses_to_all_children(self):
         obj = self.Cls()
         children = [
@@ -410,6 +410,68 @@ class TestDateTimeType(unittest.TestCase):
             ))
         )
 
+    def test_parse_legacy_format_ignores_timezone(self):
+        t = xso.DateTime()
+        self.assertEqual(
+            t.parse("19690721T02:56:15+01:00"),
+            datetime(1969, 7, 21, 2, 56, 15, tzinfo=pytz.utc)
+        )
+
+    def test_parse_pads_fraction(self):
+        t = xso.DateTime()
+        self.assertEqual(
+            t.parse("2014-01-26T19:40:10.12Z"),
+            datetime(2014, 1, 26, 19, 40, 10, 120000, tzinfo=pytz.utc)
+        )
+
+    def test_parse_strips_whitespace(self):
+        t = xso.DateTime()
+        self.assertEqual(
+            t.parse(" 2014-01-26T19:40:10Z\n"),
+            datetime(2014, 1, 26, 19, 40, 10, tzinfo=pytz.utc)
+        )
+
+    def test_parse_lenient_fields(self):
+        t = xso.DateTime()
+        self.assertEqual(
+            t.parse("2014-1-2t3:4:5"),
+            datetime(2014, 1, 2, 3, 4, 5)
+        )
+
+    def test_parse_rejects_malformed(self):
+        t = xso.DateTime()
+        values = [
+            "",
+            "2014-01-26T19:40:10.1234567Z",
+            "2014-01-26T19:40:10Zfoo",
+            "2014-01-26T19:40:10z",
+            "2014-02-30T19:40:10Z",
+            "2014-01-26T24:40:10Z",
+            "2014-01-26T19:40:10+0100",
+            "14-01-26T19:40:10Z",
+        ]
+        for value in values:
+            with self.assertRaises(ValueError, msg=value):
+                t.parse(value)
+
+    def test_parse_reuses_offsets(self):
+        t = xso.DateTime()
+        self.assertEqual(
+            t.parse("2014-01-26T20:40:10+01:00"),
+            t.parse("2014-01-26T20:40:10+01:00"),
+        )
+        self.assertEqual(
+            t.parse("2014-01-26T18:40:10-01:00"),
+            datetime(2014, 1, 26, 19, 40, 10, tzinfo=pytz.utc)
+        )
+
+    def test_format_pads_year(self):
+        t = xso.DateTime()
+        self.assertEqual(
+            "0999-01-02T03:04:05",
+            t.format(datetime(999, 1, 2, 3, 4, 5))
+        )
+
     def test_require_datetime(self):
         t = xso.DateTime()
 
@@ -456,6 +518,19 @@ class TestDate(unittest.TestCase):
             "1776-07-04",
         )
 
+    def test_parse_rejects_malformed(self):
+        t = xso.Date()
+        values = [
+            "",
+            "1776-07-04 ",
+            "1776-07-04T00:00:00",
+            "1776-02-30",
+            "17760704",
+        ]
+        for value in values:
+            with self.assertRaises(ValueError, msg=value):
+                t.parse(value)
+
     def test_coerce_rejects_datetime(self):
         t = xso.Date()
         with self.assertRaisesRegex(
@@ -512,6 +587,25 @@ class TestTime(unittest.TestCase):
             time(19, 40, 10, 123456, tzinfo=pytz.utc),
             t.parse("20:40:10.123456+01:00"))
 
+    def test_parse_wraps_around_midnight(self):
+        t = xso.Time()
+        self.assertEqual(
+            time(23, 40, 10, tzinfo=pytz.utc),
+            t.parse("00:40:10+01:00"))
+
+    def test_parse_rejects_malformed(self):
+        t = xso.Time()
+        values = [
+            "",
+            "19:40",
+            "24:00:00",
+            "19:40:10.1234567",
+            "19:40:10Zfoo",
+        ]
+        for value in values:
+            with self.assertRaises(ValueError, msg=value):
+                t.parse(value)
+
     def test_format_timezoned(self):
         t = xso.Time()
         self.assertEqual(
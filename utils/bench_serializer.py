@@ -0,0 +1,85 @@
+#!/usr/bin/python3
+"""
+Micro-benchmark for the XML serializer.
+
+Serializes message stanzas with plain, escaping-heavy and base64-like bodies
+through :class:`aioxmpp.xml.XMPPXMLGenerator` and prints the time per stanza
+and the throughput.
+"""
+import argparse
+import base64
+import io
+import os
+import timeit
+
+import aioxmpp.stanza as stanza
+import aioxmpp.structs as structs
+import aioxmpp.xml as xml
+
+
+def make_message(body):
+    msg = stanza.Message(
+        "chat",
+        from_=structs.JID.fromstr("romeo@montague.lit/orchard"),
+        to=structs.JID.fromstr("juliet@capulet.lit/balcony"),
+        id_="benchmark",
+    )
+    msg.body[None] = body
+    return msg
+
+
+def bench(name, msg, number):
+    buf = io.BytesIO()
+    gen = xml.XMPPXMLGenerator(buf)
+    gen.startDocument()
+
+    def serialize():
+        buf.seek(0)
+        buf.truncate()
+        msg.unparse_to_sax(gen)
+
+    serialize()
+    size = len(buf.getvalue())
+
+    elapsed = min(timeit.repeat(serialize, number=number, repeat=5))
+    per_stanza = elapsed / number
+    print("{:<10s} {:>9d} B {:>10.2f} us/stanza {:>8.1f} MiB/s".format(
+        name,
+        size,
+        per_stanza * 1e6,
+        size / per_stanza / (1024*1024),
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument(
+        "-n", "--number",
+        type=int,
+        default=1000,
+        help="Number of stanzas to serialize per run (default: 1000)"
+    )
+    parser.add_argument(
+        "-s", "--size",
+        type=int,
+        default=16384,
+        help="Approximate body size in bytes (default: 16384)"
+    )
+    args = parser.parse_args()
+
+    plain = ("Lorem ipsum dolor sit amet. " *
+             (args.size // 28 + 1))[:args.size]
+    escaped = ("if a < b && b > c then 'x' " *
+               (args.size // 26 + 1))[:args.size]
+    b64 = base64.b64encode(os.urandom(args.size * 3 // 4)).decode("ascii")
+    unicode = ("Grüße, ☃ und 日本語. " *
+               (args.size // 40 + 1))[:args.size // 2]
+
+    bench("plain", make_message(plain), args.number)
+    bench("escaped", make_message(escaped), args.number)
+    bench("base64", make_message(b64), args.number)
+    bench("unicode", make_message(unicode), args.number)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/python3
+"""
+Micro-benchmark for the date and time types of :mod:`aioxmpp.xso`.
+
+Parses and formats :xep:`0082` timestamps as they occur for example in
+delayed delivery information of MUC history and prints the time per
+operation.
+"""
+import argparse
+import timeit
+
+from datetime import datetime, time
+
+import pytz
+
+import aioxmpp.xso as xso
+
+
+DATETIME_SAMPLES = [
+    ("utc", "2014-01-26T19:40:10Z"),
+    ("offset", "2014-01-26T20:40:10+01:00"),
+    ("fraction", "2014-01-26T19:40:10.123456Z"),
+    ("naive", "2014-01-26T19:40:10"),
+    ("legacy", "20140126T19:40:10"),
+]
+
+TIME_SAMPLES = [
+    ("utc", "19:40:10Z"),
+    ("offset", "20:40:10.1234+01:00"),
+]
+
+
+def report(name, number, elapsed):
+    print("{:<24s} {:>8.2f} us/op".format(name, elapsed / number * 1e6))
+
+
+def bench(name, func, number):
+    report(name, number, min(timeit.repeat(func, number=number, repeat=5)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument(
+        "-n", "--number",
+        type=int,
+        default=10000,
+        help="Number of operations per run (default: 10000)"
+    )
+    args = parser.parse_args()
+
+    datetime_type = xso.DateTime()
+    for name, value in DATETIME_SAMPLES:
+        bench("DateTime.parse " + name,
+              lambda: datetime_type.parse(value),
+              args.number)
+
+    time_type = xso.Time()
+    for name, value in TIME_SAMPLES:
+        bench("Time.parse " + name,
+              lambda: time_type.parse(value),
+              args.number)
+
+    date_type = xso.Date()
+    bench("Date.parse",
+          lambda: date_type.parse("2014-01-26"),
+          args.number)
+
+    dt = datetime(2014, 1, 26, 19, 40, 10, 123400, tzinfo=pytz.utc)
+    bench("DateTime.format",
+          lambda: datetime_type.format(dt),
+          args.number)
+
+    legacy_type = xso.DateTime(legacy=True)
+    bench("DateTime.format legacy",
+          lambda: legacy_type.format(dt),
+          args.number)
+
+    t = time(19, 40, 10, tzinfo=pytz.utc)
+    bench("Time.format",
+          lambda: time_type.format(t),
+          args.number)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+#!/usr/bin/python3
+"""
+Import a directory-based entity capabilities database (one XML file per hash)
+into a single-file :class:`aioxmpp.entitycaps.database.Database`.
+"""
+import argparse
+import pathlib
+
+import aioxmpp.entitycaps.database as caps_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument(
+        "source",
+        type=pathlib.Path,
+        help="Directory with the existing database"
+    )
+    parser.add_argument(
+        "dest",
+        help="Database file to import into (created if it does not exist)"
+    )
+    args = parser.parse_args()
+
+    db = caps_database.Database(args.dest, preload=False)
+    try:
+        count = db.import_directory(args.source)
+    finally:
+        db.close()
+
+    print("imported {} entries".format(count))
+
+
+if __name__ == "__main__":
+    main()